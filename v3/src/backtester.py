@@ -1,44 +1,53 @@
+import copy, hashlib, math
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Tuple, Optional
 import numpy as np
 import pandas as pd
 
-def split_symbol(sym: str):
-    if len(sym) >= 6:
-        return sym[:3].upper(), sym[3:6].upper()
-    return sym.upper(), "USD"
+from .trades import TradeBuffer, TradeResult, to_ns  # noqa: F401 (re-export)
+from .fingerprint import arrays_fingerprint
+from .connectors.base import CandleArrays, candle_arrays, data_version
+from .symbols import PIP_DECIMALS, SymbolRegistry, default_registry, split_symbol  # noqa: F401 (re-export)
 
-PIP_DECIMALS = {"USDJPY": 0.01}
-def pip_size(symbol: str, price_hint: float) -> float:
-    if symbol in PIP_DECIMALS:
-        return PIP_DECIMALS[symbol]
-    s = str(price_hint)
-    if len(s.split(".")[-1]) <= 2:
-        return 0.01
-    return 0.0001
+def pip_size(symbol: str, price_hint: Optional[float] = None) -> float:
+    """Pip size from the default symbol registry (symbols.py); `price_hint` is unused."""
+    return default_registry().pip_size(symbol)
 
 def default_contract_size(symbol: str) -> float:
-    base, quote = split_symbol(symbol)
-    if base in ("XAU","XAG"):
-        return 100.0
-    return 100_000.0
-
-@dataclass
-class TradeResult:
-    symbol: str
-    side: str
+    return default_registry().contract_size(symbol)
+
+@dataclass(slots=True)
+class PathResult:
+    """Outcome of one signal that does not depend on equity or sizing."""
+    broker_symbol: str
     entry_time: datetime
     entry_price: float
+    ps: float
+    cs: float
+    hit: str
     exit_time: datetime
     exit_price: float
-    hit: str
-    lot: float
     pnl_pips: float
-    pnl_ccy: float
-    commission: float
-    margin_used: float
-    equity_after: float
+    hits: list       # [(label, np.datetime64, px)] sorted by time
+    last_bar: int    # ns of the last bar evaluated
+    final: bool      # later bars can no longer change the exit
+
+_WORKER = {}
+
+def _init_path_worker(bt, until):
+    _WORKER["bt"] = bt; _WORKER["until"] = until
+    if bt.path_cache is not None:
+        bt.path_cache.journal = []  # the parent keeps the cache index (sim_cache.PathCache.apply)
+
+def _path_worker(sig):
+    bt = _WORKER["bt"]
+    pr = bt._path(sig, _WORKER["until"])
+    if bt.path_cache is None:
+        return pr, ()
+    events, bt.path_cache.journal = bt.path_cache.journal, []
+    return pr, events
 
 class Backtester:
     def __init__(self, provider, default_lot: float, deposit: float, leverage: int,
@@ -48,7 +57,8 @@ class Backtester:
                  tp_weights: Optional[List[float]] = None, risk_pct: Optional[float] = None,
                  spread_pips: Optional[float] = None, spread_map: Optional[Dict[str,float]] = None,
                  slippage_pips: float = 0.0, commission_per_lot: float = 0.0,
-                 time_stop_min: Optional[int] = None, timeframe: str = "M1"):
+                 time_stop_min: Optional[int] = None, timeframe: str = "M1", path_cache=None,
+                 symbols: Optional[SymbolRegistry] = None):
         self.provider = provider
         self.default_lot = default_lot
         self.deposit = deposit
@@ -66,128 +76,412 @@ class Backtester:
         self.commission_per_lot = commission_per_lot
         self.time_stop_min = time_stop_min
         self.timeframe = timeframe
+        self.path_cache = path_cache  # sim_cache.PathCache; does not change results
+        self.symbols = symbols if symbols is not None else default_registry()  # pip / contract specs
 
-    def run(self, signals, since: datetime, until: datetime):
-        trades: List[TradeResult] = []
+    def params(self) -> Dict:
+        """JSON-friendly run configuration (for export metadata and cache keys)."""
+        return {
+            "default_lot": self.default_lot, "deposit": self.deposit, "leverage": self.leverage,
+            "account_ccy": self.account_ccy, "symbol_map": self.symbol_map, "contract_map": self.contract_map,
+            "conv_map": self.conv_map, "exit_rule": self.exit_rule, "tp_weights": self.tp_weights,
+            "risk_pct": self.risk_pct, "spread_pips": self.spread_pips, "spread_map": self.spread_map,
+            "slippage_pips": self.slippage_pips, "commission_per_lot": self.commission_per_lot,
+            "time_stop_min": self.time_stop_min, "timeframe": self.timeframe,
+            **({"symbol_specs": self.symbols.fingerprint()} if len(self.symbols) else {}),
+        }
+
+    def run(self, signals, since: datetime, until: datetime, sink=None, batch_size: int = 10_000,
+            workers: int = 1, prefetch: Optional[bool] = None, fingerprint: bool = False):
+        """Simulate signals in [since, until]. If `sink` is given (see export.TradeLogWriter),
+        trades are streamed to it every `batch_size` trades and once more at the end.
+
+        Every candle window the run needs is fetched first in one candles_many batch (see
+        data_plan); prefetch=None does this unless the provider already holds its data in memory.
+        Phase 1 simulates each signal's path (hit times, pip P&L), which does not depend on
+        equity, across `workers` processes (the provider must be picklable). Phase 2 applies
+        sizing, conversion, commission and equity in signal order. The two run in chunks of
+        `batch_size` paths, each booked and written before the next, so memory stays bounded
+        and a failed run keeps what it already flushed. With fingerprint=True
+        the report's data_fingerprint hashes the candles read (see data_fingerprint); a sink
+        with annotate() gets it too, before the first batch."""
+        sigs = [s for s in signals if since <= s.dt <= until]
+        trades = TradeBuffer()
+        flushed = 0
         equity = self.deposit
+        with self.prefetched(sigs, since, until, enabled=prefetch):
+            data_fp = self.data_fingerprint(sigs, since, until) if fingerprint else None
+            if data_fp is not None and hasattr(sink, "annotate"):
+                sink.annotate(data_fingerprint=data_fp)  # into the log's schema, before any batch
+            batch = []
+            for item in self._iter_paths(sigs, until, workers, chunk=batch_size):
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    equity = self._book_many(trades, batch, equity); batch = []
+                    if sink is not None:
+                        sink.write(trades, flushed, len(trades)); flushed = len(trades)
+            equity = self._book_many(trades, batch, equity)
+        if sink is not None:
+            sink.write(trades, flushed, len(trades))
+        trades_df = trades.to_frame()
+        summary = self._summarize(trades_df, start=since, end=until, start_equity=self.deposit)
+        return {"trades": trades_df, "summary": summary, "trade_buffer": trades, "data_fingerprint": data_fp}
+
+    def data_fingerprint(self, signals, since: datetime, until: datetime) -> str:
+        """Hash of the candles a run over `signals` reads: every data_plan window (traded symbols
+        and conversion pairs), each hashed once rather than once per signal window."""
+        h = hashlib.blake2b(digest_size=16)
+        for sym, start, end, tf in sorted(self.data_plan(signals, since, until)):
+            try:
+                ca = candle_arrays(self.provider, sym, start, end, timeframe=tf)
+            except Exception:
+                ca = None  # the run sees a missing pair the same way (conversion falls back to 1.0)
+            h.update(f"{sym}|{tf}|{arrays_fingerprint(ca)}\n".encode())
+        return h.hexdigest()
+
+    def data_plan(self, signals, since: datetime, until: datetime) -> List[Tuple[str, datetime, datetime, str]]:
+        """Every candle window a run over `signals` reads, merged to one request per symbol:
+        each traded symbol from its first signal to `until`, and every conversion pair the
+        money pass may quote from two days before `since` (the _mid_at lookback) to `until`."""
+        spans: Dict[str, Tuple[datetime, datetime]] = {}
+        quotes = set()
         for sig in signals:
             if not (since <= sig.dt <= until):
                 continue
-            broker_symbol = self.symbol_map.get(sig.symbol, sig.symbol)
-            df = self.provider.candles(broker_symbol, sig.dt, until, timeframe=self.timeframe)
-            if df is None or df.empty:
-                continue
-            first = df[df["time"] >= sig.dt].head(1)
-            if first.empty:
-                continue
-
-            price_hint = float(first.iloc[0].get("open", first.iloc[0].get("bid_open", 0.0)))
-            ps = pip_size(sig.symbol, price_hint)
-            cs = self.contract_map.get(sig.symbol, default_contract_size(sig.symbol))
-
-            entry_time = pd.to_datetime(first.iloc[0]["time"]).to_pydatetime()
-            entry_bid, entry_ask = self._row_bid_ask(first.iloc[0], ps, sig.symbol)
-            slip = self.slippage_pips * ps
-            entry_price = (entry_ask + slip) if sig.side == "BUY" else (entry_bid - slip)
-
-            lot = self._compute_lot(sig, entry_price, ps, equity, cs)
-
-            hit_label, exit_time, exit_price, pnl_pips = self._simulate_path(sig, df[df["time"] >= entry_time], ps, entry_price)
-
-            pnl_ccy = self._pnl_account(sig, pnl_pips, lot, ps, cs, when=exit_time)
-            commission = self.commission_per_lot * lot
-            pnl_net = pnl_ccy - commission
-
-            margin_used = self._margin(sig, entry_price, lot, cs)
-            equity += pnl_net
-
-            trades.append(TradeResult(
-                symbol=broker_symbol, side=sig.side, entry_time=entry_time, entry_price=entry_price,
-                exit_time=exit_time, exit_price=exit_price, hit=hit_label, lot=float(f"{lot:.3f}"),
-                pnl_pips=pnl_pips, pnl_ccy=pnl_net, commission=commission, margin_used=margin_used,
-                equity_after=equity
-            ))
-        trades_df = pd.DataFrame([t.__dict__ for t in trades])
-        summary = self._summarize(trades_df, start=since, end=until, start_equity=self.deposit)
-        return {"trades": trades_df, "summary": summary}
+            sym = self.symbol_map.get(sig.symbol, sig.symbol)
+            spans[sym] = (min(spans[sym][0], sig.dt), until) if sym in spans else (sig.dt, until)
+            quotes.add(self.symbols.currencies(sig.symbol)[1])
+        lookback = since - timedelta(days=2)
+        for quote in sorted(quotes):
+            for sym in self._conversion_symbols(quote, self.account_ccy):
+                spans[sym] = (min(spans[sym][0], lookback) if sym in spans else lookback, until)
+        return [(sym, a, b, self.timeframe) for sym, (a, b) in spans.items()]
+
+    @contextmanager
+    def prefetched(self, signals, since: datetime, until: datetime, enabled: Optional[bool] = None,
+                   max_workers: int = 8):
+        """Serve the data plan from one candles_many batch for the duration of the block;
+        windows outside it still go to the provider."""
+        if enabled is None:
+            enabled = not getattr(self.provider, "in_memory", False)
+        plan = self.data_plan(signals, since, until) if enabled else []
+        if not plan:
+            yield self
+            return
+        from .connectors.preloaded import PreloadedProvider
+        provider = self.provider
+        store = PreloadedProvider(provider, [], since, until, timeframe=self.timeframe)
+        store.prefetch(plan, max_workers=max_workers)
+        self.provider = store
+        try:
+            yield self
+        finally:
+            self.provider = provider
+
+    def _paths(self, sigs, until: datetime, workers: int = 1) -> List[tuple]:
+        """Phase 1: [(sig, PathResult)] for signals with data, in signal order."""
+        return list(self._iter_paths(sigs, until, workers))
+
+    def _iter_paths(self, sigs, until: datetime, workers: int = 1, chunk: Optional[int] = None):
+        """_paths as a generator. With workers > 1 the pool keeps simulating while the caller
+        consumes; results arrive in order, at most `chunk` signals per task."""
+        if workers <= 1 or len(sigs) < 2:
+            for sig in sigs:
+                pr = self._path(sig, until)
+                if pr is not None:
+                    yield sig, pr
+            return
+        from concurrent.futures import ProcessPoolExecutor
+        size = max(1, min(-(-len(sigs) // (workers * 4)), chunk or len(sigs)))
+        with self._for_workers() as bt, ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_path_worker, initargs=(bt, until)) as ex:
+            for sig, (pr, events) in zip(sigs, ex.map(_path_worker, sigs, chunksize=size)):
+                if events:
+                    self.path_cache.apply(events)
+                if pr is not None:
+                    yield sig, pr
+
+    @contextmanager
+    def _for_workers(self):
+        """The Backtester pool workers are initialised with. A prefetched store would be pickled
+        into every worker with all its candles; its histories are published to shared memory
+        instead (connectors.shm) and workers read views, falling back to the original provider."""
+        from .connectors.preloaded import PreloadedProvider
+        store = self.provider
+        if not isinstance(store, PreloadedProvider):
+            yield self
+            return
+        from .connectors.shm import SharedCandleServer
+        server = SharedCandleServer(store.provider)
+        try:
+            for sym, tf, ca, span in store.histories():
+                server.publish_arrays(sym, tf, ca, span)
+            bt = copy.copy(self)
+            bt.provider = server.provider_view()
+            yield bt
+        finally:
+            server.close()
+
+    def _book_many(self, trades: TradeBuffer, paths: List[tuple], equity: float) -> float:
+        """Phase 2 over a run of (sig, PathResult): same arithmetic as _book, trade by trade,
+        vectorised where lot does not depend on equity. Returns the new equity."""
+        n = len(paths)
+        if n == 0:
+            return equity
+        prs = [pr for _, pr in paths]
+        rates = {}
+        def rate(quote, when):
+            k = (quote, when)
+            if k not in rates:
+                rates[k] = self._conversion_rate(quote, self.account_ccy, when=when)
+            return rates[k]
+        quotes = [self.symbols.currencies(sig.symbol)[1] for sig, _ in paths]
+        rate_in = np.array([rate(q, pr.entry_time) for q, pr in zip(quotes, prs)])
+        rate_out = np.array([rate(q, self._exit_when(pr)) for q, pr in zip(quotes, prs)])
+        ps = np.array([pr.ps for pr in prs]); cs = np.array([pr.cs for pr in prs])
+        entry = np.array([pr.entry_price for pr in prs])
+        pnl_pips = np.array([pr.pnl_pips for pr in prs], dtype=float)
+        ppl_out = cs * ps * rate_out
 
-    def _compute_lot(self, sig, entry: float, ps: float, equity: float, cs: float) -> float:
+        if not self.risk_pct:
+            lot = np.full(n, float(self.default_lot))
+            pnl_net = pnl_pips * ppl_out * lot - self.commission_per_lot * lot
+            equity_after = np.cumsum(np.concatenate(([equity], pnl_net)))[1:]
+        else:
+            dist = np.abs(entry - np.array([sig.sl for sig, _ in paths])) / ps
+            denom = dist * ((cs * ps) * rate_in)
+            rp = self.risk_pct / 100.0
+            lot = np.empty(n); pnl_net = np.empty(n); equity_after = np.empty(n)
+            for i in range(n):
+                if dist[i] <= 0:
+                    l = self.default_lot
+                else:
+                    l = max(0.01, (equity * rp) / denom[i])
+                p = float(pnl_pips[i] * ppl_out[i] * l) - self.commission_per_lot * l
+                equity += p
+                lot[i] = l; pnl_net[i] = p; equity_after[i] = equity
+        commission = self.commission_per_lot * lot
+        margin = (cs * lot * entry) * rate_in / self.leverage
+
+        aware = any(getattr(pr.entry_time, "tzinfo", None) is not None for pr in prs)
+        trades.extend({
+            "symbol": np.array([pr.broker_symbol for pr in prs], dtype=object),
+            "side": np.array([sig.side for sig, _ in paths], dtype=object),
+            "entry_time": np.array([to_ns(pr.entry_time) for pr in prs], dtype=np.int64), "entry_price": entry,
+            "exit_time": np.array([to_ns(pr.exit_time) for pr in prs], dtype=np.int64),
+            "exit_price": np.array([pr.exit_price for pr in prs], dtype=float),
+            "hit": np.array([pr.hit for pr in prs], dtype=object), "lot": lot, "pnl_pips": pnl_pips,
+            "pnl_ccy": pnl_net, "commission": commission, "margin_used": margin, "equity_after": equity_after,
+        }, tz="UTC" if aware else None)
+        return float(equity_after[-1])
+
+    def _arrays(self, symbol: str, start: datetime, end: datetime) -> Optional[CandleArrays]:
+        """Candles as columnar arrays (connectors.base.CandleArrays); frame-only providers are
+        converted once here, so nothing below touches pandas rows."""
+        return candle_arrays(self.provider, symbol, start, end, timeframe=self.timeframe)
+
+    def _path(self, sig, until: datetime) -> Optional["PathResult"]:
+        """Equity-independent part of a trade: entry fill, exit and pip P&L."""
+        broker_symbol = self.symbol_map.get(sig.symbol, sig.symbol)
+        ca = self._arrays(broker_symbol, sig.dt, until)
+        if ca is None or not len(ca):
+            return None
+        k = ca.search(to_ns(sig.dt))
+        if k >= len(ca):
+            return None
+        if self.path_cache is not None:
+            key = self.path_cache.key(self, sig, data_version(self.provider, broker_symbol, self.timeframe))
+            pr = self.path_cache.get(key, lambda pr: self._bars_read(sig, pr, ca))
+            if pr is not None:
+                # contract size only feeds the money pass, so it is not part of the key
+                pr.cs = self.contract_map.get(sig.symbol, self.symbols.contract_size(sig.symbol))
+                if not pr.final and pr.last_bar < int(ca.time[-1]):
+                    pr = self._extend_path(sig, pr, until)
+                    self.path_cache.put(key, pr, self._bars_read(sig, pr, ca))
+                return pr
+
+        ps = self.symbols.pip_size(sig.symbol)
+        cs = self.contract_map.get(sig.symbol, self.symbols.contract_size(sig.symbol))
+
+        entry_time = ca.datetime_at(k)
+        entry_bid, entry_ask = self._bid_ask_at(ca, k, ps, sig.symbol)
+        slip = self.slippage_pips * ps
+        entry_price = (entry_ask + slip) if sig.side == "BUY" else (entry_bid - slip)
+
+        window = ca.slice(k)
+        hits = self._path_hits(sig, window, ps, entry_time)
+        hit_label, exit_time, exit_price, pnl_pips = self._resolve_exit(sig, hits, window, entry_price, ps)
+        pr = PathResult(broker_symbol, entry_time, entry_price, ps, cs, hit_label, exit_time, exit_price,
+                        pnl_pips, hits, int(window.time[-1]), self._exit_final(sig, hits))
+        if self.path_cache is not None:
+            self.path_cache.put(key, pr, self._bars_read(sig, pr, ca))
+        return pr
+
+    def _bars_read(self, sig, pr: "PathResult", ca: CandleArrays) -> Optional[str]:
+        """Digest of the bars in `ca` that `pr` depends on: from the signal through the bar that
+        settled it (its last bar while unsettled). None if `ca` ends before that bar."""
+        through = self._settled_at(sig, pr) if pr.final else pr.last_bar
+        if not len(ca) or through > int(ca.time[-1]):
+            return None
+        return arrays_fingerprint(ca.between(to_ns(sig.dt), through))
+
+    def _settled_at(self, sig, pr: "PathResult") -> int:
+        """ns of the first hit after which _exit_final holds; bars after it cannot change the exit."""
+        times = [int(np.datetime64(t, "ns").astype(np.int64)) for _, t, _ in pr.hits]
+        for t in times:
+            if self._exit_final(sig, [h for h, ht in zip(pr.hits, times) if ht <= t]):
+                return t
+        return pr.last_bar
+
+    def _extend_path(self, sig, pr: "PathResult", until: datetime) -> "PathResult":
+        """Continue an unsettled path over bars after pr.last_bar; gives the same result as
+        re-simulating from the entry bar, while only touching the new bars."""
+        after = pd.Timestamp(pr.last_bar, unit="ns", tz="UTC").to_pydatetime()
+        ca = self._arrays(pr.broker_symbol, after, until)
+        if ca is None or not len(ca):
+            return pr
+        window = ca.slice(ca.search(pr.last_bar, side="right"))
+        if not len(window):
+            return pr
+        new_hits = self._path_hits(sig, window, pr.ps, pr.entry_time, skip={h[0] for h in pr.hits})
+        hits = sorted(pr.hits + new_hits, key=lambda x: x[1])
+        hit_label, exit_time, exit_price, pnl_pips = self._resolve_exit(sig, hits, window, pr.entry_price, pr.ps)
+        return PathResult(pr.broker_symbol, pr.entry_time, pr.entry_price, pr.ps, pr.cs, hit_label, exit_time,
+                          exit_price, pnl_pips, hits, int(window.time[-1]), self._exit_final(sig, hits))
+
+    def _book(self, trades: TradeBuffer, sig, pr: "PathResult", equity: float) -> float:
+        """Money-management pass for one trade: size, convert, charge; returns new equity."""
+        lot = self._compute_lot(sig, pr.entry_price, pr.ps, equity, pr.cs, when=pr.entry_time)
+
+        pnl_ccy = self._pnl_account(sig, pr.pnl_pips, lot, pr.ps, pr.cs, when=self._exit_when(pr))
+        commission = self.commission_per_lot * lot
+        pnl_net = pnl_ccy - commission
+
+        margin_used = self._margin(sig, pr.entry_price, lot, pr.cs, when=pr.entry_time)
+        equity += pnl_net
+
+        trades.append(pr.broker_symbol, sig.side, pr.entry_time, pr.entry_price, pr.exit_time, pr.exit_price,
+                      pr.hit, lot, pr.pnl_pips, pnl_net, commission, margin_used, equity)
+        return equity
+
+    @staticmethod
+    def _exit_when(pr: "PathResult"):
+        """Exit time on the entry's clock: hit times come from naive datetime64 bars, and an
+        aware provider cannot be queried with them (the rate silently fell back to 1.0)."""
+        t = pr.exit_time
+        if getattr(pr.entry_time, "tzinfo", None) is not None and getattr(t, "tzinfo", None) is None:
+            return t.replace(tzinfo=timezone.utc)
+        return t
+
+    def _compute_lot(self, sig, entry: float, ps: float, equity: float, cs: float,
+                     when: Optional[datetime] = None, rate: Optional[float] = None) -> float:
         if not self.risk_pct:
             return self.default_lot
         risk_ccy = equity * (self.risk_pct / 100.0)
         dist_pips = abs(entry - sig.sl) / ps
         if dist_pips <= 0:
             return self.default_lot
-        base, quote = split_symbol(sig.symbol)
+        base, quote = self.symbols.currencies(sig.symbol)
         pip_per_lot_quote = cs * ps  # e.g., 100k * 0.0001 = 10 quote-ccy
-        rate = self._conversion_rate(quote, self.account_ccy, when=None)
+        if rate is None:
+            rate = self._conversion_rate(quote, self.account_ccy, when=when)
         pip_per_lot_acct = pip_per_lot_quote * rate
         lot = risk_ccy / (dist_pips * pip_per_lot_acct)
         return max(0.01, lot)
 
-    def _row_bid_ask(self, row, ps: float, symbol: str):
-        cols = set(row.index) if hasattr(row, "index") else set()
-        if {"bid_open","ask_open"} <= cols:
-            return float(row["bid_open"]), float(row["ask_open"])
-        mid = float(row.get("open", row.get("close", 0.0)))
-        sp = row.get("spread_pips", np.nan)
-        if pd.isna(sp):
+    def _bid_ask_at(self, ca: CandleArrays, k: int, ps: float, symbol: str):
+        if ca.bid_open is not None and ca.ask_open is not None:
+            return ca.value("bid_open", k), ca.value("ask_open", k)
+        mid = ca.value("open", k) if ca.open is not None else (ca.value("close", k) if ca.close is not None else 0.0)
+        sp = float(ca.spread_pips[k]) if ca.spread_pips is not None else np.nan
+        if np.isnan(sp):
             sp = self.spread_map.get(symbol, self.spread_pips or 0.0)
         half = (sp * ps) / 2.0
         return mid - half, mid + half
 
-    def _simulate_path(self, sig, df: pd.DataFrame, ps: float, entry_price: float):
-        use_ba = {"bid_high","bid_low","ask_high","ask_low"} <= set(df.columns)
-        if not use_ba:
-            sp_series = df.get("spread_pips", pd.Series([self.spread_map.get(sig.symbol, self.spread_pips or 0.0)]*len(df)))
-            bid_high = df["high"] - (sp_series.values * ps)/2.0
-            bid_low  = df["low"]  - (sp_series.values * ps)/2.0
-            ask_high = df["high"] + (sp_series.values * ps)/2.0
-            ask_low  = df["low"]  + (sp_series.values * ps)/2.0
-            bid_close = df["close"] - (sp_series.values * ps)/2.0
-            ask_close = df["close"] + (sp_series.values * ps)/2.0
+    def _simulate_path(self, sig, df, ps: float, entry_price: float):
+        ca = df if isinstance(df, CandleArrays) else CandleArrays.from_frame(df)
+        hits = self._path_hits(sig, ca, ps, ca.datetime_at(0))
+        return self._resolve_exit(sig, hits, ca, entry_price, ps)
+
+    @staticmethod
+    def _touch_space(ca: CandleArrays, high: str, low: str, half):
+        """(hi, lo, up, dn) for touch tests `hi >= up(level)` / `lo <= dn(level)`: compact
+        (integer) prices stay integers whenever the levels have an exact form there."""
+        # a fractional half-spread has no exact integer form
+        if ca.digits is not None and (half is None or not np.any(half)):
+            scale = 10 ** ca.digits
+            # x >= L  <=>  x_int >= ceil(L * scale); tolerance absorbs the float product
+            return (getattr(ca, high), getattr(ca, low),
+                    lambda x: math.ceil(x * scale - 1e-6), lambda x: math.floor(x * scale + 1e-6))
+        hi, lo = ca.price(high), ca.price(low)
+        if half is not None:
+            hi = hi + half; lo = lo - half
+        return hi, lo, (lambda x: x), (lambda x: x)
+
+    def _path_hits(self, sig, ca: CandleArrays, ps: float, entry_time, skip=()):
+        """First bar touching each TP / SL / time stop, sorted by time. Labels in `skip`
+        were already hit on earlier bars and are not searched again."""
+        if ca.has_bid_ask:
+            half = None
+            high, low = "ask_high", "bid_low"
+            ask_close = "ask_close" if ca.ask_close is not None else "close"
+            bid_close = "bid_close" if ca.bid_close is not None else "close"
+            ask_at = lambda j: ca.value(ask_close, j)
+            bid_at = lambda j: ca.value(bid_close, j)
         else:
-            bid_high = df["bid_high"].astype(float).values
-            bid_low  = df["bid_low"].astype(float).values
-            ask_high = df["ask_high"].astype(float).values
-            ask_low  = df["ask_low"].astype(float).values
-            bid_close = df.get("bid_close", df["close"]).astype(float).values
-            ask_close = df.get("ask_close", df["close"]).astype(float).values
-
-        times = pd.to_datetime(df["time"]).values
+            sp = ca.spread_pips if ca.spread_pips is not None else \
+                np.full(len(ca), self.spread_map.get(sig.symbol, self.spread_pips or 0.0))
+            half = (sp * ps) / 2.0
+            high, low = "high", "low"
+            bid_close = "close"
+            ask_at = lambda j: ca.value("close", j) + half[j]
+            bid_at = lambda j: ca.value("close", j) - half[j]
+
+        hi, lo, up, dn = self._touch_space(ca, high, low, half)
+        times = ca.time.view("datetime64[ns]")
         tps = sig.tps; sl = sig.sl
         hits = []
 
+        def first(mask):
+            j = int(mask.argmax()) if len(mask) else 0
+            return j if len(mask) and mask[j] else None
+
         if sig.side == "BUY":
             for i, tp in enumerate(tps, start=1):
-                idx = np.where(ask_high >= tp)[0]
-                if len(idx):
-                    j = idx[0]; hits.append((f"TP{i}", times[j], float(ask_close[j])))
-            idx_sl = np.where(bid_low <= sl)[0]
-            if len(idx_sl):
-                j = idx_sl[0]; hits.append(("SL", times[j], float(bid_close[j])))
+                if f"TP{i}" in skip: continue
+                j = first(hi >= up(tp))
+                if j is not None:
+                    hits.append((f"TP{i}", times[j], float(ask_at(j))))
+            j = first(lo <= dn(sl)) if "SL" not in skip else None
+            if j is not None:
+                hits.append(("SL", times[j], float(bid_at(j))))
         else:
             for i, tp in enumerate(tps, start=1):
-                idx = np.where(bid_low <= tp)[0]
-                if len(idx):
-                    j = idx[0]; hits.append((f"TP{i}", times[j], float(bid_close[j])))
-            idx_sl = np.where(ask_high >= sl)[0]
-            if len(idx_sl):
-                j = idx_sl[0]; hits.append(("SL", times[j], float(ask_close[j])))
-
-        if self.time_stop_min:
-            limit_time = pd.to_datetime(df["time"].iloc[0]) + pd.Timedelta(minutes=self.time_stop_min)
-            ts_idx = np.where(times >= np.datetime64(limit_time))[0]
-            if len(ts_idx):
-                j = ts_idx[0]; hits.append(("TIME", times[j], float(df.iloc[j]["close"])))
+                if f"TP{i}" in skip: continue
+                j = first(lo <= dn(tp))
+                if j is not None:
+                    hits.append((f"TP{i}", times[j], float(bid_at(j))))
+            j = first(hi >= up(sl)) if "SL" not in skip else None
+            if j is not None:
+                hits.append(("SL", times[j], float(ask_at(j))))
+
+        if self.time_stop_min and "TIME" not in skip:
+            limit = to_ns(entry_time) + int(round(self.time_stop_min * 60 * 1_000_000_000))
+            j = ca.search(limit)
+            if j < len(ca):
+                hits.append(("TIME", times[j], ca.value("close" if ca.close is not None else bid_close, j)))
+
+        hits.sort(key=lambda x: x[1])
+        return hits
 
+    def _resolve_exit(self, sig, hits, ca: Optional[CandleArrays], entry_price: float, ps: float):
+        """`ca` (the evaluated bars) is only read when nothing was hit."""
         if not hits:
-            last = df.tail(1).iloc[0]
-            last_px = float((last.get("ask_close") if sig.side=="BUY" else last.get("bid_close")) or last["close"])
+            side_close = "ask_close" if sig.side=="BUY" else "bid_close"
+            last_px = ca.value(side_close if getattr(ca, side_close) is not None else "close", -1)
             pnl_pips = (1 if sig.side=="BUY" else -1) * (last_px - entry_price) / ps
-            return ("EOD", pd.to_datetime(last["time"]).to_pydatetime(), last_px, float(pnl_pips))
-
-        hits.sort(key=lambda x: x[1])
+            return ("EOD", ca.datetime_at(-1), last_px, float(pnl_pips))
 
         if self.exit_rule == "first_target":
             label, t, px = hits[0]
@@ -199,12 +493,13 @@ class Backtester:
             pnl_pips = (1 if sig.side=="BUY" else -1) * (px - entry_price) / ps
             return (label, pd.to_datetime(t).to_pydatetime(), px, float(pnl_pips))
 
-        last_tp = None
+        reached = []  # TPs hit before the first stop; the stop closes the remainder
         for label, t, px in hits:
             if label.startswith("TP"):
-                last_tp = (label, t, px)
+                reached.append((label, t, px))
             else:
                 break
+        last_tp = reached[-1] if reached else None
 
         if last_tp is None:
             label, t, px = hits[0]
@@ -216,8 +511,7 @@ class Backtester:
             pnl_pips = (1 if sig.side=="BUY" else -1) * (px - entry_price) / ps
             return (label, pd.to_datetime(t).to_pydatetime(), px, float(pnl_pips))
 
-        reached = [h for h in hits if h[0].startswith("TP")]
-        if self.exit_rule == "multi_tp_scaled" and reached:
+        if self.exit_rule == "multi_tp_scaled":
             weights = self.tp_weights or [1.0/len(reached)]*len(reached)
             weights = weights[:len(reached)]
             s = sum(weights) or 1.0
@@ -231,6 +525,24 @@ class Backtester:
         pnl_pips = (1 if sig.side=="BUY" else -1) * (px - entry_price) / ps
         return (label, pd.to_datetime(t).to_pydatetime(), px, float(pnl_pips))
 
+    def _exit_final(self, sig, hits) -> bool:
+        """True once bars after the last evaluated one can no longer change the exit."""
+        if not hits:
+            return False
+        labels = {h[0] for h in hits}
+        all_tps = all(f"TP{i}" in labels for i in range(1, len(sig.tps) + 1))
+        if self.exit_rule == "first_target" or hits[0][0] == "SL" or all_tps:
+            return True
+        return any(not h[0].startswith("TP") for h in hits)
+
+    def _conversion_symbols(self, from_ccy: str, to_ccy: str) -> List[str]:
+        """Symbols _conversion_rate may read, in the order it tries them."""
+        from_ccy = from_ccy.upper(); to_ccy = to_ccy.upper()
+        if from_ccy == to_ccy:
+            return []
+        out = [self.conv_map[f"{from_ccy}->{to_ccy}"]] if f"{from_ccy}->{to_ccy}" in self.conv_map else []
+        return list(dict.fromkeys(out + [f"{from_ccy}{to_ccy}", f"{to_ccy}{from_ccy}"]))
+
     def _conversion_rate(self, from_ccy: str, to_ccy: str, when: Optional[datetime]) -> float:
         from_ccy = from_ccy.upper(); to_ccy = to_ccy.upper()
         if from_ccy == to_ccy:
@@ -255,29 +567,33 @@ class Backtester:
         try:
             end = when or datetime.now(timezone.utc)
             start = end - timedelta(days=2)
-            df = self.provider.candles(symbol, start, end, timeframe=self.timeframe)
-            if df is None or df.empty:
+            ca = self._arrays(symbol, start, end)
+            if ca is None or not len(ca):
                 return None
-            row = df.tail(1).iloc[0]
-            if "close" in df.columns:
-                return float(row["close"])
-            if "bid_close" in df.columns and "ask_close" in df.columns:
-                return float((row["bid_close"] + row["ask_close"]) / 2.0)
+            if ca.close is not None:
+                return ca.value("close", -1)
+            if ca.bid_close is not None and ca.ask_close is not None:
+                return float((ca.value("bid_close", -1) + ca.value("ask_close", -1)) / 2.0)
         except Exception:
             return None
         return None
 
-    def _pnl_account(self, sig, pnl_pips: float, lot: float, ps: float, cs: float, when: Optional[datetime]) -> float:
-        base, quote = split_symbol(sig.symbol)
+    def _pnl_account(self, sig, pnl_pips: float, lot: float, ps: float, cs: float, when: Optional[datetime],
+                     rate: Optional[float] = None) -> float:
+        """`rate` (quote -> account currency) is looked up at `when` unless the caller has one."""
+        base, quote = self.symbols.currencies(sig.symbol)
         pip_per_lot_quote = cs * ps
-        rate = self._conversion_rate(quote, self.account_ccy, when)
+        if rate is None:
+            rate = self._conversion_rate(quote, self.account_ccy, when)
         pip_per_lot_acct = pip_per_lot_quote * rate
         return float(pnl_pips * pip_per_lot_acct * lot)
 
-    def _margin(self, sig, price: float, lot: float, cs: float) -> float:
-        base, quote = split_symbol(sig.symbol)
+    def _margin(self, sig, price: float, lot: float, cs: float, when: Optional[datetime] = None,
+                rate: Optional[float] = None) -> float:
+        base, quote = self.symbols.currencies(sig.symbol)
         notional_quote = cs * lot * price
-        rate = self._conversion_rate(quote, self.account_ccy, when=None)
+        if rate is None:
+            rate = self._conversion_rate(quote, self.account_ccy, when=when)
         notional_acct = notional_quote * rate
         return float(notional_acct / self.leverage)
 
@@ -0,0 +1,30 @@
+# src/connectors/__init__.py
+# Exports resolve lazily: importing the package never pulls in pandas or a broker SDK,
+# only the connector actually used by the chosen --data-source.
+from importlib import import_module
+
+_EXPORTS = {
+    "CSVConnector": ".csv_provider",
+    "CachedProvider": ".cache_provider",
+    "SpreadAnnotatedProvider": ".spread_provider",
+    "SharedCandleServer": ".shm",
+    "SharedCandleProvider": ".shm",
+    "CTraderProvider": ".ctrader",
+    "VantageFIXProvider": ".fix",
+    "AsyncFIXProvider": ".fix",
+    "AsyncCTraderProvider": ".ctrader",
+    "AsyncConnector": ".aio",
+    "AsyncAdapter": ".aio",
+    "LoopBridge": ".aio",
+    "MT5Provider": ".mt5",
+    "RecordingConnector": ".cassette",
+    "CassetteConnector": ".cassette",
+    "WriteAheadLog": ".wal",
+}
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    mod = _EXPORTS.get(name)
+    if mod is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(mod, __name__), name)
@@ -0,0 +1,180 @@
+"""
+Asyncio-native connector layer: one event loop for Telegram, market data and simulation.
+
+AsyncConnector is the async counterpart of base.Connector (`await candle_arrays(...)`,
+`async for tick in stream_ticks(...)`). Broker SDKs that own their own threads are
+bridged into the loop without a thread hop per message:
+
+- LoopBridge: a producer thread (QuickFIX callbacks) appends to a buffer and only the
+  first item after a drain schedules a wakeup with call_soon_threadsafe; the loop then
+  hands the whole batch to listeners and subscriber queues.
+- install_asyncio_reactor(): runs Twisted on the asyncio loop itself, so cTrader
+  protocol callbacks already happen on the loop thread and Deferreds are awaited directly.
+
+AsyncAdapter wraps any synchronous provider: in-memory providers are called inline,
+everything else in the loop's default executor.
+"""
+import asyncio, logging, sys, threading
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from .base import CandleArrays, CandleRequest, candle_arrays
+
+log = logging.getLogger("aio")
+
+def install_asyncio_reactor(loop: Optional[asyncio.AbstractEventLoop] = None):
+    """Install Twisted's asyncioreactor on `loop` (default: the running loop) and return it.
+    Must run before anything imports twisted.internet.reactor (the cTrader SDK does on import)."""
+    loop = loop or asyncio.get_running_loop()
+    if "twisted.internet.reactor" not in sys.modules:
+        from twisted.internet import asyncioreactor
+        asyncioreactor.install(loop)
+    from twisted.internet import reactor
+    if getattr(reactor, "_asyncioEventloop", None) is not loop:
+        raise RuntimeError("A Twisted reactor is already installed on another loop; call "
+                           "install_asyncio_reactor() before importing src.connectors.ctrader")
+    if not reactor.running:
+        reactor.startRunning(installSignalHandlers=False)  # the asyncio loop drives it; no reactor.run()
+    return reactor
+
+
+class LoopBridge:
+    """Batched hand-off of items from foreign threads to an asyncio loop.
+
+    push() is safe from any thread and costs a locked append; one call_soon_threadsafe
+    is issued per batch, not per item. On the loop, each item goes to the listeners
+    (in order) and then to every subscriber queue; full queues count as drops. A listener
+    that raises is counted in `errors` (the first failure is logged) and the item still
+    reaches the other listeners and the subscribers."""
+    def __init__(self, loop: asyncio.AbstractEventLoop, listeners: Optional[List[Callable[[Dict], None]]] = None):
+        self.loop = loop
+        self.listeners = list(listeners or [])
+        self._lock = threading.Lock()
+        self._buf: List = []
+        self._scheduled = False
+        self._subs: List[asyncio.Queue] = []
+        self.pushed = 0
+        self.wakeups = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def push(self, item):
+        with self._lock:
+            self._buf.append(item)
+            self.pushed += 1
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.loop.call_soon_threadsafe(self._drain)
+
+    def _drain(self):
+        with self._lock:
+            items, self._buf = self._buf, []
+            self._scheduled = False
+        self.wakeups += 1
+        for item in items:
+            for fn in self.listeners:
+                try:
+                    fn(item)
+                except Exception:
+                    self.errors += 1
+                    if self.errors == 1:
+                        log.exception("LoopBridge listener %r failed; counting further failures in .errors", fn)
+            for q in self._subs:
+                try:
+                    q.put_nowait(item)
+                except asyncio.QueueFull:
+                    self.dropped += 1
+
+    def subscribe(self, maxsize: int = 100_000) -> asyncio.Queue:
+        q = asyncio.Queue(maxsize=maxsize)
+        self._subs.append(q)
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue):
+        if q in self._subs:
+            self._subs.remove(q)
+
+    async def stream(self, symbols: Optional[List[str]] = None, maxsize: int = 100_000) -> AsyncIterator:
+        """Items from now on (optionally only these symbols) until the consumer stops."""
+        want = set(symbols) if symbols else None
+        q = self.subscribe(maxsize)
+        try:
+            while True:
+                item = await q.get()
+                if want is None or _symbol(item) in want:
+                    yield item
+        finally:
+            self.unsubscribe(q)
+
+
+def _symbol(item):
+    return item.get("symbol") if isinstance(item, dict) else getattr(item, "symbol", None)
+
+
+class AsyncConnector:
+    """Async counterpart of base.Connector. Subclasses implement candle_arrays and/or
+    stream_ticks; candles_many and candles default to those."""
+    in_memory = False
+
+    async def candle_arrays(self, symbol: str, start: datetime, end: datetime,
+                            timeframe: str = "M1") -> Optional[CandleArrays]:
+        raise NotImplementedError
+
+    async def candles_many(self, requests: List[CandleRequest], return_exceptions: bool = False):
+        """Several windows at once, in request order (all awaited concurrently)."""
+        return list(await asyncio.gather(*(self.candle_arrays(s, a, b, tf) for s, a, b, tf in requests),
+                                         return_exceptions=return_exceptions))
+
+    async def candles(self, symbol: str, start: datetime, end: datetime, timeframe: str = "M1"):
+        arr = await self.candle_arrays(symbol, start, end, timeframe)
+        if arr is None:
+            import pandas as pd
+            return pd.DataFrame(columns=["time", "open", "high", "low", "close", "volume"])
+        return arr.to_frame()
+
+    def stream_ticks(self, symbols: List[str]) -> AsyncIterator:
+        raise NotImplementedError
+
+    async def close(self): ...
+
+
+class AsyncAdapter(AsyncConnector):
+    """Any synchronous provider behind the async interface. Blocking calls run in the
+    loop's default executor; in-memory providers (in_memory = True) answer inline."""
+    def __init__(self, provider):
+        self.provider = provider
+        self.in_memory = bool(getattr(provider, "in_memory", False))
+
+    async def _call(self, fn, *args):
+        if self.in_memory:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, lambda: fn(*args))
+
+    async def candle_arrays(self, symbol, start, end, timeframe="M1"):
+        return await self._call(lambda: candle_arrays(self.provider, symbol, start, end, timeframe=timeframe))
+
+    async def candles_many(self, requests, return_exceptions=False):
+        """One executor call into the provider's own batch (connectors.base.candles_many)."""
+        from .base import candles_many
+        return await self._call(lambda: candles_many(self.provider, requests, return_exceptions=return_exceptions))
+
+    async def candles(self, symbol, start, end, timeframe="M1"):
+        return await self._call(lambda: self.provider.candles(symbol, start, end, timeframe=timeframe))
+
+    async def stream_ticks(self, symbols):
+        """Iterates the provider's blocking stream_ticks in the executor, one tick per hop;
+        brokers with push callbacks should use a LoopBridge instead."""
+        it = iter(self.provider.stream_ticks(symbols))
+        loop = asyncio.get_running_loop()
+        done = object()
+        while True:
+            tick = await loop.run_in_executor(None, next, it, done)
+            if tick is done:
+                return
+            yield tick
+
+    async def close(self):
+        close = getattr(self.provider, "close", None)
+        if close is not None:
+            await self._call(close)
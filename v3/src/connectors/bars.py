@@ -0,0 +1,111 @@
+"""
+Rolling in-memory bid/ask OHLC bars built from live ticks.
+
+Each (symbol, timeframe) keeps a fixed-size ring buffer of bars, updated in place
+as ticks arrive, so candles are available without a disk round trip.
+"""
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Tuple
+import numpy as np
+import pandas as pd
+
+from .base import CandleArrays
+
+TF_SECONDS = {"M1": 60, "M5": 300, "M15": 900, "H1": 3600, "H4": 14400, "D1": 86400}
+_COLS = ["bid_open", "bid_high", "bid_low", "bid_close", "ask_open", "ask_high", "ask_low", "ask_close"]
+
+
+class _Ring:
+    def __init__(self, size: int, step_ns: int):
+        self.size = size
+        self.step = step_ns
+        self.t = np.zeros(size, dtype=np.int64)
+        self.px = np.zeros((size, 8), dtype=np.float64)
+        self.vol = np.zeros(size, dtype=np.int64)
+        self.n = 0       # bars written (monotonic)
+        self.cur = -1    # open bar start (ns)
+
+    def update(self, t_ns: int, bid: float, ask: float):
+        bucket = t_ns - t_ns % self.step
+        if bucket < self.cur:
+            return  # late tick for a closed bar
+        if bucket > self.cur:
+            i = self.n % self.size
+            self.n += 1
+            self.cur = bucket
+            self.t[i] = bucket
+            self.px[i] = (bid, bid, bid, bid, ask, ask, ask, ask)
+            self.vol[i] = 1
+            return
+        row = self.px[(self.n - 1) % self.size]
+        row[1] = max(row[1], bid); row[2] = min(row[2], bid); row[3] = bid
+        row[5] = max(row[5], ask); row[6] = min(row[6], ask); row[7] = ask
+        self.vol[(self.n - 1) % self.size] += 1
+
+    def ordered(self):
+        if self.n <= self.size:
+            sl = slice(0, self.n)
+            return self.t[sl], self.px[sl], self.vol[sl]
+        i = self.n % self.size
+        idx = np.r_[i:self.size, 0:i]
+        return self.t[idx], self.px[idx], self.vol[idx]
+
+
+class BarAggregator:
+    """Per-symbol rolling bars for a set of timeframes; safe to feed from a callback thread."""
+    in_memory = True
+
+    def __init__(self, timeframes: Iterable[str] = ("M1",), max_bars: int = 10_000):
+        self.timeframes = tuple(dict.fromkeys(["M1", *timeframes]))
+        for tf in self.timeframes:
+            if tf not in TF_SECONDS:
+                raise ValueError(f"Unsupported timeframe: {tf}")
+        self.max_bars = max_bars
+        self._rings: Dict[Tuple[str, str], _Ring] = {}
+        self._lock = threading.Lock()
+
+    def on_tick(self, tick: Dict):
+        """Accepts combined ticks: {time, symbol, bid, ask}."""
+        bid, ask = tick.get("bid"), tick.get("ask")
+        if bid is None or ask is None:
+            return
+        t_ns = pd.Timestamp(tick["time"]).value
+        sym = tick["symbol"]
+        with self._lock:
+            for tf in self.timeframes:
+                ring = self._rings.get((sym, tf))
+                if ring is None:
+                    ring = self._rings[(sym, tf)] = _Ring(self.max_bars, TF_SECONDS[tf] * 1_000_000_000)
+                ring.update(t_ns, float(bid), float(ask))
+
+    def _window(self, symbol: str, start: datetime, end: datetime, timeframe: str):
+        with self._lock:
+            ring = self._rings.get((symbol, timeframe))
+            if ring is None:
+                if timeframe not in self.timeframes:
+                    raise ValueError(f"Timeframe not aggregated: {timeframe}")
+                t, px, vol = np.empty(0, np.int64), np.empty((0, 8)), np.empty(0, np.int64)
+            else:
+                t, px, vol = (a.copy() for a in ring.ordered())
+        lo = np.searchsorted(t, pd.Timestamp(start).value, side="left")
+        hi = np.searchsorted(t, pd.Timestamp(end).value, side="right")
+        return t[lo:hi], px[lo:hi], vol[lo:hi]
+
+    def candle_arrays(self, symbol: str, start: datetime, end: datetime, timeframe="M1") -> CandleArrays:
+        """Same bars as candles(), as columnar arrays (mid = bid/ask average)."""
+        t, px, vol = self._window(symbol, start, end, timeframe)
+        cols = {c: px[:, i] for i, c in enumerate(_COLS)}
+        for k in ("open", "high", "low", "close"):
+            cols[k] = (cols[f"bid_{k}"] + cols[f"ask_{k}"]) / 2.0
+        return CandleArrays(time=t, volume=vol, **cols)
+
+    def candles(self, symbol: str, start: datetime, end: datetime, timeframe="M1") -> pd.DataFrame:
+        """Bars (including the still-forming one) whose open time falls in [start, end]."""
+        t, px, vol = self._window(symbol, start, end, timeframe)
+        df = pd.DataFrame(px, columns=_COLS)
+        df.insert(0, "time", pd.to_datetime(t, utc=True))
+        for k in ("open", "high", "low", "close"):
+            df[k] = (df[f"bid_{k}"] + df[f"ask_{k}"]) / 2.0
+        df["volume"] = vol
+        return df
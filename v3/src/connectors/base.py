@@ -1,17 +1,166 @@
 # src/connectors/base.py
-from typing import Iterable, Optional, Literal, Dict
-from dataclasses import dataclass
-from datetime import datetime
+from typing import Iterable, Optional, Literal, Dict, List, Tuple
+from dataclasses import dataclass, fields, replace
+from datetime import datetime, timedelta, timezone
+import numpy as np
 
 BarTF = Literal["M1","M5","M15","H1","H4","D1"]
+CandleRequest = Tuple[str, datetime, datetime, str]  # (symbol, start, end, timeframe)
+
+PRICE_FIELDS = ("open", "high", "low", "close", "bid_open", "bid_high", "bid_low", "bid_close",
+                "ask_open", "ask_high", "ask_low", "ask_close")
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
 @dataclass
-class Candle:  # normalized OHLCV
+class Candle:  # normalized OHLCV (one bar; bulk history travels as CandleArrays)
     time: datetime; open: float; high: float; low: float; close: float; volume: float
 
+@dataclass(slots=True)
+class CandleArrays:
+    """Columnar candles, the bulk market-data contract between connectors and the engine.
+
+    `time` is int64 ns since epoch, sorted; `tz` is "UTC" for aware sources, None for naive.
+    Prices are float64, or integers scaled by 10**digits when `digits` is set
+    (connectors.compact); price()/value() always give floats. Absent columns are None.
+    Slices are numpy views, so windows over a preloaded history copy nothing."""
+    time: np.ndarray
+    open: Optional[np.ndarray] = None
+    high: Optional[np.ndarray] = None
+    low: Optional[np.ndarray] = None
+    close: Optional[np.ndarray] = None
+    volume: Optional[np.ndarray] = None
+    bid_open: Optional[np.ndarray] = None
+    bid_high: Optional[np.ndarray] = None
+    bid_low: Optional[np.ndarray] = None
+    bid_close: Optional[np.ndarray] = None
+    ask_open: Optional[np.ndarray] = None
+    ask_high: Optional[np.ndarray] = None
+    ask_low: Optional[np.ndarray] = None
+    ask_close: Optional[np.ndarray] = None
+    spread_pips: Optional[np.ndarray] = None
+    digits: Optional[int] = None
+    tz: Optional[str] = "UTC"
+    unit: str = "ns"  # resolution of the source time column, restored by to_frame()
+
+    def __len__(self):
+        return len(self.time)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {f.name: getattr(self, f.name) for f in fields(self)
+                if f.name not in ("digits", "tz", "unit") and getattr(self, f.name) is not None}
+
+    @property
+    def has_bid_ask(self) -> bool:
+        return not any(getattr(self, k) is None for k in ("bid_high", "bid_low", "ask_high", "ask_low"))
+
+    def price(self, name: str) -> Optional[np.ndarray]:
+        a = getattr(self, name)
+        if a is None or self.digits is None:
+            return a
+        return a / (10 ** self.digits)
+
+    def value(self, name: str, i: int) -> float:
+        """One price as a float; the same value price(name)[i] gives."""
+        v = float(getattr(self, name)[i])
+        return v / (10 ** self.digits) if self.digits is not None else v
+
+    def datetime_at(self, i: int) -> datetime:
+        us = int(self.time[i]) // 1000
+        return (_EPOCH_UTC if self.tz else _EPOCH) + timedelta(microseconds=us)
+
+    def search(self, t_ns: int, side: str = "left") -> int:
+        return int(np.searchsorted(self.time, t_ns, side=side))
+
+    def slice(self, lo: int, hi: Optional[int] = None) -> "CandleArrays":
+        return replace(self, **{k: a[lo:hi] for k, a in self.columns().items()})
+
+    def between(self, start_ns: int, end_ns: int) -> "CandleArrays":
+        """Rows with start <= time <= end."""
+        return self.slice(self.search(start_ns), self.search(end_ns, "right"))
+
+    @classmethod
+    def from_frame(cls, df) -> Optional["CandleArrays"]:
+        """DataFrame edge: float or compact frames from any provider (extra columns dropped)."""
+        import pandas as pd
+        if df is None or df.empty:
+            return None
+        attrs = df.attrs
+        if "price_digits" in attrs:  # connectors.compact
+            t = df["time"].to_numpy(dtype=np.int64)
+            tz, unit, digits = attrs.get("tz"), attrs.get("time_unit") or "ns", attrs["price_digits"]
+        else:
+            times = pd.to_datetime(df["time"])
+            tz = "UTC" if times.dt.tz is not None else None
+            unit = np.datetime_data(times.values.dtype)[0]
+            t, digits = times.values.astype("datetime64[ns]").astype(np.int64), None
+        cols = {}
+        for f in fields(cls):
+            if f.name in df.columns and f.name != "time":
+                a = df[f.name].to_numpy()
+                cols[f.name] = a if (digits is not None and f.name in PRICE_FIELDS) or a.dtype.kind in "iu" \
+                    else a.astype(np.float64, copy=False)
+        if len(t) > 1 and (np.diff(t) < 0).any():
+            order = np.argsort(t, kind="stable")
+            t = t[order]; cols = {k: a[order] for k, a in cols.items()}
+        return cls(time=t, digits=digits, tz=tz, unit=unit, **cols)
+
+    def to_frame(self, expand: bool = False):
+        """DataFrame edge: float prices and datetime times; with `digits` set and expand=False,
+        a compact frame (connectors.compact) that from_frame() reads back without conversion."""
+        import pandas as pd
+        if self.digits is not None and not expand:
+            df = pd.DataFrame(self.columns())
+            df.attrs.update({"price_digits": self.digits, "tz": self.tz, "time_unit": self.unit})
+            return df
+        t = pd.to_datetime(self.time, unit="ns").as_unit(self.unit)
+        data = {"time": t.tz_localize(self.tz) if self.tz else t}
+        data.update((k, self.price(k) if k in PRICE_FIELDS else a) for k, a in self.columns().items() if k != "time")
+        return pd.DataFrame(data)
+
+def candle_arrays(provider, symbol: str, start: datetime, end: datetime, timeframe: str = "M1") -> Optional[CandleArrays]:
+    """provider.candle_arrays() where implemented, otherwise its candles() frame converted once."""
+    native = getattr(provider, "candle_arrays", None)
+    if native is not None:
+        return native(symbol, start, end, timeframe=timeframe)
+    return CandleArrays.from_frame(provider.candles(symbol, start, end, timeframe=timeframe))
+
+def data_version(provider, symbol: str, timeframe: str = "M1") -> Optional[str]:
+    """provider.data_version() where implemented: a token that changes whenever the symbol's
+    stored history may have been rewritten. None when the provider cannot tell."""
+    native = getattr(provider, "data_version", None)
+    return native(symbol, timeframe=timeframe) if native is not None else None
+
+def fetch_each(fetch, requests: List[CandleRequest], max_workers: int = 1, return_exceptions: bool = False) -> List:
+    """fetch(symbol, start, end, timeframe=...) for each request, results in request order;
+    on a thread pool when max_workers > 1. With return_exceptions a failed request yields
+    its exception instead of aborting the batch."""
+    def one(r):
+        try:
+            return fetch(r[0], r[1], r[2], timeframe=r[3])
+        except Exception as e:
+            if return_exceptions:
+                return e
+            raise
+    if max_workers <= 1 or len(requests) < 2:
+        return [one(r) for r in requests]
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(requests))) as ex:
+        return list(ex.map(one, requests))
+
+def candles_many(provider, requests: List[CandleRequest], max_workers: int = 8,
+                 return_exceptions: bool = False) -> List:
+    """provider.candles_many() where implemented, otherwise concurrent candle_arrays() calls."""
+    native = getattr(provider, "candles_many", None)
+    if native is not None:
+        return native(requests, max_workers=max_workers, return_exceptions=return_exceptions)
+    fetch = lambda s, a, b, timeframe: candle_arrays(provider, s, a, b, timeframe=timeframe)
+    return fetch_each(fetch, requests, max_workers, return_exceptions)
+
 @dataclass
 class Tick:    # normalized tick
     time: datetime; bid: Optional[float]; ask: Optional[float]; last: Optional[float]; size: Optional[float]
+    symbol: Optional[str] = None
 
 @dataclass
 class Capabilities:
@@ -23,8 +172,23 @@ class Connector:
     caps: Capabilities
 
     # ---- Market data
-    def candles(self, symbol: str, start: datetime, end: datetime, timeframe: BarTF) -> Iterable[Candle]:
-        raise NotImplementedError
+    def candle_arrays(self, symbol: str, start: datetime, end: datetime, timeframe: BarTF) -> Optional[CandleArrays]:
+        """Primary candle contract; the default converts candles() for frame-only connectors."""
+        return CandleArrays.from_frame(self.candles(symbol, start, end, timeframe=timeframe))
+    def candles_many(self, requests: List[CandleRequest], max_workers: int = 8,
+                     return_exceptions: bool = False) -> List[Optional[CandleArrays]]:
+        """Several windows at once, in request order. Connectors whose broker batches requests
+        override this; the default overlaps the round trips on a thread pool."""
+        return fetch_each(self.candle_arrays, requests, max_workers, return_exceptions)
+    def candles(self, symbol: str, start: datetime, end: datetime, timeframe: BarTF):
+        """DataFrame view (time, OHLC[, volume, bid_*/ask_*, spread_pips]) for callers at the edges."""
+        if type(self).candle_arrays is Connector.candle_arrays:
+            raise NotImplementedError
+        arr = self.candle_arrays(symbol, start, end, timeframe)
+        if arr is None:
+            import pandas as pd
+            return pd.DataFrame(columns=["time", "open", "high", "low", "close", "volume"])
+        return arr.to_frame()
     def stream_ticks(self, symbols: list[str]) -> Iterable[Tick]:
         raise NotImplementedError
     def stream_spreads(self, symbols: list[str]) -> Iterable[Dict]:  # {time, symbol, spread_pips}
@@ -0,0 +1,79 @@
+"""
+Per-symbol top-of-book state shared by the market-data handlers.
+
+Snapshot and incremental updates are applied to the book and each change of
+the best bid/ask is emitted as one combined record: {time, symbol, bid, ask}.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+BID, ASK = "BID", "ASK"
+# MDUpdateAction (279)
+NEW, CHANGE, DELETE = "0", "1", "2"
+
+
+def parse_fix_time(date_str: Optional[str], time_str: Optional[str] = None) -> Optional[datetime]:
+    """Parse FIX UTC stamps: 'YYYYMMDD-HH:MM:SS[.sss]' or MDEntryDate + MDEntryTime."""
+    if date_str and time_str is None and "-" in date_str:
+        date_str, time_str = date_str.split("-", 1)
+    if not time_str:
+        return None
+    if not date_str:
+        date_str = datetime.now(timezone.utc).strftime("%Y%m%d")
+    fmt = "%Y%m%d %H:%M:%S.%f" if "." in time_str else "%Y%m%d %H:%M:%S"
+    try:
+        return datetime.strptime(f"{date_str} {time_str[:15]}", fmt).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+class TopOfBook:
+    """Best bid/ask per symbol. Records are only emitted once both sides are known."""
+    def __init__(self):
+        self._top: Dict[str, List[Optional[float]]] = {}  # sym -> [bid, ask]
+
+    def quote(self, symbol: str):
+        top = self._top.get(symbol)
+        return (top[0], top[1]) if top else (None, None)
+
+    def reset(self, symbol: str):
+        self._top[symbol] = [None, None]
+
+    def set(self, symbol: str, side: str, price: Optional[float], action: str = NEW) -> bool:
+        """Apply one entry; returns True if the top of book changed."""
+        top = self._top.setdefault(symbol, [None, None])
+        i = 0 if side == BID else 1
+        px = None if action == DELETE else price
+        if top[i] == px:
+            return False
+        top[i] = px
+        return True
+
+    def record(self, symbol: str, ts: datetime) -> Optional[Dict]:
+        bid, ask = self.quote(symbol)
+        if bid is None or ask is None:
+            return None
+        return {"time": ts, "symbol": symbol, "bid": bid, "ask": ask}
+
+    def apply_snapshot(self, symbol: str, entries, ts: datetime) -> Optional[Dict]:
+        """Full refresh for one symbol: entries = [(side, price), ...]."""
+        before = self.quote(symbol)
+        self.reset(symbol)
+        for side, price in entries:
+            self.set(symbol, side, price)
+        if self.quote(symbol) == before:
+            return None
+        return self.record(symbol, ts)
+
+    def apply_incremental(self, entries, ts: datetime) -> List[Dict]:
+        """entries = [(symbol, side, price, action), ...]; one record per changed symbol."""
+        changed = []
+        for symbol, side, price, action in entries:
+            if self.set(symbol, side, price, action) and symbol not in changed:
+                changed.append(symbol)
+        out = []
+        for symbol in changed:
+            rec = self.record(symbol, ts)
+            if rec is not None:
+                out.append(rec)
+        return out
@@ -1,20 +1,32 @@
 import os, pandas as pd
 from datetime import datetime
+from .compact import is_compact, read_parquet, symbol_digits, to_compact, write_parquet
 try:
     import pyarrow; PARQUET=True
 except Exception: PARQUET=False
 class CachedProvider:
-    def __init__(self, provider, cache_dir): self.provider=provider; self.cache_dir=cache_dir
+    """Parquet cache in front of a provider. With compact=True the store holds integer
+    prices and int64 times (connectors.compact) and candles() returns compact frames."""
+    def __init__(self, provider, cache_dir, compact=False):
+        self.provider=provider; self.cache_dir=cache_dir; self.compact=compact
     def _path(self, sym, tf):
         d=os.path.join(self.cache_dir, sym, tf); os.makedirs(d, exist_ok=True); return os.path.join(d,"data.parquet")
+    def _slice(self, df, start, end):
+        if is_compact(df):
+            lo, hi = pd.Timestamp(start).value, pd.Timestamp(end).value
+            out = df[(df["time"]>=lo) & (df["time"]<=hi)].reset_index(drop=True)
+            out.attrs = dict(df.attrs); return out
+        return df[(df["time"]>=pd.Timestamp(start)) & (df["time"]<=pd.Timestamp(end))].reset_index(drop=True)
     def candles(self, symbol, start, end, timeframe="M1"):
         p=self._path(symbol, timeframe)
-        if PARQUET and os.path.exists(p): df=pd.read_parquet(p)
+        if PARQUET and os.path.exists(p): df=read_parquet(p, expand=not self.compact)
         else: df=pd.DataFrame(columns=["time","open","high","low","close","volume"])
-        in_cache = df[(df["time"]>=pd.Timestamp(start)) & (df["time"]<=pd.Timestamp(end))] if not df.empty else pd.DataFrame()
-        if not in_cache.empty: return in_cache.sort_values("time").reset_index(drop=True)
+        in_cache = self._slice(df, start, end) if not df.empty else pd.DataFrame()
+        if not in_cache.empty: return in_cache
         fresh=self.provider.candles(symbol,start,end,timeframe=timeframe)
         if fresh is None or fresh.empty: return fresh
-        merged=pd.concat([df,fresh],ignore_index=True).drop_duplicates(subset=["time"]).sort_values("time")
-        if PARQUET: os.makedirs(os.path.dirname(p),exist_ok=True); merged.to_parquet(p,index=False)
-        return merged[(merged["time"]>=pd.Timestamp(start)) & (merged["time"]<=pd.Timestamp(end))].reset_index(drop=True)
+        if is_compact(df): df=read_parquet(p)  # merge as floats
+        merged=(pd.concat([df,fresh],ignore_index=True) if not df.empty else fresh).drop_duplicates(subset=["time"]).sort_values("time").reset_index(drop=True)
+        if self.compact: merged=to_compact(merged, digits=symbol_digits(symbol))
+        if PARQUET: os.makedirs(os.path.dirname(p),exist_ok=True); write_parquet(p, merged)
+        return self._slice(merged, start, end)
@@ -0,0 +1,283 @@
+"""
+Record/replay cassettes: what crossed a connector boundary, in one indexed file.
+
+RecordingConnector wraps a live provider and appends every candle response (keyed by
+symbol, timeframe and window, with its latency) and every streamed message to a
+cassette. Providers that expose a `tap` (CTraderProvider raw trendbars, MDApp raw FIX
+messages) record the undecoded payload instead, so replay runs their decoders too.
+CassetteConnector serves a cassette with no broker traffic: candle windows inside a
+recorded one are sliced from it, and streams come back in order, either as fast as
+possible (speed=None) or at `speed` x the original timing (latencies included).
+
+File layout: MAGIC, then records
+    <kind:u8><t_ns:i64><dur_ns:i64><key_len:u32><body_len:u32> key body
+and, once closed, an index (JSON) followed by <index_offset:u64> INDEX_MAGIC.
+A cassette that was not closed (crash, kill) is indexed by scanning its records.
+"""
+import builtins, json, mmap, os, struct, threading, time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+
+from .base import Capabilities, CandleArrays, Connector, Tick, candle_arrays, candles_many
+
+MAGIC = b"TGBCAS1\n"
+INDEX_MAGIC = b"TGBCIDX\n"
+_HEAD = struct.Struct("<BqqII")
+_TAIL = struct.Struct("<Q")
+
+ARRAYS, TRENDBARS, EMPTY, ERROR, MESSAGE = 1, 2, 3, 4, 5  # record kinds
+
+
+def _ns(t) -> int:
+    import pandas as pd
+    return int(pd.Timestamp(t).value)
+
+
+def _call_key(symbol: str, start, end, timeframe: str) -> bytes:
+    return f"{symbol}|{timeframe}|{_ns(start)}|{_ns(end)}".encode()
+
+
+def pack_arrays(ca: CandleArrays) -> bytes:
+    """Columns as raw little-endian buffers behind a small JSON header (no pickle)."""
+    cols = ca.columns()
+    meta = {"digits": ca.digits, "tz": ca.tz, "unit": ca.unit,
+            "cols": [[k, a.dtype.str, len(a)] for k, a in cols.items()]}
+    head = json.dumps(meta).encode()
+    return b"".join([struct.pack("<I", len(head)), head] + [np.ascontiguousarray(a).tobytes() for a in cols.values()])
+
+
+def unpack_arrays(buf) -> CandleArrays:
+    """Inverse of pack_arrays; columns are read-only views into `buf`."""
+    (n,) = struct.unpack_from("<I", buf, 0)
+    meta = json.loads(bytes(buf[4:4 + n]))
+    off = 4 + n
+    cols = {}
+    for name, dtype, length in meta["cols"]:
+        dt = np.dtype(dtype)
+        cols[name] = np.frombuffer(buf, dtype=dt, count=length, offset=off)
+        off += dt.itemsize * length
+    return CandleArrays(**cols, digits=meta["digits"], tz=meta["tz"], unit=meta["unit"])
+
+
+class CassetteWriter:
+    """Append-only, thread-safe; every record is flushed so a killed recorder keeps its data."""
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._f = open(path, "wb")
+        self._f.write(MAGIC)
+        self._lock = threading.Lock()
+        self.records = 0
+
+    def write(self, kind: int, key: bytes, body: bytes, dur_ns: int = 0, t_ns: Optional[int] = None):
+        t_ns = time.time_ns() if t_ns is None else t_ns
+        with self._lock:
+            self._f.write(_HEAD.pack(kind, t_ns, dur_ns, len(key), len(body)))
+            self._f.write(key); self._f.write(body)
+            self._f.flush()
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            if self._f.closed:
+                return
+            self._f.flush()
+            index = json.dumps(_scan(self.path)).encode()
+            off = self._f.tell()
+            self._f.write(index); self._f.write(_TAIL.pack(off)); self._f.write(INDEX_MAGIC)
+            self._f.close()
+
+
+def _scan(path: str, buf=None) -> Dict:
+    """Index from the records themselves: call windows per symbol/timeframe, stream offsets per channel."""
+    own = buf is None
+    if own:
+        f = open(path, "rb")
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) else b""
+    try:
+        end = len(buf)
+        if end >= len(INDEX_MAGIC) + _TAIL.size and bytes(buf[end - len(INDEX_MAGIC):]) == INDEX_MAGIC:
+            end = _TAIL.unpack_from(buf, end - len(INDEX_MAGIC) - _TAIL.size)[0]
+        calls: Dict[str, List] = {}
+        streams: Dict[str, List[int]] = {}
+        off = len(MAGIC)
+        while off + _HEAD.size <= end:
+            kind, t_ns, dur, klen, blen = _HEAD.unpack_from(buf, off)
+            if off + _HEAD.size + klen + blen > end:
+                break  # torn final record
+            key = bytes(buf[off + _HEAD.size:off + _HEAD.size + klen]).decode()
+            if kind == MESSAGE:
+                streams.setdefault(key, []).append(off)
+            else:
+                sym, tf, a, b = key.rsplit("|", 3)
+                calls.setdefault(f"{sym}|{tf}", []).append([int(a), int(b), off])
+            off += _HEAD.size + klen + blen
+        return {"calls": calls, "streams": streams}
+    finally:
+        if own:
+            if isinstance(buf, mmap.mmap):
+                buf.close()
+            f.close()
+
+
+class RecordingConnector:
+    """Pass-through wrapper that records every response of `provider` into a cassette."""
+    def __init__(self, provider, path: str):
+        self.provider = provider
+        self.cassette = CassetteWriter(path)
+        self._tapped = set()  # call keys the provider already recorded raw
+        self._lock = threading.Lock()
+        for obj in (provider, getattr(provider, "app", None)):
+            if obj is not None and hasattr(obj, "tap"):
+                obj.tap = self.tap
+
+    def __getattr__(self, name):
+        return getattr(self.provider, name)
+
+    def tap(self, channel: str, payload, key: Optional[Tuple] = None, dur_ns: int = 0):
+        """Raw boundary payloads from the provider: ("trendbars", list of bar dicts, request key)
+        or (channel, message text) for streams."""
+        if key is None:
+            body = payload if isinstance(payload, bytes) else str(payload).encode()
+            self.cassette.write(MESSAGE, channel.encode(), body)
+            return
+        k = _call_key(*key)
+        self.cassette.write(TRENDBARS, k, json.dumps(payload).encode(), dur_ns)
+        with self._lock:
+            self._tapped.add(k)
+
+    def _record(self, key: bytes, res, dur_ns: int):
+        with self._lock:
+            if key in self._tapped:
+                self._tapped.discard(key)
+                return  # the provider recorded the raw response itself
+        if isinstance(res, Exception):
+            self.cassette.write(ERROR, key, f"{type(res).__name__}: {res}".encode(), dur_ns)
+        elif res is None or not len(res):
+            self.cassette.write(EMPTY, key, b"", dur_ns)
+        else:
+            self.cassette.write(ARRAYS, key, pack_arrays(res), dur_ns)
+
+    def candle_arrays(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
+        key = _call_key(symbol, start, end, timeframe)
+        t0 = time.perf_counter_ns()
+        try:
+            res = candle_arrays(self.provider, symbol, start, end, timeframe=timeframe)
+        except Exception as e:
+            self._record(key, e, time.perf_counter_ns() - t0)
+            raise
+        self._record(key, res, time.perf_counter_ns() - t0)
+        return res
+
+    def candles_many(self, requests, max_workers: int = 8, return_exceptions: bool = False):
+        """The provider's own batch; each response is recorded with the batch latency."""
+        t0 = time.perf_counter_ns()
+        res = candles_many(self.provider, requests, max_workers=max_workers, return_exceptions=True)
+        dur = time.perf_counter_ns() - t0
+        for r, ca in zip(requests, res):
+            self._record(_call_key(*r), ca, dur)
+        if not return_exceptions:
+            for ca in res:
+                if isinstance(ca, Exception):
+                    raise ca
+        return res
+
+    def candles(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
+        ca = self.candle_arrays(symbol, start, end, timeframe)
+        if ca is None:
+            import pandas as pd
+            return pd.DataFrame(columns=["time", "open", "high", "low", "close", "volume"])
+        return ca.to_frame()
+
+    def stream_ticks(self, symbols: List[str]):
+        for t in self.provider.stream_ticks(symbols):
+            d = t if isinstance(t, dict) else t.__dict__
+            self.cassette.write(MESSAGE, b"ticks", json.dumps({**d, "time": _ns(d["time"])}).encode())
+            yield t
+
+    def close(self):
+        self.cassette.close()
+        close = getattr(self.provider, "close", None)
+        if close is not None:
+            close()
+
+
+class CassetteConnector(Connector):
+    name = "cassette"
+    caps = Capabilities(candles=True, ticks=True, depth=False, spreads=False,
+                        place_orders=False, modify_orders=False, positions=False)
+
+    def __init__(self, path: str, speed: Optional[float] = None):
+        """speed=None serves everything immediately; otherwise responses wait their recorded
+        latency and streams keep their recorded spacing, both divided by `speed`."""
+        self.path = path
+        self.speed = speed
+        self.in_memory = speed is None
+        self._f = open(path, "rb")
+        self._buf = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        end = len(self._buf)
+        if end >= len(INDEX_MAGIC) + _TAIL.size and self._buf[end - len(INDEX_MAGIC):] == INDEX_MAGIC:
+            off = _TAIL.unpack_from(self._buf, end - len(INDEX_MAGIC) - _TAIL.size)[0]
+            index = json.loads(self._buf[off:end - len(INDEX_MAGIC) - _TAIL.size])
+        else:
+            index = _scan(path, self._buf)
+        self._calls = {k: sorted(v) for k, v in index["calls"].items()}
+        self._streams = index["streams"]
+
+    def _record(self, off: int):
+        kind, t_ns, dur, klen, blen = _HEAD.unpack_from(self._buf, off)
+        body = memoryview(self._buf)[off + _HEAD.size + klen:off + _HEAD.size + klen + blen]
+        return kind, t_ns, dur, body
+
+    def candle_arrays(self, symbol: str, start: datetime, end: datetime, timeframe="M1") -> Optional[CandleArrays]:
+        a, b = _ns(start), _ns(end)
+        hit = None
+        for lo, hi, off in self._calls.get(f"{symbol}|{timeframe}", ()):
+            if lo <= a and b <= hi:  # the exact window, else the first recording that covers it
+                if (lo, hi) == (a, b):
+                    hit = off
+                    break
+                hit = off if hit is None else hit
+        if hit is None:
+            raise KeyError(f"{symbol} {timeframe} [{start}, {end}] is not in cassette {self.path}")
+        kind, _, dur, body = self._record(hit)
+        if self.speed:
+            time.sleep(dur / 1e9 / self.speed)
+        if kind == ERROR:
+            name, _, msg = bytes(body).decode().partition(": ")
+            exc = getattr(builtins, name, None)
+            raise (exc if isinstance(exc, type) and issubclass(exc, Exception) else RuntimeError)(msg)
+        if kind == EMPTY:
+            return None
+        if kind == TRENDBARS:
+            from .ctrader import CTraderProvider
+            ca = CTraderProvider._to_arrays(json.loads(bytes(body)))
+        else:
+            ca = unpack_arrays(body)
+        return ca.between(a, b) if ca is not None else None
+
+    def messages(self, channel: str) -> Iterator[Tuple[int, bytes]]:
+        """(recorded t_ns, payload) of one stream, paced when `speed` is set."""
+        first = wall0 = None
+        for off in self._streams.get(channel, ()):
+            kind, t_ns, _, body = self._record(off)
+            if self.speed:
+                if first is None:
+                    first, wall0 = t_ns, time.perf_counter()
+                delay = (t_ns - first) / 1e9 / self.speed - (time.perf_counter() - wall0)
+                if delay > 0:
+                    time.sleep(delay)
+            yield t_ns, bytes(body)
+
+    def stream_ticks(self, symbols: List[str]) -> Iterator[Tick]:
+        import pandas as pd
+        want = set(symbols) if symbols else None
+        for _, body in self.messages("ticks"):
+            d = json.loads(body)
+            if want is None or d.get("symbol") in want:
+                d["time"] = pd.Timestamp(d["time"], unit="ns", tz="UTC").to_pydatetime()
+                yield Tick(**{k: d.get(k) for k in ("time", "bid", "ask", "last", "size", "symbol")})
+
+    def close(self):
+        self._buf.close(); self._f.close()
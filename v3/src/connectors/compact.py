@@ -0,0 +1,135 @@
+"""
+Compact candle/tick storage: integer prices scaled by per-symbol digits.
+
+A compact frame keeps
+  time     int64 ns since epoch (tz recorded in attrs)
+  prices   int32 (int64 if out of range) = round(price * 10**digits)
+  volume   int64 when integral
+  symbol   categorical
+with df.attrs = {"price_digits": d, "tz": "UTC" | None, "time_unit": "ns" | "us" | ...}.
+That is roughly half the float64 footprint and a fraction of object-typed times.
+Conversion is exact: to_compact() refuses (or widens digits) when a price is not a
+multiple of 10**-digits, and from_compact() divides by an exact power of ten, which
+returns the same float64 the price was parsed into.
+"""
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ("open", "high", "low", "close", "bid_open", "bid_high", "bid_low", "bid_close",
+                 "ask_open", "ask_high", "ask_low", "ask_close", "bid", "ask", "price", "mid",
+                 "mid_min", "mid_max", "mid_last")
+MAX_DIGITS = 7
+
+
+def symbol_digits(symbol: str) -> int:
+    """Quote digits from the symbol registry (src/symbols.py); unknown symbols: JPY crosses 3,
+    gold 2, silver 3, otherwise 5."""
+    from ..symbols import default_registry
+    return default_registry().digits(symbol or "")
+
+
+def _exact(values: np.ndarray, digits: int) -> bool:
+    scale = 10 ** digits
+    ints = np.round(values * scale)
+    return bool(np.array_equal(ints / scale, values))
+
+
+def infer_digits(values: np.ndarray, start: int = 0) -> int:
+    """Smallest digits >= start that represent every finite value exactly."""
+    v = np.asarray(values, dtype=np.float64)
+    v = v[np.isfinite(v)]
+    for d in range(start, MAX_DIGITS + 1):
+        if _exact(v, d):
+            return d
+    raise ValueError(f"prices need more than {MAX_DIGITS} decimal digits")
+
+
+def is_compact(df) -> bool:
+    return isinstance(df, pd.DataFrame) and "price_digits" in df.attrs
+
+
+def to_compact(df: pd.DataFrame, digits: Optional[int] = None, symbol: Optional[str] = None) -> pd.DataFrame:
+    if is_compact(df):
+        return df
+    cols = [c for c in df.columns if c in PRICE_COLUMNS]
+    if digits is None:
+        digits = symbol_digits(symbol) if symbol else 0
+    # widen past the configured digits rather than lose precision
+    stacked = np.concatenate([df[c].to_numpy(dtype=np.float64) for c in cols]) if cols else np.empty(0)
+    if not _exact(stacked[np.isfinite(stacked)], digits):
+        digits = infer_digits(stacked, start=digits)
+    scale = 10 ** digits
+    out = {}
+    tz, unit = None, "ns"
+    for c in df.columns:
+        a = df[c]
+        if c == "time":
+            t = pd.to_datetime(a)
+            tz = "UTC" if t.dt.tz is not None else None
+            unit = np.datetime_data(t.values.dtype)[0]
+            out[c] = t.values.astype("datetime64[ns]").astype(np.int64)
+        elif c in cols:
+            v = np.round(a.to_numpy(dtype=np.float64) * scale)
+            if np.isnan(v).any():
+                out[c] = v  # keep gaps as float; rare (unfilled sides)
+            else:
+                big = len(v) and max(abs(v.max()), abs(v.min())) >= 2 ** 31
+                out[c] = v.astype(np.int64 if big else np.int32)
+        elif c == "volume" and pd.api.types.is_numeric_dtype(a) and len(a) and np.array_equal(a, np.round(a)):
+            out[c] = a.to_numpy().astype(np.int64)
+        elif a.dtype == object or pd.api.types.is_string_dtype(a):
+            out[c] = a.astype("category")
+        else:
+            out[c] = a.to_numpy()
+    res = pd.DataFrame(out)
+    res.attrs.update({"price_digits": int(digits), "tz": tz, "time_unit": unit})
+    return res
+
+
+def from_compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Float prices and datetime times, as the connectors return them."""
+    if not is_compact(df):
+        return df
+    scale = 10 ** df.attrs["price_digits"]
+    out = {}
+    for c in df.columns:
+        a = df[c]
+        if c == "time":
+            t = pd.to_datetime(a.to_numpy(), unit="ns").as_unit(df.attrs.get("time_unit") or "ns")
+            out[c] = t.tz_localize(df.attrs["tz"]) if df.attrs.get("tz") else t
+        elif c in PRICE_COLUMNS:
+            out[c] = a.to_numpy(dtype=np.float64) / scale
+        elif isinstance(a.dtype, pd.CategoricalDtype):
+            out[c] = a.astype(a.cat.categories.dtype)
+        else:
+            out[c] = a.to_numpy()
+    return pd.DataFrame(out)
+
+
+def write_parquet(path: str, df: pd.DataFrame, fsync: bool = False):
+    """Parquet with the compact attrs in the schema metadata (via a tmp file); fsync=True
+    also makes the replace durable before returning (recorders compacting a WAL)."""
+    import json, os
+    import pyarrow as pa, pyarrow.parquet as pq
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    meta = dict(table.schema.metadata or {})
+    meta[b"compact"] = json.dumps(df.attrs if is_compact(df) else {}).encode()
+    pq.write_table(table.replace_schema_metadata(meta), path + ".tmp")
+    if fsync:
+        from .wal import durable_replace
+        durable_replace(path + ".tmp", path)
+    else:
+        os.replace(path + ".tmp", path)
+
+
+def read_parquet(path: str, expand: bool = True) -> pd.DataFrame:
+    """Reads compact or plain parquet; expand=False keeps compact frames compact."""
+    import json
+    import pyarrow.parquet as pq
+    table = pq.read_table(path)
+    df = table.to_pandas()
+    attrs = json.loads((table.schema.metadata or {}).get(b"compact", b"{}") or b"{}")
+    if attrs:
+        df.attrs.update(attrs)
+    return from_compact(df) if expand else df
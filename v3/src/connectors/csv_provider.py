@@ -0,0 +1,53 @@
+# src/connectors/csv_provider.py
+from datetime import datetime
+import os
+import pandas as pd
+
+class CSVConnector:
+    """
+    Read-only candle source for backtests.
+    Expects CSVs at: <repo>/src/data/<SYMBOL>.csv with columns:
+    time,open,high,low,close,volume  (time = ISO8601, UTC)
+    """
+    def __init__(self, data_dir=None):
+        # default to src/data so existing datasets keep working
+        self.data_dir = data_dir or os.path.join(os.path.dirname(__file__), "..", "data")
+
+    def _read(self, symbol: str) -> pd.DataFrame:
+        path = os.path.join(self.data_dir, f"{symbol}.csv")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"CSV not found: {path}")
+        return pd.read_csv(path, parse_dates=["time"])
+
+    @staticmethod
+    def _window(df: pd.DataFrame, start: datetime, end: datetime) -> pd.DataFrame:
+        df = df[(df["time"] >= pd.Timestamp(start)) & (df["time"] <= pd.Timestamp(end))]
+        return df.sort_values("time").reset_index(drop=True)
+
+    def candles(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
+        return self._window(self._read(symbol), start, end)
+
+    def data_version(self, symbol: str, timeframe="M1"):
+        """The file's size and mtime: any rewrite (or append) of <SYMBOL>.csv changes it."""
+        try:
+            st = os.stat(os.path.join(self.data_dir, f"{symbol}.csv"))
+        except OSError:
+            return None
+        return f"{st.st_size}:{st.st_mtime_ns}"
+
+    def candles_many(self, requests, max_workers: int = 8, return_exceptions: bool = False):
+        """Each symbol's file is parsed once for all of its windows; files are read concurrently."""
+        from .base import CandleArrays, fetch_each
+        symbols = list(dict.fromkeys(r[0] for r in requests))
+        frames = dict(zip(symbols, fetch_each(lambda s, a, b, timeframe: self._read(s),
+                                              [(s, None, None, None) for s in symbols], max_workers, True)))
+        out = []
+        for sym, start, end, _ in requests:
+            df = frames[sym]
+            if isinstance(df, Exception):
+                if not return_exceptions:
+                    raise df
+                out.append(df)
+            else:
+                out.append(CandleArrays.from_frame(self._window(df, start, end)))
+        return out
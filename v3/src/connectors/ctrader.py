@@ -1,13 +1,17 @@
 from datetime import datetime, timezone
-import time, threading
+import asyncio, time, threading
 from typing import Optional, Dict
+import numpy as np
 import pandas as pd
 
+from .aio import AsyncConnector, install_asyncio_reactor
+from .base import CandleArrays
+
 try:
     from ctrader_open_api import Client, Protobuf, TcpProtocol, EndPoints
     from ctrader_open_api.messages.OpenApiMessages_pb2 import (
         ProtoOAApplicationAuthReq, ProtoOAAccountAuthReq,
-        ProtoOASymbolsListReq, ProtoOAGetTrendbarsReq
+        ProtoOASymbolsListReq, ProtoOASymbolByIdReq, ProtoOAAssetListReq, ProtoOAGetTrendbarsReq
     )
     from ctrader_open_api.messages.OpenApiModelMessages_pb2 import (
         ProtoOATrendbarPeriod
@@ -23,17 +27,35 @@ _PERIOD_MAP = {
     "H1": ProtoOATrendbarPeriod.H1 if _SDK_OK else 0,
 }
 
-_SCALE = 100000.0  # per cTrader docs, prices are scaled by 1e5
+_DIGITS = 5  # per cTrader docs, prices are integers scaled by 1e5
+
+_BATCH_ID = "tb-"     # clientMsgId prefix of pipelined trendbar requests
+_MAX_IN_FLIGHT = 5    # historical-data requests the server accepts per second
 
 class _ResponseWaiter:
     def __init__(self):
         self._lock = threading.Lock()
         self._cv = threading.Condition(self._lock)
         self._last = None
+        self._by_id = {}
     def put(self, msg):
         with self._cv:
-            self._last = msg
+            cid = getattr(msg, "clientMsgId", "") or ""
+            if cid.startswith(_BATCH_ID):
+                self._by_id[cid] = msg
+            else:
+                self._last = msg
             self._cv.notify_all()
+    def wait_ids(self, ids, timeout=15.0):
+        """Responses to pipelined requests, matched by clientMsgId; missing ids timed out."""
+        deadline = time.monotonic() + timeout
+        with self._cv:
+            while not all(i in self._by_id for i in ids):
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                self._cv.wait(left)
+            return {i: self._by_id.pop(i) for i in ids if i in self._by_id}
     def wait(self, timeout=10.0):
         with self._cv:
             if self._last is None:
@@ -59,6 +81,8 @@ class CTraderProvider:
         self.host = EndPoints.PROTOBUF_LIVE_HOST if host == "LIVE" else EndPoints.PROTOBUF_DEMO_HOST
         self._client = Client(self.host, EndPoints.PROTOBUF_PORT, TcpProtocol)
         self._waiter = _ResponseWaiter()
+        self._batch_seq = 0
+        self.tap = None  # connectors.cassette records raw trendbar responses through this
         self._connected = threading.Event()
         self._reactor_thread = None
 
@@ -105,20 +129,41 @@ class CTraderProvider:
             raise TimeoutError("Timed out waiting for cTrader response")
         return msg
 
-    def _app_auth(self):
+    def _app_auth_req(self):
         req = ProtoOAApplicationAuthReq()
         req.clientId = self.client_id
         req.clientSecret = self.client_secret
-        self._send(req, timeout=10.0)
+        return req
 
-    def _account_auth(self):
+    def _account_auth_req(self):
         req = ProtoOAAccountAuthReq()
         req.ctidTraderAccountId = self.account_id
         req.accessToken = self.access_token
-        self._send(req, timeout=10.0)
+        return req
 
-    def candles(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
-        """Return pandas DataFrame with columns: time, open, high, low, close, volume"""
+    def _app_auth(self):
+        self._send(self._app_auth_req(), timeout=10.0)
+
+    def _account_auth(self):
+        self._send(self._account_auth_req(), timeout=10.0)
+
+    def symbol_specs(self, names=None):
+        """Symbol registry (src/symbols.py) from the account's symbol list, symbol details and
+        asset names; `names` limits it to those symbols. Save it once and load it at startup."""
+        from ..symbols import SymbolRegistry
+        req = ProtoOASymbolsListReq(); req.ctidTraderAccountId = self.account_id
+        light = list(Protobuf.extract(self._send(req, timeout=15.0)).symbol)
+        if names:
+            wanted = {n.upper() for n in names}
+            light = [s for s in light if s.symbolName.upper() in wanted]
+        req = ProtoOAAssetListReq(); req.ctidTraderAccountId = self.account_id
+        assets = {a.assetId: a.name for a in Protobuf.extract(self._send(req, timeout=15.0)).asset}
+        req = ProtoOASymbolByIdReq(); req.ctidTraderAccountId = self.account_id
+        req.symbolId.extend(s.symbolId for s in light)
+        details = Protobuf.extract(self._send(req, timeout=15.0)).symbol
+        return SymbolRegistry.from_ctrader(light, details, assets)
+
+    def _trendbars_req(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
         period = _PERIOD_MAP.get(timeframe.upper())
         if period is None:
             raise ValueError(f"Unsupported timeframe for cTrader: {timeframe}")
@@ -136,25 +181,174 @@ class CTraderProvider:
         req.period = period
         req.fromTimestamp = from_ms
         req.toTimestamp = to_ms
-        res = self._send(req, timeout=15.0)
+        return req
+
+    @staticmethod
+    def _extract_trendbars(res):
         # Extract protobuf payload into dict
         try:
             payload = Protobuf.extract(res)
         except Exception:
             # Fallback: return empty
-            return pd.DataFrame(columns=["time","open","high","low","close","volume"])
-        trendbars = payload.get("trendbar", []) or payload.get("trendbars", [])
+            return []
+        return payload.get("trendbar", []) or payload.get("trendbars", [])
+
+    def _trendbars(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
+        t0 = time.perf_counter_ns()
+        bars = self._extract_trendbars(self._send(self._trendbars_req(symbol, start, end, timeframe), timeout=15.0))
+        self._tap_bars(bars, (symbol, start, end, timeframe), time.perf_counter_ns() - t0)
+        return bars
+
+    def _tap_bars(self, bars, key, dur_ns):
+        if self.tap is not None:
+            from google.protobuf.json_format import MessageToDict
+            self.tap("trendbars", [tb if isinstance(tb, dict) else MessageToDict(tb) for tb in bars], key, dur_ns)
+
+    def candle_arrays(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
+        """Trendbars as CandleArrays, keeping cTrader's integer prices (scaled by 1e5) as they arrive."""
+        return self._to_arrays(self._trendbars(symbol, start, end, timeframe))
+
+    def candles_many(self, requests, max_workers: int = 8, return_exceptions: bool = False):
+        """Pipelined trendbar requests: up to _MAX_IN_FLIGHT are outstanding at once and
+        responses are matched by clientMsgId, instead of one blocking round trip per window.
+        (The single-response _send is not thread-safe, so there is no thread-pool fallback.)"""
+        from twisted.internet import reactor
+        out = [None] * len(requests)
+        step = max(1, min(max_workers, _MAX_IN_FLIGHT))
+        for lo in range(0, len(requests), step):
+            t0 = time.monotonic()
+            ids = {}
+            for i in range(lo, min(lo + step, len(requests))):
+                sym, start, end, tf = requests[i]
+                try:
+                    req = self._trendbars_req(sym, start, end, tf)
+                except Exception as e:
+                    out[i] = e
+                    continue
+                self._batch_seq += 1
+                cid = f"{_BATCH_ID}{self._batch_seq}"
+                ids[cid] = i
+                reactor.callFromThread(self._client.send, req, clientMsgId=cid)
+            got = self._waiter.wait_ids(list(ids), timeout=15.0)
+            dur = int((time.monotonic() - t0) * 1e9)
+            for cid, i in ids.items():
+                msg = got.get(cid)
+                if msg is None:
+                    out[i] = TimeoutError(f"Timed out waiting for trendbars of {requests[i][0]}")
+                    continue
+                bars = self._extract_trendbars(msg)
+                self._tap_bars(bars, requests[i], dur)
+                out[i] = self._to_arrays(bars)
+            if lo + step < len(requests):
+                time.sleep(max(0.0, 1.0 - (time.monotonic() - t0)))  # stay under the request rate limit
+        if not return_exceptions:
+            for r in out:
+                if isinstance(r, Exception):
+                    raise r
+        return out
+
+    @staticmethod
+    def _to_arrays(trendbars):
         if not trendbars:
+            return None
+        # Reconstruct OHLC from relative encoding (see cTrader docs); protobuf omits zero deltas
+        # tb is a dict like {"utcTimestampInMs":..., "low":..., "deltaOpen":..., "deltaHigh":..., "deltaClose":..., "volume":...}
+        low = np.array([int(tb["low"]) for tb in trendbars], dtype=np.int64)
+        delta = lambda k: np.array([int(tb.get(k, 0)) for tb in trendbars], dtype=np.int64)
+        cols = {"time": np.array([int(tb["utcTimestampInMs"]) for tb in trendbars], dtype=np.int64) * 1_000_000,
+                "open": low + delta("deltaOpen"), "high": low + delta("deltaHigh"), "low": low,
+                "close": low + delta("deltaClose"),
+                "volume": np.array([float(tb.get("volume", 0)) for tb in trendbars])}
+        if (np.diff(cols["time"]) < 0).any():
+            order = np.argsort(cols["time"], kind="stable")
+            cols = {k: a[order] for k, a in cols.items()}
+        return CandleArrays(**cols, digits=_DIGITS)
+
+    def candles(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
+        """Return pandas DataFrame with columns: time, open, high, low, close, volume"""
+        ca = self.candle_arrays(symbol, start, end, timeframe)
+        if ca is None:
             return pd.DataFrame(columns=["time","open","high","low","close","volume"])
-        # Reconstruct OHLC from relative encoding (see cTrader docs)
-        rows = []
-        for tb in trendbars:
-            # tb is a dict like {"utcTimestampInMs":..., "low":..., "deltaOpen":..., "deltaHigh":..., "deltaClose":..., "volume":...}
-            low_abs = float(tb["low"]) / _SCALE
-            o = (tb["deltaOpen"] + tb["low"]) / _SCALE
-            h = (tb["deltaHigh"] + tb["low"]) / _SCALE
-            c = (tb["deltaClose"] + tb["low"]) / _SCALE
-            t = datetime.utcfromtimestamp(tb["utcTimestampInMs"]/1000.0).replace(tzinfo=timezone.utc)
-            rows.append({"time": t, "open": o, "high": h, "low": low_abs, "close": c, "volume": float(tb.get("volume",0))})
-        df = pd.DataFrame(rows).sort_values("time").reset_index(drop=True)
-        return df
+        return ca.to_frame(expand=True)
+
+
+class AsyncCTraderProvider(AsyncConnector):
+    """
+    cTrader Open API on the asyncio loop. Twisted runs on asyncioreactor (see
+    connectors.aio.install_asyncio_reactor, which must run before this module is imported),
+    so protocol callbacks already happen on the loop thread: requests are awaited as
+    Deferreds matched by clientMsgId, with no reactor thread and no Condition hand-off.
+    Create it with `await AsyncCTraderProvider.connect(...)`. Requests are built and
+    trendbars decoded by the same code as CTraderProvider, whose sync API it does not share.
+    """
+    _app_auth_req = CTraderProvider._app_auth_req
+    _account_auth_req = CTraderProvider._account_auth_req
+    _trendbars_req = CTraderProvider._trendbars_req
+    _tap_bars = CTraderProvider._tap_bars
+    _extract_trendbars = staticmethod(CTraderProvider._extract_trendbars)
+    _to_arrays = staticmethod(CTraderProvider._to_arrays)
+
+    def __init__(self, client_id: str, client_secret: str, access_token: str,
+                 account_id: int, host: str = "LIVE"):
+        if not _SDK_OK:
+            raise RuntimeError("ctrader-open-api SDK not installed. pip install ctrader-open-api")
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.access_token = access_token
+        self.account_id = int(account_id)
+        host = (host or "LIVE").upper()
+        self.host = EndPoints.PROTOBUF_LIVE_HOST if host == "LIVE" else EndPoints.PROTOBUF_DEMO_HOST
+        self._client = None
+        self._batch_seq = 0
+        self.tap = None
+        self.listeners = []  # called on the loop for every message (spot events etc.)
+
+    @classmethod
+    async def connect(cls, *args, timeout: float = 10.0, **kw) -> "AsyncCTraderProvider":
+        self = cls(*args, **kw)
+        await self.start(timeout=timeout)
+        return self
+
+    async def start(self, timeout: float = 10.0):
+        loop = asyncio.get_running_loop()
+        install_asyncio_reactor(loop)
+        connected = loop.create_future()
+        self._client = Client(self.host, EndPoints.PROTOBUF_PORT, TcpProtocol)
+        self._client.setConnectedCallback(lambda c: connected.done() or connected.set_result(None))
+        self._client.setMessageReceivedCallback(lambda c, msg: [fn(msg) for fn in self.listeners])
+        self._client.startService()
+        await asyncio.wait_for(connected, timeout)
+        await self._request(self._app_auth_req(), timeout=timeout)
+        await self._request(self._account_auth_req(), timeout=timeout)
+
+    async def _request(self, req, timeout: float = 15.0):
+        self._batch_seq += 1
+        d = self._client.send(req, clientMsgId=f"{_BATCH_ID}{self._batch_seq}", responseTimeoutInSeconds=timeout)
+        return await d.asFuture(asyncio.get_running_loop())
+
+    async def candle_arrays(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
+        t0 = time.perf_counter_ns()
+        bars = self._extract_trendbars(await self._request(self._trendbars_req(symbol, start, end, timeframe)))
+        self._tap_bars(bars, (symbol, start, end, timeframe), time.perf_counter_ns() - t0)
+        return self._to_arrays(bars)
+
+    async def candles_many(self, requests, return_exceptions: bool = False):
+        """Up to _MAX_IN_FLIGHT requests outstanding, one chunk per second (the server's limit)."""
+        out = []
+        for lo in range(0, len(requests), _MAX_IN_FLIGHT):
+            t0 = time.monotonic()
+            chunk = requests[lo:lo + _MAX_IN_FLIGHT]
+            out += await asyncio.gather(*(self.candle_arrays(*r) for r in chunk), return_exceptions=return_exceptions)
+            if lo + _MAX_IN_FLIGHT < len(requests):
+                await asyncio.sleep(max(0.0, 1.0 - (time.monotonic() - t0)))
+        return out
+
+    async def candles(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
+        ca = await self.candle_arrays(symbol, start, end, timeframe)
+        if ca is None:
+            return pd.DataFrame(columns=["time","open","high","low","close","volume"])
+        return ca.to_frame(expand=True)
+
+    async def close(self):
+        if self._client is not None:
+            self._client.stopService()
@@ -1,39 +1,60 @@
 """
-Vantage FIX Market Data provider: QuickFIX client that subscribes to BID/OFFER and exposes a tick queue.
+Vantage FIX Market Data provider: QuickFIX client that subscribes to BID/OFFER, keeps
+top-of-book per symbol and exposes a queue of combined {time, symbol, bid, ask} ticks.
+AsyncFIXProvider wraps one to deliver the same ticks on an asyncio loop through a batched LoopBridge.
 """
-import os, time, threading, queue, logging
+import os, time, threading, queue, logging, asyncio
 from datetime import datetime, timezone
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Callable, Iterable
 import pandas as pd
 from dotenv import load_dotenv
 
 import quickfix as fix
 import quickfix44 as fix44
 
+from .book import TopOfBook, parse_fix_time, BID, ASK, NEW, DELETE
+from .bars import BarAggregator
+from .aio import AsyncConnector, LoopBridge
+
 log = logging.getLogger("fix_provider")
 log.setLevel(logging.INFO)
 
 # ---------------- Tick bus ----------------
 class TickBus:
+    """Bounded queue between the QuickFIX thread and the recorder. A full queue drops the
+    tick rather than block the session; drops are counted (and logged once) so a recorder
+    that falls behind shows up in its stats instead of as a silent gap."""
     def __init__(self, maxsize: int = 500_000):
         self.q = queue.Queue(maxsize=maxsize)
+        self.published = 0
+        self.dropped = 0
     def put(self, x: Dict):
+        self.published += 1
         try: self.q.put_nowait(x)
-        except queue.Full: pass
+        except queue.Full:
+            if not self.dropped:
+                log.warning("TickBus full (%d): dropping ticks until the consumer catches up", self.q.maxsize)
+            self.dropped += 1
     def drain(self, max_items: int = 100_000):
         out = []
         while len(out) < max_items:
             try: out.append(self.q.get_nowait())
             except queue.Empty: break
         return out
+    def stats(self) -> Dict:
+        return {"published": self.published, "dropped": self.dropped, "queued": self.q.qsize()}
 
 # ---------------- FIX App ----------------
 class MDApp(fix.Application):
-    def __init__(self, bus: TickBus, symbols: List[str]):
+    def __init__(self, bus: Optional[TickBus], symbols: List[str], listeners: Optional[List[Callable[[Dict], None]]] = None):
         super().__init__()
         self.sessionID: Optional[fix.SessionID] = None
         self.bus = bus
         self.symbols = symbols
+        self.listeners = list(listeners or [])
+        self.book = TopOfBook()
+        self.tap = None  # connectors.cassette records raw MD messages through this
+        self.md_messages = 0
 
     def onCreate(self, sessionID): self.sessionID = sessionID
     def onLogon(self, sessionID):
@@ -57,6 +78,9 @@ class MDApp(fix.Application):
         msgtype = fix.MsgType()
         message.getHeader().getField(msgtype)
         if msgtype.getValue() in (fix.MsgType_MarketDataSnapshotFullRefresh, fix.MsgType_MarketDataIncrementalRefresh):
+            self.md_messages += 1
+            if self.tap is not None:
+                self.tap("fix", message.toString())
             self._handle_md(message)
 
     def _subscribe(self):
@@ -81,68 +105,99 @@ class MDApp(fix.Application):
 
         fix.Session.sendToTarget(req, self.sessionID)
 
+    def _md_time(self, message: fix.Message, groups) -> datetime:
+        # Prefer venue stamps: latest MDEntryDate/MDEntryTime, then SendingTime, then local clock
+        best = None
+        for grp in groups:
+            if grp.isSetField(273):
+                d = grp.getField(272) if grp.isSetField(272) else None
+                t = parse_fix_time(d, grp.getField(273))
+                if t is not None and (best is None or t > best):
+                    best = t
+        if best is None and message.getHeader().isSetField(52):
+            best = parse_fix_time(message.getHeader().getField(52))
+        return best or datetime.now(timezone.utc)
+
     def _handle_md(self, message: fix.Message):
-        # Snapshot handler
-        entries = []
+        msgtype = fix.MsgType()
+        message.getHeader().getField(msgtype)
+        snapshot = msgtype.getValue() == fix.MsgType_MarketDataSnapshotFullRefresh
+        grp_cls = (fix44.MarketDataSnapshotFullRefresh.NoMDEntries if snapshot
+                   else fix44.MarketDataIncrementalRefresh.NoMDEntries)
+        groups = []
         try:
             count = fix.NoMDEntries()
             message.getField(count)
-            n = count.getValue()
-            for i in range(1, n + 1):
-                grp = fix44.MarketDataSnapshotFullRefresh.NoMDEntries()
+            for i in range(1, count.getValue() + 1):
+                grp = grp_cls()
                 try:
                     message.getGroup(i, grp)
                 except Exception:
                     continue
-                sym = fix.Symbol(); typ = fix.MDEntryType(); px = fix.MDEntryPx()
-                try:
-                    message.getField(sym)
-                except Exception:
-                    # Some venues put symbol only per message
-                    sym_val = None
-                else:
-                    sym_val = sym.getValue()
-                try: grp.getField(typ); grp.getField(px)
-                except Exception: continue
-                ts = datetime.now(timezone.utc)
-                side = "BID" if typ.getValue() == fix.MDEntryType_BID else "ASK"
-                if sym_val is None:
-                    # fallback: attempt to read from group
-                    s2 = fix.Symbol()
-                    if grp.isSetField(s2): grp.getField(s2); sym_val = s2.getValue()
-                if sym_val:
-                    entries.append({"symbol": sym_val, "side": side, "price": float(px.getValue()), "time": ts})
+                groups.append(grp)
         except Exception:
-            # Try incremental flavor (MsgType=X)
-            try:
-                group = fix44.MarketDataIncrementalRefresh.NoMDEntries()
-                i = 1
-                while True:
-                    message.getGroup(i, group); i += 1
-                    typ = fix.MDEntryType(); px = fix.MDEntryPx(); sym = fix.Symbol()
-                    group.getField(typ); group.getField(px); 
-                    sym_val = None
-                    if group.isSetField(sym): group.getField(sym); sym_val = sym.getValue()
-                    ts = datetime.now(timezone.utc)
-                    side = "BID" if typ.getValue() == fix.MDEntryType_BID else "ASK"
-                    if sym_val:
-                        entries.append({"symbol": sym_val, "side": side, "price": float(px.getValue()), "time": ts})
-            except Exception:
-                pass
-
-        for e in entries:
-            self.bus.put(e)
+            return
+        ts = self._md_time(message, groups)
+
+        # Snapshot carries Symbol on the message; incremental carries it per entry
+        msg_sym = message.getField(55) if message.isSetField(55) else None
+        entries = []
+        for grp in groups:
+            if not grp.isSetField(269):
+                continue
+            typ = grp.getField(269)
+            if typ not in (fix.MDEntryType_BID, fix.MDEntryType_OFFER):
+                continue
+            side = BID if typ == fix.MDEntryType_BID else ASK
+            sym = grp.getField(55) if grp.isSetField(55) else msg_sym
+            action = grp.getField(279) if grp.isSetField(279) else NEW
+            px = float(grp.getField(270)) if grp.isSetField(270) else None
+            if not sym or (px is None and action != DELETE):
+                continue
+            entries.append((sym, side, px, action))
+
+        if snapshot:
+            sym = msg_sym or (entries[0][0] if entries else None)
+            recs = [self.book.apply_snapshot(sym, [(s, p) for _, s, p, _ in entries], ts)] if sym else []
+        else:
+            recs = self.book.apply_incremental(entries, ts)
+        for r in recs:
+            if r is not None:
+                for fn in self.listeners:
+                    fn(r)
+                if self.bus is not None:
+                    self.bus.put(r)
+
+def replay_md(cassette, data_dictionary: str, symbols: Optional[List[str]] = None) -> Iterable[Dict]:
+    """Raw MD messages recorded in a cassette (connectors.cassette, channel "fix") decoded by
+    the same MDApp code as live: yields {time, symbol, bid, ask} ticks, paced by the cassette."""
+    out: List[Dict] = []
+    app = MDApp(None, symbols or [], listeners=[out.append])
+    dd = fix.DataDictionary(data_dictionary)
+    want = set(symbols) if symbols else None
+    for _, raw in cassette.messages("fix"):
+        app.fromApp(fix.Message(raw.decode(), dd, False), None)
+        for r in out:
+            if want is None or r["symbol"] in want:
+                yield r
+        out.clear()
 
 # ---------------- Provider wrapper ----------------
 class VantageFIXProvider:
     """
     Spins up a QuickFIX initiator and streams ticks into a queue.
-    Drain with .drain_ticks() and persist as needed.
+    Drain with .drain_ticks() and persist as needed; rolling bid/ask bars are
+    kept in memory and served through .candles() like any other provider.
+    Extra `listeners` see every tick on the QuickFIX thread (e.g. a recorder's
+    write-ahead log); with tick_bus=False nothing is queued for drain_ticks().
     """
-    def __init__(self, cfg_path: str, symbols: List[str]):
-        self.bus = TickBus()
+    def __init__(self, cfg_path: str, symbols: List[str],
+                 timeframes: Iterable[str] = ("M1",), max_bars: int = 10_000,
+                 listeners: Iterable[Callable[[Dict], None]] = (), tick_bus: bool = True):
+        self.bars = BarAggregator(timeframes=timeframes, max_bars=max_bars)
+        self.bus = TickBus() if tick_bus else None
         settings = fix.SessionSettings(cfg_path)
-        app = MDApp(self.bus, symbols)
+        app = self.app = MDApp(self.bus, symbols, listeners=[self.bars.on_tick] + list(listeners))
         store = fix.FileStoreFactory(settings)
         logf = fix.FileLogFactory(settings)
         self.initiator = fix.SocketInitiator(app, store, settings, logf)
@@ -150,4 +205,50 @@ class VantageFIXProvider:
         time.sleep(1.0)  # allow logon handshake
 
     def drain_ticks(self, max_items=100_000):
-        return self.bus.drain(max_items=max_items)
+        return self.bus.drain(max_items=max_items) if self.bus is not None else []
+
+    in_memory = True  # candles come from the local ring buffers
+
+    def candle_arrays(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
+        return self.bars.candle_arrays(symbol, start, end, timeframe=timeframe)
+
+    def candles(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
+        """Live bid/ask OHLC (plus mid open/high/low/close) from the in-memory ring buffers."""
+        return self.bars.candles(symbol, start, end, timeframe=timeframe)
+
+
+class AsyncFIXProvider(AsyncConnector):
+    """
+    A VantageFIXProvider driven from an asyncio loop. Besides updating the provider's bars,
+    the QuickFIX thread only appends each tick to a LoopBridge; the loop wakes once per batch
+    and feeds stream_ticks() subscribers, so nothing polls. The synchronous provider stays
+    available as `.provider` (its drain_ticks() works when connected with tick_bus=True).
+    Create it with `await AsyncFIXProvider.connect(...)` (logon blocks, so it runs in the executor).
+    """
+    in_memory = True  # candles come from the provider's ring buffers
+
+    def __init__(self, provider: VantageFIXProvider, bridge: LoopBridge):
+        self.provider = provider
+        self.bridge = bridge
+
+    @classmethod
+    async def connect(cls, cfg_path: str, symbols: List[str], tick_bus: bool = False, **kw) -> "AsyncFIXProvider":
+        loop = asyncio.get_running_loop()
+        bridge = LoopBridge(loop)
+        listeners = [bridge.push] + list(kw.pop("listeners", ()))
+        provider = await loop.run_in_executor(
+            None, lambda: VantageFIXProvider(cfg_path, symbols, listeners=listeners, tick_bus=tick_bus, **kw))
+        return cls(provider, bridge)
+
+    async def candle_arrays(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
+        return self.provider.candle_arrays(symbol, start, end, timeframe=timeframe)
+
+    async def candles(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
+        return self.provider.candles(symbol, start, end, timeframe=timeframe)
+
+    def stream_ticks(self, symbols: Optional[List[str]] = None):
+        """{time, symbol, bid, ask} dicts from now on, as they arrive."""
+        return self.bridge.stream(symbols)
+
+    async def close(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.provider.initiator.stop)
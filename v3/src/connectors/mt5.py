@@ -1,5 +1,7 @@
 from datetime import datetime
+import numpy as np
 import pandas as pd
+from .base import CandleArrays, fetch_each
 try:
     import MetaTrader5 as mt5; MT5_AVAILABLE = True
 except Exception: MT5_AVAILABLE = False
@@ -10,9 +12,20 @@ class MT5Provider:
     def __del__(self):
         try: mt5.shutdown()
         except Exception: pass
-    def candles(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
+    def _rates(self, symbol, start, end, timeframe):
         tf_map = {"M1": mt5.TIMEFRAME_M1, "M5": mt5.TIMEFRAME_M5, "M15": mt5.TIMEFRAME_M15, "H1": mt5.TIMEFRAME_H1}
-        tf = tf_map.get(timeframe, mt5.TIMEFRAME_M1); rates = mt5.copy_rates_range(symbol, tf, start, end)
+        return mt5.copy_rates_range(symbol, tf_map.get(timeframe, mt5.TIMEFRAME_M1), start, end)
+    def candle_arrays(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
+        """Columns straight from the rates record array (naive times, as candles() returns)."""
+        rates = self._rates(symbol, start, end, timeframe)
+        if rates is None or not len(rates): return None
+        return CandleArrays(time=rates["time"].astype(np.int64) * 1_000_000_000, tz=None, unit="s",
+                            volume=rates["tick_volume"], **{k: rates[k].astype(np.float64) for k in ("open","high","low","close")})
+    def candles_many(self, requests, max_workers: int = 8, return_exceptions: bool = False):
+        """Serial: the terminal API is one IPC connection and not safe to call from several threads."""
+        return fetch_each(self.candle_arrays, requests, 1, return_exceptions)
+    def candles(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
+        rates = self._rates(symbol, start, end, timeframe)
         if rates is None: return pd.DataFrame(columns=["time","open","high","low","close","volume"])
         df = pd.DataFrame(rates); df["time"] = pd.to_datetime(df["time"], unit="s")
         return df[["time","open","high","low","close","tick_volume"]].rename(columns={"tick_volume":"volume"})
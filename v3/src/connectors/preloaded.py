@@ -0,0 +1,89 @@
+"""
+Load each symbol's candles for a whole span once and serve sub-ranges as slices.
+
+Used where the same history is read many times (optimiser trials, walk-forward
+windows): histories are held as CandleArrays, and candle_arrays() binary-searches
+the time column and returns views instead of going back to the provider. Requests
+for other symbols, timeframes or ranges outside the loaded span go to the wrapped
+provider. prefetch() fills it from a list of windows (Backtester's data plan) in one
+candles_many batch.
+
+With compact=True histories are held as integer prices (connectors.compact);
+Backtester compares TP/SL levels on the integers and converts only fill prices.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import pandas as pd
+
+from .base import CandleArrays, CandleRequest, candle_arrays, candles_many, data_version, fetch_each
+from .compact import symbol_digits, to_compact
+
+
+class PreloadedProvider:
+    in_memory = True
+
+    def __init__(self, provider, symbols: Iterable[str], start: datetime, end: datetime, timeframe: str = "M1",
+                 compact: bool = False, digits: Optional[Dict[str, int]] = None):
+        self.provider = provider
+        self.compact = compact
+        self.digits = digits or {}
+        self.start, self.end = pd.Timestamp(start), pd.Timestamp(end)
+        self._arrays: Dict[Tuple[str, str], CandleArrays] = {}
+        self._spans: Dict[Tuple[str, str], Tuple[int, int]] = {}  # loaded [start, end] in ns
+        for sym in symbols:
+            self.load(sym, timeframe)
+
+    def _store(self, symbol: str, timeframe: str, ca, start, end):
+        """`ca` may also be None (no bars) or the exception the provider raised; both are kept
+        for the span so repeated reads (e.g. conversion lookups) do not go back to the provider."""
+        if self.compact and isinstance(ca, CandleArrays) and ca.digits is None:
+            ca = CandleArrays.from_frame(to_compact(ca.to_frame(), digits=self.digits.get(symbol, symbol_digits(symbol))))
+        if ca is not None and not isinstance(ca, Exception) and not len(ca):
+            ca = None
+        self._arrays[(symbol, timeframe)] = ca
+        self._spans[(symbol, timeframe)] = (pd.Timestamp(start).value, pd.Timestamp(end).value)
+
+    def load(self, symbol: str, timeframe: str = "M1"):
+        if (symbol, timeframe) not in self._arrays:
+            self._store(symbol, timeframe, candle_arrays(self.provider, symbol, self.start, self.end, timeframe),
+                        self.start, self.end)
+
+    def prefetch(self, requests: List[CandleRequest], max_workers: int = 8):
+        """Load several (symbol, start, end, timeframe) windows in one candles_many batch.
+        A failed or empty window is remembered as such: reads inside it raise the same
+        error or return None, as the provider would, without another round trip."""
+        todo = [r for r in requests if not self._covers(r[0], r[1], r[2], r[3])]
+        res = candles_many(self.provider, todo, max_workers=max_workers, return_exceptions=True)
+        for (sym, start, end, tf), ca in zip(todo, res):
+            self._store(sym, tf, ca, start, end)
+
+    def histories(self):
+        """(symbol, timeframe, CandleArrays, (start_ns, end_ns)) for every loaded span with bars."""
+        for (sym, tf), ca in self._arrays.items():
+            if isinstance(ca, CandleArrays):
+                yield sym, tf, ca, self._spans[(sym, tf)]
+
+    def _covers(self, symbol, start, end, timeframe) -> bool:
+        span = self._spans.get((symbol, timeframe))
+        return span is not None and span[0] <= pd.Timestamp(start).value and pd.Timestamp(end).value <= span[1]
+
+    def candle_arrays(self, symbol: str, start: datetime, end: datetime, timeframe="M1") -> Optional[CandleArrays]:
+        """Views into the preloaded arrays; nothing is copied."""
+        if not self._covers(symbol, start, end, timeframe):
+            return candle_arrays(self.provider, symbol, start, end, timeframe=timeframe)
+        ca = self._arrays[(symbol, timeframe)]
+        if isinstance(ca, Exception):
+            raise ca
+        return ca.between(pd.Timestamp(start).value, pd.Timestamp(end).value) if ca is not None else None
+
+    def candles_many(self, requests: List[CandleRequest], max_workers: int = 8, return_exceptions: bool = False):
+        return fetch_each(self.candle_arrays, requests, 1, return_exceptions)
+
+    def data_version(self, symbol: str, timeframe="M1") -> Optional[str]:
+        return data_version(self.provider, symbol, timeframe)
+
+    def candles(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
+        if not self._covers(symbol, start, end, timeframe) or \
+                not isinstance(self._arrays[(symbol, timeframe)], CandleArrays):
+            return self.provider.candles(symbol, start, end, timeframe=timeframe)
+        return self.candle_arrays(symbol, start, end, timeframe).to_frame()
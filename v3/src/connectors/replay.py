@@ -0,0 +1,96 @@
+"""
+Replay recorded ticks through the Connector.stream_ticks interface.
+
+Reads per-symbol tick Parquet written by tools/record_fix_md (the part files of
+<dir>/<SYMBOL>/, plus a single <dir>/<SYMBOL>.parquet from older recorders; combined
+time,symbol,bid,ask rows, or legacy BID/ASK rows) and yields them merged in time
+order, either as fast as possible or at `speed` x the original pace.
+"""
+import heapq, os, time
+from typing import Iterable, List, Optional
+import numpy as np
+import pandas as pd
+
+from .base import Capabilities, Connector, Tick
+from .compact import from_compact, read_parquet
+
+
+def tick_files(tick_dir: str, symbol: str) -> List[str]:
+    """A symbol's recordings: <SYMBOL>.parquet if an older recorder left one, then the
+    <SYMBOL>/part-<first_ns>-<last_ns>-<n>.parquet files in name (= time) order."""
+    out = []
+    single = os.path.join(tick_dir, f"{symbol}.parquet")
+    if os.path.exists(single):
+        out.append(single)
+    d = os.path.join(tick_dir, symbol)
+    if os.path.isdir(d):
+        out += [os.path.join(d, n) for n in sorted(os.listdir(d)) if n.startswith("part-") and n.endswith(".parquet")]
+    return out
+
+
+def read_ticks(tick_dir: str, symbol: str) -> pd.DataFrame:
+    """Every recorded tick of `symbol` as one float frame, sorted by time."""
+    paths = tick_files(tick_dir, symbol)
+    if not paths:
+        raise FileNotFoundError(f"Ticks not found for {symbol} in {tick_dir}")
+    df = pd.concat([read_parquet(p) for p in paths], ignore_index=True)
+    return df.sort_values("time", kind="stable").reset_index(drop=True)
+
+
+def _combined(df: pd.DataFrame, symbol: str) -> pd.DataFrame:
+    if "side" in df.columns:  # legacy one-row-per-side recordings
+        df = df.copy()
+        df["time"] = pd.to_datetime(df["time"], utc=True)
+        df = df.pivot_table(index="time", columns="side", values="price", aggfunc="last").ffill()
+        df = df.rename(columns={"BID": "bid", "ASK": "ask"}).reset_index()
+    out = pd.DataFrame({"time": pd.to_datetime(df["time"], utc=True), "bid": df["bid"].astype(float),
+                        "ask": df["ask"].astype(float)})
+    out["symbol"] = symbol
+    return out.dropna().sort_values("time", kind="stable").reset_index(drop=True)
+
+
+class ReplayTickConnector(Connector):
+    name = "replay"
+    caps = Capabilities(candles=False, ticks=True, depth=False, spreads=False,
+                        place_orders=False, modify_orders=False, positions=False)
+
+    def __init__(self, tick_dir: Optional[str] = None, frames: Optional[dict] = None,
+                 speed: Optional[float] = None, start=None, end=None):
+        """`frames` maps symbol -> DataFrame and overrides `tick_dir`; speed=None means no pacing."""
+        self.tick_dir = tick_dir
+        self.frames = frames or {}
+        self.speed = speed
+        self.start = pd.Timestamp(start) if start is not None else None
+        self.end = pd.Timestamp(end) if end is not None else None
+
+    def _load(self, symbol: str) -> pd.DataFrame:
+        if symbol in self.frames:
+            df = _combined(from_compact(self.frames[symbol]), symbol)
+        else:
+            paths = tick_files(self.tick_dir or "", symbol)
+            if not paths:
+                raise FileNotFoundError(f"Ticks not found for {symbol} in {self.tick_dir}")
+            df = pd.concat([_combined(read_parquet(p), symbol) for p in paths], ignore_index=True)
+            df = df.sort_values("time", kind="stable").reset_index(drop=True)
+        if self.start is not None:
+            df = df[df["time"] >= self.start]
+        if self.end is not None:
+            df = df[df["time"] <= self.end]
+        return df
+
+    def stream_ticks(self, symbols: List[str]) -> Iterable[Tick]:
+        streams = []
+        for sym in symbols:
+            df = self._load(sym)
+            t = df["time"].values.astype("datetime64[ns]").astype(np.int64)
+            streams.append(zip(t.tolist(), df["bid"].tolist(), df["ask"].tolist(), [sym] * len(df)))
+        first_ns = None; wall0 = None
+        for t_ns, bid, ask, sym in heapq.merge(*streams, key=lambda r: r[0]):
+            if self.speed:
+                if first_ns is None:
+                    first_ns, wall0 = t_ns, time.perf_counter()
+                delay = (t_ns - first_ns) / 1e9 / self.speed - (time.perf_counter() - wall0)
+                if delay > 0:
+                    time.sleep(delay)
+            yield Tick(time=pd.Timestamp(t_ns, unit="ns", tz="UTC").to_pydatetime(), bid=bid, ask=ask,
+                       last=None, size=None, symbol=sym)
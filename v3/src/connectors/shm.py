@@ -0,0 +1,247 @@
+"""
+Shared-memory candle arrays for multi-process backtests.
+
+SharedCandleServer loads each (symbol, timeframe) history once from a regular
+provider and copies its columns into one multiprocessing.shared_memory block.
+The SharedCandleProvider it hands out is small and picklable. Worker processes
+attach to the blocks by name on first use and slice read-only numpy views, so N
+workers share one copy of the history. Only the requested window is copied into
+the DataFrame that candles() returns.
+
+Blocks are reference counted in the server process: publishing pins a block,
+acquire()/release() bracket each user (e.g. one run), and a block is unlinked
+once it is neither pinned nor acquired. Workers only ever close their mappings.
+"""
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .base import CandleArrays, CandleRequest, candle_arrays, candles_many, data_version, fetch_each
+
+Key = Tuple[str, str]  # (symbol, timeframe)
+_OWNED = set()  # block names created by a server in this process
+_FIELDS = {f for f in CandleArrays.__dataclass_fields__ if f not in ("digits", "tz", "unit")}
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    shm = shared_memory.SharedMemory(name=name)
+    if name not in _OWNED:
+        try:  # attaching must not make this process's resource tracker unlink the block at exit
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+    return shm
+
+
+class SharedCandleProvider:
+    """candles()/arrays() over published blocks; falls back to `fallback` for anything else."""
+    in_memory = True
+
+    def __init__(self, specs: Dict[Key, Dict], fallback=None):
+        self.specs = specs
+        self.fallback = fallback
+        self._shm: Dict[str, shared_memory.SharedMemory] = {}
+        self._cols: Dict[Key, Dict[str, np.ndarray]] = {}
+
+    def __getstate__(self):
+        return {"specs": self.specs, "fallback": self.fallback}
+
+    def __setstate__(self, state):
+        self.__init__(state["specs"], state["fallback"])
+
+    def _columns(self, key: Key) -> Dict[str, np.ndarray]:
+        cols = self._cols.get(key)
+        if cols is None:
+            spec = self.specs[key]
+            shm = self._shm.get(spec["name"]) or _attach(spec["name"])
+            self._shm[spec["name"]] = shm
+            cols = {}
+            for col, dtype, offset in spec["columns"]:
+                a = np.ndarray((spec["n"],), dtype=dtype, buffer=shm.buf, offset=offset)
+                a.flags.writeable = False
+                cols[col] = a
+            self._cols[key] = cols
+        return cols
+
+    def arrays(self, symbol: str, start: datetime, end: datetime, timeframe="M1") -> Dict[str, np.ndarray]:
+        """Zero-copy read-only views of rows with start <= time <= end; `time` is int64 ns (UTC)."""
+        cols = self._columns((symbol, timeframe))
+        t = cols["time"]
+        lo = np.searchsorted(t, pd.Timestamp(start).value, side="left")
+        hi = np.searchsorted(t, pd.Timestamp(end).value, side="right")
+        return {k: a[lo:hi] for k, a in cols.items()}
+
+    def _served(self, symbol: str, start: datetime, end: datetime, timeframe: str) -> bool:
+        spec = self.specs.get((symbol, timeframe))
+        if spec is None:
+            return False
+        span = spec.get("span")
+        return span is None or (span[0] <= pd.Timestamp(start).value and pd.Timestamp(end).value <= span[1])
+
+    def candle_arrays(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
+        """The arrays() views as CandleArrays (the backtester's input); no copy."""
+        if not self._served(symbol, start, end, timeframe):
+            if self.fallback is None:
+                return None
+            return candle_arrays(self.fallback, symbol, start, end, timeframe=timeframe)
+        spec = self.specs[(symbol, timeframe)]
+        if not spec["n"]:
+            return None
+        v = self.arrays(symbol, start, end, timeframe)
+        return CandleArrays(**{k: a for k, a in v.items() if k in _FIELDS}, tz=spec["tz"], unit=spec["unit"],
+                            digits=spec.get("digits"))
+
+    def candles_many(self, requests, max_workers: int = 8, return_exceptions: bool = False):
+        return fetch_each(self.candle_arrays, requests, 1, return_exceptions)
+
+    def data_version(self, symbol: str, timeframe="M1") -> Optional[str]:
+        return data_version(self.fallback, symbol, timeframe) if self.fallback is not None else None
+
+    def candles(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
+        if not self._served(symbol, start, end, timeframe):
+            if self.fallback is None:
+                return pd.DataFrame()
+            return self.fallback.candles(symbol, start, end, timeframe=timeframe)
+        spec = self.specs[(symbol, timeframe)]
+        if not spec["n"]:
+            return pd.DataFrame()
+        if spec.get("digits") is not None:
+            return self.candle_arrays(symbol, start, end, timeframe).to_frame(expand=True)
+        v = self.arrays(symbol, start, end, timeframe)
+        data = {}
+        for k, a in v.items():
+            if k == "time":
+                t = pd.to_datetime(a, unit="ns").as_unit(spec["unit"])
+                data[k] = t.tz_localize(spec["tz"]) if spec["tz"] else t
+            else:
+                data[k] = a
+        return pd.DataFrame(data)
+
+    def close(self):
+        self._cols.clear()
+        for shm in self._shm.values():
+            try:
+                shm.close()
+            except BufferError:
+                pass  # a caller still holds a view; the mapping goes with the process
+        self._shm.clear()
+
+
+class SharedCandleServer:
+    def __init__(self, provider):
+        self.provider = provider
+        self._blocks: Dict[Key, shared_memory.SharedMemory] = {}
+        self.specs: Dict[Key, Dict] = {}
+        self._refs: Dict[Key, int] = {}
+        self._pinned = set()
+
+    def publish(self, symbol: str, timeframe: str, start: datetime, end: datetime) -> Optional[Dict]:
+        """Load [start, end] once and copy it into shared memory; no-op if already published."""
+        key = (symbol, timeframe)
+        if key in self.specs:
+            return self.specs[key]
+        df = self.provider.candles(symbol, start, end, timeframe=timeframe)
+        if df is None or df.empty:
+            return None
+        df = df.sort_values("time", kind="stable")
+        times = pd.to_datetime(df["time"])
+        tz = "UTC" if times.dt.tz is not None else None
+        unit = np.datetime_data(times.values.dtype)[0]
+        arrays = {"time": times.values.astype("datetime64[ns]").astype(np.int64)}
+        for col in df.columns:
+            if col != "time" and pd.api.types.is_numeric_dtype(df[col]):
+                arrays[col] = df[col].to_numpy()
+        return self._publish(key, arrays, {"tz": tz, "unit": unit})
+
+    def publish_arrays(self, symbol: str, timeframe: str, ca: CandleArrays,
+                       span: Optional[Tuple[int, int]] = None) -> Optional[Dict]:
+        """Copy a history already held as CandleArrays (e.g. a PreloadedProvider's) as it is:
+        compact prices stay integers. With `span` (start_ns, end_ns), reads outside it go to
+        the fallback instead of returning a clipped window."""
+        key = (symbol, timeframe)
+        if key in self.specs:
+            return self.specs[key]
+        if ca is None or not len(ca):
+            return None
+        return self._publish(key, ca.columns(), {"tz": ca.tz, "unit": ca.unit, "digits": ca.digits, "span": span})
+
+    def _publish(self, key: Key, arrays: Dict[str, np.ndarray], meta: Dict) -> Dict:
+        n = len(arrays["time"])
+        layout, offset = [], 0
+        for col, a in arrays.items():
+            layout.append((col, a.dtype.str, offset))
+            offset += -(-a.nbytes // 8) * 8  # keep every column 8-byte aligned
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (col, _, off), a in zip(layout, arrays.values()):
+            np.ndarray(a.shape, dtype=a.dtype, buffer=shm.buf, offset=off)[:] = a
+        _OWNED.add(shm.name)
+        self._blocks[key] = shm
+        self.specs[key] = {"name": shm.name, "n": n, "columns": layout, **meta}
+        self._refs[key] = 1  # pinned until close()
+        self._pinned.add(key)
+        return self.specs[key]
+
+    def publish_many(self, symbols: Iterable[str], timeframe: str, start: datetime, end: datetime,
+                     fallback=True) -> SharedCandleProvider:
+        for sym in symbols:
+            self.publish(sym, timeframe, start, end)
+        return self.provider_view(fallback=fallback)
+
+    def publish_plan(self, requests: List[CandleRequest], fallback=True, max_workers: int = 8) -> SharedCandleProvider:
+        """Publish (symbol, start, end, timeframe) windows, e.g. Backtester.data_plan, from one
+        candles_many batch. A window that has no bars or fails is published as empty, so reads
+        inside it (a missing conversion pair) return no data instead of going back to the provider."""
+        todo = [r for r in requests if (r[0], r[3]) not in self.specs]
+        res = candles_many(self.provider, todo, max_workers=max_workers, return_exceptions=True)
+        for (sym, start, end, tf), ca in zip(todo, res):
+            span = (pd.Timestamp(start).value, pd.Timestamp(end).value)
+            if isinstance(ca, CandleArrays) and len(ca):
+                self.publish_arrays(sym, tf, ca, span)
+            else:
+                self.specs[(sym, tf)] = {"name": None, "n": 0, "columns": [], "span": span}
+                self._refs[(sym, tf)] = 1
+                self._pinned.add((sym, tf))
+        return self.provider_view(fallback=fallback)
+
+    def provider_view(self, fallback=True) -> SharedCandleProvider:
+        return SharedCandleProvider(dict(self.specs), self.provider if fallback else None)
+
+    # ---- reference counting (server process)
+    def acquire(self, keys: Optional[Iterable[Key]] = None):
+        for key in (self.specs if keys is None else keys):
+            self._refs[key] += 1
+
+    def release(self, keys: Optional[Iterable[Key]] = None):
+        for key in list(self.specs if keys is None else keys):
+            self._refs[key] -= 1
+            if self._refs[key] <= 0:
+                self._unlink(key)
+
+    def refcount(self, key: Key) -> int:
+        return self._refs.get(key, 0)
+
+    def _unlink(self, key: Key):
+        shm = self._blocks.pop(key, None)
+        self.specs.pop(key); self._refs.pop(key, None); self._pinned.discard(key)
+        if shm is None:  # an empty window has no block
+            return
+        try:
+            shm.close()
+        except BufferError:
+            pass
+        shm.unlink()
+        _OWNED.discard(shm.name)
+
+    def close(self):
+        """Drop the publish pins; blocks still acquired are unlinked by their last release()."""
+        pinned, self._pinned = list(self._pinned), set()
+        self.release(pinned)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
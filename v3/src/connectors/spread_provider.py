@@ -0,0 +1,65 @@
+from collections import OrderedDict
+import pandas as pd
+from .spreads import read_spreads, asof_spreads
+
+def _utc(ts) -> pd.Timestamp:
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+class SpreadAnnotatedProvider:
+    """
+    Wraps a candle provider and attaches recorded spreads at read time with an
+    as-of join (nearest prior bucket, at most `max_stale_min` old). Spreads are
+    read one day partition at a time and kept in a small LRU of (symbol, day), so
+    overlapping or shifted windows slice partitions already in memory.
+    """
+    def __init__(self, provider, spreads_dir: str, max_stale_min: float = 5.0, cache_size: int = 64):
+        self.provider = provider
+        self.spreads_dir = spreads_dir
+        self.max_stale = pd.Timedelta(minutes=max_stale_min)
+        self.cache_size = cache_size
+        self.reads = 0  # day partitions read from disk
+        self._cache = OrderedDict()
+
+    def candles_many(self, requests, max_workers: int = 8, return_exceptions: bool = False):
+        """Fetch through the wrapped provider's batch, then annotate each window here."""
+        from .base import CandleArrays, candles_many
+        raw = candles_many(self.provider, requests, max_workers=max_workers, return_exceptions=return_exceptions)
+        out = []
+        for (symbol, start, end, _), ca in zip(requests, raw):
+            if isinstance(ca, Exception):
+                out.append(ca); continue
+            df = self._annotate(symbol, start, end, ca.to_frame(expand=True) if ca is not None else None)
+            out.append(CandleArrays.from_frame(df))
+        return out
+
+    def candles(self, symbol, start, end, timeframe="M1"):
+        return self._annotate(symbol, start, end, self.provider.candles(symbol, start, end, timeframe=timeframe))
+
+    def _annotate(self, symbol, start, end, df):
+        if df is not None and not df.empty:
+            df = asof_spreads(df, self.spreads(symbol, pd.Timestamp(start) - self.max_stale, end), self.max_stale)
+        return df
+
+    def spreads(self, symbol, start, end) -> pd.DataFrame:
+        """Spread buckets for [start, end], sliced from cached day partitions."""
+        start, end = _utc(start), _utc(end)
+        days = [self._day(symbol, d) for d in pd.date_range(start.floor("D"), end.floor("D"), freq="D")]
+        parts = [d for d in days if len(d)]
+        if not parts:
+            return days[0]
+        df = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        return df[(df["bucket"] >= start) & (df["bucket"] <= end)].reset_index(drop=True)
+
+    def _day(self, symbol, day: pd.Timestamp) -> pd.DataFrame:
+        key = (symbol, day)
+        hit = self._cache.get(key)
+        if hit is not None:
+            self._cache.move_to_end(key)
+            return hit
+        self.reads += 1
+        df = read_spreads(self.spreads_dir, symbol, day, day + pd.Timedelta(days=1) - pd.Timedelta(1, "ns"))
+        self._cache[key] = df
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return df
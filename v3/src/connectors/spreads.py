@@ -0,0 +1,179 @@
+"""
+Per-minute spread aggregation and the partitioned Parquet store it is written to.
+
+Layout: <root>/<SYMBOL>/date=YYYY-MM-DD/part-<first_bucket_ns>[-<last_bucket_ns>].parquet
+Closed minutes are appended as new part files. Once a day directory holds `max_parts`
+of them they are merged into one new part, so a day stays a handful of files no
+matter how often the recorder flushes. No part is ever written twice: the merged
+part is renamed into place before the parts it replaces are deleted, so a reader
+sees the old parts, the old parts plus their merge (duplicate minutes, which
+read_spreads drops) or the merge alone, never a gap.
+"""
+import os
+from typing import Dict, List
+import pandas as pd
+
+MINUTE_NS = 60_000_000_000
+MAX_PARTS = 32
+SPREAD_COLUMNS = ["bucket", "n", "spread_pips", "spread_min", "spread_max", "spread_last",
+                  "mid", "mid_min", "mid_max", "mid_last"]
+
+
+class SpreadMinuteAggregator:
+    """Constant-memory running count/sum/min/max/last of spread and mid per (symbol, minute)."""
+    def __init__(self):
+        # sym -> [bucket_ns, n, s_sum, s_min, s_max, s_last, m_sum, m_min, m_max, m_last]
+        self._open: Dict[str, list] = {}
+        self._closed: List[tuple] = []
+
+    def add(self, symbol: str, t_ns: int, spread_pips: float, mid: float):
+        bucket = t_ns - t_ns % MINUTE_NS
+        a = self._open.get(symbol)
+        if a is not None and bucket > a[0]:
+            self._close(symbol, a)
+            a = None
+        if a is None:
+            self._open[symbol] = [bucket, 1, spread_pips, spread_pips, spread_pips, spread_pips, mid, mid, mid, mid]
+            return
+        if bucket < a[0]:
+            return  # late event for an already closed minute
+        a[1] += 1
+        a[2] += spread_pips; a[3] = min(a[3], spread_pips); a[4] = max(a[4], spread_pips); a[5] = spread_pips
+        a[6] += mid; a[7] = min(a[7], mid); a[8] = max(a[8], mid); a[9] = mid
+
+    def _close(self, symbol: str, a: list):
+        n = a[1]
+        self._closed.append((symbol, a[0], n, a[2] / n, a[3], a[4], a[5], a[6] / n, a[7], a[8], a[9]))
+
+    def close_before(self, t_ns: int):
+        """Close minutes that ended before t_ns even if no newer event arrived for them."""
+        cutoff = t_ns - t_ns % MINUTE_NS
+        for sym in [s for s, a in self._open.items() if a[0] < cutoff]:
+            self._close(sym, self._open.pop(sym))
+
+    def drain(self) -> List[tuple]:
+        out, self._closed = self._closed, []
+        return out
+
+
+def rows_to_frame(rows: List[tuple]) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=["symbol"] + SPREAD_COLUMNS)
+    df["bucket"] = pd.to_datetime(df["bucket"], utc=True)
+    return df
+
+
+def _write_part(df: pd.DataFrame, path: str, fsync: bool):
+    tmp = path + ".tmp"
+    df[SPREAD_COLUMNS].to_parquet(tmp, index=False)
+    if fsync:
+        from .wal import durable_replace
+        durable_replace(tmp, path)
+    else:
+        os.replace(tmp, path)
+
+
+def _part_names(d: str) -> List[str]:
+    return sorted(n for n in os.listdir(d) if n.startswith("part-") and n.endswith(".parquet"))
+
+
+def compact_partition(d: str, fsync: bool = False) -> List[str]:
+    """Merge the part files of one day directory into a new part-<first>-<last> file, then
+    delete the merged parts; returns the parts left. A crash before the deletes only leaves
+    duplicate minutes, which read_spreads drops."""
+    names = _part_names(d)
+    if len(names) < 2:
+        return [os.path.join(d, n) for n in names]
+    df = pd.concat([pd.read_parquet(os.path.join(d, n)) for n in names], ignore_index=True)
+    df = df.drop_duplicates(subset=["bucket"], keep="last").sort_values("bucket")
+    b = pd.to_datetime(df["bucket"], utc=True)
+    stem = f"part-{b.iloc[0].value}-{b.iloc[-1].value}"
+    name, k = f"{stem}.parquet", 0
+    while name in names:  # the same span merged before: never write over an input
+        k += 1
+        name = f"{stem}-{k}.parquet"
+    path = os.path.join(d, name)
+    _write_part(df, path, fsync)
+    for n in names:
+        os.remove(os.path.join(d, n))
+    return [path]
+
+
+def append_partitions(root: str, df: pd.DataFrame, fsync: bool = False, max_parts: int = MAX_PARTS) -> List[str]:
+    """Write closed minutes as new part files per symbol/day; returns written paths.
+    A day directory reaching `max_parts` files is compacted right after the write."""
+    written = []
+    if df.empty:
+        return written
+    for (sym, day), g in df.groupby([df["symbol"], df["bucket"].dt.strftime("%Y-%m-%d")]):
+        d = os.path.join(root, sym, f"date={day}")
+        os.makedirs(d, exist_ok=True)
+        g = g.sort_values("bucket")
+        path = os.path.join(d, f"part-{g['bucket'].iloc[0].value}.parquet")
+        _write_part(g, path, fsync)
+        if max_parts and len(_part_names(d)) >= max_parts:
+            path, = compact_partition(d, fsync)
+        written.append(path)
+    return written
+
+
+def compact_spreads(batch, root: str) -> List[str]:
+    """Aggregate one WAL segment of (spread_pips, mid) records into minute part files.
+    Segments span whole minutes, so every bucket is complete; records older than the
+    segment (late after a roll) are dropped like late events in the live aggregator."""
+    agg = SpreadMinuteAggregator()
+    keep = batch.t_ns >= batch.start_ns
+    for sym, t, sp, mid in zip(batch.names()[keep], batch.t_ns[keep].tolist(),
+                               batch.a[keep].tolist(), batch.b[keep].tolist()):
+        agg.add(sym, t, sp, mid)
+    agg.close_before(batch.end_ns)
+    return append_partitions(root, rows_to_frame(agg.drain()), fsync=True)
+
+
+def _partition_days(start: pd.Timestamp, end: pd.Timestamp) -> List[str]:
+    return [d.strftime("%Y-%m-%d") for d in pd.date_range(start.floor("D"), end.floor("D"), freq="D")]
+
+
+def read_spreads(root: str, symbol: str, start, end, columns=("bucket", "spread_pips")) -> pd.DataFrame:
+    """Spread buckets for [start, end], reading only the day partitions that overlap it.
+    Falls back to a flat <root>/<SYMBOL>.csv (bucket,spread_pips) from older recorders."""
+    start = pd.Timestamp(start); end = pd.Timestamp(end)
+    start = start.tz_localize("UTC") if start.tzinfo is None else start.tz_convert("UTC")
+    end = end.tz_localize("UTC") if end.tzinfo is None else end.tz_convert("UTC")
+    frames = []
+    sym_dir = os.path.join(root, symbol)
+    if os.path.isdir(sym_dir):
+        for day in _partition_days(start, end):
+            d = os.path.join(sym_dir, f"date={day}")
+            if not os.path.isdir(d):
+                continue
+            for name in sorted(os.listdir(d)):
+                if name.startswith("part-") and name.endswith(".parquet"):
+                    frames.append(pd.read_parquet(os.path.join(d, name), columns=list(columns)))
+    else:
+        flat = os.path.join(root, f"{symbol}.csv")
+        if os.path.exists(flat):
+            frames.append(pd.read_csv(flat, usecols=list(columns)))
+    if not frames:
+        return pd.DataFrame({c: pd.Series(dtype="float64") for c in columns}).astype({"bucket": "datetime64[ns, UTC]"})
+    df = pd.concat(frames, ignore_index=True)
+    df["bucket"] = pd.to_datetime(df["bucket"], utc=True)
+    df = df[(df["bucket"] >= start) & (df["bucket"] <= end)]
+    return df.drop_duplicates(subset=["bucket"], keep="last").sort_values("bucket").reset_index(drop=True)
+
+
+def asof_spreads(candles: pd.DataFrame, spreads: pd.DataFrame, max_stale: pd.Timedelta) -> pd.DataFrame:
+    """Attach `spread_pips` from the nearest bucket at or before each candle, within max_stale.
+    Existing non-null spread values on the candles are kept."""
+    if candles is None or candles.empty or spreads.empty:
+        return candles
+    times = pd.to_datetime(candles["time"])
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert("UTC").dt.tz_localize(None)
+    left = pd.DataFrame({"_t": times.values.astype("datetime64[ns]"), "_i": range(len(candles))}).sort_values("_t")
+    right = pd.DataFrame({"_t": spreads["bucket"].dt.tz_convert("UTC").dt.tz_localize(None).values.astype("datetime64[ns]"),
+                          "_sp": spreads["spread_pips"].values})
+    m = pd.merge_asof(left, right, on="_t", direction="backward", tolerance=max_stale).sort_values("_i")
+    out = candles.copy()
+    sp = m["_sp"].values
+    out["spread_pips"] = out["spread_pips"].fillna(pd.Series(sp, index=out.index)) if "spread_pips" in out else sp
+    return out
@@ -0,0 +1,283 @@
+"""
+Write-ahead log for the live recorders: fixed 32-byte records in rolling segment files.
+
+The recorder callback only packs a record into an in-memory buffer (no syscall, no
+pandas). A flusher thread writes and fsyncs that buffer every `fsync_sec`, so a crash
+loses at most that much. Segments roll over every `segment_ns` of record time; a
+sealed segment is handed to a compaction thread that calls `compact(batch)` (the
+Parquet write) and deletes the segment only once that returns. On startup, segments
+left behind by a crash are compacted first, and one whose time span is still open is
+truncated to its last good record and continued. Compaction is at-least-once: a crash
+between the Parquet write and the segment delete compacts that segment again.
+
+Segment <dir>/seg-<seq>-<start_ns>-<end_ns>.wal: MAGIC, then records
+    <kind:u8><pad:u8><sym:u16><t_ns:i64><a:f64><b:f64><crc32:u32>
+A SYMBOL record names `sym` (up to 16 bytes in place of a/b) before its first TICK in
+the segment; a TICK carries (t_ns, a, b), e.g. bid/ask or spread/mid. The CRC marks
+where a torn or zero-filled tail starts.
+"""
+import glob, logging, os, queue, re, struct, threading, time, zlib
+from dataclasses import dataclass
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+
+log = logging.getLogger("wal")
+
+MAGIC = b"TGBWAL1\n"
+TICK, SYMBOL = 1, 2  # record kinds
+_TICK = struct.Struct("<BxHqdd")
+_SYM = struct.Struct("<BxHq16s")
+_CRC = struct.Struct("<I")
+RECORD_SIZE = _TICK.size + _CRC.size
+_DTYPE = np.dtype([("kind", "u1"), ("pad", "u1"), ("sym", "<u2"), ("t_ns", "<i8"),
+                   ("a", "<f8"), ("b", "<f8"), ("crc", "<u4")])
+_NAME = re.compile(r"seg-(\d+)-(-?\d+)-(-?\d+)\.wal$")
+MINUTE_NS = 60_000_000_000
+
+
+def _fsync_dir(d: str):
+    try:
+        fd = os.open(d, os.O_RDONLY)
+    except OSError:
+        return  # platforms without directory handles
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def durable_replace(tmp: str, path: str):
+    """os.replace(tmp, path) that survives power loss: data, then the rename, hit the disk."""
+    fd = os.open(tmp, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
+    _fsync_dir(os.path.dirname(os.path.abspath(path)))
+
+
+def _record(body: bytes) -> bytes:
+    return body + _CRC.pack(zlib.crc32(body))
+
+
+class _Segment(NamedTuple):
+    seq: int
+    start_ns: int
+    end_ns: int
+    path: str
+
+
+@dataclass
+class WalBatch:
+    """The records of one segment as arrays; `symbols` maps sym id -> name."""
+    seq: int
+    start_ns: int
+    end_ns: int
+    symbols: Dict[int, str]
+    sym: np.ndarray
+    t_ns: np.ndarray
+    a: np.ndarray
+    b: np.ndarray
+
+    def __len__(self):
+        return len(self.t_ns)
+
+    def names(self) -> np.ndarray:
+        lut = np.array([self.symbols.get(i) for i in range(max(self.symbols, default=-1) + 1)], dtype=object)
+        return lut[self.sym] if len(self.sym) else np.array([], dtype=object)
+
+    def frame(self, a: str = "bid", b: str = "ask"):
+        import pandas as pd
+        return pd.DataFrame({"time": pd.to_datetime(self.t_ns, utc=True), "symbol": self.names(),
+                             a: self.a, b: self.b})
+
+
+def read_segment(path: str) -> Tuple[WalBatch, int]:
+    """Decode a segment up to its first bad record; returns (batch, valid bytes)."""
+    m = _NAME.search(os.path.basename(path))
+    seq, start, end = (int(g) for g in m.groups())
+    with open(path, "rb") as f:
+        buf = f.read()
+    n = (len(buf) - len(MAGIC)) // RECORD_SIZE if buf.startswith(MAGIC) else 0
+    recs = np.frombuffer(buf, dtype=_DTYPE, count=n, offset=len(MAGIC)) if n > 0 else np.zeros(0, _DTYPE)
+    mv = memoryview(buf)
+    good = 0
+    for kind, crc in zip(recs["kind"].tolist(), recs["crc"].tolist()):
+        o = len(MAGIC) + good * RECORD_SIZE
+        if kind not in (TICK, SYMBOL) or zlib.crc32(mv[o:o + _TICK.size]) != crc:
+            break
+        good += 1
+    recs = recs[:good]
+    symbols = {}
+    for i in np.flatnonzero(recs["kind"] == SYMBOL).tolist():
+        o = len(MAGIC) + i * RECORD_SIZE
+        symbols[int(recs["sym"][i])] = bytes(mv[o + 12:o + 28]).rstrip(b"\0").decode()
+    ticks = recs[recs["kind"] == TICK]
+    batch = WalBatch(seq, start, end, symbols, ticks["sym"].copy(), ticks["t_ns"].copy(),
+                     ticks["a"].copy(), ticks["b"].copy())
+    return batch, (len(MAGIC) + good * RECORD_SIZE) if buf.startswith(MAGIC) else 0
+
+
+class WriteAheadLog:
+    """
+    append(symbol, t_ns, a, b) from the hot callback; compact(batch) runs on a background
+    thread once per sealed segment. close() seals the open segment and waits for compaction.
+    """
+    def __init__(self, directory: str, compact: Callable[[WalBatch], None], segment_ns: int = MINUTE_NS,
+                 fsync_sec: float = 0.2, clock: Callable[[], int] = time.time_ns):
+        os.makedirs(directory, exist_ok=True)
+        self.dir = directory
+        self.compact = compact
+        self.segment_ns = int(segment_ns)
+        self.fsync_sec = fsync_sec
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}          # symbol -> sym id, for the life of the log
+        self._next_id = 0                       # ids are never reused, even after adopting a segment
+        self._seg: Optional[_Segment] = None    # open segment
+        self._seg_syms = set()                  # sym ids already named in the open segment
+        self._buf = bytearray()                 # records of the open segment not yet written
+        self._sealed: List[Tuple[_Segment, bytes]] = []
+        self._files: Dict[int, object] = {}     # seq -> file, flusher thread only
+        self._seq = 0
+        self._prev_end = 0
+        self.appended = 0
+        self.fsyncs = 0
+        self.compacted = 0
+        self.recovered = 0
+        self.errors = 0
+        self._todo: "queue.Queue[Optional[_Segment]]" = queue.Queue()
+        self._recover()
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="wal-flush", daemon=True)
+        self._compactor = threading.Thread(target=self._compact_loop, name="wal-compact", daemon=True)
+        self._flusher.start()
+        self._compactor.start()
+
+    # ---- hot path
+    def append(self, symbol: str, t_ns: int, a: float, b: float):
+        with self._lock:
+            if self._seg is None or t_ns >= self._seg.end_ns:
+                self._roll(t_ns)
+            sid = self._ids.get(symbol)
+            if sid is None:
+                sid = self._ids[symbol] = self._next_id
+                self._next_id += 1
+            if sid not in self._seg_syms:
+                self._seg_syms.add(sid)
+                self._buf += _record(_SYM.pack(SYMBOL, sid, 0, symbol.encode()[:16]))
+            self._buf += _record(_TICK.pack(TICK, sid, t_ns, a, b))
+            self.appended += 1
+
+    def _seal(self):
+        self._sealed.append((self._seg, bytes(self._buf)))
+        self._prev_end = self._seg.end_ns
+        self._seg, self._buf = None, bytearray()
+        self._seg_syms = set()
+
+    def _roll(self, t_ns: int):
+        if self._seg is not None:
+            self._seal()
+        # never reopen a span that was already sealed: late records join the next segment
+        start = max(t_ns - t_ns % self.segment_ns, self._prev_end)
+        self._seq += 1
+        end = start + self.segment_ns
+        self._seg = _Segment(self._seq, start, end, os.path.join(self.dir, f"seg-{self._seq:08d}-{start}-{end}.wal"))
+
+    # ---- flusher
+    def _file(self, seg: _Segment):
+        f = self._files.get(seg.seq)
+        if f is None:
+            f = self._files[seg.seq] = open(seg.path, "ab")
+            if f.tell() == 0:
+                f.write(MAGIC)
+                _fsync_dir(self.dir)
+        return f
+
+    def sync(self, seal: bool = False):
+        """Write and fsync everything appended so far; seal the open segment once its span
+        has passed (or now, with seal=True) and queue sealed segments for compaction."""
+        with self._lock:
+            if self._seg is not None and (seal or self.clock() >= self._seg.end_ns):
+                self._seal()
+            sealed, self._sealed = self._sealed, []
+            seg, buf = self._seg, self._buf
+            self._buf = bytearray()
+        for s, data in sealed:
+            f = self._file(s)
+            f.write(data)
+            f.flush(); os.fsync(f.fileno()); f.close()
+            del self._files[s.seq]
+            self.fsyncs += 1
+            self._todo.put(s)
+        if seg is not None and buf:
+            f = self._file(seg)
+            f.write(buf)
+            f.flush(); os.fsync(f.fileno())
+            self.fsyncs += 1
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.fsync_sec):
+            try:
+                self.sync()
+            except Exception:
+                self.errors += 1
+                log.exception("WAL sync failed")
+        self.sync(seal=True)
+
+    # ---- compaction
+    def _compact_segment(self, path: str, batch: Optional[WalBatch] = None) -> bool:
+        if batch is None:
+            batch, _ = read_segment(path)
+        try:
+            if len(batch):
+                self.compact(batch)
+        except Exception:
+            self.errors += 1
+            log.exception("WAL compaction failed, keeping %s for the next start", path)
+            return False
+        os.remove(path)
+        self.compacted += len(batch)
+        return True
+
+    def _compact_loop(self):
+        while True:
+            seg = self._todo.get()
+            if seg is None:
+                return
+            self._compact_segment(seg.path)
+
+    def _recover(self):
+        paths = sorted(glob.glob(os.path.join(self.dir, "seg-*.wal")))
+        now = self.clock()
+        for i, path in enumerate(paths):
+            batch, valid = read_segment(path)
+            self._seq = max(self._seq, batch.seq)
+            self.recovered += len(batch)
+            if i == len(paths) - 1 and now < batch.end_ns:
+                self._adopt(path, batch, valid)
+                continue
+            self._compact_segment(path, batch)
+            self._prev_end = max(self._prev_end, batch.end_ns)
+        if paths:
+            log.info("WAL recovered %d records from %d segment(s) in %s", self.recovered, len(paths), self.dir)
+
+    def _adopt(self, path: str, batch: WalBatch, valid: int):
+        """Continue a segment whose span is still open, after cutting any torn tail."""
+        with open(path, "r+b") as f:
+            f.truncate(valid)
+        self._seg = _Segment(batch.seq, batch.start_ns, batch.end_ns, path)
+        self._ids = {name: sid for sid, name in batch.symbols.items()}
+        self._next_id = max(batch.symbols, default=-1) + 1
+        self._seg_syms = set(batch.symbols)
+
+    def stats(self) -> Dict:
+        return {"appended": self.appended, "fsyncs": self.fsyncs, "compacted": self.compacted,
+                "recovered": self.recovered, "pending_segments": self._todo.qsize(), "errors": self.errors}
+
+    def close(self):
+        self._stop.set()
+        self._flusher.join()
+        self._todo.put(None)
+        self._compactor.join()
@@ -0,0 +1,97 @@
+"""
+Streaming trade-log writers. Trades are written in batches while the engine runs,
+so a late crash keeps everything already flushed.
+
+- parquet: a dataset directory of atomically renamed part files
+- arrow:   an Arrow IPC stream (readable up to the last complete batch, mmap-friendly)
+- csv:     appended text, header once
+
+Run metadata (parameters, fingerprints) is embedded in the Arrow/Parquet schema and
+the final summary is written to a `<path>.meta.json` sidecar on close. Metadata known
+only once the run has loaded its data (the data fingerprint) is added with annotate()
+before the first batch.
+"""
+import json, os
+from typing import Dict, Optional
+
+EXPORT_FORMATS = ("csv", "parquet", "arrow")
+_SUFFIX = {"parquet": "", "arrow": ".arrow"}  # parquet is a directory
+
+
+def _meta_bytes(metadata: Dict) -> Dict[bytes, bytes]:
+    return {b"run": json.dumps(metadata, default=str, sort_keys=True).encode()}
+
+
+class TradeLogWriter:
+    """Each writer replaces the previous log at `path`. A `.csv` path (the CLI default)
+    given with another format takes that format's suffix instead; see `.path`."""
+    def __init__(self, path: str, fmt: str = "csv", metadata: Optional[Dict] = None):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        if fmt != "csv" and path.lower().endswith(".csv"):
+            path = path[:-4] + _SUFFIX[fmt]
+        self.path = path
+        self.fmt = fmt
+        self.metadata = dict(metadata or {})
+        self.rows = 0
+        self._parts = 0
+        self._ipc = None
+        self._sink = None
+        if fmt == "parquet":
+            os.makedirs(path, exist_ok=True)
+            for name in os.listdir(path):  # parts of an earlier run would be read back with this one
+                if name.startswith("part-") and name.endswith((".parquet", ".parquet.tmp")):
+                    os.remove(os.path.join(path, name))
+        elif fmt == "csv" and os.path.exists(path):
+            os.remove(path)
+
+    def annotate(self, **metadata):
+        """Add run metadata to the schema of every batch from the first on (and to the sidecar)."""
+        if self.rows:
+            raise ValueError("annotate() after the first batch: its schema metadata is already written")
+        self.metadata.update(metadata)
+
+    def write(self, buf, lo: int, hi: int):
+        """Write rows [lo, hi) of a TradeBuffer."""
+        if hi <= lo:
+            return
+        if self.fmt == "csv":
+            buf.to_frame(lo, hi).to_csv(self.path, mode="a", header=self.rows == 0, index=False)
+        else:
+            table = buf.to_arrow(lo, hi)
+            table = table.replace_schema_metadata(_meta_bytes(self.metadata))
+            if self.fmt == "parquet":
+                import pyarrow.parquet as pq
+                part = os.path.join(self.path, f"part-{self._parts:05d}.parquet")
+                pq.write_table(table, part + ".tmp")
+                os.replace(part + ".tmp", part)
+                self._parts += 1
+            else:
+                import pyarrow as pa
+                if self._ipc is None:
+                    self._sink = pa.OSFile(self.path, "wb")
+                    self._ipc = pa.ipc.new_stream(self._sink, table.schema)
+                self._ipc.write_table(table)
+                self._sink.flush()
+        self.rows += hi - lo
+
+    def close(self, extra: Optional[Dict] = None):
+        if self._ipc is not None:
+            self._ipc.close(); self._sink.close()
+            self._ipc = self._sink = None
+        meta = dict(self.metadata, **(extra or {}), rows=self.rows, format=self.fmt)
+        with open(self.path.rstrip("/\\") + ".meta.json", "w") as f:
+            json.dump(meta, f, default=str, indent=2, sort_keys=True)
+
+
+def read_trade_log(path: str, fmt: Optional[str] = None):
+    """Load a streamed trade log back into a DataFrame (memory-mapped for arrow)."""
+    import pandas as pd
+    fmt = fmt or ("parquet" if os.path.isdir(path) else "arrow" if path.endswith((".arrow", ".arrows")) else "csv")
+    if fmt == "csv":
+        return pd.read_csv(path, parse_dates=["entry_time", "exit_time"])
+    if fmt == "parquet":
+        return pd.read_parquet(path)
+    import pyarrow as pa
+    with pa.memory_map(path) as src:
+        return pa.ipc.open_stream(src).read_all().to_pandas()
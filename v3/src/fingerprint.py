@@ -0,0 +1,38 @@
+"""
+Cheap, stable content hashes for run metadata and cache keys.
+"""
+import hashlib
+import numpy as np
+import pandas as pd
+
+def signals_fingerprint(signals) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for s in signals:
+        h.update(f"{pd.Timestamp(s.dt).value}|{s.symbol}|{s.side}|{s.entry!r}|{s.sl!r}|{list(s.tps)!r}\n".encode())
+    return h.hexdigest()
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """Hash of a candle window: shape, column names and the raw bytes of every column."""
+    h = hashlib.blake2b(digest_size=16)
+    if df is None or df.empty:
+        return h.hexdigest()
+    h.update(f"{len(df)}|{','.join(map(str, df.columns))}".encode())
+    for c in df.columns:
+        a = df[c].values
+        if a.dtype == object:
+            a = pd.util.hash_pandas_object(df[c], index=False).values
+        elif getattr(a.dtype, "tz", None) is not None or str(a.dtype).startswith("datetime64"):
+            a = pd.DatetimeIndex(df[c]).as_unit("ns").asi8
+        h.update(np.ascontiguousarray(a).view(np.uint8).tobytes())
+    return h.hexdigest()
+
+def arrays_fingerprint(ca) -> str:
+    """Hash of a candle window given as connectors.base.CandleArrays (same idea as frame_fingerprint)."""
+    h = hashlib.blake2b(digest_size=16)
+    if ca is None or not len(ca):
+        return h.hexdigest()
+    cols = ca.columns()
+    h.update(f"{len(ca)}|{','.join(cols)}|{ca.digits}".encode())
+    for a in cols.values():
+        h.update(np.ascontiguousarray(a).view(np.uint8))  # hashed in place, no bytes copy
+    return h.hexdigest()
@@ -0,0 +1,163 @@
+"""
+Live Telegram signal listener: Telethon NewMessage/MessageEdited handlers parse each post
+as it arrives and publish Signal objects on an in-process asyncio bus.
+
+Per-message latency (receive -> parse -> publish) is kept in log-bucketed histograms.
+FakeEventSource drives the same handler path offline (tests, replays).
+"""
+import asyncio, bisect, math, time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+from .signal_parser import Signal, parse_signals_from_messages
+
+
+class LatencyHistogram:
+    """Log-spaced buckets from 1us to ~100s; cheap to record, approximate percentiles."""
+    def __init__(self, lo_ns: int = 1_000, hi_ns: int = 100_000_000_000, per_decade: int = 10):
+        n = int(round(per_decade * math.log10(hi_ns / lo_ns))) + 1
+        self.bounds = [int(lo_ns * 10 ** (i / per_decade)) for i in range(n)]
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.n = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns: int):
+        self.counts[bisect.bisect_left(self.bounds, ns)] += 1
+        self.n += 1
+        self.total_ns += ns
+        self.max_ns = max(self.max_ns, ns)
+
+    def percentile(self, q: float) -> Optional[int]:
+        """Upper bound (ns) of the bucket holding the q-th percentile."""
+        if not self.n:
+            return None
+        target = q / 100.0 * self.n
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= target and c:
+                return self.bounds[i] if i < len(self.bounds) else self.max_ns
+        return self.max_ns
+
+    def summary(self) -> Dict:
+        us = lambda v: None if v is None else v / 1_000.0
+        return {"n": self.n, "mean_us": us(self.total_ns / self.n) if self.n else None,
+                "p50_us": us(self.percentile(50)), "p99_us": us(self.percentile(99)), "max_us": us(self.max_ns)}
+
+
+class SignalBus:
+    """Fan-out of published signals to every subscriber's asyncio.Queue."""
+    def __init__(self):
+        self._subs: List[asyncio.Queue] = []
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, maxsize: int = 10_000) -> asyncio.Queue:
+        q = asyncio.Queue(maxsize=maxsize)
+        self._subs.append(q)
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue):
+        if q in self._subs:
+            self._subs.remove(q)
+
+    def publish(self, sig: Signal):
+        self.published += 1
+        for q in self._subs:
+            try:
+                q.put_nowait(sig)
+            except asyncio.QueueFull:
+                self.dropped += 1
+
+
+class LiveSignalListener:
+    """Edits of a message seen within `dedup_window` are republished only if their levels changed;
+    older message ids are forgotten, so an edit after that is published again."""
+    def __init__(self, channel, bus: SignalBus,
+                 parser: Callable[[List[Dict]], List[Signal]] = parse_signals_from_messages,
+                 dedup_window: timedelta = timedelta(hours=24)):
+        self.channel = channel
+        self.bus = bus
+        self.parser = parser
+        self.lat_parse = LatencyHistogram()
+        self.lat_publish = LatencyHistogram()
+        self.lat_total = LatencyHistogram()
+        self.messages = 0
+        self.edits = 0
+        self.dedup_window = dedup_window
+        self._last: Dict[int, tuple] = {}  # message id -> (last published levels, post date), oldest first
+        self._newest: Optional[datetime] = None
+
+    def attach(self, client):
+        """Register Telethon handlers on a (connected or not yet started) TelegramClient."""
+        from telethon import events
+        chats = int(self.channel) if str(self.channel).lstrip("-").isdigit() else self.channel
+        async def on_new(ev): await self.on_event(ev, edited=False)
+        async def on_edit(ev): await self.on_event(ev, edited=True)
+        client.add_event_handler(on_new, events.NewMessage(chats=chats))
+        client.add_event_handler(on_edit, events.MessageEdited(chats=chats))
+
+    async def on_event(self, event, edited: bool = False):
+        self.handle(event.message, edited=edited, received_ns=time.perf_counter_ns())
+
+    def handle(self, msg, edited: bool = False, received_ns: Optional[int] = None) -> List[Signal]:
+        t0 = received_ns if received_ns is not None else time.perf_counter_ns()
+        self.messages += 1
+        self.edits += int(edited)
+        text = getattr(msg, "message", None)
+        if not text:
+            return []
+        date = msg.date or datetime.now(timezone.utc)
+        fresh = self._expire(date)
+        sigs = self.parser([{"id": msg.id, "date": date, "text": text}])
+        t1 = time.perf_counter_ns()
+        self.lat_parse.record(t1 - t0)
+        out = []
+        for sig in sigs:
+            key = (sig.side, sig.symbol, sig.entry, sig.sl, tuple(sig.tps))
+            if edited and self._last.get(msg.id, (None,))[0] == key:
+                continue  # edit that did not change the levels
+            if fresh:
+                self._last[msg.id] = (key, date)
+            self.bus.publish(sig)
+            out.append(sig)
+        if out:
+            t2 = time.perf_counter_ns()
+            self.lat_publish.record(t2 - t1)
+            self.lat_total.record(t2 - t0)
+        return out
+
+    def _expire(self, date: datetime) -> bool:
+        """Forget message ids posted before the window; False if `date` itself is that old."""
+        if self._newest is None or date > self._newest:
+            self._newest = date
+        cutoff = self._newest - self.dedup_window
+        while self._last:
+            mid = next(iter(self._last))
+            if self._last[mid][1] >= cutoff:
+                break
+            del self._last[mid]
+        return date >= cutoff
+
+    def latency_summary(self) -> Dict:
+        return {"parse": self.lat_parse.summary(), "publish": self.lat_publish.summary(),
+                "total": self.lat_total.summary(), "messages": self.messages, "edits": self.edits,
+                "published": self.bus.published, "dropped": self.bus.dropped}
+
+
+class FakeEventSource:
+    """Offline stand-in for Telethon: feeds Telethon-shaped events into a listener."""
+    def __init__(self, listener: LiveSignalListener):
+        self.listener = listener
+        self._next_id = 1
+
+    async def post(self, text: str, date: Optional[datetime] = None, msg_id: Optional[int] = None,
+                   edited: bool = False):
+        if msg_id is None:
+            msg_id = self._next_id; self._next_id += 1
+        msg = SimpleNamespace(id=msg_id, date=date or datetime.now(timezone.utc), message=text)
+        await self.listener.on_event(SimpleNamespace(message=msg), edited=edited)
+        await asyncio.sleep(0)  # let subscribers run, like a real event loop tick
+        return msg_id
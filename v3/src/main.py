@@ -1,21 +1,18 @@
 import argparse, json, os
 from datetime import datetime, timezone
-from dotenv import load_dotenv
-import pandas as pd
 
-from .telegram_client import fetch_messages
-from .signal_parser import parse_signals_from_messages
-from .backtester import Backtester
-from .data_providers.mt5_provider import MT5Provider, MT5_AVAILABLE
+# Heavy dependencies (pandas, Telethon, broker SDKs) are imported on the code path
+# that needs them, so `--help` and argument errors stay fast.
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
 
 
-def parse_args():
+def build_parser():
     p = argparse.ArgumentParser(description="Telegram FX Signal Backtester")
     # Core
     p.add_argument("--channel", required=True)
     p.add_argument("--since", required=True)
     p.add_argument("--until", required=True)
-    p.add_argument("--data-source", choices=["mt5", "csv", "ctrader", "fix"], default="csv")
+    p.add_argument("--data-source", choices=["mt5", "csv", "ctrader", "fix", "cassette"], default="csv")
     p.add_argument("--timeframe", choices=["M1", "M5", "M15", "H1"], default="M1")
 
     # Account + sizing
@@ -37,9 +34,44 @@ def parse_args():
     p.add_argument("--symbol-map", type=str, default="{}")
     p.add_argument("--contract-map", type=str, default="{}")
     p.add_argument("--conv-map", type=str, default="{}")
+    p.add_argument("--symbol-specs", type=str, default=None,
+                   help="Symbol registry JSON (digits, pip position, contract size; see tools/sync_symbols). "
+                        "Default: $SYMBOL_SPECS or data/symbols.json when present")
+
+    # Record/replay at the connector boundary (connectors.cassette)
+    p.add_argument("--record-cassette", type=str, default=None,
+                   help="Also record every market-data response into this cassette file")
+    p.add_argument("--cassette", type=str, default=None, help="--data-source cassette: recorded file to serve")
+    p.add_argument("--cassette-speed", type=float, default=None,
+                   help="Replay recorded latencies at this multiple of real time (default: no waiting)")
+
+    # Recorded spreads (as-of joined onto candles at read time)
+    p.add_argument("--spreads-dir", type=str, default=None)
+    p.add_argument("--spread-max-stale-min", type=float, default=5.0)
 
     # IO
     p.add_argument("--export", type=str, default="backtest_results.csv")
+    p.add_argument("--export-format", choices=["csv", "parquet", "arrow"], default="csv",
+                   help="parquet writes a directory of part files; arrow writes an IPC stream")
+    p.add_argument("--export-batch", type=int, default=10_000, help="Trades per streamed batch")
+
+    # Parallel path simulation (phase 1); the equity pass stays ordered
+    p.add_argument("--workers", type=int, default=1, help="Processes for per-signal path simulation")
+    p.add_argument("--compact-prices", action="store_true",
+                   help="Hold preloaded candles as integer prices (optimiser / walk-forward); TP/SL checks run on integers")
+
+    # Path-result cache (reruns that only change sizing skip the bar simulation)
+    p.add_argument("--path-cache", type=str, default=None, help="Directory for cached per-signal path results")
+    p.add_argument("--path-cache-mb", type=int, default=256)
+
+    # Entry-latency sensitivity
+    p.add_argument("--entry-delays", type=str, default=None,
+                   help="e.g. 0,5s,30s,1m,5m: also write a P&L-vs-entry-delay curve to <export>.delays.csv (full runs only)")
+
+    # Incremental runs
+    p.add_argument("--resume", action="store_true",
+                   help="Continue the persisted run for this channel/config: only new messages and open trades are simulated")
+    p.add_argument("--state-dir", type=str, default="backtests/state")
 
     # cTrader (runtime params; no env coupling)
     p.add_argument("--ctrader-client-id")
@@ -52,12 +84,15 @@ def parse_args():
     p.add_argument("--fix-cfg", help="Path to FIX .cfg")
     p.add_argument("--fix-symbols", help="Comma-separated symbols for FIX MD")
 
-    return p.parse_args()
+    return p
+
+
+def parse_args(argv=None):
+    return build_parser().parse_args(argv)
 
 
 def get_data_provider(args):
     if args.data_source == "ctrader":
-        from .data_providers.ctrader_provider import CTraderProvider
         required = [
             args.ctrader_client_id,
             args.ctrader_client_secret,
@@ -66,6 +101,7 @@ def get_data_provider(args):
         ]
         if not all(required):
             raise RuntimeError("Missing --ctrader-* params (client-id, client-secret, access-token, account-id).")
+        from .connectors.ctrader import CTraderProvider
         return CTraderProvider(
             client_id=args.ctrader_client_id,
             client_secret=args.ctrader_client_secret,
@@ -77,47 +113,33 @@ def get_data_provider(args):
     if args.data_source == "fix":
         if not args.fix_cfg or not args.fix_symbols:
             raise RuntimeError("--fix-cfg and --fix-symbols are required for FIX market data.")
-        from .data_providers.fix_provider import VantageFIXProvider
+        from .connectors.fix import VantageFIXProvider
         syms = [s.strip() for s in args.fix_symbols.split(",") if s.strip()]
-        return VantageFIXProvider(cfg_path=args.fix_cfg, symbols=syms)
+        return VantageFIXProvider(cfg_path=args.fix_cfg, symbols=syms, timeframes=(args.timeframe,))
+
+    if args.data_source == "cassette":
+        if not args.cassette:
+            raise RuntimeError("--cassette is required for --data-source cassette.")
+        from .connectors.cassette import CassetteConnector
+        return CassetteConnector(args.cassette, speed=args.cassette_speed)
 
     if args.data_source == "mt5":
+        from .connectors.mt5 import MT5Provider, MT5_AVAILABLE
         if not MT5_AVAILABLE:
             raise RuntimeError("MetaTrader5 not available on this platform.")
         return MT5Provider()
 
     # csv (default)
-    class CSVProvider:
-        def candles(self, symbol: str, start: datetime, end: datetime, timeframe="M1"):
-            path = os.path.join(os.path.dirname(__file__), "..", "data", f"{symbol}.csv")
-            if not os.path.exists(path):
-                raise FileNotFoundError(f"CSV not found: {path}")
-            df = pd.read_csv(path, parse_dates=["time"])
-            df = df[(df["time"] >= pd.Timestamp(start)) & (df["time"] <= pd.Timestamp(end))]
-            return df.sort_values("time").reset_index(drop=True)
-
-    return CSVProvider()
-    
+    from .connectors.csv_provider import CSVConnector
+    return CSVConnector(data_dir=DATA_DIR)
+
 # provider factory -> connector factory
-def get_connector(args) -> Connector:
-    if args.data_source == "ctrader":
-        from src.connectors.ctrader import CTraderConnector
-        return CTraderConnector(
-            client_id=args.ctrader_client_id, client_secret=args.ctrader_client_secret,
-            access_token=args.ctrader_access_token, account_id=args.ctrader_account_id,
-            host=args.ctrader_host
-        )
-    if args.data_source == "fix":
-        from src.connectors.fix import FIXConnector
-        return FIXConnector(cfg_path=args.fix_cfg, symbols=[s.strip() for s in args.fix_symbols.split(",")])
-    if args.data_source == "mt5":
-        from src.connectors.mt5 import MT5Connector
-        return MT5Connector()
-    from src.connectors.csv_provider import CSVConnector
-    return CSVConnector()
+def get_connector(args):
+    return get_data_provider(args)
 
 def load_env_defaults(args):
     # Only non-secret defaults; safe to keep
+    from dotenv import load_dotenv
     load_dotenv()
     args.lot = args.lot or float(os.getenv("DEFAULT_LOT", "0.1"))
     args.deposit = args.deposit or float(os.getenv("DEFAULT_DEPOSIT", "1000"))
@@ -126,43 +148,29 @@ def load_env_defaults(args):
     return args
 
 
-def main():
-    args = load_env_defaults(parse_args())
-
-    symbol_map = json.loads(args.symbol_map)
-    contract_map = json.loads(args.contract_map)
-    conv_map = json.loads(args.conv_map)
-
-    since = datetime.fromisoformat(args.since).replace(tzinfo=timezone.utc)
-    until = datetime.fromisoformat(args.until).replace(tzinfo=timezone.utc)
-
+def build_backtester(args, provider):
+    from .backtester import Backtester
+    from .symbols import SymbolRegistry, default_registry, set_default_registry
+    if getattr(args, "symbol_specs", None):
+        set_default_registry(SymbolRegistry.load(args.symbol_specs))  # also read by compact storage
+    path_cache = None
+    if args.path_cache:
+        from .sim_cache import PathCache
+        path_cache = PathCache(args.path_cache, max_bytes=args.path_cache_mb * 1024 * 1024)
     tp_weights = None
     if args.tp_weights:
         tw = [float(x) for x in args.tp_weights.split(",") if x.strip()]
         if sum(tw) > 0:
             tp_weights = tw
-
-    print("[1/4] Fetching Telegram messages...")
-    msgs = fetch_messages(args.channel, since, until)
-    print(f"Fetched {len(msgs)} messages.")
-
-    print("[2/4] Parsing trading signals...")
-    signals = parse_signals_from_messages(msgs)
-    print(f"Parsed {len(signals)} candidate signals.")
-
-    print("[3/4] Loading market data via", args.data_source.upper())
-    provider = get_data_provider(args)
-
-    print("[4/4] Running backtest...")
-    bt = Backtester(
+    return Backtester(
         provider=provider,
         default_lot=args.lot,
         deposit=args.deposit,
         leverage=args.leverage,
         account_ccy=args.account_ccy,
-        symbol_map=symbol_map,
-        contract_map=contract_map,
-        conv_map=conv_map,
+        symbol_map=json.loads(args.symbol_map),
+        contract_map=json.loads(args.contract_map),
+        conv_map=json.loads(args.conv_map),
         exit_rule=args.exit,
         tp_weights=tp_weights,
         risk_pct=args.risk_pct,
@@ -171,16 +179,86 @@ def main():
         commission_per_lot=args.commission_per_lot,
         time_stop_min=args.time_stop_min,
         timeframe=args.timeframe,
+        path_cache=path_cache,
+        symbols=default_registry(),
     )
 
-    report = bt.run(signals, since, until)
+
+def load_provider(args):
+    provider = get_data_provider(args)
+    if getattr(args, "record_cassette", None):
+        from .connectors.cassette import RecordingConnector
+        provider = RecordingConnector(provider, args.record_cassette)
+    if args.spreads_dir:
+        from .connectors.spread_provider import SpreadAnnotatedProvider
+        provider = SpreadAnnotatedProvider(provider, args.spreads_dir, max_stale_min=args.spread_max_stale_min)
+    return provider
+
+
+def main():
+    args = load_env_defaults(parse_args())
+
+    since = datetime.fromisoformat(args.since).replace(tzinfo=timezone.utc)
+    until = datetime.fromisoformat(args.until).replace(tzinfo=timezone.utc)
+
+    from .telegram_client import fetch_messages
+    from .signal_parser import parse_signals_from_messages
+
+    print("[1/4] Loading market data via", args.data_source.upper())
+    bt = build_backtester(args, load_provider(args))
+
+    state = None
+    fetch_since = since
+    if args.resume:
+        from .run_state import RunState
+        state = RunState.load(args.state_dir, args.channel, bt.params(), since)
+        if state.exists:
+            fetch_since = state.last_message_date or since
+            print(f"Resuming from {state.until.isoformat()} ({len(state.pending)} pending signals)")
+
+    print("[2/4] Fetching Telegram messages...")
+    msgs = fetch_messages(args.channel, fetch_since, until)
+    if state is not None:
+        msgs = state.observe_messages(msgs)
+    print(f"Fetched {len(msgs)} messages.")
+
+    print("[3/4] Parsing trading signals...")
+    signals = parse_signals_from_messages(msgs)
+    print(f"Parsed {len(signals)} candidate signals.")
+
+    print("[4/4] Running backtest...")
+    from .export import TradeLogWriter
+    from .fingerprint import signals_fingerprint
+    writer = TradeLogWriter(args.export, fmt=args.export_format, metadata={
+        "channel": args.channel, "since": since.isoformat(), "until": until.isoformat(),
+        "data_source": args.data_source, "params": bt.params(),
+        "signals_fingerprint": signals_fingerprint(signals),
+    })
+    print("Streaming trade log ->", writer.path, f"({args.export_format})")
+    if state is not None:
+        from .run_state import run_incremental
+        report = run_incremental(bt, state, signals, until, sink=writer, batch_size=args.export_batch)
+        state.save()
+        report["data_fingerprint"] = None
+    else:
+        # run() prefetches the data plan and hands workers shared-memory views of it
+        report = bt.run(signals, since, until, sink=writer, batch_size=args.export_batch, workers=args.workers,
+                        fingerprint=True)
+    writer.close(extra={"data_fingerprint": report["data_fingerprint"], "summary": report["summary"]})
+
+    if bt.path_cache is not None:
+        print("Path cache:", bt.path_cache.stats())
 
     print("\n=== Performance Summary ===")
     for k, v in report["summary"].items():
         print(f"{k}: {v}")
 
-    print("\nSaving trade log ->", args.export)
-    report["trades"].to_csv(args.export, index=False)
+    if args.entry_delays and state is None:
+        from .sensitivity import delay_curve, parse_delays
+        curve = delay_curve(bt, signals, since, until, parse_delays(args.entry_delays))
+        curve.to_csv(args.export + ".delays.csv", index=False)
+        print("\n=== Entry-delay sensitivity ===")
+        print(curve.to_string(index=False))
 
 
 if __name__ == "__main__":
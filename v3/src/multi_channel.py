@@ -0,0 +1,99 @@
+"""
+Multi-channel runs with cross-channel signal deduplication.
+
+Channels copy each other, so the same levels often arrive from several feeds within
+seconds. A path result depends only on the broker symbol, the signal symbol (pip size
+and spread are looked up by it), side, SL/TP levels, the entry bar and the engine's
+path parameters (one Backtester, one `until`), so signals
+are canonicalised into that key, each unique key is simulated once, and the
+PathResult is fanned out to every channel that posted it. Sizing and equity are
+still booked per channel.
+
+The entry bar is the first timeframe boundary at or after the signal time; this
+assumes bars are stamped on timeframe boundaries, as every provider here does.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+
+from .backtester import Backtester
+from .connectors.bars import TF_SECONDS
+from .trades import TradeBuffer, to_ns
+
+
+def _levels(sig) -> Tuple:
+    return (round(sig.sl, 6), tuple(round(tp, 6) for tp in sig.tps))
+
+
+def path_key(bt: Backtester, sig) -> Tuple:
+    """Canonical identity of a signal's simulated path (entry level does not affect it)."""
+    step = TF_SECONDS.get(bt.timeframe, 60) * 1_000_000_000
+    t = to_ns(sig.dt)
+    entry_bar = -(-t // step) * step
+    return (bt.symbol_map.get(sig.symbol, sig.symbol), sig.symbol, sig.side) + _levels(sig) + (entry_bar,)
+
+
+def run_channels(bt: Backtester, signals_by_channel: Dict[str, List], since: datetime, until: datetime,
+                 workers: int = 1) -> Dict:
+    """Backtest several channels, simulating each unique path once. Returns per-channel
+    {trades, summary} plus dedup stats: `signals` posted, `unique` paths simulated, `ratio` = signals/unique."""
+    reps: Dict[Tuple, object] = {}
+    keyed: Dict[str, List[Tuple]] = {}
+    for ch, sigs in signals_by_channel.items():
+        keyed[ch] = []
+        for sig in sigs:
+            if not (since <= sig.dt <= until):
+                continue
+            k = path_key(bt, sig)
+            reps.setdefault(k, sig)
+            keyed[ch].append((sig, k))
+
+    keys = list(reps)
+    out = {}
+    with bt.prefetched([reps[k] for k in keys], since, until):
+        results = bt._paths([reps[k] for k in keys], until, workers=workers)
+        by_rep = {id(sig): pr for sig, pr in results}
+        paths = {k: by_rep.get(id(reps[k])) for k in keys}
+
+        for ch, items in keyed.items():
+            trades = TradeBuffer()
+            bt._book_many(trades, [(sig, paths[k]) for sig, k in items if paths[k] is not None], bt.deposit)
+            df = trades.to_frame()
+            out[ch] = {"trades": df, "summary": bt._summarize(df, start=since, end=until, start_equity=bt.deposit)}
+    n = sum(len(v) for v in keyed.values())
+    return {"channels": out,
+            "dedup": {"signals": n, "unique": len(keys), "ratio": (n / len(keys)) if keys else 1.0}}
+
+
+def lead_lag(signals_by_channel: Dict[str, List], window_s: float = 300.0) -> pd.DataFrame:
+    """Who copies whom: for each identical (symbol, side, entry, SL, TPs) posted by several channels
+    within `window_s` of the first post, count (leader, follower) pairs and their lag."""
+    posts = defaultdict(list)
+    for ch, sigs in signals_by_channel.items():
+        for sig in sigs:
+            posts[(sig.symbol, sig.side, round(sig.entry, 6)) + _levels(sig)].append((to_ns(sig.dt), ch))
+    lags = defaultdict(list)
+    win = int(window_s * 1e9)
+    for group in posts.values():
+        if len(group) < 2:
+            continue
+        group.sort()
+        i = 0
+        while i < len(group):
+            t0, leader = group[i]
+            j = i + 1
+            seen = {leader}
+            while j < len(group) and group[j][0] - t0 <= win:
+                t, ch = group[j]
+                if ch not in seen:
+                    seen.add(ch)
+                    lags[(leader, ch)].append((t - t0) / 1e9)
+                j += 1
+            i = j  # the next post outside the window starts a new cluster
+    rows = [{"leader": a, "follower": b, "count": len(v), "median_lag_s": float(np.median(v)),
+             "mean_lag_s": float(np.mean(v))} for (a, b), v in lags.items()]
+    cols = ["leader", "follower", "count", "median_lag_s", "mean_lag_s"]
+    return pd.DataFrame(rows, columns=cols).sort_values(["count", "median_lag_s"], ascending=[False, True],
+                                                       ignore_index=True)
@@ -0,0 +1,288 @@
+"""
+Budgeted search over exit and sizing parameters, with walk-forward validation.
+
+    python -m src.optimize --channel @x --since 2025-01-01 --until 2025-06-01 \
+        --method halving --objective return_dd --budget 120 --splits 3
+
+Trials are cheap because most of a trial is shared with earlier ones:
+  * candles for the whole span are loaded once (connectors.preloaded);
+  * TP/SL hit times depend on the time stop but not on exit rule, TP weights or
+    sizing, so each signal's path is simulated once per time stop and re-exited
+    per trial with Backtester._resolve_exit;
+  * sizing/equity is the O(n) Backtester._book_many pass.
+
+Methods: successive halving (many random configs on a small chronological signal
+subset, survivors promoted to larger subsets) and a Tree-structured Parzen
+Estimator sampler in numpy. Walk-forward splits partition signals by date into
+blocks; each split searches on its train blocks and reports the winner on the
+following block.
+"""
+import copy, json, math
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from .backtester import Backtester, PathResult
+from .trades import TradeBuffer
+
+EXIT_RULES = ("first_target", "multi_tp", "multi_tp_scaled")
+DEFAULT_TIME_STOPS = (None, 60, 240, 1440)
+
+
+# ---- objectives (higher is better)
+def _return_dd(s: Dict, deposit: float) -> float:
+    ret = s["net_pnl"] / deposit if deposit else s["net_pnl"]
+    return ret / max(abs(s["max_dd"]), 0.01)
+
+OBJECTIVES: Dict[str, Callable[[Dict, float], float]] = {
+    "net_pnl": lambda s, dep: float(s["net_pnl"]),
+    "profit_factor": lambda s, dep: float(min(s["profit_factor"], 100.0)) if s["trades"] else 0.0,
+    "return_dd": _return_dd,
+}
+
+
+# ---- search space
+class Space:
+    def __init__(self, exit_rules: Sequence[str] = EXIT_RULES, time_stops: Sequence[Optional[int]] = DEFAULT_TIME_STOPS,
+                 risk_range: Optional[Tuple[float, float]] = (0.25, 3.0), n_tps: int = 3):
+        self.exit_rules = list(exit_rules)
+        self.time_stops = list(time_stops)
+        self.risk_range = risk_range  # None: keep the fixed lot
+        self.n_tps = n_tps
+
+    def sample(self, rng: np.random.Generator) -> Dict:
+        rule = self.exit_rules[rng.integers(len(self.exit_rules))]
+        p = {"exit_rule": rule, "time_stop_min": self.time_stops[rng.integers(len(self.time_stops))],
+             "risk_pct": None, "tp_weights": None}
+        if self.risk_range:
+            lo, hi = np.log(self.risk_range[0]), np.log(self.risk_range[1])
+            p["risk_pct"] = round(float(np.exp(rng.uniform(lo, hi))), 3)
+        if rule == "multi_tp_scaled":
+            p["tp_weights"] = [round(float(w), 3) for w in rng.dirichlet(np.ones(self.n_tps))]
+        return p
+
+
+# ---- evaluation
+class Evaluator:
+    """Scores configs on signal subsets, sharing simulated paths across trials."""
+    def __init__(self, bt: Backtester, signals: List, since: datetime, until: datetime, objective: str = "return_dd"):
+        self.bt = bt
+        self.signals = [s for s in signals if since <= s.dt <= until]
+        self.since, self.until = since, until
+        self.objective = OBJECTIVES[objective]
+        self._paths: Dict[Optional[int], List[Optional[PathResult]]] = {}
+        self.trials = 0
+
+    def _base_paths(self, time_stop, idx: Sequence[int]) -> List[Optional[PathResult]]:
+        paths = self._paths.setdefault(time_stop, [None] * len(self.signals))
+        todo = [i for i in idx if paths[i] is None]
+        if todo:
+            bt = copy.copy(self.bt); bt.time_stop_min = time_stop; bt.exit_rule = "multi_tp"
+            for i in todo:
+                paths[i] = bt._path(self.signals[i], self.until) or False  # False: no data, never retried
+        return [paths[i] or None for i in idx]
+
+    def backtester(self, params: Dict) -> Backtester:
+        bt = copy.copy(self.bt)
+        for k, v in params.items():
+            setattr(bt, k, v)
+        return bt
+
+    def pairs(self, params: Dict, idx: Optional[Sequence[int]] = None) -> List[Tuple]:
+        """[(sig, PathResult)] for the signals in `idx`, exits resolved under `params`."""
+        idx = range(len(self.signals)) if idx is None else idx
+        bt = self.backtester(params)
+        out = []
+        for i, pr in zip(idx, self._base_paths(params.get("time_stop_min"), idx)):
+            if pr is None:
+                continue
+            sig = self.signals[i]
+            if pr.hits:  # same hits, exit resolved under this trial's rule and weights
+                label, t, px, pips = bt._resolve_exit(sig, pr.hits, None, pr.entry_price, pr.ps)
+                pr = PathResult(pr.broker_symbol, pr.entry_time, pr.entry_price, pr.ps, pr.cs, label, t, px, pips,
+                                pr.hits, pr.last_bar, bt._exit_final(sig, pr.hits))
+            out.append((sig, pr))
+        return out
+
+    def score(self, params: Dict, idx: Optional[Sequence[int]] = None) -> Tuple[float, Dict]:
+        bt = self.backtester(params)
+        trades = TradeBuffer()
+        bt._book_many(trades, self.pairs(params, idx), bt.deposit)
+        summary = bt._summarize(trades.to_frame(), start=self.since, end=self.until, start_equity=bt.deposit)
+        self.trials += 1
+        return self.objective(summary, bt.deposit), summary
+
+
+# ---- samplers
+def successive_halving(ev: Evaluator, space: Space, budget: int, eta: int = 3, min_signals: int = 20,
+                       seed: int = 0) -> List[Tuple[float, Dict]]:
+    """`budget` is in full-data trial equivalents. Rungs evaluate on growing chronological
+    subsets (a fixed random sample, kept in time order). Returns [(score, params)] of the last rung."""
+    rng = np.random.default_rng(seed)
+    n = len(ev.signals)
+    if n == 0:
+        return []
+    rungs = max(1, int(math.floor(math.log(max(n / min_signals, 1), eta))) + 1)
+    # each rung costs roughly n_configs * subset ~= the same, so spread the budget evenly
+    n_configs = max(eta, int(budget * eta ** (rungs - 1) / rungs))
+    configs = [space.sample(rng) for _ in range(n_configs)]
+    order = rng.permutation(n)
+    scored = []
+    for r in range(rungs):
+        size = n if r == rungs - 1 else max(min_signals, int(n / eta ** (rungs - 1 - r)))
+        idx = np.sort(order[:size])
+        scored = sorted(((ev.score(p, idx)[0], p) for p in configs), key=lambda x: -x[0])
+        if r < rungs - 1:
+            configs = [p for _, p in scored[:max(1, int(math.ceil(len(scored) / eta)))]]
+    return scored
+
+
+def _kde_logpdf(x: float, pts: np.ndarray, lo: float, hi: float) -> float:
+    bw = max((hi - lo) / max(len(pts), 1) ** 0.5 / 2.0, 1e-6)
+    z = (x - pts) / bw
+    return float(np.log(np.mean(np.exp(-0.5 * z * z)) / bw + 1e-12))
+
+
+def tpe(ev: Evaluator, space: Space, budget: int, n_startup: int = 10, n_candidates: int = 24,
+        gamma: float = 0.25, seed: int = 0) -> List[Tuple[float, Dict]]:
+    """Tree-structured Parzen Estimator: each step samples candidates near the best `gamma`
+    fraction of trials and keeps the one maximising l(x)/g(x). Full-data trials."""
+    rng = np.random.default_rng(seed)
+    hist: List[Tuple[float, Dict]] = []
+    cats = {"exit_rule": space.exit_rules, "time_stop_min": space.time_stops}
+
+    def split():
+        ranked = sorted(hist, key=lambda x: -x[0])
+        k = max(1, int(math.ceil(gamma * len(ranked))))
+        return [p for _, p in ranked[:k]], [p for _, p in ranked[k:]] or [p for _, p in ranked]
+
+    def cat_logp(group, key, v):
+        vals = cats[key]
+        counts = np.ones(len(vals))  # prior
+        for p in group:
+            counts[vals.index(p[key])] += 1
+        return float(np.log(counts[vals.index(v)] / counts.sum()))
+
+    def risk_logp(group, v):
+        if not space.risk_range:
+            return 0.0
+        lo, hi = np.log(space.risk_range[0]), np.log(space.risk_range[1])
+        return _kde_logpdf(np.log(v), np.log([p["risk_pct"] for p in group]), lo, hi)
+
+    def propose(good):
+        base = good[rng.integers(len(good))]
+        p = space.sample(rng)
+        if rng.random() < 0.7:
+            p["exit_rule"] = base["exit_rule"]
+        if rng.random() < 0.7:
+            p["time_stop_min"] = base["time_stop_min"]
+        if space.risk_range and base["risk_pct"]:
+            lo, hi = space.risk_range
+            p["risk_pct"] = round(float(np.clip(np.exp(np.log(base["risk_pct"]) + rng.normal(0, 0.3)), lo, hi)), 3)
+        if p["exit_rule"] == "multi_tp_scaled":
+            w = np.asarray(base["tp_weights"] or np.ones(space.n_tps) / space.n_tps)
+            p["tp_weights"] = [round(float(x), 3) for x in rng.dirichlet(w * 20 + 0.5)]
+        else:
+            p["tp_weights"] = None
+        return p
+
+    for t in range(budget):
+        if t < n_startup:
+            p = space.sample(rng)
+        else:
+            good, bad = split()
+            cands = [propose(good) for _ in range(n_candidates)]
+            def ratio(c):
+                lg = sum(cat_logp(good, k, c[k]) for k in cats) + risk_logp(good, c["risk_pct"])
+                lb = sum(cat_logp(bad, k, c[k]) for k in cats) + risk_logp(bad, c["risk_pct"])
+                return lg - lb
+            p = max(cands, key=ratio)
+        hist.append((ev.score(p)[0], p))
+    return sorted(hist, key=lambda x: -x[0])
+
+
+# ---- walk-forward
+def walk_forward_splits(signals: List, n_splits: int = 3, train_blocks: Optional[int] = None) -> List[Tuple[List, List]]:
+    """Sort by date, cut into n_splits + 1 equal-count blocks; split i trains on the blocks
+    before block i + 1 (the last `train_blocks` of them if given) and tests on block i + 1."""
+    sigs = sorted(signals, key=lambda s: s.dt)
+    edges = np.linspace(0, len(sigs), n_splits + 2).astype(int)
+    blocks = [sigs[edges[i]:edges[i + 1]] for i in range(n_splits + 1)]
+    out = []
+    for i in range(n_splits):
+        first = 0 if train_blocks is None else max(0, i + 1 - train_blocks)
+        train = [s for b in blocks[first:i + 1] for s in b]
+        if train and blocks[i + 1]:
+            out.append((train, blocks[i + 1]))
+    return out
+
+
+def optimize(bt: Backtester, signals: List, since: datetime, until: datetime, method: str = "halving",
+             objective: str = "return_dd", budget: int = 100, n_splits: int = 3, space: Optional[Space] = None,
+             seed: int = 0) -> Dict:
+    """Search on each walk-forward train split and score the winner out of sample.
+    Returns {"splits": [...], "best": params of the last split, "trials": n}."""
+    space = space or Space()
+    search = {"halving": successive_halving, "tpe": tpe}[method]
+    splits = walk_forward_splits(signals, n_splits) if n_splits > 0 else [(list(signals), [])]
+    out, trials = [], 0
+    for k, (train, test) in enumerate(splits):
+        train_until = test[0].dt if test else until
+        ev = Evaluator(bt, train, since, train_until, objective)
+        ranked = search(ev, space, budget, seed=seed + k)
+        trials += ev.trials
+        if not ranked:
+            continue
+        score, best = ranked[0]
+        row = {"split": k, "train_start": train[0].dt.isoformat(), "train_end": train[-1].dt.isoformat(),
+               "params": best, "train_score": score}
+        if test:
+            tev = Evaluator(bt, test, test[0].dt, until, objective)
+            row["test_score"], row["test_summary"] = tev.score(best)
+            row["test_start"], row["test_end"] = test[0].dt.isoformat(), test[-1].dt.isoformat()
+        out.append(row)
+    return {"splits": out, "best": out[-1]["params"] if out else None, "trials": trials}
+
+
+def main():
+    from .main import build_parser, build_backtester, load_env_defaults, load_provider
+    p = build_parser()
+    p.description = "Optimise exit and sizing parameters with walk-forward validation"
+    p.add_argument("--method", choices=["halving", "tpe"], default="halving")
+    p.add_argument("--objective", choices=list(OBJECTIVES), default="return_dd")
+    p.add_argument("--budget", type=int, default=100, help="Trials (full-data equivalents for halving)")
+    p.add_argument("--splits", type=int, default=3, help="Walk-forward splits; 0 = search on all signals")
+    p.add_argument("--exit-rules", default=",".join(EXIT_RULES))
+    p.add_argument("--time-stops", default="none,60,240,1440", help="Minutes; 'none' disables the time stop")
+    p.add_argument("--risk-range", default="0.25,3", help="lo,hi risk %% (log-uniform); 'none' keeps --lot")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", default="optimize_results.json")
+    args = load_env_defaults(p.parse_args())
+    since = datetime.fromisoformat(args.since).replace(tzinfo=timezone.utc)
+    until = datetime.fromisoformat(args.until).replace(tzinfo=timezone.utc)
+
+    from .connectors.preloaded import PreloadedProvider
+    from .signal_parser import parse_signals_from_messages
+    from .telegram_client import fetch_messages
+    signals = parse_signals_from_messages(fetch_messages(args.channel, since, until))
+    bt = build_backtester(args, None)
+    # every window trials read, conversion pairs included, in one batch
+    bt.provider = PreloadedProvider(load_provider(args), [], since, until, timeframe=args.timeframe,
+                                     compact=args.compact_prices)
+    bt.provider.prefetch(bt.data_plan(signals, since, until))
+
+    stops = [None if x.strip().lower() == "none" else int(x) for x in args.time_stops.split(",") if x.strip()]
+    risk = None if args.risk_range.lower() == "none" else tuple(float(x) for x in args.risk_range.split(","))
+    n_tps = max((len(s.tps) for s in signals), default=3)
+    space = Space([r.strip() for r in args.exit_rules.split(",")], stops, risk, n_tps)
+    res = optimize(bt, signals, since, until, args.method, args.objective, args.budget, args.splits, space, args.seed)
+    for row in res["splits"]:
+        print(f"split {row['split']}: train {row['train_score']:.3f} test {row.get('test_score', float('nan')):.3f} "
+              f"{json.dumps(row['params'])}")
+    print("trials:", res["trials"], "best:", json.dumps(res["best"]))
+    with open(args.out, "w") as f:
+        json.dump(res, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Live paper trading: Telegram signals + streaming ticks, no orders placed.
+
+Open positions live in per-symbol level books (heaps keyed by trigger price), so
+each tick only touches the levels it actually crosses instead of every open
+position. Fills are written with the same schema as Backtester.run.
+
+Tick-level semantics mirror the bar engine: BUY TPs trigger on ask >= TP and fill at
+the ask, BUY stops trigger on bid <= SL and fill at the bid (mirrored for SELL).
+A position closes at the first stop (SL/TIME) or once its final TP is reached;
+multi_tp exits at the last TP reached before that, multi_tp_scaled at the
+weighted average of the TPs reached. Sizing, margin and P&L convert from the quote
+currency at the latest streamed tick of a conversion pair (USDJPY itself for a USD
+account trading it; GBPUSD for EURGBP).
+"""
+import asyncio, heapq, itertools
+from datetime import datetime
+from typing import Dict, List, Optional
+import pandas as pd
+
+from .backtester import Backtester
+from .trades import TradeBuffer, to_ns
+
+
+class _Position:
+    __slots__ = ("pid", "sig", "symbol", "entry_ns", "entry_time", "entry_price", "ps", "cs", "lot",
+                 "margin", "deadline_ns", "reached", "open")
+
+    def __init__(self, pid, sig, symbol, entry_time, entry_price, ps, cs, lot, margin, deadline_ns):
+        self.pid = pid; self.sig = sig; self.symbol = symbol
+        self.entry_time = entry_time; self.entry_ns = to_ns(entry_time)
+        self.entry_price = entry_price; self.ps = ps; self.cs = cs; self.lot = lot; self.margin = margin
+        self.deadline_ns = deadline_ns
+        self.reached: List[tuple] = []  # (label, t_ns, px)
+        self.open = True
+
+
+class _Book:
+    """Levels for one symbol: `up` fires when ask >= level, `down` when bid <= level."""
+    __slots__ = ("up", "down", "pending")
+
+    def __init__(self):
+        self.up: List[tuple] = []      # (level, seq, pid, label)
+        self.down: List[tuple] = []    # (-level, seq, pid, label)
+        self.pending: List = []        # signals waiting for the next tick to fill
+
+
+class PaperTrader:
+    def __init__(self, bt: Backtester, sink=None, batch_size: int = 1_000):
+        """`bt` supplies the sizing/P&L rules and configuration (exit rule, spread,
+        slippage, commission, time stop, symbol/contract maps)."""
+        self.bt = bt
+        self.equity = bt.deposit
+        self.trades = TradeBuffer()
+        self.sink = sink
+        self.batch_size = batch_size
+        self._flushed = 0
+        self._books: Dict[str, _Book] = {}
+        self._pos: Dict[int, _Position] = {}
+        self._deadlines: List[tuple] = []  # (deadline_ns, pid)
+        self._seq = itertools.count()
+        self._last_tick: Dict[str, tuple] = {}  # symbol -> (t_ns, bid, ask), the source of conversion rates
+        self._stale = 0  # closed positions whose untouched levels are still in the heaps
+
+    # ---- inputs
+    def submit(self, sig):
+        """Queue a signal; it fills on the next tick of its broker symbol."""
+        sym = self.bt.symbol_map.get(sig.symbol, sig.symbol)
+        self._books.setdefault(sym, _Book()).pending.append(sig)
+
+    def on_tick(self, tick):
+        """Accepts base.Tick objects or {time, symbol, bid, ask} dicts."""
+        if isinstance(tick, dict):
+            sym, t, bid, ask = tick["symbol"], tick["time"], tick["bid"], tick["ask"]
+        else:
+            sym, t, bid, ask = tick.symbol, tick.time, tick.bid, tick.ask
+        if bid is None or ask is None:
+            return
+        self.process(sym, to_ns(t), float(bid), float(ask), t)
+
+    def process(self, sym: str, t_ns: int, bid: float, ask: float, t: Optional[datetime] = None):
+        self._last_tick[sym] = (t_ns, bid, ask)
+        book = self._books.get(sym)
+        if book is None:
+            book = self._books[sym] = _Book()
+        if book.pending:  # new positions' levels are pushed first, so this tick can fire them
+            sigs, book.pending = book.pending, []
+            for sig in sigs:
+                self._open(sym, book, sig, t if t is not None else pd.Timestamp(t_ns, tz="UTC").to_pydatetime(), bid, ask)
+        fired = []
+        while book.up and book.up[0][0] <= ask:
+            lvl, seq, pid, label = heapq.heappop(book.up)
+            fired.append((seq, pid, label))
+        while book.down and -book.down[0][0] >= bid:
+            nlvl, seq, pid, label = heapq.heappop(book.down)
+            fired.append((seq, pid, label))
+        while self._deadlines and self._deadlines[0][0] <= t_ns:
+            _, pid = heapq.heappop(self._deadlines)
+            fired.append((-1, pid, "TIME"))
+        # same construction order as the bar engine when several levels fire on one tick
+        for _, pid, label in sorted(fired, key=lambda f: (f[1], _label_order(f[2]))):
+            pos = self._pos.get(pid)
+            if pos is None or not pos.open:
+                continue  # stale level of a closed position
+            self._hit(pos, label, t_ns, bid, ask)
+
+    # ---- position lifecycle
+    def _open(self, sym, book: _Book, sig, t: datetime, bid: float, ask: float):
+        bt = self.bt
+        ps = bt.symbols.pip_size(sig.symbol)
+        cs = bt.contract_map.get(sig.symbol, bt.symbols.contract_size(sig.symbol))
+        slip = bt.slippage_pips * ps
+        entry = (ask + slip) if sig.side == "BUY" else (bid - slip)
+        rate = self._rate(sig, t)
+        lot = bt._compute_lot(sig, entry, ps, self.equity, cs, when=t, rate=rate)
+        margin = bt._margin(sig, entry, lot, cs, when=t, rate=rate)
+        deadline = to_ns(t) + int(bt.time_stop_min * 60e9) if bt.time_stop_min else None
+        pid = next(self._seq)
+        pos = self._pos[pid] = _Position(pid, sig, sym, t, entry, ps, cs, lot, margin, deadline)
+        buy = sig.side == "BUY"
+        for i, tp in enumerate(sig.tps, start=1):
+            if buy: heapq.heappush(book.up, (tp, next(self._seq), pid, f"TP{i}"))
+            else: heapq.heappush(book.down, (-tp, next(self._seq), pid, f"TP{i}"))
+        if buy: heapq.heappush(book.down, (-sig.sl, next(self._seq), pid, "SL"))
+        else: heapq.heappush(book.up, (sig.sl, next(self._seq), pid, "SL"))
+        if deadline is not None:
+            heapq.heappush(self._deadlines, (deadline, pid))
+
+    def _hit(self, pos: _Position, label: str, t_ns: int, bid: float, ask: float):
+        buy = pos.sig.side == "BUY"
+        rule = self.bt.exit_rule
+        if label.startswith("TP"):
+            px = ask if buy else bid
+            pos.reached.append((label, t_ns, px))
+            if rule == "first_target" or len(pos.reached) == len(pos.sig.tps):
+                self._close(pos, *self._exit_from_reached(pos))
+            return
+        px = bid if buy else ask
+        if label == "TIME":
+            px = (bid + ask) / 2.0
+        if rule == "first_target" or not pos.reached:
+            self._close(pos, label, t_ns, px)
+        else:
+            self._close(pos, *self._exit_from_reached(pos))
+
+    def _exit_from_reached(self, pos: _Position):
+        reached = pos.reached
+        if self.bt.exit_rule == "first_target":
+            return reached[0]
+        if self.bt.exit_rule == "multi_tp_scaled":
+            weights = self.bt.tp_weights or [1.0 / len(reached)] * len(reached)
+            weights = weights[:len(reached)]
+            s = sum(weights) or 1.0
+            avg_px = sum(px * w / s for (_, _, px), w in zip(reached, weights))
+            return "SCALED_TP", reached[-1][1], avg_px
+        return reached[-1]
+
+    def _rate(self, sig, when: datetime) -> float:
+        """Quote -> account currency rate from the latest tick of a conversion pair, tried in
+        Backtester._conversion_symbols order. Without such a tick the Backtester's candle
+        provider is asked; with no provider either this raises rather than assume 1.0."""
+        bt = self.bt
+        quote = bt.symbols.currencies(sig.symbol)[1]
+        syms = bt._conversion_symbols(quote, bt.account_ccy)
+        if not syms:
+            return 1.0
+        for sym in syms:
+            tick = self._last_tick.get(bt.symbol_map.get(sym, sym))
+            if tick is not None:
+                mid = (tick[1] + tick[2]) / 2.0
+                return mid if sym.upper().endswith(bt.account_ccy.upper()) else 1.0 / mid
+        if bt.provider is not None:
+            return bt._conversion_rate(quote, bt.account_ccy, when)
+        raise ValueError(f"no {quote}->{bt.account_ccy} rate for {sig.symbol}: stream ticks for one of "
+                         f"{', '.join(syms)} or give the Backtester a candle provider")
+
+    def _compact(self):
+        for book in self._books.values():
+            book.up = [e for e in book.up if e[2] in self._pos]; heapq.heapify(book.up)
+            book.down = [e for e in book.down if e[2] in self._pos]; heapq.heapify(book.down)
+        self._deadlines = [e for e in self._deadlines if e[1] in self._pos]; heapq.heapify(self._deadlines)
+        self._stale = 0
+
+    def _close(self, pos: _Position, label: str, t_ns: int, px: float):
+        pos.open = False
+        del self._pos[pos.pid]
+        self._stale += 1
+        if self._stale > 1024 and self._stale > len(self._pos):
+            self._compact()
+        bt = self.bt
+        sig = pos.sig
+        pnl_pips = (1 if sig.side == "BUY" else -1) * (px - pos.entry_price) / pos.ps
+        exit_time = pd.Timestamp(t_ns, unit="ns", tz="UTC").to_pydatetime()
+        pnl_ccy = bt._pnl_account(sig, pnl_pips, pos.lot, pos.ps, pos.cs, when=exit_time,
+                                  rate=self._rate(sig, exit_time))
+        commission = bt.commission_per_lot * pos.lot
+        pnl_net = pnl_ccy - commission
+        self.equity += pnl_net
+        self.trades.append(pos.symbol, sig.side, pos.entry_time, pos.entry_price, exit_time, px, label,
+                           pos.lot, float(pnl_pips), pnl_net, commission, pos.margin, self.equity)
+        if self.sink is not None and len(self.trades) - self._flushed >= self.batch_size:
+            self.flush()
+
+    # ---- outputs
+    @property
+    def open_positions(self) -> int:
+        return len(self._pos)
+
+    def flush(self):
+        if self.sink is not None:
+            self.sink.write(self.trades, self._flushed, len(self.trades))
+            self._flushed = len(self.trades)
+
+    def report(self) -> Dict:
+        df = self.trades.to_frame()
+        start = df["entry_time"].min().to_pydatetime() if len(df) else datetime.now()
+        end = df["exit_time"].max().to_pydatetime() if len(df) else datetime.now()
+        return {"trades": df, "summary": self.bt._summarize(df, start=start, end=end, start_equity=self.bt.deposit),
+                "open_positions": self.open_positions}
+
+
+_ORDER = {"SL": 100, "TIME": 101}
+def _label_order(label: str) -> int:
+    return _ORDER.get(label, int(label[2:]) if label.startswith("TP") else 200)
+
+
+def replay(trader: PaperTrader, ticks, signals=()) -> Dict:
+    """Drive a trader from any tick iterable (e.g. ReplayTickConnector.stream_ticks), submitting
+    each signal just before the first tick at or after its timestamp."""
+    sigs = sorted(signals, key=lambda s: s.dt)
+    i = 0
+    for tick in ticks:
+        t = tick["time"] if isinstance(tick, dict) else tick.time
+        while i < len(sigs) and sigs[i].dt <= t:
+            trader.submit(sigs[i]); i += 1
+        trader.on_tick(tick)
+    trader.flush()
+    return trader.report()
+
+
+async def run_live(trader: PaperTrader, signal_queue: asyncio.Queue, tick_queue: asyncio.Queue):
+    """Consume signals (e.g. from live_signals.SignalBus) and ticks from asyncio queues until cancelled."""
+    async def _signals():
+        while True:
+            trader.submit(await signal_queue.get())
+
+    task = asyncio.create_task(_signals())
+    try:
+        while True:
+            trader.on_tick(await tick_queue.get())
+    finally:
+        task.cancel()
+        trader.flush()
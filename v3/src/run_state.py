@@ -0,0 +1,214 @@
+"""
+Persisted per-(channel, config) backtest state for incremental daily runs.
+
+Layout under <state_dir>/<channel>/<config_key>/:
+  state.json         cursor (last message), equity after the settled prefix, pending signals
+  settled/part-*.parquet   append-only trade rows whose outcome and sizing can no longer change
+
+A trade row is settled once its exit is final *and* every earlier trade is settled
+(sizing under --risk-pct depends on the equity left by earlier trades). Signals after
+the first unsettled one stay pending with their path result, so a resumed run only
+simulates new bars for open paths and new signals, then redoes the cheap money pass.
+"""
+import hashlib, json, os, re
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+from .backtester import PathResult
+from .signal_parser import Signal
+from .trades import TradeBuffer, TRADE_COLUMNS, to_ns
+
+STATE_VERSION = 1
+
+
+def config_key(params: Dict, since: datetime) -> str:
+    blob = json.dumps({"params": params, "since": since.isoformat()}, sort_keys=True, default=str)
+    return hashlib.blake2b(blob.encode(), digest_size=8).hexdigest()
+
+
+def _ts(ns: int) -> datetime:
+    return pd.Timestamp(ns, unit="ns", tz="UTC").to_pydatetime()
+
+
+def _signal_to_json(sig: Signal) -> Dict:
+    return {"dt": to_ns(sig.dt), "side": sig.side, "symbol": sig.symbol, "entry": sig.entry,
+            "sl": sig.sl, "tps": list(sig.tps), "raw_text": sig.raw_text}
+
+
+def _signal_from_json(d: Dict) -> Signal:
+    return Signal(dt=_ts(d["dt"]), side=d["side"], symbol=d["symbol"], entry=d["entry"], sl=d["sl"],
+                  tps=list(d["tps"]), raw_text=d["raw_text"])
+
+
+def _time_to_json(t: datetime) -> List:
+    return [to_ns(t), getattr(t, "tzinfo", None) is not None]
+
+
+def _time_from_json(v) -> datetime:
+    ns, aware = v
+    t = pd.Timestamp(ns, unit="ns", tz="UTC" if aware else None)
+    return t.to_pydatetime()
+
+
+def _path_to_json(pr: Optional[PathResult]) -> Optional[Dict]:
+    if pr is None:
+        return None
+    return {"broker_symbol": pr.broker_symbol, "entry_time": _time_to_json(pr.entry_time),
+            "entry_price": pr.entry_price, "ps": pr.ps, "cs": pr.cs, "hit": pr.hit,
+            "exit_time": _time_to_json(pr.exit_time), "exit_price": pr.exit_price, "pnl_pips": pr.pnl_pips,
+            "hits": [[lbl, int(np.datetime64(t, "ns").astype(np.int64)), px] for lbl, t, px in pr.hits],
+            "last_bar": pr.last_bar, "final": pr.final}
+
+
+def _path_from_json(d: Optional[Dict]) -> Optional[PathResult]:
+    if d is None:
+        return None
+    hits = [(lbl, np.datetime64(ns, "ns"), px) for lbl, ns, px in d["hits"]]
+    return PathResult(d["broker_symbol"], _time_from_json(d["entry_time"]), d["entry_price"], d["ps"], d["cs"],
+                      d["hit"], _time_from_json(d["exit_time"]), d["exit_price"], d["pnl_pips"], hits,
+                      d["last_bar"], d["final"])
+
+
+class RunState:
+    def __init__(self, state_dir: str, channel: str, params: Dict, since: datetime):
+        self.key = config_key(params, since)
+        self.dir = os.path.join(state_dir, re.sub(r"[^\w.-]+", "_", channel), self.key)
+        self.channel = channel
+        self.params = params
+        self.since = since
+        self.until: Optional[datetime] = None
+        self.last_message_id: int = 0
+        self.last_message_date: Optional[datetime] = None
+        self.equity: Optional[float] = None
+        self.settled_rows = 0
+        self.tz: Optional[str] = None
+        self.pending: List[tuple] = []  # [(Signal, Optional[PathResult])]
+
+    @classmethod
+    def load(cls, state_dir: str, channel: str, params: Dict, since: datetime) -> "RunState":
+        st = cls(state_dir, channel, params, since)
+        path = os.path.join(st.dir, "state.json")
+        if not os.path.exists(path):
+            return st
+        with open(path) as f:
+            d = json.load(f)
+        if d.get("version") != STATE_VERSION:
+            raise RuntimeError(f"Unsupported run-state version in {path}")
+        st.until = _ts(d["until"]) if d["until"] is not None else None
+        st.last_message_id = d["last_message_id"]
+        st.last_message_date = _ts(d["last_message_date"]) if d["last_message_date"] is not None else None
+        st.equity = d["equity"]
+        st.settled_rows = d["settled_rows"]
+        st.tz = d["tz"]
+        st.pending = [(_signal_from_json(p["signal"]), _path_from_json(p["path"])) for p in d["pending"]]
+        return st
+
+    @property
+    def exists(self) -> bool:
+        return self.until is not None
+
+    def observe_messages(self, msgs: List[Dict]):
+        """Advance the message cursor; returns only messages not seen by earlier runs."""
+        fresh = [m for m in msgs if m["id"] > self.last_message_id]
+        for m in fresh:
+            self.last_message_id = max(self.last_message_id, m["id"])
+            if self.last_message_date is None or m["date"] > self.last_message_date:
+                self.last_message_date = m["date"]
+        return fresh
+
+    def load_settled(self, into: TradeBuffer):
+        d = os.path.join(self.dir, "settled")
+        if not os.path.isdir(d):
+            return
+        import pyarrow.parquet as pq
+        for name in sorted(os.listdir(d)):
+            if not name.endswith(".parquet"):
+                continue
+            t = pq.read_table(os.path.join(d, name))
+            cols = {}
+            for k in TRADE_COLUMNS:
+                col = t.column(k)
+                if k in ("entry_time", "exit_time"):
+                    cols[k] = col.cast("int64").to_numpy()
+                elif col.type.equals("string") or str(col.type).startswith("dictionary"):
+                    cols[k] = np.asarray(col.to_pylist(), dtype=object)
+                else:
+                    cols[k] = col.to_numpy()
+            into.extend(cols, tz=self.tz)
+
+    def append_settled(self, buf: TradeBuffer, lo: int, hi: int):
+        if hi <= lo:
+            return
+        d = os.path.join(self.dir, "settled")
+        os.makedirs(d, exist_ok=True)
+        import pyarrow.parquet as pq
+        path = os.path.join(d, f"part-{self.settled_rows:012d}.parquet")
+        # full-precision lot: the rounded value is only applied on output
+        table = buf.to_arrow(lo, hi, round_lot=False)
+        pq.write_table(table, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        self.settled_rows += hi - lo
+        self.tz = self.tz or buf.tz
+
+    def save(self):
+        os.makedirs(self.dir, exist_ok=True)
+        d = {
+            "version": STATE_VERSION, "channel": self.channel, "config_key": self.key, "params": self.params,
+            "since": self.since.isoformat(), "until": to_ns(self.until) if self.until else None,
+            "last_message_id": self.last_message_id,
+            "last_message_date": to_ns(self.last_message_date) if self.last_message_date else None,
+            "equity": self.equity, "settled_rows": self.settled_rows, "tz": self.tz,
+            "pending": [{"signal": _signal_to_json(s), "path": _path_to_json(p)} for s, p in self.pending],
+        }
+        tmp = os.path.join(self.dir, "state.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(d, f)
+        os.replace(tmp, os.path.join(self.dir, "state.json"))
+
+
+def run_incremental(bt, state: RunState, new_signals, until: datetime, sink=None, batch_size: int = 10_000) -> Dict:
+    """Resume a persisted run up to `until`. Produces the same trade log and summary as
+    bt.run(all_signals, state.since, until), simulating only new signals and open paths."""
+    trades = TradeBuffer()
+    state.load_settled(trades)
+    frozen = len(trades)
+    equity = bt.deposit if state.equity is None else state.equity
+    items = list(state.pending) + [(s, None) for s in new_signals if state.since <= s.dt <= until]
+
+    flushed = 0
+    if sink is not None:
+        sink.write(trades, 0, frozen); flushed = frozen
+    pending: List[tuple] = []
+    settling = True
+    settled_equity = equity
+    for sig, pr in items:
+        if pr is None:
+            pr = bt._path(sig, until)
+        elif not pr.final:
+            pr = bt._extend_path(sig, pr, until)
+        if pr is None:
+            settling = False
+            pending.append((sig, None))
+            continue
+        equity = bt._book(trades, sig, pr, equity)
+        if settling and pr.final:
+            settled_equity = equity
+        else:
+            settling = False
+            pending.append((sig, pr))
+        if sink is not None and len(trades) - flushed >= batch_size:
+            sink.write(trades, flushed, len(trades)); flushed = len(trades)
+    if sink is not None:
+        sink.write(trades, flushed, len(trades))
+
+    n_settled = len(trades) - sum(1 for _, p in pending if p is not None)
+    state.append_settled(trades, frozen, n_settled)
+    state.equity = settled_equity
+    state.pending = pending
+    state.until = until
+
+    trades_df = trades.to_frame()
+    summary = bt._summarize(trades_df, start=state.since, end=until, start_equity=bt.deposit)
+    return {"trades": trades_df, "summary": summary, "trade_buffer": trades}
@@ -0,0 +1,158 @@
+"""
+Entry-delay sensitivity: how a channel's result decays as followers enter later.
+
+Each signal's candle window is loaded once. Per window we precompute, for every
+TP/SL level, the sorted bar indices where the level is touched; a delayed entry at
+bar k then finds each first touch with one searchsorted instead of a new scan, so
+extra delays cost O(levels * log bars) per signal. Entry follows Backtester.run:
+the first bar at or after sig.dt + delay, so delays shorter than a bar only move
+the entry when they cross a bar boundary.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+from .backtester import Backtester, PathResult
+from .connectors.base import CandleArrays
+from .trades import TradeBuffer, to_ns
+
+DEFAULT_DELAYS_S = (0, 5, 30, 60, 300)
+
+
+class _Window:
+    """Bid/ask arrays of one signal's candles plus per-level touch indices."""
+    __slots__ = ("ca", "t", "times", "bid_open", "ask_open", "mid_open", "spread_open", "close", "touch")
+
+    def __init__(self, bt: Backtester, sig, ca: CandleArrays):
+        self.ca = ca
+        self.t = ca.time
+        self.times = ca.time.view("datetime64[ns]")
+        self.bid_open = self.ask_open = self.mid_open = self.spread_open = None
+        if ca.bid_open is not None and ca.ask_open is not None:
+            self.bid_open = ca.price("bid_open")
+            self.ask_open = ca.price("ask_open")
+        else:
+            self.mid_open = ca.price("open") if ca.open is not None else ca.price("close")
+            sp = ca.spread_pips.astype(float) if ca.spread_pips is not None else np.full(len(ca), np.nan)
+            self.spread_open = np.where(np.isnan(sp), bt.spread_map.get(sig.symbol, bt.spread_pips or 0.0), sp)
+        self.close = ca.price("close" if ca.close is not None else "bid_close")  # the engine's TIME exit price
+        self.touch: Dict[float, Dict[str, np.ndarray]] = {}
+
+    def hits(self, bt: Backtester, sig, ps: float, k: int, entry_time) -> list:
+        """Same result as bt._path_hits(sig, ca.slice(k), ps, entry_time)."""
+        lv = self.touch.get(ps)
+        if lv is None:
+            lv = self.touch[ps] = self._levels(bt, sig, ps)
+        out = []
+        for label, idx in lv["levels"]:
+            p = np.searchsorted(idx, k)
+            if p < len(idx):
+                j = idx[p]
+                px = lv["ask_close"][j] if (sig.side == "BUY") == label.startswith("TP") else lv["bid_close"][j]
+                out.append((label, self.times[j], float(px)))
+        if bt.time_stop_min:
+            limit = to_ns(entry_time) + int(round(bt.time_stop_min * 60 * 1_000_000_000))
+            j = np.searchsorted(self.t, limit, side="left")
+            if j < len(self.t):
+                out.append(("TIME", self.times[j], float(self.close[j])))
+        out.sort(key=lambda x: x[1])
+        return out
+
+    def _levels(self, bt: Backtester, sig, ps: float) -> Dict:
+        """Touch indices per level, compared exactly as bt._path_hits compares them."""
+        ca = self.ca
+        if ca.has_bid_ask:
+            half = None
+            high, low = "ask_high", "bid_low"
+            bid_close = ca.price("bid_close" if ca.bid_close is not None else "close")
+            ask_close = ca.price("ask_close" if ca.ask_close is not None else "close")
+        else:
+            sp = ca.spread_pips if ca.spread_pips is not None else \
+                np.full(len(ca), bt.spread_map.get(sig.symbol, bt.spread_pips or 0.0))
+            half = (sp * ps) / 2.0
+            high, low = "high", "low"
+            bid_close = ca.price("close") - half; ask_close = ca.price("close") + half
+        hi, lo, up, dn = bt._touch_space(ca, high, low, half)
+        levels = []
+        for i, tp in enumerate(sig.tps, start=1):
+            mask = hi >= up(tp) if sig.side == "BUY" else lo <= dn(tp)
+            levels.append((f"TP{i}", np.flatnonzero(mask)))
+        mask = lo <= dn(sig.sl) if sig.side == "BUY" else hi >= up(sig.sl)
+        levels.append(("SL", np.flatnonzero(mask)))
+        return {"levels": levels, "bid_close": bid_close, "ask_close": ask_close}
+
+
+def _entry(bt: Backtester, sig, w: _Window, k: int):
+    ps = bt.symbols.pip_size(sig.symbol)
+    if w.bid_open is not None:
+        bid, ask = float(w.bid_open[k]), float(w.ask_open[k])
+    else:
+        half = (w.spread_open[k] * ps) / 2.0
+        bid, ask = float(w.mid_open[k]) - half, float(w.mid_open[k]) + half
+    slip = bt.slippage_pips * ps
+    return ps, (ask + slip) if sig.side == "BUY" else (bid - slip)
+
+
+def delayed_paths(bt: Backtester, signals, since: datetime, until: datetime,
+                  delays_s: Sequence[float] = DEFAULT_DELAYS_S) -> List[tuple]:
+    """Per signal in [since, until]: [(sig, PathResult or None) per delay]. One candle load per signal."""
+    out = []
+    for sig in signals:
+        if not (since <= sig.dt <= until):
+            continue
+        broker_symbol = bt.symbol_map.get(sig.symbol, sig.symbol)
+        ca = bt._arrays(broker_symbol, sig.dt, until)
+        if ca is None or not len(ca):
+            out.append((sig, [None] * len(delays_s)))
+            continue
+        w = _Window(bt, sig, ca)
+        cs = bt.contract_map.get(sig.symbol, bt.symbols.contract_size(sig.symbol))
+        row = []
+        base = to_ns(sig.dt)
+        for d in delays_s:
+            k = int(np.searchsorted(w.t, base + int(round(d * 1e9)), side="left"))
+            if k >= len(w.t):
+                row.append(None)
+                continue
+            ps, entry_price = _entry(bt, sig, w, k)
+            entry_time = ca.datetime_at(k)
+            hits = w.hits(bt, sig, ps, k, entry_time)
+            label, exit_time, exit_price, pnl_pips = bt._resolve_exit(sig, hits, ca, entry_price, ps)
+            row.append(PathResult(broker_symbol, entry_time, entry_price, ps, cs, label, exit_time, exit_price,
+                                  pnl_pips, hits, int(w.t[-1]), bt._exit_final(sig, hits)))
+        out.append((sig, row))
+    return out
+
+
+def delay_curve(bt: Backtester, signals, since: datetime, until: datetime,
+                delays_s: Sequence[float] = DEFAULT_DELAYS_S) -> pd.DataFrame:
+    """P&L vs entry latency: one row per delay with the usual run summary plus pip totals.
+    The delay-0 row matches Backtester.run on the same inputs."""
+    rows = []
+    with bt.prefetched(signals, since, until):
+        paths = delayed_paths(bt, signals, since, until, delays_s)
+        books = []
+        for i in range(len(delays_s)):
+            trades = TradeBuffer()
+            bt._book_many(trades, [(sig, prs[i]) for sig, prs in paths if prs[i] is not None], bt.deposit)
+            books.append(trades.to_frame())
+    for d, df in zip(delays_s, books):
+        s = bt._summarize(df, start=since, end=until, start_equity=bt.deposit)
+        rows.append({"delay_s": d, "trades": s["trades"], "net_pnl": s["net_pnl"], "win_rate": s["win_rate"],
+                     "profit_factor": s["profit_factor"], "max_dd": s["max_dd"],
+                     "total_pips": float(df["pnl_pips"].sum()) if len(df) else 0.0,
+                     "mean_pips": float(df["pnl_pips"].mean()) if len(df) else 0.0})
+    return pd.DataFrame(rows)
+
+
+def parse_delays(spec: str) -> List[float]:
+    """'0,5s,30s,1m,5m' -> seconds. Bare numbers are seconds."""
+    units = {"s": 1, "m": 60, "h": 3600}
+    out = []
+    for tok in (x.strip().lower() for x in spec.split(",")):
+        if not tok:
+            continue
+        mult = units.get(tok[-1])
+        out.append(float(tok[:-1]) * mult if mult else float(tok))
+    return out
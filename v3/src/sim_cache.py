@@ -0,0 +1,148 @@
+"""
+Disk-backed, content-addressed cache of per-signal path results.
+
+A PathResult (entry fill, hit times, exit, pip P&L) depends only on the signal,
+the candles it was simulated on and the path parameters; sizing, deposit and
+commission are applied afterwards by Backtester._book. The key hashes the signal,
+the path parameters and the provider's data_version for the symbol (if it has
+one). Each entry also stores a digest of the bars the path actually read, from
+the entry up to the bar that settled it (or its last bar, if unsettled); a get
+whose bars no longer match is a miss. Bars after that point do not invalidate
+the entry, so extending the candle history keeps settled paths cached and
+unsettled ones are continued from where they stopped.
+
+Layout: <cache_dir>/<key[:2]>/<key>.json. Reads bump the file's mtime; when the
+total size passes `max_bytes`, least recently used entries are deleted. Pool
+workers read and write entries but keep no index: their events are returned
+with each result and applied by the parent (apply()), which alone evicts.
+"""
+import hashlib, json, os
+from typing import Callable, Dict, List, Optional
+
+from .backtester import PathResult
+from .run_state import _path_from_json, _path_to_json
+from .trades import to_ns
+
+CACHE_VERSION = 3
+
+
+class PathCache:
+    def __init__(self, cache_dir: str, max_bytes: int = 256 * 1024 * 1024):
+        self.dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.journal: Optional[List[tuple]] = None  # set in pool workers; see apply()
+        self._index: Dict[str, list] = {}  # key -> [mtime, size]
+        self._bytes = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        for shard in os.listdir(cache_dir):
+            d = os.path.join(cache_dir, shard)
+            if not os.path.isdir(d):
+                continue
+            for name in os.listdir(d):
+                if name.endswith(".json"):
+                    st = os.stat(os.path.join(d, name))
+                    self._index[name[:-5]] = [st.st_mtime, st.st_size]
+                    self._bytes += st.st_size
+
+    @staticmethod
+    def key(bt, sig, data_version: Optional[str] = None) -> str:
+        """Signal fields + the symbol's data version + every parameter the path depends on."""
+        blob = json.dumps({
+            "v": CACHE_VERSION,
+            "signal": [to_ns(sig.dt), sig.side, sig.symbol, sig.entry, sig.sl, list(sig.tps)],
+            "broker_symbol": bt.symbol_map.get(sig.symbol, sig.symbol),
+            "pip": bt.symbols.pip_size(sig.symbol),
+            "data": data_version,
+            "exit_rule": bt.exit_rule, "tp_weights": bt.tp_weights,
+            "spread_pips": bt.spread_pips, "spread": bt.spread_map.get(sig.symbol),
+            "slippage_pips": bt.slippage_pips, "time_stop_min": bt.time_stop_min, "timeframe": bt.timeframe,
+        }, sort_keys=True, default=str)
+        return hashlib.blake2b(blob.encode(), digest_size=16).hexdigest()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.dir, key[:2], key + ".json")
+
+    def get(self, key: str, bars: Callable[[PathResult], Optional[str]]) -> Optional[PathResult]:
+        """The cached path if `bars(pr)`, the digest of the bars it read in the current data,
+        still equals the one stored with it (None means they are no longer available)."""
+        path = self._file(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            pr = _path_from_json(entry["path"])
+        except FileNotFoundError:
+            return self._record(("miss", key))
+        except (OSError, ValueError, KeyError, TypeError):  # half-written or an older layout
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return self._record(("drop", key))
+        if bars(pr) != entry["bars"]:
+            return self._record(("miss", key))
+        try:
+            os.utime(path)
+            self._record(("hit", key, os.stat(path).st_mtime))
+        except OSError:  # evicted meanwhile; the entry read is still valid
+            self._record(("hit", key, None))
+        return pr
+
+    def put(self, key: str, pr: PathResult, bars: str):
+        path = self._file(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps({"path": _path_to_json(pr), "bars": bars}).encode()
+        tmp = f"{path}.{os.getpid()}.tmp"  # unique per process: pool workers share the directory
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self._record(("put", key, os.stat(path).st_mtime, len(data)))
+
+    def _record(self, event: tuple):
+        if self.journal is not None:
+            self.journal.append(event)
+        else:
+            self.apply([event])
+        return None
+
+    def apply(self, events: List[tuple]):
+        """Index bookkeeping for get/put events, made here or reported by a pool worker;
+        evicts once the total passes max_bytes."""
+        for kind, key, *rest in events:
+            if kind == "hit":
+                self.hits += 1
+                if key in self._index and rest[0] is not None:
+                    self._index[key][0] = rest[0]
+            elif kind == "put":
+                if key in self._index:
+                    self._bytes -= self._index[key][1]
+                self._index[key] = list(rest)
+                self._bytes += rest[1]
+            else:  # miss / drop
+                self.misses += 1
+                if kind == "drop":
+                    self._forget(key)
+        if self._bytes > self.max_bytes:
+            self._evict()
+
+    def _forget(self, key: str):
+        _, size = self._index.pop(key, (0, 0))
+        self._bytes -= size
+
+    def _drop(self, key: str):
+        self._forget(key)
+        try:
+            os.remove(self._file(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        target = self.max_bytes * 0.9  # evict in batches, not on every put
+        for key in sorted(self._index, key=lambda k: self._index[k][0]):
+            if self._bytes <= target:
+                break
+            self._drop(key)
+
+    def stats(self) -> Dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._index), "bytes": self._bytes}
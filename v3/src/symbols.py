@@ -0,0 +1,191 @@
+"""
+Symbol specifications: digits, pip position, contract size, currencies, lot limits.
+
+A SymbolRegistry is filled once (from cTrader symbol metadata or a local JSON file),
+saved to disk and then answers every per-trade lookup from a dict. Symbols it does
+not know fall back to fixed rules on the symbol name, resolved once per symbol:
+
+  pip      JPY quote or metal (XAU/XAG/XPT/XPD) 0.01, other pairs of two ISO currency
+           codes 0.0001, anything else (crypto, oil, indices, CFDs) 0.01
+  contract XAU/XAG 100, otherwise 100_000
+  digits   JPY quote 3, XAU 2, XAG 3, otherwise 5 (connectors.compact)
+
+The JSON file is {"SYMBOL": {"digits": 5, "pip_position": 4, "contract_size": 100000, ...}}.
+"""
+import hashlib, json, os
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, Optional
+
+PIP_DECIMALS = {"USDJPY": 0.01}  # explicit overrides for symbols without a spec
+_METALS = ("XAU", "XAG", "XPT", "XPD")
+_CURRENCIES = frozenset((  # ISO 4217 codes of currencies brokers quote as forex pairs
+    "USD EUR GBP JPY CHF CAD AUD NZD SEK NOK DKK PLN CZK HUF RON BGN TRY RUB ZAR MXN BRL CLP COP "
+    "CNH CNY HKD SGD THB INR IDR KRW TWD PHP MYR ILS SAR AED KWD QAR BHD OMR EGP KES NGN").split())
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "symbols.json")
+
+
+def split_symbol(sym: str):
+    if len(sym) >= 6:
+        return sym[:3].upper(), sym[3:6].upper()
+    return sym.upper(), "USD"
+
+
+@dataclass(frozen=True, slots=True)
+class SymbolSpec:
+    name: str
+    digits: int
+    pip_position: int
+    contract_size: float
+    base_ccy: str
+    quote_ccy: str
+    min_lot: float = 0.01
+    lot_step: float = 0.01
+    symbol_id: Optional[int] = None
+
+    @property
+    def pip_size(self) -> float:
+        return 10.0 ** -self.pip_position
+
+
+def _fallback_pip(symbol: str) -> float:
+    s = symbol.upper()
+    if s in PIP_DECIMALS:
+        return PIP_DECIMALS[s]
+    base, quote = split_symbol(s)
+    if quote == "JPY" or base in _METALS:
+        return 0.01
+    return 0.0001 if len(s) >= 6 and base in _CURRENCIES and quote in _CURRENCIES else 0.01
+
+
+def _fallback_digits(symbol: str) -> int:
+    s = symbol.upper()
+    if s.startswith("XAU"):
+        return 2
+    if s.startswith("XAG") or s[3:6] == "JPY":
+        return 3
+    return 5
+
+
+def _fallback_contract(symbol: str) -> float:
+    return 100.0 if split_symbol(symbol)[0] in ("XAU", "XAG") else 100_000.0
+
+
+class SymbolRegistry:
+    def __init__(self, specs: Iterable[SymbolSpec] = ()):
+        self._specs: Dict[str, SymbolSpec] = {s.name.upper(): s for s in specs}
+        self._pip: Dict[str, float] = {}        # resolved pip size per symbol, spec or fallback
+        self._contract: Dict[str, float] = {}
+
+    def __len__(self):
+        return len(self._specs)
+
+    def __iter__(self):
+        return iter(self._specs.values())
+
+    def __contains__(self, symbol: str):
+        return symbol.upper() in self._specs
+
+    def get(self, symbol: str) -> Optional[SymbolSpec]:
+        return self._specs.get(symbol.upper())
+
+    def update(self, specs: Iterable[SymbolSpec]):
+        for s in specs:
+            self._specs[s.name.upper()] = s
+        self._pip.clear(); self._contract.clear()
+
+    def pip_size(self, symbol: str) -> float:
+        ps = self._pip.get(symbol)
+        if ps is None:
+            spec = self.get(symbol)
+            ps = self._pip[symbol] = spec.pip_size if spec is not None else _fallback_pip(symbol)
+        return ps
+
+    def contract_size(self, symbol: str) -> float:
+        cs = self._contract.get(symbol)
+        if cs is None:
+            spec = self.get(symbol)
+            cs = self._contract[symbol] = spec.contract_size if spec is not None else _fallback_contract(symbol)
+        return cs
+
+    def digits(self, symbol: str) -> int:
+        spec = self.get(symbol)
+        return spec.digits if spec is not None else _fallback_digits(symbol)
+
+    def currencies(self, symbol: str):
+        spec = self.get(symbol)
+        return (spec.base_ccy, spec.quote_ccy) if spec is not None else split_symbol(symbol)
+
+    def fingerprint(self) -> Optional[str]:
+        """Hash of every spec (None when empty), for cache keys and run parameters."""
+        if not self._specs:
+            return None
+        blob = json.dumps(self.to_json(), sort_keys=True)
+        return hashlib.blake2b(blob.encode(), digest_size=8).hexdigest()
+
+    # ---- persistence
+    def to_json(self) -> Dict[str, Dict]:
+        return {k: {f: v for f, v in asdict(s).items() if f != "name"} for k, s in sorted(self._specs.items())}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Dict]) -> "SymbolRegistry":
+        specs = []
+        for name, d in data.items():
+            base, quote = split_symbol(name)
+            specs.append(SymbolSpec(name=name, digits=int(d["digits"]), pip_position=int(d["pip_position"]),
+                                    contract_size=float(d.get("contract_size", _fallback_contract(name))),
+                                    base_ccy=d.get("base_ccy", base), quote_ccy=d.get("quote_ccy", quote),
+                                    min_lot=float(d.get("min_lot", 0.01)), lot_step=float(d.get("lot_step", 0.01)),
+                                    symbol_id=d.get("symbol_id")))
+        return cls(specs)
+
+    @classmethod
+    def load(cls, path: str) -> "SymbolRegistry":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_json(json.load(f))
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+
+    @classmethod
+    def from_ctrader(cls, light_symbols, details, assets: Optional[Dict[int, str]] = None) -> "SymbolRegistry":
+        """From ProtoOASymbolsListRes.symbol (names, asset ids) and ProtoOASymbolByIdRes.symbol
+        (digits, pipPosition, volumes in cents of units); `assets` maps assetId -> currency."""
+        assets = assets or {}
+        light = {s.symbolId: s for s in light_symbols}
+        specs = []
+        for d in details:
+            ls = light.get(d.symbolId)
+            if ls is None:
+                continue
+            base, quote = split_symbol(ls.symbolName)
+            lot = getattr(d, "lotSize", 0) or 0   # cents of base units per lot
+            specs.append(SymbolSpec(
+                name=ls.symbolName, digits=int(d.digits), pip_position=int(d.pipPosition),
+                contract_size=lot / 100.0 if lot else _fallback_contract(ls.symbolName),
+                base_ccy=assets.get(getattr(ls, "baseAssetId", None), base),
+                quote_ccy=assets.get(getattr(ls, "quoteAssetId", None), quote),
+                min_lot=(getattr(d, "minVolume", 0) or 0) / lot if lot else 0.01,
+                lot_step=(getattr(d, "stepVolume", 0) or 0) / lot if lot else 0.01,
+                symbol_id=int(d.symbolId)))
+        return cls(specs)
+
+
+_DEFAULT: Optional[SymbolRegistry] = None
+
+
+def default_registry() -> SymbolRegistry:
+    """Process-wide registry, loaded once from $SYMBOL_SPECS or data/symbols.json (empty if absent)."""
+    global _DEFAULT
+    if _DEFAULT is None:
+        path = os.getenv("SYMBOL_SPECS") or DEFAULT_PATH
+        _DEFAULT = SymbolRegistry.load(path) if os.path.exists(path) else SymbolRegistry()
+    return _DEFAULT
+
+
+def set_default_registry(reg: Optional[SymbolRegistry]):
+    global _DEFAULT
+    _DEFAULT = reg
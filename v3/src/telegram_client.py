@@ -1,20 +1,22 @@
 import os
 from datetime import datetime
 from typing import List, Dict
-from dotenv import load_dotenv
-from telethon import TelegramClient
-from telethon.tl.types import PeerChannel
-load_dotenv()
-API_ID = int(os.getenv("TELEGRAM_API_ID", "0")); API_HASH = os.getenv("TELEGRAM_API_HASH", ""); PHONE = os.getenv("TELEGRAM_PHONE", None)
+# Telethon and .env are only loaded once a fetch is actually needed (keeps CLI startup cheap)
 def _client():
-    if int(API_ID) == 0 or not API_HASH: raise RuntimeError("Missing TELEGRAM_API_ID / TELEGRAM_API_HASH in environment")
-    return TelegramClient("telegram", int(API_ID), API_HASH)
+    from dotenv import load_dotenv
+    from telethon import TelegramClient
+    load_dotenv()
+    api_id = int(os.getenv("TELEGRAM_API_ID", "0")); api_hash = os.getenv("TELEGRAM_API_HASH", "")
+    if api_id == 0 or not api_hash: raise RuntimeError("Missing TELEGRAM_API_ID / TELEGRAM_API_HASH in environment")
+    return TelegramClient("telegram", api_id, api_hash)
 def fetch_messages(channel_ref: str, since: datetime, until: datetime) -> List[Dict]:
+    from telethon.tl.types import PeerChannel
     out = []
     with _client() as client:
         client.connect()
-        if PHONE and not client.is_user_authorized():
-            client.send_code_request(PHONE); raise RuntimeError("First run requires interactive login. Run script standalone to complete login.")
+        phone = os.getenv("TELEGRAM_PHONE", None)
+        if phone and not client.is_user_authorized():
+            client.send_code_request(phone); raise RuntimeError("First run requires interactive login. Run script standalone to complete login.")
         entity = PeerChannel(int(channel_ref)) if channel_ref.isdigit() else channel_ref
         for msg in client.iter_messages(entity, offset_date=until, reverse=True):
             if msg.date < since: break
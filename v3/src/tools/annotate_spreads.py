@@ -1,19 +1,25 @@
 """
 Merge recorded per-minute spreads into an OHLC CSV as a `spread_pips` column.
+
+Backtests no longer need this step: pass --spreads-dir to src.main and spreads are
+attached at read time. Kept for exporting annotated candles to other tools.
 """
 import os, argparse, pandas as pd
+from src.connectors.spreads import read_spreads, asof_spreads
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--candles", required=True, help="Path to candles CSV (time,open,high,low,close,volume)")
-    ap.add_argument("--spreads", required=True, help="Path to spreads CSV (bucket,spread_pips)")
+    ap.add_argument("--spreads", required=True, help="Spread store root (or dir holding <SYMBOL>.csv)")
+    ap.add_argument("--symbol", required=True)
+    ap.add_argument("--max-stale-min", type=float, default=5.0)
     ap.add_argument("--out", required=True)
     args = ap.parse_args()
 
     c = pd.read_csv(args.candles, parse_dates=["time"])
-    s = pd.read_csv(args.spreads, parse_dates=["bucket"])
-    s = s.rename(columns={"bucket":"time"})
-    out = c.merge(s, on="time", how="left")
+    stale = pd.Timedelta(minutes=args.max_stale_min)
+    s = read_spreads(args.spreads, args.symbol, c["time"].min() - stale, c["time"].max())
+    out = asof_spreads(c, s, stale)
     out.to_csv(args.out, index=False)
     print(f"Wrote {args.out}")
 
@@ -2,18 +2,26 @@
 Resample tick parquet into OHLCV CSV for a given timeframe.
 """
 import os, argparse, pandas as pd
+from src.connectors.replay import read_ticks
 
 def resample_ticks(df_ticks: pd.DataFrame, timeframe: str) -> pd.DataFrame:
-    df = df_ticks.copy()
-    df["time"] = pd.to_datetime(df["time"], utc=True)
-    piv = df.pivot_table(index="time", columns="side", values="price", aggfunc="last")
-    piv["mid"] = piv.mean(axis=1)
-    rule = {"M1":"1min","M5":"5min","M15":"15min","H1":"1H"}[timeframe]
-    o = piv["mid"].resample(rule).first()
-    h = piv["mid"].resample(rule).max()
-    l = piv["mid"].resample(rule).min()
-    c = piv["mid"].resample(rule).last()
-    v = piv["mid"].resample(rule).count()
+    if "side" in df_ticks.columns:
+        # legacy recordings: one row per BID/ASK update
+        df = df_ticks.copy()
+        df["time"] = pd.to_datetime(df["time"], utc=True)
+        piv = df.pivot_table(index="time", columns="side", values="price", aggfunc="last")
+        mid = piv.mean(axis=1)
+    else:
+        # combined top-of-book rows: time, symbol, bid, ask
+        mid = pd.Series(((df_ticks["bid"] + df_ticks["ask"]) / 2.0).values,
+                        index=pd.to_datetime(df_ticks["time"], utc=True)).sort_index()
+    rule = {"M1":"1min","M5":"5min","M15":"15min","H1":"1h"}[timeframe]
+    r = mid.resample(rule)
+    o = r.first()
+    h = r.max()
+    l = r.min()
+    c = r.last()
+    v = r.count()
     out = pd.DataFrame({"time": o.index, "open": o.values, "high": h.values, "low": l.values, "close": c.values, "volume": v.values})
     return out.dropna().reset_index(drop=True)
 
@@ -25,10 +33,10 @@ def main():
     ap.add_argument("--out", required=True)
     args = ap.parse_args()
 
-    path = os.path.join(args.ticks, f"{args.symbol}.parquet")
-    if not os.path.exists(path):
-        raise SystemExit(f"Ticks not found: {path}")
-    df = pd.read_parquet(path)
+    try:
+        df = read_ticks(args.ticks, args.symbol)  # plain or compact recordings
+    except FileNotFoundError as e:
+        raise SystemExit(str(e))
     candles = resample_ticks(df, args.timeframe)
     os.makedirs(os.path.dirname(args.out), exist_ok=True)
     candles.to_csv(args.out, index=False)
@@ -1,73 +1,129 @@
 """
 cTrader live spread recorder using Spotware Open API.
+
+Spot events are folded into running per-minute aggregates (count/sum/min/max/last
+of spread and mid); closed minutes are appended to a partitioned Parquet store.
+With a `wal_dir`, events are only appended to a write-ahead log instead and each
+minute segment is aggregated into the store in the background (spreads.compact_spreads).
 """
 import os, time, threading
-from datetime import datetime, timezone
-import pandas as pd
+from typing import Dict, Optional
 from dotenv import load_dotenv
 
 from ctrader_open_api import Client, TcpProtocol, EndPoints, Protobuf
 from ctrader_open_api.messages.OpenApiMessages_pb2 import (
-    ProtoOAApplicationAuthReq, ProtoOAAccountAuthReq, ProtoOASubscribeSpotsReq
+    ProtoOAApplicationAuthReq, ProtoOAAccountAuthReq, ProtoOASymbolsListReq,
+    ProtoOASymbolByIdReq, ProtoOASubscribeSpotsReq, ProtoOASpotEvent
 )
 
+from src.connectors.spreads import MINUTE_NS, SpreadMinuteAggregator, append_partitions, compact_spreads, rows_to_frame
+from src.connectors.wal import WriteAheadLog
+from src.symbols import SymbolRegistry, default_registry
+
 _SCALE = 100000.0
+_SPOT_EVENT = ProtoOASpotEvent().payloadType
 
 class CTraderSpreadsRecorder:
-    def __init__(self, symbols):
+    def __init__(self, symbols, client_id: Optional[str] = None,
+                 client_secret: Optional[str] = None, access_token: Optional[str] = None,
+                 account_id: Optional[int] = None, host: Optional[str] = None,
+                 registry: Optional[SymbolRegistry] = None, out_dir: Optional[str] = None,
+                 wal_dir: Optional[str] = None, fsync_sec: float = 0.2):
         load_dotenv()
-        cid=os.getenv("CTRADER_CLIENT_ID"); sec=os.getenv("CTRADER_CLIENT_SECRET")
-        tok=os.getenv("CTRADER_ACCESS_TOKEN"); acc=int(os.getenv("CTRADER_ACCOUNT_ID","0"))
-        host=(os.getenv("CTRADER_HOST","LIVE") or "LIVE").upper()
+        cid = client_id or os.getenv("CTRADER_CLIENT_ID"); sec = client_secret or os.getenv("CTRADER_CLIENT_SECRET")
+        tok = access_token or os.getenv("CTRADER_ACCESS_TOKEN"); acc = int(account_id or os.getenv("CTRADER_ACCOUNT_ID", "0"))
+        host = (host or os.getenv("CTRADER_HOST", "LIVE") or "LIVE").upper()
         self.symbols = symbols
         self.account_id = acc
+        self._ids: Dict[int, str] = {}           # symbolId -> name
+        self._pip_div: Dict[int, float] = {}     # symbolId -> scaled units per pip
+        self._last: Dict[int, list] = {}         # symbolId -> [bid, ask] (spot events only carry changes)
+        self._agg = SpreadMinuteAggregator()
+        self.registry = registry if registry is not None else default_registry()
+        self._lock = threading.Lock()
+        self.wal = None
+        if wal_dir:  # replays minutes left by a previous crash into out_dir before connecting
+            self.wal = WriteAheadLog(wal_dir, lambda b: compact_spreads(b, out_dir),
+                                     segment_ns=MINUTE_NS, fsync_sec=fsync_sec)
         self.client = Client(EndPoints.PROTOBUF_LIVE_HOST if host=="LIVE" else EndPoints.PROTOBUF_DEMO_HOST,
                              EndPoints.PROTOBUF_PORT, TcpProtocol)
+        self.client.setConnectedCallback(lambda c: self._auth(cid, sec, tok, acc))
         self.client.setMessageReceivedCallback(self._on_msg)
         self.client.startService()
-        self._rows = []  # (sym, time, spread_pips)
-        self._lock = threading.Lock()
-        self._auth(cid, sec, tok, acc)
-        self._subscribe(symbols)
 
     def _auth(self, client_id, client_secret, access_token, account_id):
-        r = ProtoOAApplicationAuthReq(); r.clientId=client_id; r.clientSecret=client_secret; self.client.send(r)
-        r2 = ProtoOAAccountAuthReq(); r2.ctidTraderAccountId=account_id; r2.accessToken=access_token; self.client.send(r2)
+        r = ProtoOAApplicationAuthReq(); r.clientId=client_id; r.clientSecret=client_secret
+        r2 = ProtoOAAccountAuthReq(); r2.ctidTraderAccountId=account_id; r2.accessToken=access_token
+        d = self.client.send(r)
+        d.addCallback(lambda _: self.client.send(r2))
+        d.addCallback(lambda _: self._load_symbols())
+
+    def _load_symbols(self):
+        specs = [self.registry.get(s) for s in self.symbols]
+        if all(sp is not None and sp.symbol_id is not None for sp in specs):
+            self._use_specs(specs)  # everything known from the registry: no metadata round trips
+            return self._subscribe()
+        req = ProtoOASymbolsListReq(); req.ctidTraderAccountId = self.account_id
+        return self.client.send(req).addCallback(self._on_symbols)
 
-    def _subscribe(self, symbols):
+    def _on_symbols(self, message):
+        wanted = {s.upper() for s in self.symbols}
+        self._light = [s for s in Protobuf.extract(message).symbol if s.symbolName.upper() in wanted]
+        req = ProtoOASymbolByIdReq(); req.ctidTraderAccountId = self.account_id
+        req.symbolId.extend(s.symbolId for s in self._light)
+        return self.client.send(req).addCallback(self._on_symbol_details)
+
+    def _on_symbol_details(self, message):
+        specs = list(SymbolRegistry.from_ctrader(self._light, Protobuf.extract(message).symbol))
+        self.registry.update(specs)
+        self._use_specs(specs)
+        self._subscribe()
+
+    def _use_specs(self, specs):
+        # pipPosition from symbol metadata, resolved once instead of per event
+        for sp in specs:
+            self._ids[sp.symbol_id] = sp.name
+            self._pip_div[sp.symbol_id] = _SCALE * sp.pip_size
+
+    def _subscribe(self):
         req = ProtoOASubscribeSpotsReq()
         req.ctidTraderAccountId = self.account_id
-        for s in symbols:
-            req.symbolName.append(s)
-        self.client.send(req)
+        req.symbolId.extend(self._pip_div)
+        return self.client.send(req)
 
     def _on_msg(self, client, message):
+        if message.payloadType != _SPOT_EVENT:
+            return
         try:
-            payload = Protobuf.extract(message)
-            if payload.get("payloadType","").endswith("SPOT_EVENT"):
-                sym = payload.get("symbolName")
-                bid = float(payload.get("bid", 0.0))/_SCALE
-                ask = float(payload.get("ask", 0.0))/_SCALE
-                if sym and bid>0 and ask>0:
-                    # Infer pip size: 0.0001 default, 0.01 for 2dp
-                    ps = 0.0001 if max(len(str(bid).split(".")[-1]), len(str(ask).split(".")[-1]))>2 else 0.01
-                    spread_pips = (ask - bid)/ps
-                    with self._lock:
-                        self._rows.append((sym, datetime.now(timezone.utc), spread_pips))
+            ev = Protobuf.extract(message)
+            sid = ev.symbolId
+            div = self._pip_div.get(sid)
+            if div is None:
+                return
+            last = self._last.setdefault(sid, [0, 0])
+            if ev.HasField("bid"): last[0] = ev.bid
+            if ev.HasField("ask"): last[1] = ev.ask
+            bid, ask = last
+            if bid > 0 and ask > 0:
+                t_ns = time.time_ns()
+                if self.wal is not None:
+                    self.wal.append(self._ids[sid], t_ns, (ask - bid) / div, (ask + bid) / (2.0 * _SCALE))
+                    return
+                with self._lock:
+                    self._agg.add(self._ids[sid], t_ns, (ask - bid) / div, (ask + bid) / (2.0 * _SCALE))
         except Exception:
             pass
 
     def flush_minute(self, out_dir):
-        os.makedirs(out_dir, exist_ok=True)
+        """Append every closed minute to <out_dir>/<SYMBOL>/date=.../part-*.parquet."""
+        if self.wal is not None:
+            return  # the WAL compaction thread writes minutes as their segments seal
         with self._lock:
-            if not self._rows: return
-            df = pd.DataFrame(self._rows, columns=["symbol","time","spread_pips"])
-            self._rows = []
-        for sym, g in df.groupby("symbol"):
-            g["bucket"] = g["time"].dt.floor("1min")
-            agg = g.groupby("bucket")["spread_pips"].mean().reset_index()
-            path = os.path.join(out_dir, f"{sym}.csv")
-            if os.path.exists(path):
-                old = pd.read_csv(path, parse_dates=["bucket"])
-                agg = pd.concat([old, agg], ignore_index=True).drop_duplicates(subset=["bucket"]).sort_values("bucket")
-            agg.to_csv(path, index=False)
+            self._agg.close_before(time.time_ns())
+            rows = self._agg.drain()
+        if rows:
+            append_partitions(out_dir, rows_to_frame(rows))
+
+    def close(self):
+        if self.wal is not None:
+            self.wal.close()
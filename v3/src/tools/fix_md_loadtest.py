@@ -0,0 +1,134 @@
+"""
+Load test for the FIX tick recorder, entirely on localhost.
+
+For each rate, starts fix_md_sim in a subprocess, connects the production
+VantageFIXProvider (MDApp, TickBus) to it and runs the record_fix_md persist loop
+until the simulator stops, then reports one JSON line:
+
+  sent / received / published / dropped / persisted   quotes (messages for received)
+  throughput                                            persisted rows per second
+  latency                                               send -> persisted row, LatencyHistogram summary
+  flush                                                 time spent in each persist call
+  cpu_pct                                               recorder process (QuickFIX thread + persist loop)
+
+--wal measures record_fix_md's default mode instead of --no-wal: every tick goes to
+the write-ahead log on the QuickFIX thread (published counts WAL appends, nothing is
+dropped) and each closed segment is persisted in the background, so latency includes
+waiting for the segment to close (--segment-sec) and flush times each compaction.
+
+Synthetic quotes always change the top of book, so sent == published when MDApp keeps
+up and published == persisted + dropped when the recorder does.
+
+  python -m src.tools.fix_md_loadtest --symbols EURUSD,GBPUSD,USDJPY --rates 1000,5000,20000 --duration 20
+  python -m src.tools.fix_md_loadtest --symbols EURUSD,GBPUSD,USDJPY --wal --segment-sec 5
+"""
+import os, sys, json, time, argparse, subprocess, tempfile
+from typing import Dict, List
+import pandas as pd
+
+from src.live_signals import LatencyHistogram
+from src.tools.fix_md_sim import initiator_cfg, write_cfg
+from src.tools.record_fix_md import persist_ticks, tick_wal
+
+
+def flush(ticks, out_dir: str, compact: bool, latency: LatencyHistogram,
+          flush_hist: LatencyHistogram, fsync: bool = False) -> int:
+    """persist_ticks plus accounting: every row's latency is (write done - tick time).
+    `ticks` are tick dicts (a drained bus) or a frame (a WAL segment)."""
+    t = time.perf_counter_ns()
+    n = persist_ticks(ticks, out_dir, compact=compact, fsync=fsync)
+    done = time.time_ns()
+    flush_hist.record(time.perf_counter_ns() - t)
+    if n:
+        for tt in pd.DataFrame(ticks)["time"]:
+            latency.record(max(0, done - pd.Timestamp(tt).value))
+    return n
+
+
+def wal_recorder(out_dir: str, compact: bool, latency: LatencyHistogram, flush_hist: LatencyHistogram,
+                 fsync_ms: int = 200, segment_sec: float = 5.0):
+    """record_fix_md.tick_wal with each segment compaction accounted like a flush."""
+    persist = lambda df, out, compact, fsync: flush(df, out, compact, latency, flush_hist, fsync=fsync)
+    return tick_wal(out_dir, compact=compact, fsync_sec=fsync_ms / 1000.0, segment_sec=segment_sec, persist=persist)
+
+
+def run_once(symbols: List[str], rate: float, duration: float, port: int, workdir: str, *,
+             flush_sec: float = 1.0, compact: bool = False, entries_per_msg: int = 1,
+             data_dictionary: str = "FIX44.xml", ticks: str = None, wal: bool = False,
+             fsync_ms: int = 200, segment_sec: float = 5.0) -> Dict:
+    from src.connectors.fix import VantageFIXProvider
+    out_dir = os.path.join(workdir, "ticks")
+    os.makedirs(out_dir, exist_ok=True)
+    cmd = [sys.executable, "-m", "src.tools.fix_md_sim", "--symbols", ",".join(symbols), "--rate", str(rate),
+           "--duration", str(duration), "--port", str(port), "--entries-per-msg", str(entries_per_msg),
+           "--data-dictionary", data_dictionary, "--work", os.path.join(workdir, "sim")]
+    if ticks:
+        cmd += ["--ticks", ticks]
+    sim = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    try:
+        ready = sim.stdout.readline()
+        if not ready:
+            raise RuntimeError(f"simulator exited before listening (rc={sim.wait()})")
+        cfg = write_cfg(os.path.join(workdir, "initiator.cfg"), initiator_cfg(port, workdir, data_dictionary))
+        latency, flush_hist = LatencyHistogram(), LatencyHistogram()
+        tick_log, listeners = None, []
+        if wal:
+            tick_log, on_tick = wal_recorder(out_dir, compact, latency, flush_hist, fsync_ms, segment_sec)
+            listeners = [on_tick]
+        prov = VantageFIXProvider(cfg_path=cfg, symbols=symbols, listeners=listeners, tick_bus=tick_log is None)
+        persisted = 0
+        cpu0, t0 = time.process_time(), time.perf_counter()
+        while sim.poll() is None:
+            if tick_log is None:
+                persisted += flush(prov.drain_ticks(), out_dir, compact, latency, flush_hist)
+            time.sleep(flush_sec)
+        time.sleep(flush_sec)  # whatever was still in flight when the simulator stopped
+        if tick_log is None:
+            persisted += flush(prov.drain_ticks(), out_dir, compact, latency, flush_hist)
+        prov.initiator.stop()
+        if tick_log is not None:
+            tick_log.close()  # compacts the open segment too
+            persisted = tick_log.stats()["compacted"]
+        wall, cpu = time.perf_counter() - t0, time.process_time() - cpu0
+        sent = json.loads(sim.stdout.readline() or "{}")
+    finally:
+        if sim.poll() is None:
+            sim.kill()
+    bus = prov.bus.stats() if tick_log is None else {"published": tick_log.stats()["appended"], "dropped": 0}
+    return {"rate": rate, "symbols": len(symbols), "entries_per_msg": entries_per_msg, "wal": wal,
+            "sent": sent.get("sent_quotes"), "sim_rate": sent.get("achieved_rate"),
+            "received": prov.app.md_messages, "published": bus["published"], "dropped": bus["dropped"],
+            "persisted": persisted, "throughput": persisted / wall if wall else None,
+            "latency": latency.summary(), "flush": flush_hist.summary(),
+            "cpu_pct": 100.0 * cpu / wall if wall else None, "sim_cpu_pct": sent.get("cpu_pct")}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--symbols", required=True, help="Comma-separated symbols")
+    ap.add_argument("--rates", default="1000,5000,20000", help="Comma-separated quotes/second, one run each")
+    ap.add_argument("--duration", type=float, default=20.0)
+    ap.add_argument("--port", type=int, default=9878)
+    ap.add_argument("--flush-sec", type=float, default=1.0, help="Recorder drain/persist interval")
+    ap.add_argument("--compact", action="store_true")
+    ap.add_argument("--entries-per-msg", type=int, default=1)
+    ap.add_argument("--ticks", default=None, help="Replay recorded tick parquet instead of random walks")
+    ap.add_argument("--wal", action="store_true", help="Record through the write-ahead log (record_fix_md's default)")
+    ap.add_argument("--fsync-ms", type=int, default=200, help="WAL fsync interval")
+    ap.add_argument("--segment-sec", type=float, default=5.0, help="WAL segment span")
+    ap.add_argument("--data-dictionary", default="FIX44.xml")
+    ap.add_argument("--work", default=None, help="Keep cfg, session logs and ticks here (default: temp dir)")
+    args = ap.parse_args()
+
+    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+    for rate in (float(r) for r in args.rates.split(",") if r.strip()):
+        with tempfile.TemporaryDirectory(prefix="fix_md_lt_") as tmp:
+            work = os.path.join(args.work, f"rate_{int(rate)}") if args.work else tmp
+            rep = run_once(symbols, rate, args.duration, args.port, work, flush_sec=args.flush_sec,
+                           compact=args.compact, entries_per_msg=args.entries_per_msg,
+                           data_dictionary=args.data_dictionary, ticks=args.ticks, wal=args.wal,
+                           fsync_ms=args.fsync_ms, segment_sec=args.segment_sec)
+            print(json.dumps(rep), flush=True)
+
+if __name__ == "__main__":
+    main()
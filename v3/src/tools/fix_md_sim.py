@@ -0,0 +1,279 @@
+"""
+Local FIX 4.4 market-data simulator for load-testing MDApp and the tick recorder.
+
+A QuickFIX acceptor on localhost answers the recorder's MarketDataRequest with one
+snapshot (35=W) per symbol, then streams incremental refreshes (35=X) at a fixed rate
+of quotes per second, from synthetic random walks or from recorded ticks (a parquet
+dir written by record_fix_md). Every entry carries MDEntryDate/MDEntryTime set to the
+send time (UTC, microseconds), so the recorder's tick time is the send time and
+persisted-minus-tick time is the end-to-end latency (see fix_md_loadtest).
+
+Prints one JSON line when listening and one with the send stats on exit:
+
+  python -m src.tools.fix_md_sim --symbols EURUSD,USDJPY --rate 5000 --duration 30 --port 9878
+"""
+import os, json, time, random, argparse, threading
+from datetime import datetime, timezone
+from itertools import cycle
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import quickfix as fix
+    import quickfix44 as fix44
+    _FIX_OK = True
+except Exception:
+    _FIX_OK = False
+
+from src.symbols import default_registry
+
+Quote = Tuple[str, float, float]  # symbol, bid, ask
+
+_START = {"EURUSD": 1.1, "GBPUSD": 1.27, "USDJPY": 150.0, "GBPJPY": 190.0, "XAUUSD": 2350.0}
+
+
+def synthetic_quotes(symbols: List[str], seed: int = 0, spread_pips: float = 1.0) -> Iterator[Quote]:
+    """Endless round-robin random walk. Each step moves the bid by 1-3 points, so every
+    quote changes the top of book and becomes exactly one recorded tick."""
+    reg = default_registry()
+    rng = random.Random(seed)
+    state = []
+    for s in symbols:
+        point = 10.0 ** -reg.digits(s)
+        spread = max(1, round(spread_pips * reg.pip_size(s) / point))
+        state.append([s, reg.digits(s), point, round(_START.get(s.upper(), 1.0) / point), spread])
+    for st in cycle(state):
+        sym, digits, point, bid_pts, spread = st
+        bid_pts += rng.choice((-3, -2, -1, 1, 2, 3))
+        st[3] = bid_pts
+        yield sym, round(bid_pts * point, digits), round((bid_pts + spread) * point, digits)
+
+
+def recorded_quotes(tick_dir: str, symbols: List[str]) -> Iterator[Quote]:
+    """Recorded {time, symbol, bid, ask} ticks for `symbols`, merged by time and looped."""
+    import pandas as pd
+    from src.connectors.replay import read_ticks
+    frames = []
+    for s in symbols:
+        df = read_ticks(tick_dir, s)
+        if "bid" not in df.columns:
+            raise ValueError(f"{s}: per-side recordings are not supported, re-record as bid/ask rows")
+        frames.append(df.assign(symbol=s)[["time", "symbol", "bid", "ask"]])
+    df = pd.concat(frames, ignore_index=True).sort_values("time", kind="stable")
+    rows = list(zip(df["symbol"], df["bid"].astype(float), df["ask"].astype(float)))
+    if not rows:
+        raise ValueError(f"no ticks for {symbols} in {tick_dir}")
+    return cycle(rows)
+
+
+def paced(quotes: Iterator[Quote], rate: float, duration: Optional[float] = None, max_batch: int = 1_000,
+          clock=time.perf_counter, sleep=time.sleep) -> Iterator[List[Quote]]:
+    """Batches of quotes at `rate` per second on average: each wake-up emits what is due
+    since the start (at most max_batch), so a slow sender catches up instead of drifting."""
+    t0 = clock()
+    sent = 0
+    while True:
+        elapsed = clock() - t0
+        if duration is not None and elapsed >= duration:
+            return
+        due = min(int(elapsed * rate) - sent, max_batch)
+        if due <= 0:
+            sleep(min(0.001, (sent + 1) / rate - elapsed))
+            continue
+        batch = [next(quotes) for _ in range(due)]
+        sent += due
+        yield batch
+
+
+def _cfg(defaults: Dict[str, str], session: Dict[str, str]) -> str:
+    lines = ["[DEFAULT]"] + [f"{k}={v}" for k, v in defaults.items()]
+    lines += ["", "[SESSION]"] + [f"{k}={v}" for k, v in session.items()]
+    return "\n".join(lines) + "\n"
+
+
+def acceptor_cfg(port: int, workdir: str, data_dictionary: str = "FIX44.xml") -> str:
+    return _cfg({"ConnectionType": "acceptor", "SocketAcceptPort": str(port), "StartTime": "00:00:00",
+                 "EndTime": "00:00:00", "UseDataDictionary": "Y", "DataDictionary": data_dictionary,
+                 "FileStorePath": os.path.join(workdir, "sim_store"), "SocketNodelay": "Y"},
+                {"BeginString": "FIX.4.4", "SenderCompID": "SIM", "TargetCompID": "REC"})
+
+
+def initiator_cfg(port: int, workdir: str, data_dictionary: str = "FIX44.xml") -> str:
+    """Localhost twin of fix/vantage_md.cfg for the recorder side (plain TCP, local store and log)."""
+    return _cfg({"ConnectionType": "initiator", "UseDataDictionary": "Y", "StartTime": "00:00:00",
+                 "EndTime": "00:00:00", "FileStorePath": os.path.join(workdir, "store"),
+                 "FileLogPath": os.path.join(workdir, "log"), "DataDictionary": data_dictionary,
+                 "SocketUseSSL": "N", "ReconnectInterval": "1", "SocketNodelay": "Y"},
+                {"BeginString": "FIX.4.4", "SenderCompID": "REC", "TargetCompID": "SIM",
+                 "SocketConnectHost": "127.0.0.1", "SocketConnectPort": str(port), "HeartBtInt": "30",
+                 "ResetOnLogon": "Y", "ResetOnLogout": "Y", "ResetOnDisconnect": "Y"})
+
+
+def write_cfg(path: str, text: str) -> str:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+
+def _stamp(now: datetime) -> Tuple[str, str]:
+    return now.strftime("%Y%m%d"), now.strftime("%H:%M:%S.%f")
+
+
+class MDSimApp(fix.Application if _FIX_OK else object):
+    """Acceptor side: records the subscription, then sends what send_snapshot/send_quotes are given."""
+    def __init__(self):
+        super().__init__()
+        self.sessionID = None
+        self.subscribed: List[str] = []
+        self.ready = threading.Event()
+        self.sent_messages = 0
+        self.sent_quotes = 0
+
+    def onCreate(self, sessionID): pass
+    def onLogon(self, sessionID): self.sessionID = sessionID
+    def onLogout(self, sessionID): self.ready.clear()
+    def toAdmin(self, message, sessionID): pass
+    def fromAdmin(self, message, sessionID): pass
+    def toApp(self, message, sessionID): pass
+
+    def fromApp(self, message, sessionID):
+        msgtype = fix.MsgType()
+        message.getHeader().getField(msgtype)
+        if msgtype.getValue() != fix.MsgType_MarketDataRequest:
+            return
+        count = fix.NoRelatedSym()
+        message.getField(count)
+        syms = []
+        for i in range(1, count.getValue() + 1):
+            g = fix44.MarketDataRequest.NoRelatedSym()
+            message.getGroup(i, g)
+            syms.append(g.getField(55))
+        self.sessionID = sessionID
+        self.subscribed = syms
+        self.ready.set()
+
+    def send_snapshot(self, sym: str, bid: float, ask: float):
+        d, t = _stamp(datetime.now(timezone.utc))
+        msg = fix44.MarketDataSnapshotFullRefresh()
+        msg.setField(fix.MDReqID("MD-REQ-1"))
+        msg.setField(fix.Symbol(sym))
+        for typ, px in ((fix.MDEntryType_BID, bid), (fix.MDEntryType_OFFER, ask)):
+            g = fix44.MarketDataSnapshotFullRefresh.NoMDEntries()
+            g.setField(fix.MDEntryType(typ))
+            g.setField(fix.MDEntryPx(px))
+            g.setField(fix.StringField(272, d))
+            g.setField(fix.StringField(273, t))
+            msg.addGroup(g)
+        fix.Session.sendToTarget(msg, self.sessionID)
+        self.sent_messages += 1
+
+    def send_quotes(self, quotes: List[Quote]):
+        """One incremental refresh carrying a CHANGE of both sides for every quote."""
+        d, t = _stamp(datetime.now(timezone.utc))
+        msg = fix44.MarketDataIncrementalRefresh()
+        msg.setField(fix.MDReqID("MD-REQ-1"))
+        for sym, bid, ask in quotes:
+            for typ, px in ((fix.MDEntryType_BID, bid), (fix.MDEntryType_OFFER, ask)):
+                g = fix44.MarketDataIncrementalRefresh.NoMDEntries()
+                g.setField(fix.MDUpdateAction(fix.MDUpdateAction_CHANGE))
+                g.setField(fix.MDEntryType(typ))
+                g.setField(fix.Symbol(sym))
+                g.setField(fix.MDEntryPx(px))
+                g.setField(fix.StringField(272, d))
+                g.setField(fix.StringField(273, t))
+                msg.addGroup(g)
+        fix.Session.sendToTarget(msg, self.sessionID)
+        self.sent_messages += 1
+        self.sent_quotes += len(quotes)
+
+
+def _per_message(batch: List[Quote], n: int) -> Iterator[List[Quote]]:
+    """Split a due batch into messages of up to n quotes, never two quotes of one symbol in
+    a message (MDApp emits one tick per changed symbol per message)."""
+    msg: List[Quote] = []
+    seen = set()
+    for q in batch:
+        if len(msg) == n or q[0] in seen:
+            yield msg
+            msg, seen = [], set()
+        msg.append(q)
+        seen.add(q[0])
+    if msg:
+        yield msg
+
+
+def first_quotes(quotes: Iterator[Quote], subscribed: List[str], symbols: Optional[List[str]] = None,
+                 max_scan: int = 1_000_000) -> Dict[str, Tuple[float, float]]:
+    """The first quote of each subscribed symbol (duplicates count once), for its snapshot.
+    Symbols outside `symbols` (what the simulator sends) are rejected up front; any still
+    unseen after `max_scan` quotes raise instead of waiting on an endless stream."""
+    wanted = set(subscribed)
+    missing = wanted - set(symbols) if symbols is not None else set()
+    if missing:
+        raise ValueError(f"subscribed to {sorted(missing)}, but the simulator only sends {list(symbols)}")
+    first: Dict[str, Tuple[float, float]] = {}
+    for _, (sym, bid, ask) in zip(range(max_scan), quotes):
+        if sym in wanted:
+            first.setdefault(sym, (bid, ask))
+            if len(first) == len(wanted):
+                return first
+    raise ValueError(f"no quote for {sorted(wanted - set(first))} in the first {max_scan} quotes")
+
+
+def run_sim(cfg_path: str, quotes: Iterator[Quote], rate: float, duration: float,
+            entries_per_msg: int = 1, wait_sec: float = 30.0, on_listen=None,
+            symbols: Optional[List[str]] = None) -> Dict:
+    """Accept one recorder session, answer its subscription and send for `duration` seconds.
+    `symbols` are the ones `quotes` carries; a subscription outside them raises ValueError."""
+    if not _FIX_OK:
+        raise RuntimeError("quickfix not installed. pip install quickfix")
+    settings = fix.SessionSettings(cfg_path)
+    app = MDSimApp()
+    acceptor = fix.SocketAcceptor(app, fix.MemoryStoreFactory(), settings)
+    acceptor.start()
+    try:
+        if on_listen is not None:
+            on_listen()
+        if not app.ready.wait(wait_sec):
+            raise TimeoutError(f"no MarketDataRequest within {wait_sec}s")
+        first = first_quotes(quotes, app.subscribed, symbols)
+        for sym in dict.fromkeys(app.subscribed):
+            app.send_snapshot(sym, *first[sym])
+        cpu0, t0 = time.process_time(), time.perf_counter()
+        for batch in paced(quotes, rate, duration):
+            for msg in _per_message(batch, entries_per_msg):
+                app.send_quotes(msg)
+        wall, cpu = time.perf_counter() - t0, time.process_time() - cpu0
+        time.sleep(0.5)  # let the last messages leave before logout
+    finally:
+        acceptor.stop()
+    return {"rate": rate, "sent_messages": app.sent_messages, "sent_quotes": app.sent_quotes,
+            "wall_sec": wall, "achieved_rate": app.sent_quotes / wall if wall else None,
+            "cpu_sec": cpu, "cpu_pct": 100.0 * cpu / wall if wall else None}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--symbols", required=True, help="Comma-separated symbols")
+    ap.add_argument("--rate", type=float, default=1_000.0, help="Quotes per second (all symbols)")
+    ap.add_argument("--duration", type=float, default=30.0, help="Seconds of incremental refreshes")
+    ap.add_argument("--port", type=int, default=9878)
+    ap.add_argument("--entries-per-msg", type=int, default=1, help="Quotes per 35=X message")
+    ap.add_argument("--ticks", default=None, help="Replay recorded tick parquet from this dir instead of random walks")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--data-dictionary", default="FIX44.xml")
+    ap.add_argument("--work", default="fix/sim", help="Dir for the generated cfg and session store")
+    ap.add_argument("--wait-sec", type=float, default=30.0, help="Give up if nobody subscribes in time")
+    args = ap.parse_args()
+
+    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+    quotes = recorded_quotes(args.ticks, symbols) if args.ticks else synthetic_quotes(symbols, seed=args.seed)
+    cfg = write_cfg(os.path.join(args.work, "acceptor.cfg"),
+                    acceptor_cfg(args.port, args.work, args.data_dictionary))
+    listening = lambda: print(json.dumps({"listening": args.port}), flush=True)
+    stats = run_sim(cfg, quotes, args.rate, args.duration, entries_per_msg=args.entries_per_msg,
+                    wait_sec=args.wait_sec, on_listen=listening, symbols=symbols)
+    print(json.dumps(stats), flush=True)
+
+if __name__ == "__main__":
+    main()
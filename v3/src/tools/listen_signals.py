@@ -0,0 +1,43 @@
+"""
+Listen to a Telegram channel live and print parsed signals plus parse/publish latency.
+"""
+import argparse, asyncio, json
+from src.live_signals import SignalBus, LiveSignalListener
+
+async def _run(args):
+    from src.telegram_client import _client
+    client = _client()
+    bus = SignalBus()
+    listener = LiveSignalListener(args.channel, bus)
+    listener.attach(client)
+    q = bus.subscribe()
+
+    async def _print_signals():
+        while True:
+            sig = await q.get()
+            print(f"{sig.dt.isoformat()} {sig.side} {sig.symbol} @ {sig.entry} SL {sig.sl} TP {sig.tps}")
+
+    async def _print_latency():
+        while True:
+            await asyncio.sleep(args.stats_sec)
+            print(json.dumps(listener.latency_summary()))
+
+    async with client:
+        tasks = [asyncio.create_task(_print_signals()), asyncio.create_task(_print_latency())]
+        try:
+            await client.run_until_disconnected()
+        finally:
+            for t in tasks: t.cancel()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--channel", required=True, help="Channel username or numeric id")
+    ap.add_argument("--stats-sec", type=int, default=60)
+    args = ap.parse_args()
+    try:
+        asyncio.run(_run(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
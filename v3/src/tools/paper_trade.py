@@ -0,0 +1,108 @@
+"""
+Paper-trade a Telegram channel live against FIX ticks (or replay recorded ticks).
+
+Live:   python -m src.tools.paper_trade --channel @x --fix-cfg fix.cfg --symbols EURUSD,XAUUSD
+Replay: python -m src.tools.paper_trade --channel @x --tick-dir data/ticks --symbols EURUSD --since ... --until ...
+"""
+import argparse, asyncio, json
+from datetime import datetime, timezone
+
+
+def _backtester(args):
+    from src.backtester import Backtester
+    return Backtester(provider=None, default_lot=args.lot, deposit=args.deposit, leverage=args.leverage,
+                      account_ccy=args.account_ccy, symbol_map=json.loads(args.symbol_map), contract_map={},
+                      conv_map={}, exit_rule=args.exit, risk_pct=args.risk_pct, spread_pips=0.0,
+                      slippage_pips=args.slippage_pips, commission_per_lot=args.commission_per_lot,
+                      time_stop_min=args.time_stop_min)
+
+
+def _sink(args):
+    if not args.export:
+        return None
+    from src.export import TradeLogWriter
+    return TradeLogWriter(args.export, fmt=args.export_format, metadata={"channel": args.channel, "mode": "paper"})
+
+
+async def _run_live(args, trader, symbols):
+    """Telethon, FIX market data and the paper trader share this one event loop."""
+    from src.connectors.fix import AsyncFIXProvider
+    from src.live_signals import SignalBus, LiveSignalListener
+    from src.paper import run_live
+    from src.telegram_client import _client
+
+    client = _client()
+    bus = SignalBus()
+    LiveSignalListener(args.channel, bus).attach(client)
+    fix = await AsyncFIXProvider.connect(args.fix_cfg, symbols)
+    ticks = fix.bridge.subscribe()
+
+    async def _report():
+        while True:
+            await asyncio.sleep(args.stats_sec)
+            rep = trader.report()
+            print(json.dumps({"open": rep["open_positions"], **rep["summary"]}, default=str))
+
+    async with client:
+        tasks = [asyncio.create_task(x) for x in (_report(), run_live(trader, bus.subscribe(), ticks))]
+        try:
+            await client.run_until_disconnected()
+        finally:
+            for t in tasks: t.cancel()
+            await fix.close()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--channel", required=True)
+    ap.add_argument("--symbols", required=True, help="Comma-separated broker symbols")
+    ap.add_argument("--fix-cfg", help="Live mode: FIX .cfg for market data")
+    ap.add_argument("--tick-dir", help="Replay mode: directory of record_fix_md tick recordings")
+    ap.add_argument("--since"); ap.add_argument("--until")
+    ap.add_argument("--speed", type=float, default=None, help="Replay pace multiplier (default: as fast as possible)")
+    ap.add_argument("--lot", type=float, default=0.1)
+    ap.add_argument("--risk-pct", type=float)
+    ap.add_argument("--deposit", type=float, default=1000.0)
+    ap.add_argument("--leverage", type=int, default=500)
+    ap.add_argument("--account-ccy", default="USD")
+    ap.add_argument("--exit", choices=["first_target", "multi_tp", "multi_tp_scaled"], default="multi_tp_scaled")
+    ap.add_argument("--time-stop-min", type=int, default=None)
+    ap.add_argument("--slippage-pips", type=float, default=0.0)
+    ap.add_argument("--commission-per-lot", type=float, default=0.0)
+    ap.add_argument("--symbol-map", default="{}")
+    ap.add_argument("--export", default=None)
+    ap.add_argument("--export-format", choices=["csv", "parquet", "arrow"], default="csv")
+    ap.add_argument("--stats-sec", type=int, default=60)
+    args = ap.parse_args()
+
+    from src.paper import PaperTrader, replay
+    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+    sink = _sink(args)
+    trader = PaperTrader(_backtester(args), sink=sink)
+    try:
+        if args.tick_dir:
+            from src.connectors.replay import ReplayTickConnector
+            from src.telegram_client import fetch_messages
+            from src.signal_parser import parse_signals_from_messages
+            since = datetime.fromisoformat(args.since).replace(tzinfo=timezone.utc)
+            until = datetime.fromisoformat(args.until).replace(tzinfo=timezone.utc)
+            signals = parse_signals_from_messages(fetch_messages(args.channel, since, until))
+            conn = ReplayTickConnector(tick_dir=args.tick_dir, speed=args.speed, start=since, end=until)
+            rep = replay(trader, conn.stream_ticks(symbols), signals)
+            for k, v in rep["summary"].items():
+                print(f"{k}: {v}")
+            print("open_positions:", rep["open_positions"])
+        else:
+            if not args.fix_cfg:
+                raise SystemExit("--fix-cfg (live) or --tick-dir (replay) is required")
+            asyncio.run(_run_live(args, trader, symbols))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        trader.flush()
+        if sink is not None:
+            sink.close()
+
+
+if __name__ == "__main__":
+    main()
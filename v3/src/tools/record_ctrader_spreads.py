@@ -1,15 +1,14 @@
 """
-Run the cTrader live spread recorder and flush to CSV on an interval.
+Run the cTrader live spread recorder and append closed minutes to Parquet on an interval.
 """
 #!/usr/bin/env python
-import argparse, time
+import argparse, os, time
 from src.tools.ctrader_spreads import CTraderSpreadsRecorder
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--symbols", required=True, help="Comma-separated cTrader symbols")
-    ap.add_argument("--mode", choices=["top","weighted"], default="top")
-    ap.add_argument("--out", required=True, help="Dir for spread CSVs")
+    ap.add_argument("--out", required=True, help="Root dir for partitioned spread Parquet")
     # runtime auth (no env)
     ap.add_argument("--ctrader-client-id", required=True)
     ap.add_argument("--ctrader-client-secret", required=True)
@@ -17,16 +16,20 @@ def main():
     ap.add_argument("--ctrader-account-id", type=int, required=True)
     ap.add_argument("--ctrader-host", choices=["LIVE","DEMO"], default="LIVE")
     ap.add_argument("--flush-sec", type=int, default=30)
+    ap.add_argument("--no-wal", action="store_true", help="Aggregate in memory and flush every --flush-sec, no write-ahead log")
+    ap.add_argument("--fsync-ms", type=int, default=200, help="WAL fsync interval (max events lost on a crash)")
     args = ap.parse_args()
 
     rec = CTraderSpreadsRecorder(
         symbols=[s.strip() for s in args.symbols.split(",") if s.strip()],
-        mode=args.mode,
         client_id=args.ctrader_client_id,
         client_secret=args.ctrader_client_secret,
         access_token=args.ctrader_access_token,
         account_id=args.ctrader_account_id,
         host=args.ctrader_host,
+        out_dir=args.out,
+        wal_dir=None if args.no_wal else os.path.join(args.out, "_wal"),
+        fsync_sec=args.fsync_ms / 1000.0,
     )
     try:
         while True:
@@ -34,6 +37,8 @@ def main():
             rec.flush_minute(args.out)
     except KeyboardInterrupt:
         pass
+    finally:
+        rec.close()
 
 if __name__ == "__main__":
     main()
@@ -1,37 +1,107 @@
 """
-Record live ticks from Vantage FIX to Parquet files per symbol.
+Record live ticks from Vantage FIX to Parquet part files per symbol.
+
+By default every tick is appended to a write-ahead log (<out>/_wal) on the QuickFIX
+thread and whole WAL segments are compacted into the Parquet files in the background,
+so a crash loses at most --fsync-ms of ticks. --no-wal drains the in-memory tick bus
+every --flush-sec instead (ticks since the last flush are lost on a crash).
+
+Each flush or segment becomes a new <out>/<SYMBOL>/part-<first_ns>-<last_ns>-<n>.parquet
+and earlier parts are never rewritten, so persisting costs only the new rows;
+connectors.replay.read_ticks reads a symbol back.
 """
-import os, argparse, time, pandas as pd
-from src.data_providers.fix_provider import VantageFIXProvider
+import os, argparse, logging, time, numpy as np, pandas as pd
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+from src.connectors.compact import symbol_digits, to_compact, write_parquet
+
+log = logging.getLogger("record_fix_md")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US = timedelta(microseconds=1)
+
+def persist_ticks(ticks, out_dir: str, compact: bool = False, fsync: bool = False) -> int:
+    """Write {time, symbol, bid, ask} ticks (dicts or a frame) as one new part file per symbol
+    under <out_dir>/<SYMBOL>/; returns rows written."""
+    if len(ticks) == 0:
+        return 0
+    df = pd.DataFrame(ticks)
+    for sym, g in df.groupby("symbol"):
+        g = g.reset_index(drop=True)
+        t_ns = pd.to_datetime(g["time"], utc=True).to_numpy("datetime64[ns]").view(np.int64)
+        d = os.path.join(out_dir, sym)
+        os.makedirs(d, exist_ok=True)
+        if compact:
+            g = to_compact(g, digits=symbol_digits(sym))
+        stem = os.path.join(d, f"part-{t_ns.min():019d}-{t_ns.max():019d}")
+        k = 0
+        while os.path.exists(f"{stem}-{k:03d}.parquet"):  # an earlier flush ended on the same tick time
+            k += 1
+        write_parquet(f"{stem}-{k:03d}.parquet", g, fsync=fsync)
+    return len(df)
+
+def tick_wal(out_dir: str, compact: bool = False, fsync_sec: float = 0.2, segment_sec: float = 60.0,
+             wal_dir: str = None, persist=persist_ticks):
+    """A WriteAheadLog whose segments compact into part files under <out_dir> (via
+    `persist`, called like persist_ticks), and the MDApp listener that appends each tick to it."""
+    from src.connectors.wal import WriteAheadLog
+    wal = WriteAheadLog(wal_dir or os.path.join(out_dir, "_wal"),
+                        lambda b: persist(b.frame("bid", "ask"), out_dir, compact=compact, fsync=True),
+                        segment_ns=int(segment_sec * 1e9), fsync_sec=fsync_sec)
+    def on_tick(t: Dict):
+        wal.append(t["symbol"], (t["time"] - _EPOCH) // _US * 1000, t["bid"], t["ask"])
+    return wal, on_tick
 
 def main():
+    from src.connectors.fix import VantageFIXProvider
+
     ap = argparse.ArgumentParser()
     ap.add_argument("--cfg", required=True, help="Path to FIX .cfg")
     ap.add_argument("--symbols", required=True, help="Comma-separated symbols (EURUSD,XAUUSD,...)")
     ap.add_argument("--out", required=True, help="Output dir for tick parquet")
     ap.add_argument("--flush-sec", type=int, default=5)
+    ap.add_argument("--compact", action="store_true", help="Store integer prices (scaled by symbol digits) and int64 times")
+    ap.add_argument("--cassette", default=None, help="Also record the raw MD messages (replay with fix.replay_md)")
+    ap.add_argument("--no-wal", action="store_true", help="Drain to a new Parquet part every --flush-sec, no write-ahead log")
+    ap.add_argument("--fsync-ms", type=int, default=200, help="WAL fsync interval (max ticks lost on a crash)")
+    ap.add_argument("--segment-sec", type=int, default=60, help="WAL segment span; each is compacted into Parquet")
     args = ap.parse_args()
 
     os.makedirs(args.out, exist_ok=True)
     symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
-    prov = VantageFIXProvider(cfg_path=args.cfg, symbols=symbols)
+    wal, listeners = None, []
+    if not args.no_wal:  # replays segments left by a previous crash before connecting
+        wal, on_tick = tick_wal(args.out, compact=args.compact, fsync_sec=args.fsync_ms / 1000.0,
+                                segment_sec=args.segment_sec)
+        listeners = [on_tick]
+    prov = VantageFIXProvider(cfg_path=args.cfg, symbols=symbols, listeners=listeners, tick_bus=wal is None)
+    rec = None
+    if args.cassette:
+        from src.connectors.cassette import RecordingConnector
+        rec = RecordingConnector(prov, args.cassette)
 
+    dropped = 0
     try:
         while True:
-            ticks = prov.drain_ticks()
-            if ticks:
-                df = pd.DataFrame(ticks)
-                for sym, g in df.groupby("symbol"):
-                    path = os.path.join(args.out, f"{sym}.parquet")
-                    if os.path.exists(path):
-                        old = pd.read_parquet(path)
-                        dfw = pd.concat([old, g], ignore_index=True)
-                    else:
-                        dfw = g
-                    dfw.to_parquet(path, index=False)
+            if wal is not None:
+                time.sleep(args.flush_sec)
+                if wal.errors:
+                    log.warning("WAL: %s", wal.stats())
+                continue
+            persist_ticks(prov.drain_ticks(), args.out, compact=args.compact)
+            if prov.bus.dropped != dropped:
+                log.warning("tick bus dropped %d ticks since the last flush (%s)",
+                            prov.bus.dropped - dropped, prov.bus.stats())
+                dropped = prov.bus.dropped
             time.sleep(args.flush_sec)
     except KeyboardInterrupt:
         pass
+    finally:
+        if rec is not None:
+            rec.cassette.close()
+        if wal is not None:
+            prov.initiator.stop()
+            wal.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,48 @@
+"""
+Backtest several channels in one pass, simulating signals shared between channels once.
+
+python -m src.tools.run_channels --channel chanA,chanB,chanC --since 2025-01-01 --until 2025-02-01 [backtester flags]
+Writes <export>.<channel>.csv per channel and <export>.leadlag.csv.
+"""
+import json
+from datetime import datetime, timezone
+
+from src.main import build_parser, build_backtester, load_env_defaults, load_provider
+
+
+def main():
+    p = build_parser()
+    p.description = "Multi-channel backtest with cross-channel signal deduplication"
+    p.add_argument("--lead-lag-window-s", type=float, default=300.0)
+    args = load_env_defaults(p.parse_args())
+    since = datetime.fromisoformat(args.since).replace(tzinfo=timezone.utc)
+    until = datetime.fromisoformat(args.until).replace(tzinfo=timezone.utc)
+    channels = [c.strip() for c in args.channel.split(",") if c.strip()]
+
+    from src.telegram_client import fetch_messages
+    from src.signal_parser import parse_signals_from_messages
+    from src.multi_channel import run_channels, lead_lag
+
+    bt = build_backtester(args, load_provider(args))
+    signals = {}
+    for ch in channels:
+        signals[ch] = parse_signals_from_messages(fetch_messages(ch, since, until))
+        print(f"{ch}: {len(signals[ch])} signals")
+
+    rep = run_channels(bt, signals, since, until, workers=args.workers)
+    d = rep["dedup"]
+    print(f"Dedup: {d['signals']} signals -> {d['unique']} unique paths (x{d['ratio']:.2f})")
+    base = args.export[:-4] if args.export.endswith(".csv") else args.export
+    for ch, r in rep["channels"].items():
+        r["trades"].to_csv(f"{base}.{ch.lstrip('@')}.csv", index=False)
+        print(ch, json.dumps(r["summary"], default=str))
+
+    ll = lead_lag(signals, window_s=args.lead_lag_window_s)
+    ll.to_csv(f"{base}.leadlag.csv", index=False)
+    if len(ll):
+        print("\n=== Who copies whom ===")
+        print(ll.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Fetch symbol specifications (digits, pip position, contract size, currencies, lot limits)
+from cTrader once and save them as the registry JSON the backtester and recorders load.
+
+python -m src.tools.sync_symbols --ctrader-client-id ... --ctrader-account-id 123 [--symbols EURUSD,XAUUSD] [--out data/symbols.json]
+"""
+import argparse, os
+from src.symbols import DEFAULT_PATH, SymbolRegistry
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--symbols", default="", help="Comma-separated symbols (default: every symbol on the account)")
+    ap.add_argument("--out", default=DEFAULT_PATH, help="Registry JSON (merged into if it exists)")
+    ap.add_argument("--ctrader-client-id", required=True)
+    ap.add_argument("--ctrader-client-secret", required=True)
+    ap.add_argument("--ctrader-access-token", required=True)
+    ap.add_argument("--ctrader-account-id", type=int, required=True)
+    ap.add_argument("--ctrader-host", choices=["LIVE", "DEMO"], default="LIVE")
+    args = ap.parse_args()
+
+    from src.connectors.ctrader import CTraderProvider
+    prov = CTraderProvider(client_id=args.ctrader_client_id, client_secret=args.ctrader_client_secret,
+                           access_token=args.ctrader_access_token, account_id=args.ctrader_account_id,
+                           host=args.ctrader_host)
+    names = [s.strip() for s in args.symbols.split(",") if s.strip()]
+    fetched = prov.symbol_specs(names or None)
+    reg = SymbolRegistry.load(args.out) if os.path.exists(args.out) else SymbolRegistry()
+    reg.update(fetched)
+    reg.save(args.out)
+    print(f"{len(fetched)} symbol specs -> {args.out} ({len(reg)} total)")
+
+if __name__ == "__main__":
+    main()
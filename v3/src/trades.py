@@ -0,0 +1,139 @@
+"""
+Columnar trade log: the engine writes each trade straight into growable numpy
+columns; a DataFrame (or Arrow table) is built once at the end.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+import numpy as np
+import pandas as pd
+
+# name -> numpy dtype; times are stored as int64 ns since epoch (UTC)
+TRADE_SCHEMA: Dict[str, str] = {
+    "symbol": "object", "side": "object",
+    "entry_time": "int64", "entry_price": "float64",
+    "exit_time": "int64", "exit_price": "float64",
+    "hit": "object", "lot": "float64",
+    "pnl_pips": "float64", "pnl_ccy": "float64", "commission": "float64",
+    "margin_used": "float64", "equity_after": "float64",
+}
+TRADE_COLUMNS = list(TRADE_SCHEMA)
+_TIME_COLS = ("entry_time", "exit_time")
+
+
+@dataclass(slots=True)
+class TradeResult:
+    symbol: str
+    side: str
+    entry_time: datetime
+    entry_price: float
+    exit_time: datetime
+    exit_price: float
+    hit: str
+    lot: float
+    pnl_pips: float
+    pnl_ccy: float
+    commission: float
+    margin_used: float
+    equity_after: float
+
+
+def to_ns(t) -> int:
+    return pd.Timestamp(t).value
+
+
+class TradeBuffer:
+    """Preallocated per-field arrays, doubled when full."""
+    def __init__(self, capacity: int = 1024):
+        self.n = 0
+        self.tz = None  # "UTC" once an aware timestamp is seen
+        self.cols = {k: np.empty(max(capacity, 1), dtype=dt) for k, dt in TRADE_SCHEMA.items()}
+
+    def __len__(self):
+        return self.n
+
+    def _grow(self):
+        for k, a in self.cols.items():
+            b = np.empty(len(a) * 2, dtype=a.dtype)
+            b[:self.n] = a[:self.n]
+            self.cols[k] = b
+
+    def append(self, symbol, side, entry_time, entry_price, exit_time, exit_price, hit, lot,
+               pnl_pips, pnl_ccy, commission, margin_used, equity_after):
+        if self.n == len(self.cols["symbol"]):
+            self._grow()
+        if self.tz is None and getattr(entry_time, "tzinfo", None) is not None:
+            self.tz = "UTC"
+        i = self.n; c = self.cols
+        c["symbol"][i] = symbol; c["side"][i] = side
+        c["entry_time"][i] = to_ns(entry_time); c["entry_price"][i] = entry_price
+        c["exit_time"][i] = to_ns(exit_time); c["exit_price"][i] = exit_price
+        c["hit"][i] = hit; c["lot"][i] = lot
+        c["pnl_pips"][i] = pnl_pips; c["pnl_ccy"][i] = pnl_ccy; c["commission"][i] = commission
+        c["margin_used"][i] = margin_used; c["equity_after"][i] = equity_after
+        self.n += 1
+
+    def extend(self, cols: Dict[str, np.ndarray], tz: Optional[str] = None):
+        """Bulk-append whole columns (e.g. trades reloaded from disk)."""
+        m = len(cols["symbol"])
+        while self.n + m > len(self.cols["symbol"]):
+            self._grow()
+        for k, a in self.cols.items():
+            a[self.n:self.n + m] = cols[k]
+        self.n += m
+        self.tz = self.tz or tz
+
+    def columns(self, lo: int = 0, hi: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Views over rows [lo, hi) of each column (no copy)."""
+        hi = self.n if hi is None else min(hi, self.n)
+        return {k: a[lo:hi] for k, a in self.cols.items()}
+
+    def _times(self, a: np.ndarray):
+        t = pd.to_datetime(a, unit="ns")
+        return t.tz_localize(self.tz) if self.tz else t
+
+    def to_frame(self, lo: int = 0, hi: Optional[int] = None) -> pd.DataFrame:
+        cols = self.columns(lo, hi)
+        if len(cols["symbol"]) == 0:
+            return pd.DataFrame()
+        data = {}
+        for k, a in cols.items():
+            if k in _TIME_COLS:
+                data[k] = self._times(a)
+            elif k == "lot":
+                data[k] = np.round(a, 3)
+            else:
+                data[k] = a.copy()
+        return pd.DataFrame(data)
+
+    def to_arrow(self, lo: int = 0, hi: Optional[int] = None, round_lot: bool = True):
+        """Typed Arrow table: timestamp[ns, UTC] times, dictionary-encoded symbol/side/hit."""
+        import pyarrow as pa
+        cols = self.columns(lo, hi)
+        arrays = []
+        for k in TRADE_COLUMNS:
+            a = cols[k]
+            if k in _TIME_COLS:
+                arrays.append(pa.array(a, type=pa.timestamp("ns", tz=self.tz)))
+            elif k == "lot" and round_lot:
+                arrays.append(pa.array(np.round(a, 3)))
+            elif TRADE_SCHEMA[k] == "object":
+                arrays.append(pa.array(a, type=pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(a))
+        return pa.Table.from_arrays(arrays, names=TRADE_COLUMNS)
+
+    def __getitem__(self, i: int) -> TradeResult:
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        row = {k: a[i] for k, a in self.cols.items()}
+        for k in _TIME_COLS:
+            row[k] = self._times(np.array([row[k]]))[0].to_pydatetime()
+        row["lot"] = round(float(row["lot"]), 3)
+        return TradeResult(**{k: (v.item() if isinstance(v, np.generic) else v) for k, v in row.items()})
+
+    def __iter__(self) -> Iterator[TradeResult]:
+        for i in range(self.n):
+            yield self[i]
@@ -0,0 +1,169 @@
+"""
+Walk-forward evaluation on rolling calendar windows.
+
+    python -m src.walkforward --channel @x --since 2025-01-01 --until 2025-07-01 \
+        --train-days 60 --test-days 14 --method halving --budget 60 --workers 4
+
+Signals are fetched and parsed once and candles for the full span are loaded once;
+each window works on slices of both (a bisect range over the sorted signals and
+iloc slices of the preloaded candles). Windows pick their parameters on the train
+range with the optimiser and simulate the test range in parallel. The cheap money
+pass then runs in window order, each test window starting from the equity the
+previous one ended with, which gives one stitched out-of-sample equity curve.
+"""
+import bisect, json
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+import pandas as pd
+
+from .backtester import Backtester
+from .optimize import OBJECTIVES, Evaluator, Space, successive_halving, tpe
+from .trades import TradeBuffer
+
+Window = Tuple[datetime, datetime, datetime, datetime]  # train_start, train_end, test_start, test_end
+
+
+def rolling_windows(since: datetime, until: datetime, train_days: float, test_days: float,
+                    anchored: bool = False) -> List[Window]:
+    """Consecutive, non-overlapping test ranges of `test_days`, each preceded by `train_days`
+    of training (or everything since `since` when anchored)."""
+    out = []
+    test_start = since + timedelta(days=train_days)
+    while test_start < until:
+        test_end = min(test_start + timedelta(days=test_days), until)
+        train_start = since if anchored else test_start - timedelta(days=train_days)
+        out.append((train_start, test_start, test_start, test_end))
+        test_start = test_end
+    return out
+
+
+_W = {}
+
+def _init_window_worker(bt, signals, times, kw):
+    _W.update(bt=bt, signals=signals, times=times, kw=kw)
+
+def _window_worker(window: Window):
+    return _run_window(_W["bt"], _W["signals"], _W["times"], window, **_W["kw"])
+
+
+def _run_window(bt: Backtester, signals: List, times: List[datetime], window: Window, method: str = "halving",
+                budget: int = 60, objective: str = "return_dd", space: Optional[Space] = None,
+                grid: Optional[Sequence[Dict]] = None, seed: int = 0) -> Dict:
+    """Phase 1 of one window: choose params on train, simulate test paths (no equity)."""
+    tr0, tr1, te0, te1 = window
+    # half-open ranges so a signal on a boundary belongs to exactly one test window
+    train = signals[bisect.bisect_left(times, tr0):bisect.bisect_left(times, tr1)]
+    test = signals[bisect.bisect_left(times, te0):bisect.bisect_left(times, te1)]
+    res = {"window": window, "n_train": len(train), "n_test": len(test), "params": None, "train_score": None,
+           "pairs": []}
+    if not train:
+        return res
+    ev = Evaluator(bt, train, tr0, tr1, objective)
+    if grid:
+        ranked = sorted(((ev.score(p)[0], p) for p in grid), key=lambda x: -x[0])
+    else:
+        search = {"halving": successive_halving, "tpe": tpe}[method]
+        ranked = search(ev, space or Space(), budget, seed=seed)
+    if not ranked:
+        return res
+    res["train_score"], res["params"] = ranked[0]
+    if test:
+        res["pairs"] = Evaluator(bt, test, te0, te1, objective).pairs(res["params"])
+    return res
+
+
+def walk_forward(bt: Backtester, signals: List, windows: Sequence[Window], workers: int = 1,
+                 objective: str = "return_dd", **search) -> Dict:
+    """Returns {"windows": per-window metrics, "trades": stitched OOS trades,
+    "equity": OOS equity curve, "summary": summary of the stitched run}."""
+    signals = sorted(signals, key=lambda s: s.dt)
+    times = [s.dt for s in signals]
+    kw = dict(search, objective=objective)
+    if workers > 1 and len(windows) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_window_worker,
+                                 initargs=(bt, signals, times, kw)) as ex:
+            results = list(ex.map(_window_worker, windows))
+    else:
+        results = [_run_window(bt, signals, times, w, **kw) for w in windows]
+
+    trades = TradeBuffer()
+    equity = bt.deposit
+    rows = []
+    for res in results:
+        tr0, tr1, te0, te1 = res["window"]
+        row = {"train_start": tr0.isoformat(), "train_end": tr1.isoformat(), "test_start": te0.isoformat(),
+               "test_end": te1.isoformat(), "n_train": res["n_train"], "n_test": res["n_test"],
+               "params": json.dumps(res["params"]), "train_score": res["train_score"]}
+        if res["params"] is not None:
+            wbt = Evaluator(bt, [], te0, te1).backtester(res["params"])
+            lo, start_equity = len(trades), equity
+            equity = wbt._book_many(trades, res["pairs"], equity)
+            s = wbt._summarize(trades.to_frame(lo), start=te0, end=te1, start_equity=start_equity)
+            s["net_pnl_pct"] = s["net_pnl"] / start_equity if start_equity else 0.0
+            row.update({f"test_{k}": v for k, v in s.items() if k not in ("period_start", "period_end")})
+            row["test_score"] = OBJECTIVES[objective](s, start_equity)
+        rows.append(row)
+
+    df = trades.to_frame()
+    start = windows[0][2] if windows else datetime.now(timezone.utc)
+    end = windows[-1][3] if windows else start
+    equity_curve = (pd.DataFrame({"time": df["exit_time"], "equity": df["equity_after"]})
+                    if len(df) else pd.DataFrame(columns=["time", "equity"]))
+    return {"windows": pd.DataFrame(rows), "trades": df, "equity": equity_curve,
+            "summary": bt._summarize(df, start=start, end=end, start_equity=bt.deposit)}
+
+
+def main():
+    from .main import build_parser, build_backtester, load_env_defaults, load_provider
+    p = build_parser()
+    p.description = "Walk-forward evaluation on rolling train/test windows"
+    p.add_argument("--train-days", type=float, default=60)
+    p.add_argument("--test-days", type=float, default=14)
+    p.add_argument("--anchored", action="store_true", help="Train on everything since --since")
+    p.add_argument("--method", choices=["halving", "tpe"], default="halving")
+    p.add_argument("--objective", choices=list(OBJECTIVES), default="return_dd")
+    p.add_argument("--budget", type=int, default=60)
+    p.add_argument("--seed", type=int, default=0)
+    args = load_env_defaults(p.parse_args())
+    since = datetime.fromisoformat(args.since).replace(tzinfo=timezone.utc)
+    until = datetime.fromisoformat(args.until).replace(tzinfo=timezone.utc)
+
+    from .signal_parser import parse_signals_from_messages
+    from .telegram_client import fetch_messages
+    signals = parse_signals_from_messages(fetch_messages(args.channel, since, until))
+    bt = build_backtester(args, None)
+    plan = bt.data_plan(signals, since, until)  # traded symbols and conversion pairs
+    provider = load_provider(args)
+    server = None
+    if args.workers > 1:
+        from .connectors.shm import SharedCandleServer
+        server = SharedCandleServer(provider)
+        bt.provider = server.publish_plan(plan)
+    else:
+        from .connectors.preloaded import PreloadedProvider
+        bt.provider = PreloadedProvider(provider, [], since, until, timeframe=args.timeframe,
+                                         compact=args.compact_prices)
+        bt.provider.prefetch(plan)
+    try:
+        windows = rolling_windows(since, until, args.train_days, args.test_days, anchored=args.anchored)
+        rep = walk_forward(bt, signals, windows, workers=args.workers, objective=args.objective,
+                           method=args.method, budget=args.budget, seed=args.seed)
+    finally:
+        if server is not None:
+            bt.provider.close(); server.close()
+
+    base = args.export[:-4] if args.export.endswith(".csv") else args.export
+    rep["windows"].to_csv(base + ".walkforward.csv", index=False)
+    rep["trades"].to_csv(base + ".oos.csv", index=False)
+    rep["equity"].to_csv(base + ".oos_equity.csv", index=False)
+    cols = [c for c in ("test_start", "params", "train_score", "test_trades", "test_net_pnl", "test_max_dd")
+            if c in rep["windows"]]
+    print(rep["windows"][cols].to_string(index=False))
+    print("\n=== Out-of-sample (stitched) ===")
+    for k, v in rep["summary"].items():
+        print(f"{k}: {v}")
+
+
+if __name__ == "__main__":
+    main()
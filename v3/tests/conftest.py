@@ -0,0 +1,75 @@
+"""
+Fixtures-by-import shared by the engine tests: an in-memory candle provider,
+seeded random-walk markets and signals, and a Backtester on the usual test
+account. Test modules import them (`from conftest import ...`); each test
+passes its own seed so the data stays the same as when it was written.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+from src.backtester import Backtester
+from src.signal_parser import Signal
+
+T0 = datetime(2025, 1, 6, tzinfo=timezone.utc)
+
+
+class FrameProvider:
+    """candles() sliced from in-memory frames. `frames` is one DataFrame served for every
+    symbol, or {symbol: DataFrame} where other symbols raise FileNotFoundError (as a CSV
+    directory would). `calls` counts candles() reads."""
+    def __init__(self, frames):
+        self.frames = frames
+        self.calls = 0
+
+    def candles(self, symbol, start, end, timeframe="M1"):
+        self.calls += 1
+        if isinstance(self.frames, dict):
+            if symbol not in self.frames:
+                raise FileNotFoundError(symbol)
+            df = self.frames[symbol]
+        else:
+            df = self.frames
+        return df[(df["time"] >= pd.Timestamp(start)) & (df["time"] <= pd.Timestamp(end))].reset_index(drop=True)
+
+
+def market(seed: int, days: float = 2, n: Optional[int] = None, base: float = 1.10, vol: float = 0.00015,
+           half_range: float = 0.0003, start: datetime = T0, digits: Optional[int] = None) -> pd.DataFrame:
+    """M1 random walk around `base`: `n` bars (default `days` of them) with steps of
+    N(0, vol) and high/low `half_range` off the mid; prices rounded to `digits` if given."""
+    rng = np.random.default_rng(seed)
+    n = int(days * 24 * 60) if n is None else n
+    mid = base + np.cumsum(rng.normal(0, vol, n))
+    if digits is not None:
+        mid = np.round(mid, digits)
+    hi, lo = mid + half_range, mid - half_range
+    if digits is not None:
+        hi, lo = np.round(hi, digits), np.round(lo, digits)
+    return pd.DataFrame({"time": pd.date_range(start, periods=n, freq="1min"), "open": mid,
+                         "high": hi, "low": lo, "close": mid, "volume": 1})
+
+
+def make_signals(df: pd.DataFrame, seed: int, n: int = 40, symbol: str = "EURUSD", sl: float = 0.002,
+                 tps=(0.001, 0.003), jitter_s: int = 0):
+    """`n` signals on random bars of `df`, random side, entry at the bar's close, SL and TPs
+    at fixed distances; with `jitter_s` each lands up to that many seconds into its bar."""
+    rng = np.random.default_rng(seed)
+    out = []
+    for k in range(n):
+        i = int(rng.integers(0, len(df) - 10))
+        px = float(df["close"].iloc[i]); d = 1 if rng.integers(0, 2) else -1
+        dt = df["time"].iloc[i].to_pydatetime()
+        if jitter_s:
+            dt += timedelta(seconds=int(rng.integers(0, jitter_s)))
+        out.append(Signal(dt=dt, side="BUY" if d > 0 else "SELL", symbol=symbol, entry=px, sl=px - d * sl,
+                          tps=[px + d * t for t in tps], raw_text=str(k)))
+    return sorted(out, key=lambda s: s.dt)
+
+
+def make_bt(provider, **kw) -> Backtester:
+    """Backtester on a 1000 USD account trading 0.1 lots with no symbol maps; keywords override."""
+    args = dict(default_lot=0.1, deposit=1000, leverage=100, account_ccy="USD", symbol_map={}, contract_map={},
+                conv_map={})
+    args.update(kw)
+    return Backtester(provider, **args)
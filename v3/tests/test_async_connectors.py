@@ -0,0 +1,80 @@
+import asyncio, threading, time
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+from src.connectors.aio import AsyncAdapter, LoopBridge
+from src.connectors.bars import BarAggregator
+from src.connectors.replay import ReplayTickConnector
+
+T0 = datetime(2025, 6, 2, tzinfo=timezone.utc)
+
+class SlowProvider:
+    def __init__(self, df, delay): self.df = df; self.delay = delay
+    def candles(self, symbol, start, end, timeframe="M1"):
+        time.sleep(self.delay)
+        df = self.df
+        return df[(df["time"] >= pd.Timestamp(start)) & (df["time"] <= pd.Timestamp(end))].reset_index(drop=True)
+
+def _frame(n=120):
+    return pd.DataFrame({"time": pd.date_range(T0, periods=n, freq="1min"), "open": 1.1, "high": 1.2,
+                         "low": 1.0, "close": 1.1, "volume": 1})
+
+
+def test_bridge_batches_wakeups_and_keeps_order():
+    async def scenario():
+        bars = BarAggregator()
+        bridge = LoopBridge(asyncio.get_running_loop(), listeners=[bars.on_tick])
+        got = []
+        async def consume():
+            async for t in bridge.stream(["EURUSD"]):
+                got.append(t["bid"])
+                if len(got) == 5_000:
+                    return
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0)
+        def produce():  # stands in for the QuickFIX thread
+            for i in range(10_000):
+                sym = "EURUSD" if i % 2 == 0 else "GBPUSD"
+                bridge.push({"time": T0 + timedelta(milliseconds=i), "symbol": sym, "bid": float(i), "ask": i + 0.5})
+        th = threading.Thread(target=produce); th.start()
+        await asyncio.wait_for(task, 5)
+        th.join()
+        return bridge, bars, got
+    bridge, bars, got = asyncio.run(scenario())
+    assert got == [float(i) for i in range(0, 10_000, 2)]
+    assert bridge.pushed == 10_000 and bridge.wakeups < bridge.pushed and bridge.dropped == 0
+    assert bars.candles("GBPUSD", T0, T0 + timedelta(minutes=1))["bid_close"].iloc[-1] == 9_999.0
+
+
+def test_bridge_counts_failing_listeners_and_delivers_the_rest():
+    async def scenario():
+        seen = []
+        def flaky(t):
+            if t % 3 == 0:
+                raise ValueError(t)
+        bridge = LoopBridge(asyncio.get_running_loop(), listeners=[flaky, seen.append])
+        q = bridge.subscribe()
+        for i in range(9):
+            bridge.push(i)
+        await asyncio.sleep(0)
+        return bridge, seen, q.qsize()
+    bridge, seen, queued = asyncio.run(scenario())
+    assert bridge.errors == 3 and seen == list(range(9)) and queued == 9
+
+def test_adapter_overlaps_blocking_fetches():
+    df = _frame()
+    ad = AsyncAdapter(SlowProvider(df, delay=0.2))
+    async def scenario():
+        t = time.perf_counter()
+        res = await asyncio.gather(*(ad.candle_arrays("EURUSD", T0, T0 + timedelta(minutes=m)) for m in range(5)))
+        return time.perf_counter() - t, res, await ad.candles("EURUSD", T0, T0 + timedelta(minutes=9))
+    elapsed, res, frame = asyncio.run(scenario())
+    assert elapsed < 0.6 and [len(r) for r in res] == [1, 2, 3, 4, 5] and len(frame) == 10
+
+
+def test_adapter_streams_sync_ticks():
+    ticks = pd.DataFrame({"time": pd.date_range(T0, periods=4, freq="1s"), "bid": [1.0, 1.1, 1.2, 1.3],
+                          "ask": [1.1, 1.2, 1.3, 1.4]})
+    ad = AsyncAdapter(ReplayTickConnector(frames={"EURUSD": ticks}))
+    async def scenario():
+        return [t.bid async for t in ad.stream_ticks(["EURUSD"])]
+    assert asyncio.run(scenario()) == [1.0, 1.1, 1.2, 1.3]
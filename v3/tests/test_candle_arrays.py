@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+from conftest import FrameProvider, make_bt, make_signals, market
+from src.connectors.bars import BarAggregator
+from src.connectors.base import CandleArrays, Connector
+from src.connectors.compact import to_compact
+from src.connectors.preloaded import PreloadedProvider
+
+T0 = datetime(2025, 4, 7, tzinfo=timezone.utc)
+
+class ArraysOnly:
+    """Serves CandleArrays only; the engine must not need a DataFrame."""
+    def __init__(self, df): self.ca = CandleArrays.from_frame(df); self.calls = 0
+    def candle_arrays(self, symbol, start, end, timeframe="M1"):
+        self.calls += 1
+        return self.ca.between(pd.Timestamp(start).value, pd.Timestamp(end).value)
+
+def _market(n=3000, bid_ask=False):
+    df = market(44, n=n, start=T0, digits=5)
+    if bid_ask:
+        for side, off in (("bid", -0.00005), ("ask", 0.00005)):
+            for c in ("open", "high", "low", "close"):
+                df[f"{side}_{c}"] = df[c] + off
+    return df
+
+def _signals(df):
+    return make_signals(df, 8, 120, tps=(0.001, 0.004))
+
+def _bt(prov, **kw):
+    return make_bt(prov, spread_pips=0.6, **kw)
+
+
+def test_frame_round_trip():
+    for df in (_market(50, bid_ask=True), _market(50).assign(time=lambda d: d["time"].dt.tz_localize(None))):
+        ca = CandleArrays.from_frame(df)
+        assert ca.time.dtype == np.int64 and ca.has_bid_ask == ("bid_high" in df)
+        pd.testing.assert_frame_equal(ca.to_frame()[list(df.columns)], df, check_exact=True)
+    c = CandleArrays.from_frame(to_compact(_market(50), symbol="EURUSD"))
+    assert c.digits == 5 and c.close.dtype == np.int32
+    pd.testing.assert_frame_equal(c.to_frame(expand=True), _market(50), check_exact=True)
+
+
+def test_unsorted_frames_are_sorted():
+    df = _market(20)
+    ca = CandleArrays.from_frame(df.iloc[::-1])
+    assert (np.diff(ca.time) > 0).all() and np.array_equal(ca.close, df["close"].values)
+
+
+def test_arrays_provider_matches_frame_provider():
+    df = _market(bid_ask=True)
+    since, until = T0, T0 + timedelta(minutes=2999)
+    for kw in ({"exit_rule": "multi_tp"}, {"exit_rule": "multi_tp_scaled", "time_stop_min": 30, "risk_pct": 1.0}):
+        ref = _bt(FrameProvider(df), **kw).run(_signals(df), since, until)
+        prov = ArraysOnly(df)
+        got = _bt(prov, **kw).run(_signals(df), since, until, fingerprint=True)
+        assert prov.calls > 0
+        pd.testing.assert_frame_equal(got["trades"], ref["trades"], check_exact=True)
+        assert got["data_fingerprint"] == _bt(ArraysOnly(df), **kw).run(_signals(df), since, until, fingerprint=True)["data_fingerprint"]
+
+
+def test_preloaded_windows_are_views():
+    df = _market()
+    prov = PreloadedProvider(FrameProvider(df), ["EURUSD"], T0, T0 + timedelta(days=3))
+    w = prov.candle_arrays("EURUSD", T0 + timedelta(minutes=10), T0 + timedelta(minutes=20))
+    assert len(w) == 11 and np.shares_memory(w.close, prov._arrays[("EURUSD", "M1")].close)
+    pd.testing.assert_frame_equal(prov.candles("EURUSD", T0 + timedelta(minutes=10), T0 + timedelta(minutes=20)),
+                                  df.iloc[10:21].reset_index(drop=True), check_exact=True)
+
+
+def test_live_bars_as_arrays():
+    agg = BarAggregator()
+    for sec, bid in [(0, 1.0), (20, 1.3), (61, 1.1)]:
+        agg.on_tick({"time": T0 + timedelta(seconds=sec), "symbol": "EURUSD", "bid": bid, "ask": bid + 0.1})
+    ca = agg.candle_arrays("EURUSD", T0, T0 + timedelta(hours=1))
+    df = agg.candles("EURUSD", T0, T0 + timedelta(hours=1))
+    pd.testing.assert_frame_equal(ca.to_frame()[list(df.columns)], df, check_exact=True)
+
+
+def test_connector_candles_default_to_arrays():
+    class C(Connector):
+        def candle_arrays(self, symbol, start, end, timeframe="M1"):
+            return CandleArrays.from_frame(_market(5))
+    assert len(C().candles("EURUSD", T0, T0, "M1")) == 5
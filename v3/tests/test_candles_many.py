@@ -0,0 +1,96 @@
+import threading, time
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import make_bt, market
+from src.connectors.base import CandleArrays, candles_many
+from src.connectors.csv_provider import CSVConnector
+from src.signal_parser import Signal
+
+T0 = datetime(2025, 5, 5, tzinfo=timezone.utc)
+
+class SlowProvider:
+    """Frame provider with per-call latency; records calls and peak concurrency."""
+    def __init__(self, frames, delay=0.0):
+        self.frames = frames; self.delay = delay; self.calls = []
+        self._lock = threading.Lock(); self._active = 0; self.peak = 0
+    def candles(self, symbol, start, end, timeframe="M1"):
+        with self._lock:
+            self.calls.append((symbol, start, end)); self._active += 1; self.peak = max(self.peak, self._active)
+        time.sleep(self.delay)
+        with self._lock:
+            self._active -= 1
+        if symbol not in self.frames:
+            raise FileNotFoundError(symbol)
+        df = self.frames[symbol]
+        return df[(df["time"] >= pd.Timestamp(start)) & (df["time"] <= pd.Timestamp(end))].reset_index(drop=True)
+
+def _market(base, seed, n=2000):
+    return market(seed, n=n, base=base, vol=base * 0.00015, half_range=base * 0.0003, start=T0 - timedelta(days=1))
+
+FRAMES = {"EURUSD": _market(1.1, 1), "GBPJPY": _market(190.0, 2), "USDJPY": _market(150.0, 3)}
+
+def _signals():
+    out = []
+    rng = np.random.default_rng(9)
+    for k in range(40):
+        sym = "EURUSD" if k % 2 else "GBPJPY"
+        df = FRAMES[sym]
+        i = int(rng.integers(1500, 1990))
+        px = float(df["close"].iloc[i]); d = 1 if k % 3 else -1
+        out.append(Signal(dt=df["time"].iloc[i].to_pydatetime(), side="BUY" if d > 0 else "SELL", symbol=sym,
+                          entry=px, sl=px * (1 - d * 0.002), tps=[px * (1 + d * 0.001)], raw_text=str(k)))
+    return out
+
+def _bt(prov, conv_map=None):
+    return make_bt(prov, conv_map=conv_map or {}, spread_pips=0.5, risk_pct=1.0)
+
+
+def test_data_plan_covers_traded_and_conversion_symbols():
+    sigs = _signals()
+    since, until = T0, T0 + timedelta(hours=10)
+    plan = {p[0]: p for p in _bt(None, conv_map={"JPY->USD": "USDJPY"}).data_plan(sigs, since, until)}
+    assert set(plan) == {"EURUSD", "GBPJPY", "USDJPY", "JPYUSD"}
+    assert plan["EURUSD"][1] == min(s.dt for s in sigs if s.symbol == "EURUSD") and plan["EURUSD"][2] == until
+    assert plan["USDJPY"][1] == since - timedelta(days=2) and plan["USDJPY"][3] == "M1"
+
+
+def test_prefetched_run_matches_per_signal_fetching():
+    sigs = _signals()
+    since, until = T0, T0 + timedelta(hours=10)
+    ref_prov = SlowProvider(FRAMES)
+    ref = _bt(ref_prov).run(sigs, since, until, prefetch=False)
+    prov = SlowProvider(FRAMES)
+    bt = _bt(prov)
+    got = bt.run(sigs, since, until)
+    pd.testing.assert_frame_equal(got["trades"], ref["trades"], check_exact=True)
+    assert len(prov.calls) == len(bt.data_plan(sigs, since, until)) < len(ref_prov.calls)
+    assert bt.provider is prov  # the prefetch store only lives for the run
+
+
+def test_fallback_overlaps_latency():
+    prov = SlowProvider(FRAMES, delay=0.2)
+    reqs = [(s, T0, T0 + timedelta(hours=1), "M1") for s in ("EURUSD", "GBPJPY", "USDJPY", "XAUUSD")] * 2
+    t = time.perf_counter()
+    res = candles_many(prov, reqs, max_workers=8, return_exceptions=True)
+    assert time.perf_counter() - t < 0.6 and prov.peak > 1
+    assert isinstance(res[3], FileNotFoundError) and isinstance(res[0], CandleArrays) and len(res[0]) == 61
+    with pytest.raises(FileNotFoundError):
+        candles_many(prov, reqs, max_workers=8)
+
+
+def test_csv_batch_reads_each_file_once(tmp_path, monkeypatch):
+    for sym in ("EURUSD", "USDJPY"):
+        FRAMES[sym].assign(time=FRAMES[sym]["time"].dt.strftime("%Y-%m-%dT%H:%M:%SZ")).to_csv(
+            tmp_path / f"{sym}.csv", index=False)
+    csv = CSVConnector(str(tmp_path))
+    reads = []
+    orig = pd.read_csv
+    monkeypatch.setattr(pd, "read_csv", lambda *a, **k: reads.append(a[0]) or orig(*a, **k))
+    reqs = [("EURUSD", T0, T0 + timedelta(minutes=m), "M1") for m in (10, 20, 30)] + \
+           [("USDJPY", T0, T0 + timedelta(minutes=5), "M1"), ("XAUUSD", T0, T0, "M1")]
+    res = csv.candles_many(reqs, return_exceptions=True)
+    assert len(reads) == 2 and isinstance(res[-1], FileNotFoundError)
+    for r, ca in zip(reqs[:4], res):
+        pd.testing.assert_frame_equal(ca.to_frame(), csv.candles(*r[:3]), check_exact=True)
@@ -0,0 +1,96 @@
+import os, time
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import FrameProvider, make_bt, market
+from src.connectors.cassette import CassetteConnector, RecordingConnector
+from src.connectors.ctrader import CTraderProvider
+from src.connectors.replay import ReplayTickConnector
+from src.signal_parser import Signal
+
+T0 = datetime(2025, 8, 4, tzinfo=timezone.utc)
+
+def _market(base, seed, n=1500):
+    return market(seed, n=n, base=base, vol=base * 0.0002, half_range=0.05, start=T0 - timedelta(days=2), digits=3)
+
+FRAMES = {"GBPJPY": _market(190.0, 1), "USDJPY": _market(150.0, 2)}
+
+def _signals():
+    df = FRAMES["GBPJPY"]
+    out = []
+    for k, i in enumerate(range(1200, 1450, 25)):
+        px = float(df["close"].iloc[i]); d = 1 if k % 2 else -1
+        out.append(Signal(dt=df["time"].iloc[i].to_pydatetime(), side="BUY" if d > 0 else "SELL", symbol="GBPJPY",
+                          entry=px, sl=px - d * 0.3, tps=[px + d * 0.2], raw_text=str(k)))
+    return out
+
+def _bt(prov):
+    return make_bt(prov, spread_pips=1.0, risk_pct=1.0)
+
+
+def test_replayed_run_is_identical_without_broker_calls(tmp_path):
+    path = str(tmp_path / "run.cas")
+    since, until = T0 - timedelta(days=2), T0
+    live = FrameProvider(FRAMES)
+    rec = RecordingConnector(live, path)
+    ref = _bt(rec).run(_signals(), since, until, prefetch=False, fingerprint=True)
+    rec.close()
+    cas = CassetteConnector(path)
+    got = _bt(cas).run(_signals(), since, until, prefetch=False, fingerprint=True)
+    assert len(ref["trades"]) == 10 and live.calls > 0
+    pd.testing.assert_frame_equal(got["trades"], ref["trades"], check_exact=True)
+    assert got["data_fingerprint"] == ref["data_fingerprint"]
+    lo, hi, _ = cas._calls["JPYUSD|M1"][0]
+    with pytest.raises(FileNotFoundError):  # recorded errors come back as they happened
+        cas.candle_arrays("JPYUSD", pd.Timestamp(lo, tz="UTC"), pd.Timestamp(hi, tz="UTC"))
+    with pytest.raises(KeyError):
+        cas.candle_arrays("EURUSD", since, until)
+    # a window inside a recorded one is served from it
+    w = cas.candle_arrays("GBPJPY", _signals()[0].dt, _signals()[0].dt + timedelta(minutes=9))
+    assert len(w) == 10
+
+
+def test_unclosed_cassette_is_indexed_by_scanning(tmp_path):
+    path = str(tmp_path / "crash.cas")
+    rec = RecordingConnector(FrameProvider(FRAMES), path)
+    end = T0 - timedelta(days=1)
+    rec.candle_arrays("USDJPY", end - timedelta(hours=1), end)
+    rec.candle_arrays("GBPJPY", end - timedelta(hours=2), end)
+    rec.cassette._f.flush()
+    with open(path, "ab") as f:
+        f.write(b"\x01torn")  # half-written record after a kill
+    cas = CassetteConnector(path)
+    assert len(cas.candle_arrays("GBPJPY", end - timedelta(hours=1), end)) == 61
+
+
+def test_raw_trendbars_are_decoded_on_replay(tmp_path):
+    class FakeCTrader:
+        tap = None
+        def candle_arrays(self, symbol, start, end, timeframe="M1"):
+            bars = [{"utcTimestampInMs": int(pd.Timestamp(start).value // 1_000_000) + 60_000 * i, "low": 110000 + i,
+                     "deltaOpen": 2, "deltaHigh": 5, "deltaClose": 3, "volume": 7} for i in range(30)]
+            self.tap("trendbars", bars, (symbol, start, end, timeframe), 1_000)
+            return CTraderProvider._to_arrays(bars)
+    path = str(tmp_path / "ct.cas")
+    rec = RecordingConnector(FakeCTrader(), path)
+    ref = rec.candle_arrays("EURUSD", T0, T0 + timedelta(minutes=29))
+    rec.close()
+    got = CassetteConnector(path).candle_arrays("EURUSD", T0, T0 + timedelta(minutes=29))
+    assert got.digits == 5 and np.array_equal(got.close, ref.close) and np.array_equal(got.time, ref.time)
+
+
+def test_streams_replay_at_full_speed_or_original_timing(tmp_path):
+    ticks = pd.DataFrame({"time": pd.date_range(T0, periods=6, freq="100ms"), "bid": np.arange(6) + 1.0,
+                          "ask": np.arange(6) + 1.1})
+    path = str(tmp_path / "ticks.cas")
+    rec = RecordingConnector(ReplayTickConnector(frames={"EURUSD": ticks}, speed=10.0), path)
+    assert len(list(rec.stream_ticks(["EURUSD"]))) == 6
+    rec.close()
+    fast = CassetteConnector(path)
+    t = time.perf_counter()
+    assert [x.bid for x in fast.stream_ticks(["EURUSD"])] == list(ticks["bid"])
+    assert time.perf_counter() - t < 0.03
+    t = time.perf_counter()
+    list(CassetteConnector(path, speed=1.0).stream_ticks(["EURUSD"]))  # recorded ~50 ms apart end to end
+    assert time.perf_counter() - t >= 0.04
@@ -0,0 +1,97 @@
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from conftest import FrameProvider, make_bt, market
+from src.connectors.cache_provider import CachedProvider
+from src.connectors.compact import from_compact, read_parquet, to_compact, write_parquet
+from src.connectors.preloaded import PreloadedProvider
+from src.connectors.replay import ReplayTickConnector
+from src.signal_parser import Signal
+
+T0 = datetime(2025, 3, 3, tzinfo=timezone.utc)
+
+def _market(n=3000, bid_ask=True, digits=5):
+    if not bid_ask:
+        return market(43, n=n, start=T0, digits=digits)
+    df = market(43, n=n, start=T0, half_range=0.0, digits=digits)
+    for side, off in (("bid", -0.00005), ("ask", 0.00005)):
+        p = np.round(df["close"].to_numpy() + off, digits)
+        df[f"{side}_open"] = p; df[f"{side}_close"] = p
+        df[f"{side}_high"] = np.round(p + 0.0003, digits); df[f"{side}_low"] = np.round(p - 0.0003, digits)
+    return df
+
+def _signals(df, n=150):
+    """Levels taken from bar extremes, so many touches land exactly on a level."""
+    rng = np.random.default_rng(7)
+    hi = df["ask_high"] if "ask_high" in df else df["high"]
+    lo = df["bid_low"] if "bid_low" in df else df["low"]
+    out = []
+    for k in range(n):
+        i = int(rng.integers(0, len(df) - 200))
+        j = i + int(rng.integers(5, 150))
+        d = 1 if rng.integers(0, 2) else -1
+        px = float(df["close"].iloc[i])
+        tp = float(hi.iloc[j]) if d > 0 else float(lo.iloc[j])
+        sl = float(lo.iloc[j]) if d > 0 else float(hi.iloc[j])
+        out.append(Signal(dt=df["time"].iloc[i].to_pydatetime(), side="BUY" if d > 0 else "SELL", symbol="EURUSD",
+                          entry=px, sl=sl - d * 0.001, tps=[tp, tp + d * 0.002], raw_text=str(k)))
+    return out
+
+def _bt(prov, spread=0.0):
+    return make_bt(prov, exit_rule="multi_tp", spread_pips=spread)
+
+
+def test_round_trip_is_exact():
+    df = _market()
+    c = to_compact(df, symbol="EURUSD")
+    assert c.attrs["price_digits"] == 5 and c["bid_high"].dtype == np.int32 and c["time"].dtype == np.int64
+    pd.testing.assert_frame_equal(from_compact(c), df, check_exact=True)
+
+
+def test_digits_widen_instead_of_rounding():
+    df = pd.DataFrame({"time": pd.date_range(T0, periods=2, freq="1s"), "bid": [1.123456, 1.1], "ask": [1.2, 1.3]})
+    c = to_compact(df, digits=5)
+    assert c.attrs["price_digits"] == 6
+    pd.testing.assert_frame_equal(from_compact(c), df, check_exact=True)
+
+
+def test_memory_drops():
+    df = _market(20_000)
+    loose = df.copy()
+    loose["time"] = loose["time"].astype(object)  # as many CSV/SDK paths deliver it
+    loose["symbol"] = "EURUSD"
+    c = to_compact(loose, symbol="EURUSD")
+    assert loose.memory_usage(deep=True).sum() >= 2 * c.memory_usage(deep=True).sum()
+    assert isinstance(c["symbol"].dtype, pd.CategoricalDtype)
+
+
+def test_compact_backtest_matches_float():
+    since, until = T0, T0 + pd.Timedelta(minutes=3000)
+    for df, spread in ((_market(), 0.0), (_market(bid_ask=False), 0.0), (_market(bid_ask=False), 0.7)):
+        sigs = _signals(df)
+        ref = _bt(FrameProvider(df), spread).run(sigs, since, until)
+        prov = PreloadedProvider(FrameProvider(df), ["EURUSD"], since, until, compact=True)
+        got = _bt(prov, spread).run(sigs, since, until)
+        pd.testing.assert_frame_equal(got["trades"], ref["trades"], check_exact=True)
+
+
+def test_parquet_round_trip(tmp_path):
+    ticks = pd.DataFrame({"time": pd.date_range(T0, periods=50, freq="250ms"), "symbol": "EURUSD",
+                          "bid": np.round(1.1 + np.arange(50) * 1e-5, 5)})
+    ticks["ask"] = np.round(ticks["bid"] + 0.00008, 5)
+    path = str(tmp_path / "EURUSD.parquet")
+    write_parquet(path, to_compact(ticks, symbol="EURUSD"))
+    assert read_parquet(path, expand=False).attrs["price_digits"] == 5
+    pd.testing.assert_frame_equal(read_parquet(path), ticks, check_exact=True)
+    got = list(ReplayTickConnector(tick_dir=str(tmp_path)).stream_ticks(["EURUSD"]))
+    assert [t.bid for t in got] == ticks["bid"].tolist()
+
+
+def test_cached_provider_compact_store(tmp_path):
+    df = _market(500)
+    src = FrameProvider(df)
+    cache = CachedProvider(src, str(tmp_path), compact=True)
+    first = cache.candles("EURUSD", T0, T0 + pd.Timedelta(minutes=499))
+    again = cache.candles("EURUSD", T0 + pd.Timedelta(minutes=100), T0 + pd.Timedelta(minutes=200))
+    assert src.calls == 1 and again.attrs["price_digits"] == 5 and len(again) == 101
+    pd.testing.assert_frame_equal(from_compact(first), df, check_exact=True)
@@ -0,0 +1,59 @@
+from dataclasses import replace
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import T0, FrameProvider, make_bt, make_signals, market
+from src.connectors.preloaded import PreloadedProvider
+from src.sensitivity import delay_curve, delayed_paths, parse_delays
+from src.signal_parser import Signal
+
+@pytest.mark.parametrize("exit_rule,time_stop", [("multi_tp", None), ("multi_tp_scaled", 600), ("first_target", None)])
+def test_delay_curve_matches_shifted_runs(exit_rule, time_stop):
+    df = market(11, days=3)
+    sigs = make_signals(df, 5, sl=0.0025, tps=(0.001, 0.002, 0.004), jitter_s=60)
+    mk = lambda prov: make_bt(prov, exit_rule=exit_rule, risk_pct=1.0, spread_pips=0.5, commission_per_lot=3.5,
+                              time_stop_min=time_stop)
+    since, until = T0, T0 + timedelta(days=3)
+    delays = [0, 5, 90, 600]
+    prov = FrameProvider(df)
+    curve = delay_curve(mk(prov), sigs, since, until, delays)
+    assert prov.calls == 1  # the data plan: one prefetched window, shared by every signal and delay
+    for d, row in zip(delays, curve.itertuples()):
+        shifted = [replace(s, dt=s.dt + timedelta(seconds=d)) for s in sigs]
+        ref = mk(FrameProvider(df)).run(shifted, since, until)
+        assert row.trades == ref["summary"]["trades"]
+        assert row.net_pnl == pytest.approx(ref["summary"]["net_pnl"], abs=1e-9)
+        assert row.total_pips == pytest.approx(ref["trades"]["pnl_pips"].sum(), abs=1e-9)
+
+def test_compact_levels_touch_like_the_engine():
+    n = 600
+    close = np.full(n, 1.1)
+    high = close.copy(); high[300] = 1.1011   # exactly the TP, which 1.1 + 0.0011 overshoots in float
+    df = pd.DataFrame({"time": pd.date_range(T0, periods=n, freq="1min"), "open": close, "high": high,
+                       "low": close - 0.0002, "close": close, "volume": 1})
+    since, until = T0, T0 + timedelta(minutes=n)
+    prov = PreloadedProvider(FrameProvider(df), ["EURUSD"], since, until, compact=True)
+    bt = make_bt(prov, spread_pips=0.0)
+    sig = Signal(dt=T0, side="BUY", symbol="EURUSD", entry=1.1, sl=1.095, tps=[1.1 + 0.0011], raw_text="")
+    (_, [pr]), = delayed_paths(bt, [sig], since, until, [0])
+    assert pr.hit == bt._path(sig, until).hit == "TP1"
+
+def test_parse_delays():
+    assert parse_delays("0, 5s,30,1m,5m") == [0.0, 5.0, 30.0, 60.0, 300.0]
+
+def test_time_stops_on_bid_ask_only_candles():
+    df = market(12, days=1)
+    ba = pd.DataFrame({"time": df["time"], "volume": 1,
+                       **{f"{side}_{c}": df[c] + sgn * 0.00005 for side, sgn in (("bid", -1), ("ask", 1))
+                          for c in ("open", "high", "low", "close")}})
+    sigs = make_signals(df, 6, n=20, sl=0.004, tps=(0.003, 0.005), jitter_s=60)
+    since, until = T0, T0 + timedelta(days=1)
+    mk = lambda: make_bt(FrameProvider(ba), time_stop_min=30)
+    delays = [0, 60, 300]
+    curve = delay_curve(mk(), sigs, since, until, delays)
+    for d, row in zip(delays, curve.itertuples()):
+        ref = mk().run([replace(s, dt=s.dt + timedelta(seconds=d)) for s in sigs], since, until)
+        assert "TIME" in set(ref["trades"]["hit"])
+        assert row.trades == ref["summary"]["trades"]
+        assert row.total_pips == pytest.approx(ref["trades"]["pnl_pips"].sum(), abs=1e-9)
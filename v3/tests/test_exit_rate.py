@@ -0,0 +1,21 @@
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+from conftest import FrameProvider, make_bt
+from src.signal_parser import Signal
+from src.trades import TradeBuffer
+
+T0 = datetime(2025, 3, 3, tzinfo=timezone.utc)
+
+def test_exit_pnl_converts_at_the_exit_time_on_aware_data():
+    times = pd.date_range(T0 - timedelta(days=1), periods=3000, freq="1min")  # tz-aware bars
+    px = np.where(np.arange(3000) < 1500, 190.0, 190.5)       # TP touched at bar 1500
+    usdjpy = np.where(np.arange(3000) < 1500, 100.0, 200.0)   # conversion rate doubles there
+    frame = lambda p: pd.DataFrame({"time": times, "open": p, "high": p, "low": p, "close": p, "volume": 1})
+    bt = make_bt(FrameProvider({"GBPJPY": frame(px), "USDJPY": frame(usdjpy)}), spread_pips=0.0)
+    sig = Signal(dt=T0, side="BUY", symbol="GBPJPY", entry=190.0, sl=189.0, tps=[190.4], raw_text="")
+    until = T0 + timedelta(hours=12)
+    t = bt.run([sig], T0, until)["trades"].iloc[0]
+    # 50 pips * 1000 JPY per pip per lot * 0.1 lot at USDJPY 200 on exit (not 100, and not an unconverted 1.0)
+    assert t["hit"] == "TP1" and np.isclose(t["pnl_pips"], 50.0) and np.isclose(t["pnl_ccy"], 25.0)
+    assert np.isclose(bt._book(TradeBuffer(), sig, bt._path(sig, until), 1000.0), 1025.0)
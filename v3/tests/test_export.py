@@ -0,0 +1,73 @@
+import json, os
+from datetime import datetime, timedelta, timezone
+import pytest
+from conftest import FrameProvider, make_bt, make_signals, market
+from src.trades import TradeBuffer
+from src.export import TradeLogWriter, read_trade_log
+
+T0 = datetime(2025, 1, 2, 10, 0, tzinfo=timezone.utc)
+
+def _buf(n):
+    b = TradeBuffer()
+    for i in range(n):
+        b.append("EURUSD" if i % 2 else "XAUUSD", "BUY", T0, 1.1, T0 + timedelta(minutes=i), 1.2,
+                 "TP1" if i % 3 else "SL", 0.1, 10.0, 5.0 * i, 0.0, 100.0, 1000.0 + i)
+    return b
+
+@pytest.mark.parametrize("fmt,name", [("csv", "t.csv"), ("parquet", "t.parquet"), ("arrow", "t.arrow")])
+def test_streamed_batches_round_trip(tmp_path, fmt, name):
+    buf = _buf(7)
+    path = str(tmp_path / name)
+    w = TradeLogWriter(path, fmt=fmt, metadata={"params": {"exit_rule": "multi_tp"}})
+    for lo in range(0, 7, 3):
+        w.write(buf, lo, min(lo + 3, 7))
+    w.close(extra={"data_fingerprint": "abc"})
+    df = read_trade_log(path)
+    assert len(df) == 7 and list(df["pnl_ccy"]) == [5.0 * i for i in range(7)]
+    meta = json.load(open(path + ".meta.json"))
+    assert meta["rows"] == 7 and meta["data_fingerprint"] == "abc"
+    if fmt != "csv":
+        assert str(df["symbol"].dtype) == "category"
+        assert str(df["exit_time"].dtype) == "datetime64[ns, UTC]"
+
+
+def test_parquet_run_replaces_the_previous_parts(tmp_path):
+    path = str(tmp_path / "log")
+    w = TradeLogWriter(path, fmt="parquet")
+    for lo in range(0, 9, 3):
+        w.write(_buf(9), lo, lo + 3)
+    w.close()
+    w = TradeLogWriter(path, fmt="parquet")
+    w.write(_buf(2), 0, 2)
+    w.close()
+    assert len(read_trade_log(path)) == 2
+
+@pytest.mark.parametrize("fmt,name", [("parquet", "out"), ("arrow", "out.arrow")])
+def test_default_csv_name_takes_the_format_suffix(tmp_path, fmt, name):
+    w = TradeLogWriter(str(tmp_path / "out.csv"), fmt=fmt)
+    w.write(_buf(3), 0, 3)
+    w.close()
+    assert w.path == str(tmp_path / name) and len(read_trade_log(w.path)) == 3
+
+
+@pytest.mark.parametrize("fmt,name", [("parquet", "log"), ("arrow", "log.arrow")])
+def test_data_fingerprint_is_in_the_schema(tmp_path, fmt, name):
+    import pyarrow as pa, pyarrow.parquet as pq
+    df = market(21, days=1)
+    path = str(tmp_path / name)
+    w = TradeLogWriter(path, fmt=fmt, metadata={"channel": "@x"})
+    rep = make_bt(FrameProvider(df)).run(make_signals(df, 22, n=12), df["time"].iloc[0].to_pydatetime(),
+                                         df["time"].iloc[-1].to_pydatetime(), sink=w, batch_size=5, fingerprint=True)
+    w.close()
+    if fmt == "parquet":
+        schemas = [pq.read_schema(os.path.join(path, n)) for n in sorted(os.listdir(path))]
+    else:
+        with pa.memory_map(path) as src:
+            schemas = [pa.ipc.open_stream(src).schema]
+    assert len(schemas) >= (3 if fmt == "parquet" else 1)
+    for schema in schemas:
+        run = json.loads(schema.metadata[b"run"])
+        assert run["channel"] == "@x" and run["data_fingerprint"] == rep["data_fingerprint"] is not None
+    assert json.load(open(path + ".meta.json"))["data_fingerprint"] == rep["data_fingerprint"]
+    with pytest.raises(ValueError):
+        w.annotate(data_fingerprint="late")
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from src.connectors.book import ASK, BID, CHANGE, TopOfBook
+from src.connectors.replay import read_ticks
+from src.live_signals import LatencyHistogram
+from src.tools.fix_md_loadtest import flush, wal_recorder
+import pytest
+from src.tools.fix_md_sim import _per_message, first_quotes, paced, synthetic_quotes
+
+SYMS = ["EURUSD", "USDJPY", "XAUUSD"]
+
+
+def test_every_synthetic_quote_is_one_recorded_tick():
+    quotes = list(islice(synthetic_quotes(SYMS, seed=1), 3000))
+    assert [q[0] for q in quotes[:6]] == SYMS * 2
+    eu = [q for q in quotes if q[0] == "EURUSD"]
+    assert all(round(a - b, 5) == 0.0001 for _, b, a in eu) and all(round(b, 5) == b for _, b, _ in eu)
+    book, ts, recs = TopOfBook(), datetime(2025, 1, 1, tzinfo=timezone.utc), 0
+    for msg in _per_message(quotes, 4):
+        assert len({q[0] for q in msg}) == len(msg) <= 4
+        entries = [(s, side, px, CHANGE) for s, b, a in msg for side, px in ((BID, b), (ASK, a))]
+        recs += len(book.apply_incremental(entries, ts))
+    assert recs == len(quotes)
+
+
+def test_snapshot_quotes_stop_after_one_pass():
+    first = first_quotes(synthetic_quotes(SYMS), ["USDJPY", "EURUSD", "USDJPY"], SYMS)
+    assert sorted(first) == ["EURUSD", "USDJPY"]
+    with pytest.raises(ValueError, match="GBPUSD"):
+        first_quotes(synthetic_quotes(SYMS), ["EURUSD", "GBPUSD"], SYMS)
+    with pytest.raises(ValueError, match="GBPUSD"):  # no symbol list: bounded scan of the endless stream
+        first_quotes(synthetic_quotes(SYMS), ["EURUSD", "GBPUSD"], max_scan=1_000)
+
+
+def test_pacing_catches_up_in_bursts():
+    now = [0.0]
+    def clock(): return now[0]
+    def sleep(s): now[0] += max(s, 0.0005)
+    batches = []
+    for b in paced(iter(range(10**6)), rate=10_000, duration=1.0, max_batch=500, clock=clock, sleep=sleep):
+        batches.append(len(b))
+        now[0] += 0.2 if len(batches) == 3 else 0.0  # a stalled send
+    assert max(batches) == 500 and 9_900 <= sum(batches) <= 10_000
+
+
+def test_flush_appends_rows_and_accounts_latency(tmp_path):
+    t0 = datetime.now(timezone.utc) - timedelta(milliseconds=50)
+    ticks = [{"time": t0, "symbol": s, "bid": b, "ask": a} for s, b, a in islice(synthetic_quotes(SYMS), 30)]
+    lat, fl = LatencyHistogram(), LatencyHistogram()
+    assert flush(ticks[:12], str(tmp_path), True, lat, fl) == 12
+    assert flush(ticks[12:], str(tmp_path), True, lat, fl) == 18
+    assert flush([], str(tmp_path), True, lat, fl) == 0
+    assert len(read_ticks(str(tmp_path), "USDJPY")) == 10
+    assert lat.n == 30 and lat.percentile(50) >= 50_000_000 and fl.n == 3
+
+
+def test_wal_mode_accounts_every_compacted_segment(tmp_path):
+    t0 = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(seconds=10)
+    lat, fl = LatencyHistogram(), LatencyHistogram()
+    wal, on_tick = wal_recorder(str(tmp_path), True, lat, fl, fsync_ms=10, segment_sec=1)
+    for i, (s, b, a) in enumerate(islice(synthetic_quotes(SYMS), 30)):
+        on_tick({"time": t0 + timedelta(milliseconds=100 * i), "symbol": s, "bid": b, "ask": a})
+    wal.close()
+    assert wal.stats()["compacted"] == lat.n == 30 and fl.n == 3  # three 1 s segments
+    assert len(read_ticks(str(tmp_path), "USDJPY")) == 10 and lat.percentile(50) >= 5_000_000_000
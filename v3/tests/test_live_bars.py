@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta, timezone
+from src.connectors.bars import BarAggregator
+
+T0 = datetime(2025, 1, 2, 10, 0, tzinfo=timezone.utc)
+
+def _tick(sec, bid, ask, sym="EURUSD"):
+    return {"time": T0 + timedelta(seconds=sec), "symbol": sym, "bid": bid, "ask": ask}
+
+def test_m1_and_m5_bars_update_per_tick():
+    agg = BarAggregator(timeframes=("M5",))
+    for sec, bid in [(0, 1.0), (20, 1.3), (40, 0.9), (61, 1.1)]:
+        agg.on_tick(_tick(sec, bid, bid + 0.1))
+    m1 = agg.candles("EURUSD", T0, T0 + timedelta(hours=1), "M1")
+    assert len(m1) == 2
+    b = m1.iloc[0]
+    assert (b["bid_open"], b["bid_high"], b["bid_low"], b["bid_close"]) == (1.0, 1.3, 0.9, 0.9)
+    assert b["volume"] == 3 and m1.iloc[1]["bid_open"] == 1.1
+    m5 = agg.candles("EURUSD", T0, T0 + timedelta(hours=1), "M5")
+    assert len(m5) == 1 and m5.iloc[0]["bid_close"] == 1.1
+
+def test_ring_buffer_is_bounded_and_ordered():
+    agg = BarAggregator(max_bars=3)
+    for m in range(5):
+        agg.on_tick(_tick(60 * m, 1.0 + m, 1.1 + m))
+    df = agg.candles("EURUSD", T0 - timedelta(days=1), T0 + timedelta(days=1))
+    assert list(df["bid_open"]) == [3.0, 4.0, 5.0]
+    assert df["time"].is_monotonic_increasing
@@ -0,0 +1,35 @@
+import asyncio
+from src.live_signals import SignalBus, LiveSignalListener, FakeEventSource
+
+POST = "BUY EURUSD @ 1.1000 SL 1.0950 TP1 1.1050 TP2 1.1100"
+
+def test_fake_posts_are_parsed_and_published_to_every_subscriber():
+    async def scenario():
+        bus = SignalBus()
+        listener = LiveSignalListener("chan", bus)
+        a, b = bus.subscribe(), bus.subscribe()
+        src = FakeEventSource(listener)
+        mid = await src.post(POST)
+        await src.post("good morning traders")
+        await src.post(POST, msg_id=mid, edited=True)                  # unchanged edit: not republished
+        await src.post(POST.replace("1.1100", "1.1150"), msg_id=mid, edited=True)
+        return listener, [a.get_nowait() for _ in range(a.qsize())], b.qsize()
+    listener, got, b_size = asyncio.run(scenario())
+    assert [s.tps for s in got] == [[1.105, 1.11], [1.105, 1.115]]
+    assert b_size == 2
+    lat = listener.latency_summary()
+    assert lat["messages"] == 4 and lat["edits"] == 2 and lat["published"] == 2
+    assert lat["total"]["n"] == 2 and lat["total"]["p99_us"] > 0
+
+def test_dedup_state_expires_with_the_window():
+    from datetime import datetime, timedelta, timezone
+    async def scenario():
+        listener = LiveSignalListener("chan", SignalBus(), dedup_window=timedelta(hours=1))
+        src, t0 = FakeEventSource(listener), datetime(2025, 1, 6, 9, tzinfo=timezone.utc)
+        old = await src.post(POST, date=t0)
+        for i in range(1, 5):
+            await src.post(POST, date=t0 + timedelta(minutes=30 * i))
+        await src.post(POST, msg_id=old, date=t0, edited=True)  # unchanged, but its id has expired
+        return listener
+    listener = asyncio.run(scenario())
+    assert len(listener._last) == 3 and listener.bus.published == 6
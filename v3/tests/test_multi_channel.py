@@ -0,0 +1,55 @@
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+from conftest import T0, FrameProvider, make_bt, market
+from src.multi_channel import lead_lag, run_channels
+from src.signal_parser import Signal
+
+def _market():
+    return market(31)
+
+def _channels(df):
+    rng = np.random.default_rng(8)
+    a, b, c = [], [], []
+    for k in range(20):
+        i = int(rng.integers(0, len(df) - 10))
+        px = round(float(df["close"].iloc[i]), 4); d = 1 if k % 2 else -1
+        sig = Signal(dt=df["time"].iloc[i].to_pydatetime() + timedelta(seconds=5), side="BUY" if d > 0 else "SELL",
+                     symbol="EURUSD", entry=px, sl=round(px - d * 0.002, 4),
+                     tps=[round(px + d * 0.001, 4), round(px + d * 0.003, 4)], raw_text="a")
+        a.append(sig)
+        if k % 2 == 0:  # B copies half of A within the same bar, 20s later
+            b.append(Signal(sig.dt + timedelta(seconds=20), sig.side, sig.symbol, sig.entry, sig.sl, list(sig.tps), "b"))
+        if k % 4 == 0:  # C copies a quarter of A two bars later: different entry bar, simulated separately
+            c.append(Signal(sig.dt + timedelta(minutes=2), sig.side, sig.symbol, sig.entry, sig.sl, list(sig.tps), "c"))
+    return {"A": a, "B": b, "C": c}
+
+def test_shared_paths_match_independent_runs():
+    df = _market(); chans = _channels(df); until = T0 + timedelta(days=2)
+    mk = lambda prov: make_bt(prov, exit_rule="multi_tp_scaled", risk_pct=1.0, spread_pips=0.5, time_stop_min=300)
+    prov = FrameProvider(df)
+    rep = run_channels(mk(prov), chans, T0, until)
+    assert rep["dedup"] == {"signals": 35, "unique": 25, "ratio": 35 / 25}
+    assert prov.calls == 1  # the data plan prefetches the symbol once for all 25 unique paths
+    for ch, sigs in chans.items():
+        ref = mk(FrameProvider(df)).run(sigs, T0, until)
+        pd.testing.assert_frame_equal(rep["channels"][ch]["trades"], ref["trades"], check_exact=True)
+
+def test_aliases_of_one_broker_symbol_keep_their_own_spread():
+    df = _market(); a = _channels(df)["A"][:6]; until = T0 + timedelta(days=2)
+    alias = [Signal(s.dt, s.side, "EURUSD.x", s.entry, s.sl, list(s.tps), "x") for s in a]
+    mk = lambda prov: make_bt(prov, symbol_map={"EURUSD.x": "EURUSD"}, spread_pips=0.5,
+                              spread_map={"EURUSD.x": 3.0})
+    rep = run_channels(mk(FrameProvider(df)), {"A": a, "X": alias}, T0, until)
+    assert rep["dedup"]["unique"] == 12
+    for ch, sigs in (("A", a), ("X", alias)):
+        ref = mk(FrameProvider(df)).run(sigs, T0, until)
+        pd.testing.assert_frame_equal(rep["channels"][ch]["trades"], ref["trades"], check_exact=True)
+
+def test_lead_lag_finds_copier():
+    df = _market(); chans = _channels(df)
+    ll = lead_lag(chans, window_s=300)
+    top = ll.iloc[0]
+    assert (top["leader"], top["follower"], top["count"], top["median_lag_s"]) == ("A", "B", 10, 20.0)
+    ac = ll[(ll["leader"] == "A") & (ll["follower"] == "C")].iloc[0]
+    assert ac["count"] == 5 and ac["median_lag_s"] == 120.0
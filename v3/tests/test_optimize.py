@@ -0,0 +1,63 @@
+from datetime import timedelta
+import pytest
+from conftest import T0, FrameProvider, make_bt, make_signals, market
+from src.connectors.preloaded import PreloadedProvider
+from src.optimize import Evaluator, Space, optimize, successive_halving, tpe, walk_forward_splits
+
+def _market():
+    return market(41, days=4)
+
+def _signals(df):
+    return make_signals(df, 6, 80, tps=(0.001, 0.002, 0.004))
+
+def _bt(prov):
+    return make_bt(prov, exit_rule="multi_tp", spread_pips=0.5, commission_per_lot=3.0)
+
+@pytest.mark.parametrize("params", [
+    {"exit_rule": "first_target", "time_stop_min": None, "risk_pct": None, "tp_weights": None},
+    {"exit_rule": "multi_tp", "time_stop_min": 240, "risk_pct": 1.5, "tp_weights": None},
+    {"exit_rule": "multi_tp_scaled", "time_stop_min": 60, "risk_pct": 0.7, "tp_weights": [0.5, 0.3, 0.2]},
+])
+def test_trial_scores_match_full_runs(params):
+    df = _market(); sigs = _signals(df); until = T0 + timedelta(days=4)
+    prov = PreloadedProvider(FrameProvider(df), ["EURUSD"], T0, until)
+    ev = Evaluator(_bt(prov), sigs, T0, until, objective="net_pnl")
+    ev.score({**params, "time_stop_min": 1440})  # warm the shared path memo with another time stop
+    score, summary = ev.score(params)
+    bt = _bt(FrameProvider(df))
+    for k, v in params.items():
+        setattr(bt, k, v)
+    ref = bt.run(sigs, T0, until)["summary"]
+    assert summary == ref and score == ref["net_pnl"]
+
+def test_search_reuses_paths_per_time_stop():
+    df = _market(); sigs = _signals(df); until = T0 + timedelta(days=4)
+    inner = FrameProvider(df)
+    ev = Evaluator(_bt(PreloadedProvider(inner, ["EURUSD"], T0, until)), sigs, T0, until)
+    space = Space(time_stops=(None, 120))
+    ranked = successive_halving(ev, space, budget=12, eta=3, min_signals=20)
+    assert ranked == sorted(ranked, key=lambda x: -x[0]) and len(ranked) >= 1
+    assert inner.calls == 1  # one load for the whole span
+    assert sum(p is not None for paths in ev._paths.values() for p in paths) <= len(sigs) * 2
+    hist = tpe(ev, space, budget=15, n_startup=5)
+    assert len(hist) == 15 and hist[0][0] >= hist[-1][0]
+
+def test_walk_forward_splits_are_chronological():
+    df = _market(); sigs = _signals(df)
+    splits = walk_forward_splits(sigs, n_splits=3)
+    assert len(splits) == 3
+    for train, test in splits:
+        assert train[-1].dt <= test[0].dt
+    res = optimize(_bt(FrameProvider(df)), sigs, T0, T0 + timedelta(days=4), method="halving", budget=6, n_splits=2)
+    assert len(res["splits"]) == 2 and "test_score" in res["splits"][0] and res["best"]["exit_rule"]
+
+def test_data_plan_preload_serves_conversion_pairs_too():
+    df = _market(); sigs = _signals(df); until = T0 + timedelta(days=4)
+    inner = FrameProvider(df)
+    bt = _bt(PreloadedProvider(inner, [], T0, until))
+    bt.account_ccy = "EUR"  # USD P&L is converted through EURUSD / USDEUR
+    bt.provider.prefetch(bt.data_plan(sigs, T0, until))  # as optimize.main does
+    loaded = inner.calls
+    Evaluator(bt, sigs, T0, until).score({"exit_rule": "multi_tp", "time_stop_min": None, "risk_pct": 1.0,
+                                          "tp_weights": None})
+    assert inner.calls == loaded
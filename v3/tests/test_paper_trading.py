@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+from src.backtester import Backtester
+from src.connectors.replay import ReplayTickConnector
+from src.paper import PaperTrader, replay
+from src.signal_parser import Signal
+from src.trades import TRADE_COLUMNS
+
+T0 = datetime(2025, 1, 2, 10, 0, tzinfo=timezone.utc)
+
+def _ticks(mids, step_s=10, spread=0.0002):
+    t = [T0 + timedelta(seconds=step_s * i) for i in range(len(mids))]
+    return pd.DataFrame({"time": t, "symbol": "EURUSD", "bid": [m - spread / 2 for m in mids],
+                         "ask": [m + spread / 2 for m in mids]})
+
+def _bt(exit_rule="multi_tp", time_stop=None):
+    return Backtester(provider=None, default_lot=1.0, deposit=1000, leverage=100, account_ccy="USD",
+                      symbol_map={}, contract_map={}, conv_map={}, exit_rule=exit_rule, time_stop_min=time_stop)
+
+def _sig(side, sl, tps, dt=T0):
+    return Signal(dt=dt, side=side, symbol="EURUSD", entry=1.1, sl=sl, tps=tps, raw_text="")
+
+def test_replay_fills_tp_ladder_and_stop():
+    mids = [1.1000, 1.1005, 1.1012, 1.1021, 1.1008, 1.0990, 1.1030]
+    conn = ReplayTickConnector(frames={"EURUSD": _ticks(mids)})
+    trader = PaperTrader(_bt())
+    rep = replay(trader, conn.stream_ticks(["EURUSD"]), [
+        _sig("BUY", 1.0950, [1.1010, 1.1020, 1.1050]),   # TP1 and TP2 reached, TP3 never
+        _sig("SELL", 1.1015, [1.0950]),                  # stopped out at 1.1012 mid tick
+    ])
+    tr = rep["trades"]
+    assert list(tr.columns) == TRADE_COLUMNS
+    sell = tr[tr["side"] == "SELL"].iloc[0]
+    assert sell["hit"] == "SL" and sell["pnl_pips"] < 0
+    assert rep["open_positions"] == 1   # BUY: TP1+TP2 reached, TP3/SL still pending
+
+def test_time_stop_and_first_target():
+    mids = [1.1000, 1.1001, 1.1002, 1.1003]
+    trader = PaperTrader(_bt(time_stop=0.5))  # 30s
+    rep = replay(trader, ReplayTickConnector(frames={"EURUSD": _ticks(mids)}).stream_ticks(["EURUSD"]),
+                 [_sig("BUY", 1.09, [1.2])])
+    assert rep["trades"]["hit"].tolist() == ["TIME"]
+    trader = PaperTrader(_bt(exit_rule="first_target"))
+    rep = replay(trader, ReplayTickConnector(frames={"EURUSD": _ticks([1.1, 1.1011])}).stream_ticks(["EURUSD"]),
+                 [_sig("BUY", 1.09, [1.1005, 1.1010])])
+    assert rep["trades"]["hit"].tolist() == ["TP1"] and rep["summary"]["trades"] == 1
+
+def test_many_positions_only_crossed_levels_fire():
+    trader = PaperTrader(_bt())
+    for k in range(500):
+        trader.submit(_sig("BUY", 1.0 - k * 1e-4, [1.2 + k * 1e-4]))
+    trader.on_tick({"time": T0, "symbol": "EURUSD", "bid": 1.1, "ask": 1.1002})
+    assert trader.open_positions == 500
+    trader.on_tick({"time": T0 + timedelta(seconds=1), "symbol": "EURUSD", "bid": 0.99995, "ask": 1.0})
+    assert trader.open_positions == 499 and len(trader.trades) == 1
+
+def test_pnl_converts_from_the_quote_currency_at_live_ticks():
+    # USDJPY on a USD account: 1 lot, 100 pips = 100,000 JPY, worth 100,000 / 150.00 USD at the exit tick
+    bt = Backtester(provider=None, default_lot=1.0, deposit=1000, leverage=100, account_ccy="USD",
+                    symbol_map={}, contract_map={}, conv_map={})
+    trader = PaperTrader(bt)
+    trader.submit(Signal(dt=T0, side="BUY", symbol="USDJPY", entry=149.0, sl=148.0, tps=[150.0], raw_text=""))
+    trader.on_tick({"time": T0, "symbol": "USDJPY", "bid": 148.99, "ask": 149.0})
+    trader.on_tick({"time": T0 + timedelta(seconds=1), "symbol": "USDJPY", "bid": 150.0, "ask": 150.0})
+    tr = trader.trades.to_frame().iloc[0]
+    assert tr["hit"] == "TP1" and abs(tr["pnl_pips"] - 100.0) < 1e-6
+    assert abs(tr["pnl_ccy"] - 100_000 / 150.0) < 1e-6
+    assert abs(tr["margin_used"] - 100_000 * 149.0 / 148.995 / 100) < 1e-6   # ~100k USD notional at 1:100
+
+    # EURGBP needs a GBP->USD rate: without a GBPUSD tick (or a provider) it refuses to guess
+    trader = PaperTrader(bt)
+    trader.submit(Signal(dt=T0, side="BUY", symbol="EURGBP", entry=0.85, sl=0.84, tps=[0.86], raw_text=""))
+    try:
+        trader.on_tick({"time": T0, "symbol": "EURGBP", "bid": 0.8499, "ask": 0.85})
+        assert False, "expected a missing-rate error"
+    except ValueError as e:
+        assert "GBPUSD" in str(e)
+    trader = PaperTrader(bt)
+    trader.on_tick({"time": T0, "symbol": "GBPUSD", "bid": 1.25, "ask": 1.25})
+    trader.submit(Signal(dt=T0, side="BUY", symbol="EURGBP", entry=0.85, sl=0.84, tps=[0.86], raw_text=""))
+    trader.on_tick({"time": T0, "symbol": "EURGBP", "bid": 0.8499, "ask": 0.85})
+    trader.on_tick({"time": T0 + timedelta(seconds=1), "symbol": "EURGBP", "bid": 0.86, "ask": 0.8601})
+    tr = trader.trades.to_frame().iloc[0]
+    assert abs(tr["pnl_ccy"] - 101 * 10 * 1.25) < 1e-6   # filled at the 0.8601 ask, 10 GBP a pip
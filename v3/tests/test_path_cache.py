@@ -0,0 +1,73 @@
+from datetime import timedelta
+import pandas as pd
+from conftest import T0, FrameProvider, make_bt, make_signals, market
+from src.backtester import Backtester
+from src.sim_cache import PathCache
+
+def _market():
+    return market(21)
+
+def _signals(df, n=25):
+    return make_signals(df, 2, n, sl=0.0025)
+
+def _bt(df, cache, **kw):
+    args = dict(exit_rule="multi_tp_scaled", spread_pips=0.4, time_stop_min=300)
+    args.update(kw)
+    return make_bt(FrameProvider(df), path_cache=cache, **args)
+
+def test_sizing_rerun_hits_cache_and_matches(tmp_path, monkeypatch):
+    df = _market(); sigs = _signals(df); until = T0 + timedelta(days=2)
+    _bt(df, PathCache(str(tmp_path))).run(sigs, T0, until)
+
+    calls = []
+    orig = Backtester._path_hits
+    monkeypatch.setattr(Backtester, "_path_hits", lambda self, *a, **k: calls.append(1) or orig(self, *a, **k))
+    cache = PathCache(str(tmp_path))  # reopened from disk
+    rep = _bt(df, cache, risk_pct=1.5, deposit=5000, commission_per_lot=7.0).run(sigs, T0, until)
+    ref = _bt(df, None, risk_pct=1.5, deposit=5000, commission_per_lot=7.0).run(sigs, T0, until)
+    assert cache.hits == len(sigs) and cache.misses == 0
+    assert len(calls) == len(sigs)  # only the uncached reference run simulated paths
+    pd.testing.assert_frame_equal(rep["trades"], ref["trades"])
+
+def test_changed_path_params_or_bars_read_miss(tmp_path):
+    df = _market(); sigs = _signals(df, 5); until = T0 + timedelta(days=2)
+    _bt(df, PathCache(str(tmp_path))).run(sigs, T0, until)
+    cache = PathCache(str(tmp_path))
+    _bt(df, cache, exit_rule="first_target").run(sigs, T0, until)
+    assert cache.hits == 0
+    edited = df.copy()
+    i = int(df.index[df["time"] == pd.Timestamp(sigs[0].dt)][0])
+    edited.loc[i, "open"] += 0.001  # the first signal's entry bar
+    cache = PathCache(str(tmp_path))
+    rep = _bt(edited, cache).run(sigs, T0, until)
+    assert cache.misses == 1 and cache.hits == len(sigs) - 1
+    pd.testing.assert_frame_equal(rep["trades"], _bt(edited, None).run(sigs, T0, until)["trades"])
+
+def test_bars_after_the_exit_keep_paths_cached_and_open_ones_extend(tmp_path):
+    df = _market(); sigs = _signals(df); until = T0 + timedelta(days=2)
+    short = T0 + timedelta(days=1, hours=12)
+    first = [s for s in sigs if s.dt <= short]
+    _bt(df, PathCache(str(tmp_path))).run(first, T0, short)
+    cache = PathCache(str(tmp_path))
+    rep = _bt(df, cache).run(sigs, T0, until)  # the history now runs half a day further
+    assert cache.hits == len(first) and cache.misses == len(sigs) - len(first)
+    pd.testing.assert_frame_equal(rep["trades"], _bt(df, None).run(sigs, T0, until)["trades"])
+
+def test_pool_workers_report_to_the_parent_index(tmp_path):
+    df = _market(); sigs = _signals(df); until = T0 + timedelta(days=2)
+    cache = PathCache(str(tmp_path))
+    _bt(df, cache).run(sigs, T0, until, workers=2)
+    assert cache.stats()["entries"] == len(sigs) and cache.misses == len(sigs)
+    _bt(df, cache).run(sigs, T0, until, workers=2)
+    assert cache.hits == len(sigs)
+    small = PathCache(str(tmp_path / "small"), max_bytes=3000)
+    _bt(df, small).run(sigs, T0, until, workers=2)
+    assert 0 < small.stats()["entries"] < len(sigs) and small.stats()["bytes"] <= 3000
+    assert len(list((tmp_path / "small").rglob("*.json"))) == small.stats()["entries"]
+
+def test_lru_eviction_bounds_size(tmp_path):
+    df = _market(); sigs = _signals(df); until = T0 + timedelta(days=2)
+    cache = PathCache(str(tmp_path), max_bytes=3000)
+    _bt(df, cache).run(sigs, T0, until)
+    st = cache.stats()
+    assert 0 < st["entries"] < len(sigs) and st["bytes"] <= 3000
@@ -0,0 +1,38 @@
+from datetime import timedelta
+import pandas as pd
+import pytest
+from conftest import T0, FrameProvider, make_bt, make_signals, market
+from src.run_state import RunState, run_incremental
+
+@pytest.mark.parametrize("exit_rule,time_stop", [("multi_tp", None), ("multi_tp_scaled", 600), ("first_target", None)])
+def test_resume_matches_full_rerun(tmp_path, exit_rule, time_stop):
+    df = market(7, days=3)
+    sigs = make_signals(df, 3, sl=0.0025, tps=(0.001, 0.002, 0.004))
+    mk = lambda: make_bt(FrameProvider(df), exit_rule=exit_rule, risk_pct=1.0, spread_pips=0.5,
+                         commission_per_lot=3.5, time_stop_min=time_stop)
+    since, days = T0, [T0 + timedelta(days=d, hours=12) for d in range(3)]
+
+    bt = mk()
+    for i, until in enumerate(days):
+        st = RunState.load(str(tmp_path), "chan", bt.params(), since)
+        new = [s for s in sigs if (i == 0 or s.dt > days[i - 1]) and s.dt <= until]
+        inc = run_incremental(bt, st, new, until)
+        st.save()
+        full = mk().run([s for s in sigs if s.dt <= until], since, until)
+        pd.testing.assert_frame_equal(inc["trades"], full["trades"], check_exact=True)
+        assert inc["summary"] == full["summary"]
+    assert RunState.load(str(tmp_path), "chan", bt.params(), since).settled_rows > 0
+
+def test_scaled_exits_settle_like_multi_tp(tmp_path):
+    df = market(7, days=6)
+    sigs = make_signals(df, 3, 120, sl=0.0025, tps=(0.001, 0.002, 0.004))
+    pending = {}
+    for rule in ("multi_tp", "multi_tp_scaled"):
+        bt = make_bt(FrameProvider(df), exit_rule=rule, spread_pips=0.5)
+        st = RunState.load(str(tmp_path / rule), "chan", bt.params(), T0)
+        for d in range(1, 6):
+            until = T0 + timedelta(days=d)
+            run_incremental(bt, st, [s for s in sigs if until - timedelta(days=1) < s.dt <= until], until)
+        pending[rule] = len(st.pending)
+    # a stop after TP1 closes the scaled remainder, so only genuinely open trades stay pending
+    assert pending["multi_tp_scaled"] == pending["multi_tp"] < 10
@@ -0,0 +1,51 @@
+from datetime import timedelta
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import T0, FrameProvider, make_bt, market
+from src.connectors.shm import SharedCandleServer
+from src.signal_parser import Signal
+
+def _market(seed, base):
+    return market(seed, base=base, vol=base * 1e-4, half_range=base * 3e-4)
+
+def test_views_match_provider_and_are_read_only():
+    prov = FrameProvider({"EURUSD": _market(1, 1.1)})
+    with SharedCandleServer(prov) as server:
+        view = server.publish_many(["EURUSD"], "M1", T0, T0 + timedelta(days=2))
+        a, b = T0 + timedelta(hours=3, seconds=30), T0 + timedelta(hours=9)
+        pd.testing.assert_frame_equal(view.candles("EURUSD", a, b), prov.candles("EURUSD", a, b))
+        arr = view.arrays("EURUSD", a, b)
+        with pytest.raises(ValueError):
+            arr["close"][0] = 0.0
+        view.close()
+
+def test_parallel_run_shares_one_copy_and_cleans_up():
+    frames = {"EURUSD": _market(1, 1.1), "XAUUSD": _market(2, 2000.0)}
+    prov = FrameProvider(frames)
+    rng = np.random.default_rng(9)
+    sigs = []
+    for k in range(30):
+        sym = "EURUSD" if k % 2 else "XAUUSD"; df = frames[sym]
+        i = int(rng.integers(0, len(df) - 10)); px = float(df["close"].iloc[i]); step = px * 1e-3
+        sigs.append(Signal(dt=df["time"].iloc[i].to_pydatetime(), side="BUY", symbol=sym, entry=px,
+                           sl=px - 2 * step, tps=[px + step, px + 2 * step], raw_text=str(k)))
+    sigs.sort(key=lambda s: s.dt)
+    until = T0 + timedelta(days=2)
+    mk = lambda p: make_bt(p, exit_rule="multi_tp", spread_pips=0.5)
+    ref = mk(FrameProvider(frames)).run(sigs, T0, until)
+
+    server = SharedCandleServer(prov)
+    view = server.publish_many(["EURUSD", "XAUUSD"], "M1", T0, until)
+    assert prov.calls == 2
+    server.acquire()
+    server.close()  # publish pins dropped; the run's acquire keeps the blocks alive
+    names = [spec["name"] for spec in view.specs.values()]
+    out = mk(view).run(sigs, T0, until, workers=2)
+    pd.testing.assert_frame_equal(out["trades"], ref["trades"], check_exact=True)
+    view.close()
+    server.release()
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
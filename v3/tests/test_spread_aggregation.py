@@ -0,0 +1,42 @@
+import pandas as pd
+import os
+from src.connectors.spreads import SpreadMinuteAggregator, MINUTE_NS, rows_to_frame, append_partitions, read_spreads
+
+T0 = pd.Timestamp("2025-01-02 10:00", tz="UTC").value
+
+def test_running_minute_stats():
+    agg = SpreadMinuteAggregator()
+    for sec, sp in [(1, 1.0), (20, 3.0), (50, 2.0)]:
+        agg.add("EURUSD", T0 + sec * 10**9, sp, 1.1)
+    assert agg.drain() == []
+    agg.add("EURUSD", T0 + MINUTE_NS + 1, 5.0, 1.2)
+    (row,) = agg.drain()
+    assert row[:7] == ("EURUSD", T0, 3, 2.0, 1.0, 3.0, 2.0)
+    agg.close_before(T0 + 2 * MINUTE_NS)
+    assert agg.drain()[0][1] == T0 + MINUTE_NS
+
+def test_partitions_are_appended_not_rewritten(tmp_path):
+    agg = SpreadMinuteAggregator()
+    agg.add("EURUSD", T0, 1.0, 1.1)
+    agg.close_before(T0 + MINUTE_NS)
+    first = append_partitions(str(tmp_path), rows_to_frame(agg.drain()))
+    agg.add("EURUSD", T0 + MINUTE_NS, 2.0, 1.1)
+    agg.close_before(T0 + 2 * MINUTE_NS)
+    second = append_partitions(str(tmp_path), rows_to_frame(agg.drain()))
+    assert first != second
+    df = pd.concat([pd.read_parquet(p) for p in first + second])
+    assert list(df["spread_pips"]) == [1.0, 2.0]
+
+def test_frequent_flushes_are_compacted_per_day(tmp_path):
+    agg, seen = SpreadMinuteAggregator(), {}
+    for m in range(10):  # one flush per minute
+        agg.add("EURUSD", T0 + m * MINUTE_NS, float(m), 1.1)
+        agg.close_before(T0 + (m + 1) * MINUTE_NS)
+        append_partitions(str(tmp_path), rows_to_frame(agg.drain()), max_parts=4)
+        day = tmp_path / "EURUSD" / "date=2025-01-02"
+        for name in os.listdir(day):  # a file, once written, is never written again
+            stamp = os.stat(day / name).st_mtime_ns
+            assert seen.setdefault(name, stamp) == stamp, name
+    assert len(os.listdir(day)) == 1  # merged into a new part at the 4th, 7th and 10th flush
+    got = read_spreads(str(tmp_path), "EURUSD", pd.Timestamp(T0, tz="UTC"), pd.Timestamp(T0 + 10 * MINUTE_NS, tz="UTC"))
+    assert list(got["spread_pips"]) == [float(m) for m in range(10)]
@@ -0,0 +1,28 @@
+import pandas as pd
+from src.connectors.spreads import SpreadMinuteAggregator, MINUTE_NS, rows_to_frame, append_partitions
+from src.connectors.spread_provider import SpreadAnnotatedProvider
+
+T0 = pd.Timestamp("2025-01-02 10:00", tz="UTC")
+
+class _Candles:
+    calls = 0
+    def candles(self, symbol, start, end, timeframe="M1"):
+        self.calls += 1
+        t = pd.date_range(T0, periods=10, freq="1min").tz_localize(None)  # naive like CSV data
+        return pd.DataFrame({"time": t, "open": 1.1, "high": 1.1, "low": 1.1, "close": 1.1})
+
+def test_asof_join_nearest_prior_bucket_with_staleness(tmp_path):
+    agg = SpreadMinuteAggregator()
+    for minute, sp in [(0, 1.0), (2, 3.0)]:   # buckets at 10:00 and 10:02 only
+        agg.add("EURUSD", T0.value + minute * MINUTE_NS + 5, sp, 1.1)
+    agg.close_before(T0.value + 3 * MINUTE_NS)
+    append_partitions(str(tmp_path), rows_to_frame(agg.drain()))
+
+    src = _Candles()
+    prov = SpreadAnnotatedProvider(src, str(tmp_path), max_stale_min=2)
+    df = prov.candles("EURUSD", T0, T0 + pd.Timedelta(minutes=9))
+    sp = list(df["spread_pips"])
+    assert sp[:5] == [1.0, 1.0, 3.0, 3.0, 3.0]   # 10:01 falls back to 10:00
+    assert pd.isna(sp[5])                        # older than max staleness
+    again = prov.candles("EURUSD", T0 + pd.Timedelta(minutes=1), T0 + pd.Timedelta(minutes=8))
+    assert prov.reads == 1 and list(again["spread_pips"][:3]) == sp[:3]  # other window, same day partition
@@ -0,0 +1,27 @@
+import subprocess, sys, os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("pandas", "numpy", "telethon", "dotenv", "quickfix", "ctrader_open_api", "twisted", "MetaTrader5")
+
+def _run(code):
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return out.stdout.strip()
+
+def test_cli_import_and_parse_stays_light():
+    code = (
+        "import sys; import src.main as m; "
+        "sys.argv = ['x', '--channel', 'c', '--since', '2025-01-01', '--until', '2025-01-02']; m.parse_args(); "
+        "import src.connectors; "
+        "print(','.join(sorted(k for k in %r if k in sys.modules)))" % (HEAVY,)
+    )
+    loaded = _run(code)
+    assert loaded == "", f"heavy modules imported at startup: {loaded}"
+
+def test_csv_path_does_not_load_telethon_or_broker_sdks():
+    code = (
+        "import sys; from src.main import get_data_provider\n"
+        "class A: data_source='csv'\n"
+        "get_data_provider(A())\n"
+        "print(','.join(sorted(k for k in %r if k in sys.modules)))" % (HEAVY,)
+    )
+    assert _run(code) == "numpy,pandas"
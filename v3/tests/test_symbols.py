@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import numpy as np
+from conftest import FrameProvider, make_bt, market
+from src.backtester import pip_size
+from src.connectors.compact import symbol_digits
+from src.signal_parser import Signal
+from src.symbols import SymbolRegistry, SymbolSpec, default_registry, set_default_registry
+
+T0 = datetime(2025, 7, 1, tzinfo=timezone.utc)
+
+def test_fallback_does_not_depend_on_price_formatting():
+    assert pip_size("EURUSD", 1.1) == pip_size("EURUSD", 1.12345) == 0.0001
+    assert pip_size("USDJPY", 150.0) == pip_size("GBPJPY", 190.123) == 0.01
+    assert pip_size("XAUUSD", 2350.5) == 0.01 and pip_size("US30", 39000.25) == 0.01
+    assert pip_size("USDZAR", 18.5) == pip_size("EURGBP", 0.85) == 0.0001
+    for sym in ("BTCUSD", "ETHUSD", "XTIUSD", "XBRUSD"):  # six letters, but not two currencies
+        assert pip_size(sym, 60_000.0) == 0.01, sym
+
+
+def test_json_round_trip_and_ctrader_metadata(tmp_path):
+    light = [SimpleNamespace(symbolId=1, symbolName="EURUSD", baseAssetId=10, quoteAssetId=11),
+             SimpleNamespace(symbolId=2, symbolName="GOLD", baseAssetId=12, quoteAssetId=11)]
+    details = [SimpleNamespace(symbolId=1, digits=5, pipPosition=4, lotSize=10_000_000, minVolume=100_000, stepVolume=100_000),
+               SimpleNamespace(symbolId=2, digits=2, pipPosition=1, lotSize=10_000, minVolume=100, stepVolume=100)]
+    reg = SymbolRegistry.from_ctrader(light, details, {10: "EUR", 11: "USD", 12: "XAU"})
+    gold = reg.get("gold")
+    assert (gold.contract_size, gold.pip_size, gold.quote_ccy, gold.min_lot, gold.symbol_id) == (100.0, 0.1, "USD", 0.01, 2)
+    reg.save(str(tmp_path / "symbols.json"))
+    back = SymbolRegistry.load(str(tmp_path / "symbols.json"))
+    assert list(back) == list(reg) and back.fingerprint() == reg.fingerprint()
+
+
+def test_backtester_and_compact_storage_use_the_registry():
+    n = 200
+    df = market(3, n=n, base=2300, vol=0.5, half_range=1, start=T0, digits=2)
+    mid = df["close"].to_numpy()
+    sig = Signal(dt=T0, side="BUY", symbol="GOLD", entry=mid[0], sl=mid[0] - 5, tps=[mid[0] + 5], raw_text="")
+    reg = SymbolRegistry([SymbolSpec("GOLD", digits=2, pip_position=1, contract_size=100.0,
+                                     base_ccy="XAU", quote_ccy="USD")])
+    bt = make_bt(FrameProvider(df), default_lot=1.0, deposit=10_000, symbols=reg)
+    t = bt.run([sig], T0, T0 + timedelta(minutes=n - 1))["trades"].iloc[0]
+    assert np.isclose(t["pnl_ccy"], (t["exit_price"] - t["entry_price"]) * 100.0)
+    assert np.isclose(t["pnl_pips"], (t["exit_price"] - t["entry_price"]) / 0.1)
+    assert "symbol_specs" in bt.params()
+    prev = default_registry()
+    try:
+        set_default_registry(reg)
+        assert symbol_digits("GOLD") == 2 and symbol_digits("EURJPY") == 3
+    finally:
+        set_default_registry(prev)
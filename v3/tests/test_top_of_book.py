@@ -0,0 +1,36 @@
+import pytest
+from datetime import datetime, timezone
+import pandas as pd
+from src.connectors.book import TopOfBook, parse_fix_time, BID, ASK, CHANGE, DELETE
+from src.tools.build_candles import resample_ticks
+
+T0 = datetime(2025, 1, 2, 10, 0, tzinfo=timezone.utc)
+
+def test_snapshot_then_incremental_emits_combined_ticks():
+    book = TopOfBook()
+    rec = book.apply_snapshot("EURUSD", [(BID, 1.1000), (ASK, 1.1002)], T0)
+    assert rec == {"time": T0, "symbol": "EURUSD", "bid": 1.1000, "ask": 1.1002}
+    # identical snapshot -> no record
+    assert book.apply_snapshot("EURUSD", [(BID, 1.1000), (ASK, 1.1002)], T0) is None
+    recs = book.apply_incremental([("EURUSD", BID, 1.1001, CHANGE), ("EURUSD", ASK, 1.1003, CHANGE)], T0)
+    assert len(recs) == 1 and recs[0]["bid"] == 1.1001 and recs[0]["ask"] == 1.1003
+
+def test_deleted_side_suppresses_records():
+    book = TopOfBook()
+    book.apply_snapshot("XAUUSD", [(BID, 2000.0), (ASK, 2000.3)], T0)
+    assert book.apply_incremental([("XAUUSD", ASK, None, DELETE)], T0) == []
+    assert book.quote("XAUUSD") == (2000.0, None)
+
+def test_parse_fix_time():
+    assert parse_fix_time("20250102-10:00:00.250") == T0.replace(microsecond=250000)
+    assert parse_fix_time("20250102", "10:00:00") == T0
+    assert parse_fix_time(None) is None
+
+def test_resample_combined_ticks():
+    ticks = pd.DataFrame({
+        "time": [T0, T0.replace(second=30), T0.replace(minute=1)],
+        "symbol": "EURUSD", "bid": [1.0, 1.2, 1.1], "ask": [1.2, 1.4, 1.3],
+    })
+    c = resample_ticks(ticks, "M1")
+    assert list(c["open"]) == pytest.approx([1.1, 1.2])
+    assert c["high"].iloc[0] == pytest.approx(1.3) and c["volume"].iloc[0] == 2
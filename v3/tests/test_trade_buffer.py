@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+from src.backtester import Backtester
+from src.signal_parser import Signal
+from src.trades import TradeBuffer, TradeResult, TRADE_COLUMNS
+
+T0 = datetime(2025, 1, 2, 10, 0, tzinfo=timezone.utc)
+
+class FrameProvider:
+    def __init__(self, frames): self.frames = frames
+    def candles(self, symbol, start, end, timeframe="M1"):
+        df = self.frames.get(symbol)
+        if df is None: return pd.DataFrame()
+        return df[(df["time"] >= pd.Timestamp(start)) & (df["time"] <= pd.Timestamp(end))].reset_index(drop=True)
+
+def _path(prices):
+    t = pd.date_range(T0, periods=len(prices), freq="1min")
+    p = np.asarray(prices, dtype=float)
+    return pd.DataFrame({"time": t, "open": p, "high": p + 0.0002, "low": p - 0.0002, "close": p, "volume": 1})
+
+def test_buffer_grows_and_iterates():
+    buf = TradeBuffer(capacity=1)
+    for i in range(5):
+        buf.append("EURUSD", "BUY", T0, 1.1, T0 + timedelta(minutes=i), 1.2, "TP1", 0.12345, 10.0, 5.0, 0.0, 100.0, 1000.0 + i)
+    df = buf.to_frame()
+    assert list(df.columns) == TRADE_COLUMNS and len(df) == 5
+    assert df["lot"].iloc[0] == 0.123 and str(df["exit_time"].dt.tz) == "UTC"
+    rows = list(buf)
+    assert isinstance(rows[4], TradeResult) and rows[4].exit_time == T0 + timedelta(minutes=4)
+    assert buf.to_arrow().num_rows == 5
+
+def test_run_writes_trades_columnar():
+    prov = FrameProvider({"EURUSD": _path([1.1000, 1.1005, 1.1012, 1.1030, 1.1000])})
+    bt = Backtester(prov, default_lot=0.1, deposit=1000, leverage=100, account_ccy="USD",
+                    symbol_map={}, contract_map={}, conv_map={}, exit_rule="first_target")
+    sig = Signal(dt=T0, side="BUY", symbol="EURUSD", entry=1.1, sl=1.09, tps=[1.1010], raw_text="")
+    rep = bt.run([sig], T0 - timedelta(days=1), T0 + timedelta(hours=1))
+    tr = rep["trades"]
+    assert len(tr) == 1 and tr["hit"].iloc[0] == "TP1"
+    assert tr["pnl_pips"].iloc[0] > 0 and rep["summary"]["trades"] == 1
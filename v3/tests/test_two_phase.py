@@ -0,0 +1,64 @@
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import T0, FrameProvider, make_bt, make_signals, market
+from src.trades import TradeBuffer
+
+def _market():
+    return market(17)
+
+def _signals(df):
+    return make_signals(df, 4, 60)
+
+@pytest.mark.parametrize("risk_pct", [None, 1.0])
+def test_parallel_paths_and_money_pass_match_serial(risk_pct):
+    df = _market(); sigs = _signals(df); until = T0 + timedelta(days=2)
+    bt = make_bt(FrameProvider(df), default_lot=0.2, deposit=2000, exit_rule="multi_tp", risk_pct=risk_pct,
+                 spread_pips=0.6, commission_per_lot=3.5, time_stop_min=240)
+    serial = bt.run(sigs, T0, until, batch_size=7, fingerprint=True)
+    parallel = bt.run(sigs, T0, until, workers=2, fingerprint=True)
+    pd.testing.assert_frame_equal(serial["trades"], parallel["trades"], check_exact=True)
+    assert serial["data_fingerprint"] == parallel["data_fingerprint"]
+
+    # phase 2 agrees with the one-trade-at-a-time money pass
+    ref = TradeBuffer(); equity = bt.deposit
+    for sig in sigs:
+        pr = bt._path(sig, until)
+        if pr is not None:
+            equity = bt._book(ref, sig, pr, equity)
+    pd.testing.assert_frame_equal(ref.to_frame(), serial["trades"], check_exact=True)
+
+def test_data_fingerprint_is_opt_in_and_tracks_the_candles():
+    df = _market(); sigs = _signals(df); until = T0 + timedelta(days=2)
+    mk = lambda d: make_bt(FrameProvider(d), spread_pips=0.5)
+    assert mk(df).run(sigs, T0, until)["data_fingerprint"] is None
+    fp = mk(df).run(sigs, T0, until, fingerprint=True)["data_fingerprint"]
+    edited = df.copy(); edited.loc[len(df) - 1, "close"] += 0.0001  # a bar after every entry
+    assert mk(edited).run(sigs, T0, until, fingerprint=True)["data_fingerprint"] != fp
+
+def test_paths_are_booked_and_flushed_chunk_by_chunk():
+    df = _market(); sigs = _signals(df); until = T0 + timedelta(days=2)
+    bt = make_bt(FrameProvider(df), spread_pips=0.5)
+    simulated, seen = [], []
+    path = bt._path
+    bt._path = lambda sig, until: simulated.append(sig) or path(sig, until)
+    class Sink:
+        def write(self, trades, lo, hi): seen.append((len(simulated), hi))
+    out = bt.run(sigs, T0, until, sink=Sink(), batch_size=10)
+    assert seen[0] == (10, 10)  # the first chunk is written before the rest is simulated
+    assert seen[-1][1] == len(out["trades"]) and len(seen) == len(sigs) // 10 + 1
+
+def test_workers_get_shared_views_not_the_prefetched_candles():
+    import pickle
+    df = _market(); sigs = _signals(df); until = T0 + timedelta(days=2)
+    bt = make_bt(FrameProvider(df), spread_pips=0.5)
+    with bt.prefetched(sigs, T0, until):
+        store = bt.provider
+        with bt._for_workers() as wb:
+            view = pickle.loads(pickle.dumps(wb.provider))
+            assert bt.provider is store and wb.provider.fallback is store.provider  # not the store itself
+            a = store.candle_arrays("EURUSD", sigs[0].dt, until)
+            b = view.candle_arrays("EURUSD", sigs[0].dt, until)
+            assert np.array_equal(a.time, b.time) and np.array_equal(a.close, b.close)
+            view.close()
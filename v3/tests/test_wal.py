@@ -0,0 +1,110 @@
+import glob, os, time
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+from src.connectors.spreads import MINUTE_NS, SpreadMinuteAggregator, compact_spreads, read_spreads
+from src.connectors.wal import WriteAheadLog
+from src.connectors.replay import read_ticks
+from src.tools.record_fix_md import persist_ticks, tick_wal
+
+T0 = datetime(2025, 9, 1, tzinfo=timezone.utc)
+T0_NS = int(pd.Timestamp(T0).value)
+
+
+def _ticks(n, start=T0):
+    rng = np.random.default_rng(4)
+    bid = np.round(1.1 + np.cumsum(rng.choice([-1, 1], n)) * 1e-5, 5)
+    return [{"time": start + timedelta(milliseconds=250 * i), "symbol": ("EURUSD", "GBPUSD")[i % 2],
+             "bid": float(bid[i]), "ask": round(float(bid[i]) + 1e-4, 5)} for i in range(n)]
+
+
+def test_ticks_roll_into_segments_and_compact_to_parquet(tmp_path):
+    out = str(tmp_path)
+    wal, on_tick = tick_wal(out, compact=True, fsync_sec=0.01, segment_sec=10)
+    ticks = _ticks(200)  # 50 s of ticks: five 10 s segments
+    for t in ticks:
+        on_tick(t)
+    wal.close()
+    assert wal.stats()["compacted"] == 200 and wal.errors == 0
+    assert not glob.glob(os.path.join(out, "_wal", "*.wal"))
+    assert len(glob.glob(os.path.join(out, "GBPUSD", "part-*.parquet"))) == 5  # one part per segment
+    got = read_ticks(out, "GBPUSD")
+    ref = pd.DataFrame([t for t in ticks if t["symbol"] == "GBPUSD"])
+    assert list(got["time"]) == list(pd.to_datetime(ref["time"], utc=True))
+    assert np.array_equal(got["bid"].to_numpy(), ref["bid"].to_numpy())
+
+
+def test_each_persist_adds_a_part_and_leaves_earlier_ones_alone(tmp_path):
+    out = str(tmp_path)
+    ticks = _ticks(40)
+    persist_ticks(ticks[:20], out, compact=True)
+    first = sorted(glob.glob(os.path.join(out, "EURUSD", "part-*.parquet")))
+    stamp = os.stat(first[0]).st_mtime_ns
+    persist_ticks(pd.DataFrame(ticks[20:]), out, compact=True)
+    parts = sorted(glob.glob(os.path.join(out, "EURUSD", "part-*.parquet")))
+    assert len(parts) == 2 and parts[0] == first[0] and os.stat(parts[0]).st_mtime_ns == stamp
+    got = read_ticks(out, "EURUSD")
+    assert got["bid"].tolist() == [t["bid"] for t in ticks if t["symbol"] == "EURUSD"]
+
+
+def test_crash_recovery_compacts_closed_and_continues_open_segments(tmp_path):
+    d = str(tmp_path / "wal")
+    now = T0_NS + 90 * 10**9
+    seen = []
+    def disk_full(batch): raise OSError("disk full")
+    wal = WriteAheadLog(d, disk_full, segment_ns=MINUTE_NS, fsync_sec=3600, clock=lambda: now)
+    for i in range(120):  # one closed minute, one still open
+        wal.append("EURUSD", T0_NS + i * 10**9, 1.0 + i, 2.0)
+    wal.sync()
+    while not wal.errors:
+        time.sleep(0.001)
+    paths = sorted(glob.glob(os.path.join(d, "*.wal")))
+    assert len(paths) == 2  # then killed: the failed segment and the open one are left
+    with open(paths[1], "ab") as f:
+        f.write(b"\x01\x00torn-record")
+    wal2 = WriteAheadLog(d, seen.append, segment_ns=MINUTE_NS, fsync_sec=3600, clock=lambda: now)
+    assert wal2.recovered == 120 and [len(b) for b in seen] == [60] and not os.path.exists(paths[0])
+    wal2.append("GBPUSD", T0_NS + 100 * 10**9, 7.0, 8.0)
+    wal2.append("EURUSD", T0_NS + 101 * 10**9, 9.0, 2.0)
+    wal2.close()
+    last = seen[-1]
+    assert len(seen) == 2 and len(last) == 62 and os.path.basename(paths[1]).startswith(f"seg-{last.seq:08d}")
+    assert list(last.names()[-3:]) == ["EURUSD", "GBPUSD", "EURUSD"] and last.a[-1] == 9.0
+    assert not glob.glob(os.path.join(d, "*.wal"))
+
+
+def test_spread_segments_match_the_live_aggregator(tmp_path):
+    root = str(tmp_path / "spreads")
+    batches = []
+    wal = WriteAheadLog(str(tmp_path / "wal"), batches.append, segment_ns=MINUTE_NS, fsync_sec=3600,
+                        clock=lambda: T0_NS)
+    agg = SpreadMinuteAggregator()
+    rng = np.random.default_rng(9)
+    for i in range(600):
+        t, sp, mid = T0_NS + i * 500_000_000, float(rng.uniform(0.5, 2.0)), 1.1 + i * 1e-5
+        wal.append("EURUSD", t, sp, mid)
+        agg.add("EURUSD", t, sp, mid)
+    wal.append("EURUSD", T0_NS + 1_000_000, 99.0, 1.0)  # late: its minute was already sealed
+    wal.close()
+    for b in batches:
+        compact_spreads(b, root)
+    agg.close_before(T0_NS + 10 * MINUTE_NS)
+    ref = pd.DataFrame(agg.drain()).iloc[:, 1:4]
+    got = read_spreads(root, "EURUSD", T0, T0 + timedelta(minutes=10), columns=("bucket", "n", "spread_pips"))
+    assert len(got) == 5 and list(got["n"]) == list(ref[2])
+    assert np.allclose(got["spread_pips"], ref[3])
+
+
+def test_new_symbol_after_an_adopted_segment_gets_a_fresh_id(tmp_path):
+    d = str(tmp_path / "wal")
+    now = T0_NS + 90 * 10**9
+    seen = []
+    wal = WriteAheadLog(d, seen.append, segment_ns=MINUTE_NS, fsync_sec=3600, clock=lambda: now)
+    wal.append("EURUSD", T0_NS, 1.0, 2.0)                 # id 0, in the closed minute
+    wal.append("GBPUSD", T0_NS + 70 * 10**9, 3.0, 4.0)    # id 1, alone in the open minute
+    wal.sync()  # then killed
+    wal2 = WriteAheadLog(d, seen.append, segment_ns=MINUTE_NS, fsync_sec=3600, clock=lambda: now)
+    wal2.append("EURUSD", T0_NS + 80 * 10**9, 9.9, 2.0)  # unknown to the adopted segment
+    wal2.close()
+    last = seen[-1]
+    assert list(last.names()) == ["GBPUSD", "EURUSD"] and list(last.a) == [3.0, 9.9]
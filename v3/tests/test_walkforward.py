@@ -0,0 +1,71 @@
+import json
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+from conftest import T0, FrameProvider, make_bt, make_signals, market
+from src.connectors.preloaded import PreloadedProvider
+from src.walkforward import rolling_windows, walk_forward
+
+def _market():
+    return market(51, days=8)
+
+def _signals(df, n=120):
+    return make_signals(df, 12, n)
+
+def _bt(prov):
+    return make_bt(prov, exit_rule="multi_tp", spread_pips=0.5)
+
+GRID = [{"exit_rule": "first_target", "time_stop_min": None, "risk_pct": None, "tp_weights": None},
+        {"exit_rule": "multi_tp", "time_stop_min": 240, "risk_pct": None, "tp_weights": None}]
+
+def test_windows_tile_the_test_span():
+    ws = rolling_windows(T0, T0 + timedelta(days=8), train_days=3, test_days=2)
+    assert [w[2] for w in ws] == [T0 + timedelta(days=d) for d in (3, 5, 7)]
+    assert ws[-1][3] == T0 + timedelta(days=8) and all(w[1] == w[2] for w in ws)
+    assert rolling_windows(T0, T0 + timedelta(days=8), 3, 2, anchored=True)[-1][0] == T0
+
+def test_stitched_oos_matches_per_window_runs_and_parallel():
+    df = _market(); sigs = _signals(df); until = T0 + timedelta(days=8)
+    inner = FrameProvider(df)
+    bt = _bt(PreloadedProvider(inner, ["EURUSD"], T0, until))
+    ws = rolling_windows(T0, until, train_days=3, test_days=2)
+    rep = walk_forward(bt, sigs, ws, grid=GRID, objective="net_pnl")
+    assert inner.calls == 1
+    wins = rep["windows"]
+    assert len(wins) == 3 and wins["test_trades"].sum() == len(rep["trades"])
+    # stitched equity carries over between windows
+    eq = rep["trades"]["equity_after"].values
+    assert np.allclose(np.diff(np.concatenate(([1000.0], eq))), rep["trades"]["pnl_ccy"].values)
+
+    # each window's OOS trades equal a plain run of the chosen params on that test range
+    lo = 0
+    for (_, _, te0, te1), row in zip(ws, wins.itertuples()):
+        ref_bt = _bt(FrameProvider(df))
+        params = json.loads(row.params)
+        assert params in GRID
+        for k, v in params.items():
+            setattr(ref_bt, k, v)
+        ref = ref_bt.run([s for s in sigs if te0 <= s.dt < te1], te0, te1)["trades"]
+        got = rep["trades"].iloc[lo:lo + len(ref)].reset_index(drop=True)
+        pd.testing.assert_frame_equal(got.drop(columns="equity_after"), ref.drop(columns="equity_after"))
+        lo += len(ref)
+
+    par = walk_forward(_bt(FrameProvider(df)), sigs, ws, workers=2, grid=GRID, objective="net_pnl")
+    pd.testing.assert_frame_equal(par["trades"], rep["trades"], check_exact=True)
+
+def test_published_plan_serves_conversion_pairs_and_missing_ones():
+    from src.connectors.shm import SharedCandleServer
+    df = _market(); sigs = _signals(df, 40); until = T0 + timedelta(days=8)
+    inner = FrameProvider({"EURUSD": df})
+    bt = _bt(inner); bt.account_ccy = "EUR"  # converts through EURUSD; USDEUR is missing
+    ref = bt.run(sigs, T0, until)["trades"]
+    server = SharedCandleServer(inner)
+    bt.provider = server.publish_plan(bt.data_plan(sigs, T0, until))  # as walkforward.main does
+    loaded = inner.calls
+    try:
+        rep = walk_forward(bt, sigs, rolling_windows(T0, until, 3, 2), workers=2, grid=GRID, objective="net_pnl")
+        out = bt.run(sigs, T0, until)["trades"]
+    finally:
+        bt.provider.close(); server.close()
+    assert inner.calls == loaded and len(rep["windows"]) == 3
+    pd.testing.assert_frame_equal(out, ref, check_exact=True)